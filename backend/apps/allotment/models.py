@@ -5,7 +5,7 @@ from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, ROUND_UP
 from typing import Optional
 
 from django.core.validators import MinValueValidator
-from django.db import models, transaction
+from django.db import models
 from django.db.models import Sum, DecimalField, Value
 from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save, post_delete
@@ -324,50 +324,17 @@ class AllotmentItems(AuditModel):
 # -----------------------------
 # Signals — Stock Update
 # -----------------------------
-def _update_balance_sync(item_id: int) -> None:
-    """Update balance values synchronously (faster than Celery task)."""
-    try:
-        from apps.license.models import LicenseImportItemsModel
-        from apps.core.scripts.calculate_balance import update_balance_values
-
-        item = LicenseImportItemsModel.objects.get(id=item_id)
-        update_balance_values(item)
-    except Exception:
-        # swallow exceptions to avoid failing DB writes
-        pass
-
-
 @receiver(post_save, sender=AllotmentItems, dispatch_uid="update_stock")
 def update_stock(sender, instance, **kwargs):
-    """Update stock balance synchronously after save."""
-    item = instance.item
-    if not item:
-        return
+    """Recompute the allotted import item's balance once the transaction commits."""
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
 
-    # Update immediately instead of scheduling a task
-    def _job():
-        _update_balance_sync(item.id)
-
-    try:
-        transaction.on_commit(_job)
-    except Exception:
-        # fallback immediate invocation in environments without on_commit
-        _job()
+    update_balance_values_on_commit([instance.item_id])
 
 
 @receiver(post_delete, sender=AllotmentItems)
 def delete_stock(sender, instance, **kwargs):
-    """Update stock balance synchronously after delete."""
-    item = instance.item
-    if not item:
-        return
+    """Recompute the allotted import item's balance once the transaction commits."""
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
 
-    # Update immediately instead of scheduling a task
-    def _job():
-        _update_balance_sync(item.id)
-
-    try:
-        transaction.on_commit(_job)
-    except Exception:
-        # fallback immediate invocation in environments without on_commit
-        _job()
+    update_balance_values_on_commit([instance.item_id])
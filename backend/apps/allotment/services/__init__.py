@@ -3,16 +3,19 @@ Allotment services for business logic.
 
 This package contains service classes for allotment operations:
 - allocation_service: Allocation and deallocation logic
+- bulk_allocation: Batched allocate-items validation and writes
 - validation_service: Allotment validation rules
 - filter_service: License filtering for allocation
 """
 
 from .allocation_service import AllocationService
+from .bulk_allocation import allocate_items_bulk
 from .validation_service import AllotmentValidationService
 from .filter_service import LicenseFilterService
 
 __all__ = [
     'AllocationService',
+    'allocate_items_bulk',
     'AllotmentValidationService',
     'LicenseFilterService',
 ]
@@ -0,0 +1,367 @@
+"""
+Bulk allocation of license import items to an allotment.
+
+Backs AllotmentActionViewSet.allocate_items. The old loop locked, validated
+and created one allocation at a time (a row lock, a balance computation, a
+restriction lookup, an allotment aggregate and a plan-group aggregate per
+line), so allocating 40 lines took hundreds of queries. Here:
+
+- every requested import item is locked in ONE ``SELECT ... FOR UPDATE``
+  ordered by primary key, so concurrent allocations queue on the same rows
+  in the same order instead of deadlocking;
+- restrictions, condition pools, utilization plans and live allotted totals
+  are fetched in batch for all requested items;
+- each line is validated in memory against running totals, so two lines in
+  one request can no longer both pass a cap only one of them fits;
+- new rows are written with bulk_create and amended rows with bulk_update.
+
+bulk_create/bulk_update send no post_save, so apply_allocation_side_effects()
+does what the AllotmentItems signals did, once per request instead of once
+per row.
+
+Must run inside a transaction (allocate_items is @transaction.atomic); the
+row locks are held until it commits.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.constants import DEC_0, DEC_000
+
+# Notification / purchase status codes exempt from the restricted
+# (available_value) rule; they always use the row balance.
+EXCEPTION_NOTIFICATION = "098/2009"
+EXCEPTION_PURCHASE_STATUS = "CO"
+
+_ITEM_FIELDS = (
+    'id', 'license_id', 'condition_type', 'is_restricted', 'available_quantity', 'available_value',
+    'license__license_number', 'license__notification_number__code',
+    'license__purchase_status__code', 'license__balance__balance_cif',
+)
+
+
+def _item_pk(value):
+    """Import item id as sent by the client (int or numeric string); None if unusable."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _lock_items(item_ids):
+    """Lock the requested import items in pk order; returns {id: values row}."""
+    from apps.license.models import LicenseImportItemsModel
+
+    rows = (
+        LicenseImportItemsModel.objects
+        .select_for_update(of=('self',))
+        .filter(pk__in=item_ids)
+        .order_by('pk')
+        .values(*_ITEM_FIELDS)
+    )
+    return {row['id']: row for row in rows}
+
+
+def _restricted_item_ids(item_ids):
+    """Items with a linked item name carrying a SION norm class and restriction %."""
+    from apps.license.models import LicenseImportItemsModel
+
+    through = LicenseImportItemsModel.items.through
+    return set(
+        through.objects.filter(
+            licenseimportitemsmodel_id__in=item_ids,
+            itemnamemodel__sion_norm_class__isnull=False,
+            itemnamemodel__restriction_percentage__gt=0,
+        ).values_list('licenseimportitemsmodel_id', flat=True)
+    )
+
+
+def _plan_caps(items):
+    """
+    Utilization-plan caps for the requested items' description groups.
+
+    Returns {item_id: group} for items whose group has at least one plan
+    line, where group = {'ids', 'planned_qty', 'planned_val', 'already_qty',
+    'already_val'}. Items sharing a group share the same dict.
+    """
+    from apps.license.models import LicenseItemPlan
+    from apps.license.services.plan_enforcement import live_allotted_by_item
+    from apps.license.services.plan_grouping import group_ids_by_license
+
+    license_ids = {row['license_id'] for row in items.values()}
+    plans = {
+        row['import_item_id']: (row['pq'], row['pv'])
+        for row in LicenseItemPlan.objects.filter(import_item__license_id__in=license_ids)
+        .values('import_item_id')
+        .annotate(
+            pq=Coalesce(Sum('planned_quantity'), Value(Decimal('0')), output_field=DecimalField()),
+            pv=Coalesce(Sum('planned_cif_fc'), Value(Decimal('0')), output_field=DecimalField()),
+        )
+        .order_by()
+    }
+    if not plans:
+        return {}
+
+    group_of = group_ids_by_license({row['license_id'] for row in items.values()})
+    planned_groups = {}
+    for item_id in items:
+        gids = tuple(group_of.get(item_id, [item_id]))
+        if any(gid in plans for gid in gids):
+            planned_groups[gids] = None
+
+    allotted = live_allotted_by_item({gid for gids in planned_groups for gid in gids})
+    for gids in planned_groups:
+        planned_groups[gids] = {
+            'ids': gids,
+            'planned_qty': sum((Decimal(str(plans[g][0] or 0)) for g in gids if g in plans), DEC_000),
+            'planned_val': sum((Decimal(str(plans[g][1] or 0)) for g in gids if g in plans), DEC_0),
+            'already_qty': sum((allotted.get(g, (DEC_000, DEC_0))[0] for g in gids), DEC_000),
+            'already_val': sum((allotted.get(g, (DEC_000, DEC_0))[1] for g in gids), DEC_0),
+        }
+    return {
+        item_id: planned_groups[tuple(group_of.get(item_id, [item_id]))]
+        for item_id in items
+        if tuple(group_of.get(item_id, [item_id])) in planned_groups
+    }
+
+
+def _condition_pools(items):
+    """{license_id: {condition_type: remaining}} for licences with %-condition items."""
+    from apps.license.services.condition_pool import compute_condition_pools_bulk
+
+    license_ids = {
+        row['license_id'] for row in items.values()
+        if (row['condition_type'] or '').strip().endswith('%')
+    }
+    return compute_condition_pools_bulk(license_ids) if license_ids else {}
+
+
+def allocate_items_bulk(allotment, allocations, user=None):
+    """
+    Validate and write a batch of allocations for one allotment.
+
+    Same checks, in the same order and with the same error payloads, as the
+    per-line loop it replaces: available quantity, available CIF FC
+    (restricted / condition-pool aware, capped at the row balance), the
+    allotment's remaining quantity and the description-group utilization plan.
+
+    Args:
+        allotment: AllotmentModel instance
+        allocations: [{'item_id', 'qty', 'cif_fc', 'cif_inr'}, ...]
+        user: User recorded as created_by / modified_by (optional)
+
+    Returns:
+        (created_items, errors) as returned by the allocate-items endpoint
+    """
+    from apps.allotment.models import AllotmentItems
+
+    lines = []
+    for allocation in allocations:
+        lines.append((
+            _item_pk(allocation.get('item_id')),
+            Decimal(str(allocation.get('qty', 0))),
+            Decimal(str(allocation.get('cif_fc', 0))),
+            Decimal(str(allocation.get('cif_inr', 0))),
+        ))
+
+    items = _lock_items({item_id for item_id, *_ in lines if item_id is not None})
+    restricted_ids = _restricted_item_ids(list(items))
+    pools = _condition_pools(items)
+    plan_groups = _plan_caps(items) if items else {}
+
+    # Allocations on an allotment already attached to a BOE do not count
+    # against licence balances; plan caps only count type "AT" allotments.
+    counts_against_license = not allotment.bill_of_entry.exists()
+    counts_against_plan = counts_against_license and allotment.type == "AT"
+
+    remaining_balance = Decimal(str(allotment.required_quantity)) - Decimal(str(allotment.alloted_quantity))
+
+    # Running totals of what this request has accepted so far.
+    taken_qty = {}
+    taken_cif = {}
+    taken_license = {}
+    taken_pool = {}
+
+    accepted = []
+    errors = []
+    for (item_id, qty, cif_fc, cif_inr), allocation in zip(lines, allocations):
+        row = items.get(item_id)
+        if row is None:
+            errors.append({'item_id': allocation.get('item_id'), 'error': 'License import item not found'})
+            continue
+        license_id = row['license_id']
+        condition = (row['condition_type'] or '').strip()
+
+        actual_available_qty = Decimal(str(row['available_quantity'] or 0)) - taken_qty.get(item_id, DEC_000)
+        if actual_available_qty < qty:
+            errors.append({
+                'item_id': item_id,
+                'error': f'Insufficient available quantity. Available: {actual_available_qty}, Requested: {qty}'
+            })
+            continue
+
+        # Row balance (LicenseImportItemsModel.balance_cif_fc): licence
+        # balance, or the condition pool remaining when that is lower.
+        balance_cif_fc = Decimal(str(row['license__balance__balance_cif'] or 0)) - taken_license.get(license_id, DEC_0)
+        pool = pools.get(license_id, {}).get(condition) if condition.endswith('%') else None
+        if pool is not None:
+            balance_cif_fc = min(pool - taken_pool.get((license_id, condition), DEC_0), balance_cif_fc)
+
+        available_cif = balance_cif_fc
+        if row['is_restricted']:
+            is_exception = (
+                row['license__notification_number__code'] == EXCEPTION_NOTIFICATION
+                or row['license__purchase_status__code'] == EXCEPTION_PURCHASE_STATUS
+            )
+            if item_id in restricted_ids and not is_exception:
+                stored_available = Decimal(str(row['available_value'] or 0))
+                if stored_available > 0:
+                    available_cif = stored_available - taken_cif.get(item_id, DEC_0)
+
+        # available_cif can NEVER exceed balance_cif_fc
+        if available_cif > balance_cif_fc:
+            available_cif = balance_cif_fc
+
+        if available_cif < cif_fc:
+            errors.append({
+                'item_id': item_id,
+                'error': f'Insufficient available CIF FC. Available: {available_cif:.2f}, Requested: {cif_fc}'
+            })
+            continue
+
+        if qty > remaining_balance:
+            errors.append({
+                'item_id': item_id,
+                'error': f'Allocation exceeds balance quantity. Balance: {remaining_balance}, Requested: {qty}'
+            })
+            continue
+
+        group = plan_groups.get(item_id)
+        if group is not None:
+            already_qty = group['already_qty']
+            already_val = group['already_val']
+            planned_qty = group['planned_qty']
+            planned_val = group['planned_val']
+            if (already_qty + qty) > planned_qty or (already_val + cif_fc) > planned_val:
+                errors.append({
+                    'item_id': item_id,
+                    'plan_exceeded': True,
+                    'error': 'Allocation exceeds the utilization plan for this item.',
+                    'planned_quantity': str(planned_qty),
+                    'planned_cif_fc': str(planned_val),
+                    'already_allotted_quantity': str(already_qty),
+                    'already_allotted_cif_fc': str(already_val),
+                    'requested_quantity': str(qty),
+                    'requested_cif_fc': str(cif_fc),
+                    'remaining_planned_quantity': str(planned_qty - already_qty),
+                    'remaining_planned_cif_fc': str(planned_val - already_val),
+                })
+                continue
+            if counts_against_plan:
+                group['already_qty'] += qty
+                group['already_val'] += cif_fc
+
+        remaining_balance -= qty
+        taken_qty[item_id] = taken_qty.get(item_id, DEC_000) + qty
+        taken_cif[item_id] = taken_cif.get(item_id, DEC_0) + cif_fc
+        if counts_against_license:
+            taken_license[license_id] = taken_license.get(license_id, DEC_0) + cif_fc
+            if pool is not None:
+                taken_pool[(license_id, condition)] = taken_pool.get((license_id, condition), DEC_0) + cif_fc
+        accepted.append((item_id, qty, cif_fc, cif_inr))
+
+    if not accepted:
+        return [], errors
+
+    # One AllotmentItems row per (allotment, item): amend existing rows,
+    # create the rest; repeated lines for one item merge into one row.
+    existing = {
+        obj.item_id: obj
+        for obj in AllotmentItems.objects.filter(allotment=allotment, item_id__in={a[0] for a in accepted})
+    }
+    now = timezone.now()
+    to_create = {}
+    to_update = {}
+    for item_id, qty, cif_fc, cif_inr in accepted:
+        obj = existing.get(item_id)
+        if obj is not None:
+            obj.qty += qty
+            obj.cif_fc += cif_fc
+            obj.cif_inr += cif_inr
+            obj.modified_on = now
+            if user is not None:
+                obj.modified_by = user
+            to_update[item_id] = obj
+        elif item_id in to_create:
+            obj = to_create[item_id]
+            obj.qty += qty
+            obj.cif_fc += cif_fc
+            obj.cif_inr += cif_inr
+        else:
+            to_create[item_id] = AllotmentItems(
+                allotment=allotment,
+                item_id=item_id,
+                qty=qty,
+                cif_fc=cif_fc,
+                cif_inr=cif_inr,
+                is_boe=False,
+                created_by=user,
+                modified_by=user,
+            )
+
+    if to_update:
+        AllotmentItems.objects.bulk_update(
+            list(to_update.values()), ['qty', 'cif_fc', 'cif_inr', 'modified_on', 'modified_by'],
+        )
+    if to_create:
+        AllotmentItems.objects.bulk_create(list(to_create.values()))
+
+    apply_allocation_side_effects(allotment, {items[item_id]['license_id'] for item_id, *_ in accepted},
+                                  [item_id for item_id, *_ in accepted])
+
+    rows_by_item = {**to_update, **to_create}
+    created_items = [
+        {
+            'id': rows_by_item[item_id].id,
+            'item_id': item_id,
+            'license_number': items[item_id]['license__license_number'],
+            'qty': str(qty),
+            'cif_fc': str(cif_fc),
+            'cif_inr': str(cif_inr),
+        }
+        for item_id, qty, cif_fc, cif_inr in accepted
+    ]
+    return created_items, errors
+
+
+def apply_allocation_side_effects(allotment, license_ids, item_ids):
+    """
+    What the AllotmentItems post_save receivers do, once for a whole batch.
+
+    - is_allotted flag on the allotment (allotment.signals)
+    - licence balance_cif / flags recompute, which also re-seeds the
+      incremental ledger when it is on (license.signals)
+    - import item balances after commit (allotment.models.update_stock)
+    - license_balance_mv dirty-set and view refreshes
+    - cache tags (core.cache_signals)
+    """
+    from apps.core.cache_utils import invalidate_tags
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
+    from apps.core.signals_materialized_views import mark_dirty_on_commit, refresh_on_commit
+    from apps.license.models import LicenseDetailsModel
+    from apps.license.signals import update_license_flags
+
+    allotment.is_allotted = True
+    allotment.save(update_fields=['is_allotted'])
+
+    for license_obj in LicenseDetailsModel.objects.filter(pk__in=license_ids).select_related('balance', 'flags'):
+        update_license_flags(license_obj)
+
+    update_balance_values_on_commit(item_ids)
+    mark_dirty_on_commit(license_ids=license_ids)
+    refresh_on_commit('item_balance_mv')
+    refresh_on_commit('license_balance_mv')
+    invalidate_tags(f'allotment:{allotment.pk}', 'item_report', 'inventory_balance',
+                    *(f'license:{pk}' for pk in license_ids))
@@ -10,13 +10,14 @@ from apps.allotment.models import AllotmentItems
 def update_license_balance(license_item):
     """
     Update balance values for a license item using the optimized calculation function.
-    This replaces the old manual calculation with the centralized, optimized version.
+    Joins the transaction's batched recompute (the same one the AllotmentItems
+    update_stock/delete_stock hooks use), so it runs once per item at commit.
     """
     if not license_item:
         return
 
-    from apps.core.scripts.calculate_balance import update_balance_values
-    update_balance_values(license_item)
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
+    update_balance_values_on_commit([license_item.pk])
 
 
 @receiver(post_save, sender=AllotmentItems)
@@ -1,3 +1,76 @@
-from django.test import TestCase
+"""
+Tests for the bulk allocate-items path (apps.allotment.services.bulk_allocation).
+"""
+from decimal import Decimal
 
-# Create your tests here.
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.allotment.models import AllotmentItems, AllotmentModel
+from apps.allotment.services.bulk_allocation import allocate_items_bulk
+from apps.core.models import CompanyModel
+from apps.license.models import LicenseBalance, LicenseDetailsModel, LicenseImportItemsModel
+
+
+def _setup(suffix, items=1):
+    license_obj = LicenseDetailsModel.objects.create(license_number=f"TEST-ALLOC{suffix}")
+    created = [
+        LicenseImportItemsModel.objects.create(license=license_obj, serial_number=n + 1, quantity=Decimal("100.000"))
+        for n in range(items)
+    ]
+    LicenseImportItemsModel.objects.filter(license=license_obj).update(
+        available_quantity=Decimal("100.000"), available_value=Decimal("1000.00"),
+    )
+    LicenseBalance.objects.filter(license=license_obj).update(balance_cif=Decimal("5000.00"))
+    company = CompanyModel.objects.create(name=f"Test Co Alloc {suffix}")
+    allotment = AllotmentModel.objects.create(
+        company=company, item_name="Test Commodity", type="AT", required_quantity=Decimal("10000"),
+    )
+    return allotment, created
+
+
+def _line(item, qty, cif_fc="1"):
+    return {'item_id': item.pk, 'qty': qty, 'cif_fc': cif_fc, 'cif_inr': 0}
+
+
+@pytest.mark.django_db
+def test_running_totals_reject_lines_that_only_fit_alone():
+    allotment, (item,) = _setup("01")
+
+    created, errors = allocate_items_bulk(allotment, [_line(item, 60), {**_line(item, 60), 'item_id': str(item.pk)}])
+
+    assert len(created) == 1
+    assert errors[0]['error'].startswith('Insufficient available quantity. Available: 40')
+
+
+@pytest.mark.django_db
+def test_lines_for_one_item_merge_into_its_existing_row():
+    allotment, (item,) = _setup("02")
+    AllotmentItems.objects.create(allotment=allotment, item=item, qty=Decimal("5.000"))
+    AllotmentModel.objects.filter(pk=allotment.pk).update(is_allotted=False)
+    allotment.refresh_from_db()
+
+    created, errors = allocate_items_bulk(allotment, [_line(item, 10), _line(item, 20), {'item_id': 0, 'qty': 1}])
+
+    assert [e['error'] for e in errors] == ['License import item not found']
+    assert len(created) == 2
+    row = AllotmentItems.objects.get(allotment=allotment, item=item)
+    assert row.qty == Decimal("35.000")
+    assert {c['id'] for c in created} == {row.pk}
+    assert AllotmentModel.objects.get(pk=allotment.pk).is_allotted
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_lines():
+    small_allotment, small_items = _setup("03", items=2)
+    large_allotment, large_items = _setup("04", items=12)
+
+    with CaptureQueriesContext(connection) as small:
+        created, _ = allocate_items_bulk(small_allotment, [_line(i, 1) for i in small_items])
+    assert len(created) == 2
+    with CaptureQueriesContext(connection) as large:
+        created, _ = allocate_items_bulk(large_allotment, [_line(i, 1) for i in large_items])
+    assert len(created) == 12
+
+    assert len(large.captured_queries) == len(small.captured_queries)
@@ -23,6 +23,7 @@ from apps.accounts.permissions import AllotmentPermission
 from apps.allotment.models import AllotmentModel, AllotmentItems
 from apps.core.utils.exceptions import api_error, _safe_int
 from apps.allotment.serializers import AllotmentSerializer
+from apps.allotment.services.bulk_allocation import allocate_items_bulk
 from apps.license.models import LicenseImportItemsModel
 from apps.license.serializers import LicenseImportItemSerializer
 
@@ -297,194 +298,9 @@ class AllotmentActionViewSet(ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        created_items = []
-        errors = []
-
-        for allocation in allocations:
-            item_id = allocation.get('item_id')
-            qty = Decimal(str(allocation.get('qty', 0)))
-            cif_fc = Decimal(str(allocation.get('cif_fc', 0)))
-            cif_inr = Decimal(str(allocation.get('cif_inr', 0)))
-
-            try:
-                # Get the license import item. select_for_update locks the row for
-                # the read-check-create sequence (the whole action runs in one
-                # transaction via @transaction.atomic), so two concurrent
-                # allocations cannot both pass the plan/availability cap.
-                license_item = LicenseImportItemsModel.objects.select_for_update().get(id=item_id)
-
-                # Use the stored available_quantity field — this is the value the
-                # user sees in the Available License Items list (AVAIL QTY column)
-                # and is kept in sync by update_balance_values() via post_save
-                # signals. Recomputing dynamically via calculate_available_quantity
-                # diverges from the UI for restricted items: it sets credit =
-                # old_quantity (the already-debited amount) and returns 0 even
-                # when the stored field correctly shows balance remaining.
-                actual_available_qty = Decimal(str(license_item.available_quantity or 0))
-
-                # Check if available quantity is sufficient
-                if actual_available_qty < qty:
-                    errors.append({
-                        'item_id': item_id,
-                        'error': f'Insufficient available quantity. Available: {actual_available_qty}, Requested: {qty}'
-                    })
-                    continue
-
-                # Check if available CIF FC is sufficient
-                # PRIORITY 1: Check is_restricted flag
-                # If is_restricted=False (not restricted), always use license-level balance (balance_cif_fc)
-                # If is_restricted=True AND has restriction percentage, use restricted balance logic
-
-                # Get calculated balance
-                balance_cif_fc = Decimal(str(license_item.balance_cif_fc or 0))
-
-                # PRIORITY 1: Check is_restricted flag
-                if not license_item.is_restricted:
-                    # Non-restricted item: always use balance_cif_fc from property
-                    available_cif = balance_cif_fc
-                else:
-                    # is_restricted=True: check if item has restriction percentage
-                    # Check if license is exception (098/2009 or Conversion)
-                    notif_code = (
-                        license_item.license.notification_number.code
-                        if license_item.license and license_item.license.notification_number_id
-                        else None
-                    )
-                    is_exception = (
-                        license_item.license and (
-                            notif_code == "098/2009" or
-                            (license_item.license.purchase_status and license_item.license.purchase_status.code == "CO")
-                        )
-                    )
-
-                    # Check if item has restrictions
-                    has_restriction = license_item.items.filter(
-                        sion_norm_class__isnull=False,
-                        restriction_percentage__gt=0
-                    ).exists()
-
-                    # Determine which value to use
-                    if has_restriction and not is_exception:
-                        # Restricted item, non-exception license: use stored available_value
-                        stored_available = Decimal(str(license_item.available_value or 0))
-                        # If available_value is not set (0 or NULL), fall back to balance_cif_fc
-                        if stored_available > 0:
-                            available_cif = stored_available
-                        else:
-                            # Not yet processed by update_restriction_balances, use calculated
-                            available_cif = balance_cif_fc
-                    else:
-                        # Exception license or no restriction percentage: use calculated balance_cif_fc
-                        available_cif = balance_cif_fc
-
-                # CRITICAL: available_cif can NEVER exceed balance_cif_fc
-                if available_cif > balance_cif_fc:
-                    available_cif = balance_cif_fc
-
-                if available_cif < cif_fc:
-                    errors.append({
-                        'item_id': item_id,
-                        'error': f'Insufficient available CIF FC. Available: {available_cif:.2f}, Requested: {cif_fc}'
-                    })
-                    continue
-
-                # Check if allocation would exceed balance quantity
-                from decimal import Decimal as D
-                current_allotted = allotment.alloted_quantity
-                required_qty = D(str(allotment.required_quantity))
-                remaining_balance = required_qty - D(str(current_allotted))
-
-                if qty > remaining_balance:
-                    errors.append({
-                        'item_id': item_id,
-                        'error': f'Allocation exceeds balance quantity. Balance: {remaining_balance}, Requested: {qty}'
-                    })
-                    continue
-
-                # --- Utilization-plan cap (per description-group) -----------
-                # A product is planned by its description group (summed across
-                # serial numbers). The cumulative allotment across the WHOLE
-                # group (already allotted + this request) may not exceed the
-                # group's total planned qty / CIF-FC. Exceeding it returns a
-                # `plan_exceeded` error so the frontend can open the planner.
-                # Groups WITHOUT any plan line fall through to existing behavior.
-                from django.db.models import Sum as _Sum, DecimalField as _DecimalField, Value as _Value
-                from django.db.models.functions import Coalesce as _Coalesce
-                from apps.license.models import LicenseItemPlan as _LIP
-                from apps.license.services.plan_grouping import group_ids_of as _group_ids_of
-                _gids = _group_ids_of(license_item)
-                _group_plans = _LIP.objects.filter(import_item_id__in=_gids)
-                plan_agg = _group_plans.aggregate(
-                    pq=_Coalesce(_Sum('planned_quantity'), _Value(Decimal('0')), output_field=_DecimalField()),
-                    pv=_Coalesce(_Sum('planned_cif_fc'), _Value(Decimal('0')), output_field=_DecimalField()),
-                )
-                if _group_plans.exists():
-                    from apps.license.services.plan_enforcement import (
-                        live_allotted_qty_for, live_allotted_value_for,
-                    )
-                    already_qty = live_allotted_qty_for(_gids)
-                    already_val = live_allotted_value_for(_gids)
-                    planned_qty = Decimal(str(plan_agg['pq'] or 0))
-                    planned_val = Decimal(str(plan_agg['pv'] or 0))
-                    if (already_qty + qty) > planned_qty or (already_val + cif_fc) > planned_val:
-                        errors.append({
-                            'item_id': item_id,
-                            'plan_exceeded': True,
-                            'error': 'Allocation exceeds the utilization plan for this item.',
-                            'planned_quantity': str(planned_qty),
-                            'planned_cif_fc': str(planned_val),
-                            'already_allotted_quantity': str(already_qty),
-                            'already_allotted_cif_fc': str(already_val),
-                            'requested_quantity': str(qty),
-                            'requested_cif_fc': str(cif_fc),
-                            'remaining_planned_quantity': str(planned_qty - already_qty),
-                            'remaining_planned_cif_fc': str(planned_val - already_val),
-                        })
-                        continue
-                # ------------------------------------------------------------
-
-                # Check if this item is already allocated to this allotment
-                existing = AllotmentItems.objects.filter(
-                    allotment=allotment,
-                    item=license_item
-                ).first()
-
-                if existing:
-                    # Item already exists - amend by adding to existing quantities
-                    existing.qty += qty
-                    existing.cif_fc += cif_fc
-                    existing.cif_inr += cif_inr
-                    existing.save()
-                    allotment_item = existing
-                else:
-                    # Create new allotment item
-                    allotment_item = AllotmentItems.objects.create(
-                        allotment=allotment,
-                        item=license_item,
-                        qty=qty,
-                        cif_fc=cif_fc,
-                        cif_inr=cif_inr,
-                        is_boe=False
-                    )
-
-                created_items.append({
-                    'id': allotment_item.id,
-                    'item_id': item_id,
-                    'license_number': license_item.license.license_number,
-                    'qty': str(qty),
-                    'cif_fc': str(cif_fc),
-                    'cif_inr': str(cif_inr)
-                })
-
-            except LicenseImportItemsModel.DoesNotExist:
-                errors.append({
-                    'item_id': item_id,
-                    'error': 'License import item not found'
-                })
-            except Exception as e:
-                import logging as _log
-                _log.getLogger(__name__).exception("allocate_items: failed for item_id %s", item_id)
-                errors.append({'item_id': item_id, 'error': 'Allocation failed; check server logs'})
+        # One ordered row lock for every requested item, batched lookups and
+        # in-memory validation with running totals; see services.bulk_allocation.
+        created_items, errors = allocate_items_bulk(allotment, allocations, user=request.user)
 
         # Refresh allotment to get updated balanced_quantity
         allotment.refresh_from_db()
@@ -7,7 +7,7 @@ from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, DivisionByZero
 logger = logging.getLogger(__name__)
 
 from django.core.validators import MinValueValidator
-from django.db import models, transaction
+from django.db import models
 from django.db.models import Sum, DecimalField, Value
 from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save, post_delete
@@ -21,6 +21,7 @@ from apps.core.constants import (
     DEC_0,
     DEC_000,
 )
+from apps.core.commit_batch import add_to_commit_batch
 from apps.core.models import AuditModel, CompanyModel
 
 # Locally-used decimal for 4 dp exchange rates
@@ -305,113 +306,78 @@ class RowDetails(AuditModel):
 # -----------------------------
 # Signals for stock updates
 # -----------------------------
-def _update_balance_sync(item_id: int) -> None:
-    """Update balance values synchronously (faster than Celery task)."""
-    try:
-        from apps.license.models import LicenseImportItemsModel
-        from apps.core.scripts.calculate_balance import update_balance_values
-
-        item = LicenseImportItemsModel.objects.get(id=item_id)
-        update_balance_values(item)
-    except LicenseImportItemsModel.DoesNotExist:
-        logger.warning("_update_balance_sync: item_id=%s no longer exists", item_id)
-    except Exception as e:
-        logger.exception("_update_balance_sync failed for item_id=%s: %s", item_id, e)
-
-
 @receiver(post_save, sender=RowDetails, dispatch_uid="update_stock_on_save")
 def update_stock(sender, instance, **kwargs):
-    """Update stock balance synchronously after save."""
-    item = instance.sr_number
-    if not item:
-        return
-
-    # Update immediately instead of scheduling a task
-    def _job():
-        _update_balance_sync(item.id)
+    """Recompute the row's import item balance once the transaction commits."""
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
 
-    try:
-        transaction.on_commit(_job)
-    except Exception as e:
-        logger.debug("on_commit not available, invoking balance update immediately: %s", e)
-        _job()
+    update_balance_values_on_commit([instance.sr_number_id])
 
 
 @receiver(post_delete, sender=RowDetails)
 def delete_stock(sender, instance, **kwargs):
-    """Update stock balance synchronously after delete."""
-    item = instance.sr_number
-    if not item:
-        return
+    """Recompute the row's import item balance once the transaction commits."""
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
 
-    # Update immediately instead of scheduling a task
-    def _job():
-        _update_balance_sync(item.id)
-
-    try:
-        transaction.on_commit(_job)
-    except Exception as e:
-        logger.debug("on_commit not available, invoking balance update immediately: %s", e)
-        _job()
+    update_balance_values_on_commit([instance.sr_number_id])
 
 
-def _recalculate_boe_exchange_rate(boe_id: int, force: bool = False) -> None:
-    """Recalculate and persist the exchange rate on a BOE from its row totals.
+def _recalculate_boe_exchange_rates(boe_ids, force: bool = False) -> None:
+    """Recalculate and persist the exchange rate on BOEs from their row totals.
 
-    Uses .update() (not .save()) to avoid re-triggering BillOfEntryModel.save()
-    and the associated signals — preventing any infinite-loop risk.
+    One grouped aggregate over the BOEs' rows and one bulk_update for the rates
+    that change. bulk_update (not .save()) avoids re-triggering
+    BillOfEntryModel.save() and the associated signals — preventing any
+    infinite-loop risk.
 
     When force=True (ledger upload), always writes the computed rate regardless of
     the current stored value. When force=False (signal-triggered), only updates
     when the new rate differs by more than 1 to prevent spurious writes.
     """
-    try:
-        boe = BillOfEntryModel.objects.get(pk=boe_id)
-        total_fc = boe.get_total_fc
-        total_inr = boe.get_total_inr
-        if total_fc > DEC_0:
+    boe_ids = list(boe_ids)
+    if not boe_ids:
+        return
+    totals = {
+        row["bill_of_entry_id"]: row
+        for row in RowDetails.objects.filter(bill_of_entry_id__in=boe_ids)
+        .values("bill_of_entry_id")
+        .annotate(
+            total_fc=Coalesce(Sum("cif_fc"), Value(DEC_0), output_field=DecimalField()),
+            total_inr=Coalesce(Sum("cif_inr"), Value(DEC_0), output_field=DecimalField()),
+        )
+        .order_by()
+    }
+    changed = []
+    for boe_id, exchange_rate in BillOfEntryModel.objects.filter(pk__in=boe_ids).values_list("pk", "exchange_rate"):
+        row = totals.get(boe_id)
+        if not row:
+            continue  # No rows — nothing to update
+        try:
+            total_fc = _to_decimal(row["total_fc"], DEC_0).quantize(DEC_0)
+            total_inr = _to_decimal(row["total_inr"], DEC_0).quantize(DEC_0)
+            if total_fc <= DEC_0:
+                continue  # No FC totals — nothing to update
             new_ex = (total_inr / total_fc).quantize(DEC_EX_0)
-        else:
-            return  # No FC totals — nothing to update
-        if force:
-            BillOfEntryModel.objects.filter(pk=boe_id).update(exchange_rate=new_ex)
-        else:
-            current = _to_decimal(boe.exchange_rate, DEC_EX_0)
-            if abs(new_ex - current) > Decimal("1"):
-                BillOfEntryModel.objects.filter(pk=boe_id).update(exchange_rate=new_ex)
-    except (BillOfEntryModel.DoesNotExist, DivisionByZero, ZeroDivisionError, InvalidOperation, TypeError):
-        pass
+            if force or abs(new_ex - _to_decimal(exchange_rate, DEC_EX_0)) > Decimal("1"):
+                changed.append(BillOfEntryModel(pk=boe_id, exchange_rate=new_ex))
+        except (DivisionByZero, ZeroDivisionError, InvalidOperation, TypeError):
+            continue
+    if changed:
+        BillOfEntryModel.objects.bulk_update(changed, ["exchange_rate"])
 
 
-@receiver(post_save, sender=RowDetails, dispatch_uid="recalc_exchange_rate_on_save")
-def recalc_exchange_rate_on_row_save(sender, instance, **kwargs):
-    """Recalculate BOE exchange rate after a RowDetails row is saved."""
-    if not instance.bill_of_entry_id:
-        return
-
-    boe_id = instance.bill_of_entry_id
+def _recalculate_boe_exchange_rate(boe_id: int, force: bool = False) -> None:
+    """Single-BOE _recalculate_boe_exchange_rates()."""
+    _recalculate_boe_exchange_rates([boe_id], force=force)
 
-    def _job():
-        _recalculate_boe_exchange_rate(boe_id)
 
-    try:
-        transaction.on_commit(_job)
-    except Exception:
-        _job()
+@receiver(post_save, sender=RowDetails, dispatch_uid="recalc_exchange_rate_on_save")
+def recalc_exchange_rate_on_row_save(sender, instance, **kwargs):
+    """Recalculate the BOE exchange rate once the transaction commits."""
+    add_to_commit_batch("boe_exchange_rates", [instance.bill_of_entry_id], _recalculate_boe_exchange_rates)
 
 
 @receiver(post_delete, sender=RowDetails, dispatch_uid="recalc_exchange_rate_on_delete")
 def recalc_exchange_rate_on_row_delete(sender, instance, **kwargs):
-    """Recalculate BOE exchange rate after a RowDetails row is deleted."""
-    if not instance.bill_of_entry_id:
-        return
-
-    boe_id = instance.bill_of_entry_id
-
-    def _job():
-        _recalculate_boe_exchange_rate(boe_id)
-
-    try:
-        transaction.on_commit(_job)
-    except Exception:
-        _job()
+    """Recalculate the BOE exchange rate once the transaction commits."""
+    add_to_commit_batch("boe_exchange_rates", [instance.bill_of_entry_id], _recalculate_boe_exchange_rates)
@@ -14,6 +14,8 @@ from typing import Any
 
 from pypdf import PdfReader
 
+from apps.core.utils.stage_timer import StageTimer
+
 
 _BE_HEADER_RX = re.compile(r"^\s*(\d{6,10})\s+(\d{2}/\d{2}/\d{4})\s*$", re.MULTILINE)
 _IEC_RX = re.compile(r"\b(\d{10})\s*/\s*(\d{1,3})\b")
@@ -100,11 +102,19 @@ def extract_pages(source) -> list[str]:
     return [(p.extract_text() or "") for p in reader.pages]
 
 
-def parse_boe_pdf(source) -> dict[str, Any]:
-    pages = extract_pages(source)
+def parse_boe_pdf(source, timer: StageTimer | None = None) -> dict[str, Any]:
+    """Parse a BOE PDF. Pass a StageTimer to collect per-stage timings
+    (digital_text, item_parse)."""
+    timer = timer or StageTimer()
+    with timer.stage("digital_text"):
+        pages = extract_pages(source)
     if not pages:
         return {}
+    with timer.stage("item_parse"):
+        return _parse_pages(pages)
+
 
+def _parse_pages(pages: list[str]) -> dict[str, Any]:
     page1 = pages[0]
     page2 = pages[1] if len(pages) > 1 else ""
     page4 = pages[3] if len(pages) > 3 else ""
@@ -1,10 +1,18 @@
 from celery import shared_task
 
-from apps.core.scripts.calculate_balance import update_balance_values
+from apps.core.scripts.calculate_balance import update_balance_values_bulk
 
 
 @shared_task
 def update_balance_values_task(import_item_id):
-    from apps.license.models import LicenseImportItemsModel
-    import_item = LicenseImportItemsModel.objects.get(id=import_item_id)
-    update_balance_values(import_item)
+    update_balance_values_bulk([import_item_id])
+
+
+@shared_task(bind=True, name='parse_boe_pdf_job')
+def parse_boe_pdf_job(self, path, create_company=True):
+    """Parse an uploaded BOE PDF off the request (BOEPdfParseView with
+    async=true). The upload at `path` is deleted once parsed."""
+    from apps.bill_of_entry.views.parse_pdf import run_boe_pdf_parse
+    from apps.core.pdf_parse_jobs import run_parse_job
+
+    return run_parse_job(self, path, lambda source, timer: run_boe_pdf_parse(source, create_company, timer=timer))
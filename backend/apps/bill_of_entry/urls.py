@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework import routers
 
 from apps.bill_of_entry.views.boe import BillOfEntryViewSet
-from apps.bill_of_entry.views.parse_pdf import BOEPdfParseView
+from apps.bill_of_entry.views.parse_pdf import BOEPdfParseJobView, BOEPdfParseView
 
 app_name = "bill_of_entry"
 
@@ -11,5 +11,6 @@ router.register(r"bill-of-entries", BillOfEntryViewSet, basename="bill-of-entrie
 
 urlpatterns = [
     path("bill-of-entries/parse-pdf/", BOEPdfParseView.as_view(), name="boe-parse-pdf"),
+    path("bill-of-entries/parse-pdf/jobs/<str:job_id>/", BOEPdfParseJobView.as_view(), name="boe-parse-pdf-job"),
     path("", include(router.urls)),
 ]
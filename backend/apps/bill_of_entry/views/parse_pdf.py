@@ -5,10 +5,12 @@ for matched company, port, and license items in the local database.
 """
 from __future__ import annotations
 
+import re
 from decimal import Decimal, InvalidOperation
 from typing import Any
 
 from django.db import transaction
+from django.db.models import Q
 from rest_framework import status
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
@@ -19,7 +21,10 @@ from apps.accounts.permissions import AllotmentPermission
 from apps.allotment.models import AllotmentModel
 from apps.bill_of_entry.parsers.boe_pdf import parse_boe_pdf
 from apps.core.models import CompanyModel, ExchangeRateModel, PortModel
+from apps.core.pdf_parse_jobs import enqueue_parse_job, job_status_response
+from apps.core.utils.stage_timer import StageTimer
 from apps.license.models import LicenseDetailsModel, LicenseImportItemsModel
+from apps.license.utils.license_number import normalize_license_number
 
 
 def _decimal(value, default=None):
@@ -95,45 +100,72 @@ def _convert_to_usd_rate(parsed: dict[str, Any]) -> Decimal | None:
     return None
 
 
-def _find_license(lic_no: str):
-    """Find a license by number with progressive fallbacks for format variants."""
-    if not lic_no:
-        return None
-    lic_no = lic_no.strip()
-    # 1) exact
-    lic = LicenseDetailsModel.objects.filter(license_number=lic_no).first()
-    if lic:
-        return lic
-    # 2) case-insensitive (in case of trailing letters)
-    lic = LicenseDetailsModel.objects.filter(license_number__iexact=lic_no).first()
-    if lic:
-        return lic
-    # 3) without leading zeros, then with extra leading zero
+def _license_match_rank(stored: str, lic_no: str) -> int | None:
+    """
+    Preference of a stored licence number for a PDF value (lower is better),
+    in the order the old per-row fallback chain tried them: exact,
+    case-insensitive, without leading zeros, padded to 10, digits only, and
+    finally any number with the same normalised key. None if it doesn't match.
+    """
     stripped = lic_no.lstrip("0")
-    if stripped and stripped != lic_no:
-        lic = LicenseDetailsModel.objects.filter(license_number=stripped).first()
-        if lic:
-            return lic
-    padded = lic_no.zfill(10)
-    if padded != lic_no:
-        lic = LicenseDetailsModel.objects.filter(license_number=padded).first()
-        if lic:
-            return lic
-    # 4) endswith (catches stored values with a prefix like "L-")
-    if stripped:
-        lic = LicenseDetailsModel.objects.filter(license_number__endswith=stripped).first()
-        if lic:
-            return lic
-    # 5) digits-only (handles prefixed PDF values like "L-3411007518")
-    import re as _re
-    digits = _re.sub(r"\D", "", lic_no)
-    if digits and digits != lic_no:
-        lic = LicenseDetailsModel.objects.filter(license_number=digits).first()
-        if lic:
-            return lic
+    digits = re.sub(r"\D", "", lic_no)
+    for rank, candidate_matches in enumerate((
+        stored == lic_no,
+        stored.lower() == lic_no.lower(),
+        bool(stripped) and stored == stripped,
+        stored == lic_no.zfill(10),
+        bool(digits) and stored == digits,
+    )):
+        if candidate_matches:
+            return rank
+    if normalize_license_number(stored) and normalize_license_number(stored) == normalize_license_number(lic_no):
+        return 5
     return None
 
 
+def resolve_licence_rows(pairs):
+    """
+    Resolve (licence number, serial number) pairs in two queries.
+
+    Licences are fetched by exact number or by the indexed normalised
+    license_number_key; import items by (licence, serial number).
+
+    Returns:
+        (licences, items): {licence number: {'id', 'license_number'}} and
+        {(licence id, serial number): {'id', 'description'}}
+    """
+    numbers = {lic_no.strip() for lic_no, _ in pairs if lic_no and lic_no.strip()}
+    if not numbers:
+        return {}, {}
+    keys = {normalize_license_number(n) for n in numbers} - {""}
+
+    candidates = list(
+        LicenseDetailsModel.objects
+        .filter(Q(license_number__in=numbers) | Q(license_number_key__in=keys))
+        .values("id", "license_number")
+    )
+    licences = {}
+    for lic_no in numbers:
+        best = None
+        for candidate in candidates:  # model ordering, so ties keep .first() semantics
+            rank = _license_match_rank(candidate["license_number"], lic_no)
+            if rank is not None and (best is None or rank < best[0]):
+                best = (rank, candidate)
+        if best:
+            licences[lic_no] = best[1]
+
+    serials = {slno for lic_no, slno in pairs if slno is not None and (lic_no or "").strip() in licences}
+    items = {}
+    if serials:
+        for row in (
+            LicenseImportItemsModel.objects
+            .filter(license_id__in={lic["id"] for lic in licences.values()}, serial_number__in=serials)
+            .values("id", "license_id", "serial_number", "description")
+        ):
+            items.setdefault((row["license_id"], row["serial_number"]), row)
+    return licences, items
+
+
 def _match_license_rows(parsed: dict[str, Any], usd_rate: Decimal | None):
     """
     For each licence row in the PDF, find the license first (with format
@@ -145,19 +177,21 @@ def _match_license_rows(parsed: dict[str, Any], usd_rate: Decimal | None):
         no_data          - parser couldn't extract a license number
     """
     rows = []
-    for lic in parsed.get("licences") or []:
+    parsed_rows = parsed.get("licences") or []
+    licences, items = resolve_licence_rows(
+        [(lic.get("licence_number") or "", lic.get("licence_slno")) for lic in parsed_rows]
+    )
+    for lic in parsed_rows:
         lic_no = (lic.get("licence_number") or "").strip()
         slno = lic.get("licence_slno")
         item = None
         license_obj = None
         status = "no_data"
         if lic_no:
-            license_obj = _find_license(lic_no)
+            license_obj = licences.get(lic_no)
             if license_obj:
                 if slno is not None:
-                    item = LicenseImportItemsModel.objects.filter(
-                        license=license_obj, serial_number=slno
-                    ).first()
+                    item = items.get((license_obj["id"], slno))
                     status = "matched" if item else "license_only"
                 else:
                     status = "license_only"
@@ -178,27 +212,101 @@ def _match_license_rows(parsed: dict[str, Any], usd_rate: Decimal | None):
             "qty": str(qty) if qty is not None else None,
             "cif_inr": str(debit_inr) if debit_inr is not None else None,
             "cif_fc": str(cif_fc) if cif_fc is not None else None,
-            "matched_license_id": license_obj.id if license_obj else None,
-            "matched_license_number": license_obj.license_number if license_obj else None,
-            "matched_item_id": item.id if item else None,
-            "matched_item_description": item.description if item else None,
+            "matched_license_id": license_obj["id"] if license_obj else None,
+            "matched_license_number": license_obj["license_number"] if license_obj else None,
+            "matched_item_id": item["id"] if item else None,
+            "matched_item_description": item["description"] if item else None,
             "match_status": status,
         })
     return rows
 
 
+def run_boe_pdf_parse(source, create_company: bool = True,
+                      timer: StageTimer | None = None) -> tuple[int, dict[str, Any]]:
+    """
+    Parse a BOE PDF and match it against companies, ports, allotments and
+    licence items.
+
+    Returns (http_status, payload) — the response BOEPdfParseView sends,
+    whether it runs in the request or in the parse_boe_pdf_job task.
+    `timer` collects per-stage timings, reported in the payload's `timings`.
+    """
+    timer = timer or StageTimer()
+    try:
+        parsed = parse_boe_pdf(source, timer=timer)
+    except Exception as exc:
+        return status.HTTP_400_BAD_REQUEST, {"detail": f"Failed to parse PDF: {exc}"}
+
+    if not parsed.get("be_number"):
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {
+            "detail": "Could not detect a BOE number — this may not be an "
+                      "ICEGATE Bill of Entry PDF, or the layout is unsupported.",
+            "parsed": parsed,
+            "timings": timer.timings,
+        }
+
+    with timer.stage("matching"), transaction.atomic():
+        company, company_created = _match_or_create_company(parsed, create_company)
+        port = _match_port(parsed.get("port_code"))
+        allotment = _match_allotment_by_invoice(parsed.get("invoice_no"))
+
+        usd_rate = _convert_to_usd_rate(parsed)
+        licences = _match_license_rows(parsed, usd_rate)
+
+    # Compute prefill values for the Allotment form
+    cif_inr_total = sum(
+        (_decimal(row["cif_inr"]) for row in licences if row.get("cif_inr") is not None),
+        Decimal("0"),
+    )
+    qty_total = sum(
+        (_decimal(row["qty"]) for row in licences if row.get("qty") is not None),
+        Decimal("0"),
+    )
+    cif_fc_total = (cif_inr_total / usd_rate).quantize(Decimal("0.01")) \
+        if usd_rate and usd_rate > 0 and cif_inr_total > 0 else None
+
+    prefill = {
+        "company_id": company.id if company else None,
+        "company_name": company.name if company else parsed.get("buyer_name"),
+        "company_created": company_created,
+        "port_id": port.id if port else None,
+        "port_code": parsed.get("port_code"),
+        "invoice": parsed.get("invoice_no"),
+        "exchange_rate": str(usd_rate) if usd_rate else None,
+        "item_name": parsed.get("item_description"),
+        "required_quantity": str(qty_total) if qty_total else None,
+        "cif_inr": str(cif_inr_total) if cif_inr_total else None,
+        "cif_fc": str(cif_fc_total) if cif_fc_total else None,
+        "estimated_arrival_date": None,
+        "is_boe": True,
+    }
+
+    return status.HTTP_200_OK, {
+        "parsed": parsed,
+        "prefill": prefill,
+        "matched_allotment_id": allotment.id if allotment else None,
+        "matched_company_id": company.id if company else None,
+        "company_created": company_created,
+        "matched_port_id": port.id if port else None,
+        "licences": licences,
+        "timings": timer.timings,
+    }
+
+
 class BOEPdfParseView(APIView):
     """
     POST /api/bill-of-entries/parse-pdf/
         multipart-form: file=<BOE PDF>
         optional form: create_company=true|false (default true)
+                       async=true|false (default false)
 
-    Returns a JSON object suitable for prefilling AllotmentFormModal.
+    Returns a JSON object suitable for prefilling AllotmentFormModal. With
+    async=true the parse runs in a Celery worker and the response is
+    202 {"job_id": ...}; poll BOEPdfParseJobView for the result.
     """
     permission_classes = [IsAuthenticated, AllotmentPermission]
     parser_classes = [MultiPartParser, FormParser]
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         upload = request.FILES.get("file")
         if not upload:
@@ -207,66 +315,24 @@ class BOEPdfParseView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            parsed = parse_boe_pdf(upload)
-        except Exception as exc:
-            return Response(
-                {"detail": f"Failed to parse PDF: {exc}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        create_company = str(request.data.get("create_company", "true")).lower() != "false"
+        if str(request.data.get("async", "false")).lower() == "true":
+            from apps.bill_of_entry.tasks import parse_boe_pdf_job
+            return enqueue_parse_job(parse_boe_pdf_job, upload, create_company=create_company)
 
-        if not parsed.get("be_number"):
-            return Response(
-                {
-                    "detail": "Could not detect a BOE number — this may not be an "
-                              "ICEGATE Bill of Entry PDF, or the layout is unsupported.",
-                    "parsed": parsed,
-                },
-                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            )
+        status_code, payload = run_boe_pdf_parse(upload, create_company)
+        return Response(payload, status=status_code)
 
-        create_company = str(request.data.get("create_company", "true")).lower() != "false"
-        company, company_created = _match_or_create_company(parsed, create_company)
-        port = _match_port(parsed.get("port_code"))
-        allotment = _match_allotment_by_invoice(parsed.get("invoice_no"))
 
-        usd_rate = _convert_to_usd_rate(parsed)
-        licences = _match_license_rows(parsed, usd_rate)
+class BOEPdfParseJobView(APIView):
+    """
+    GET /api/bill-of-entries/parse-pdf/jobs/<job_id>/
 
-        # Compute prefill values for the Allotment form
-        cif_inr_total = sum(
-            (_decimal(row["cif_inr"]) for row in licences if row.get("cif_inr") is not None),
-            Decimal("0"),
-        )
-        qty_total = sum(
-            (_decimal(row["qty"]) for row in licences if row.get("qty") is not None),
-            Decimal("0"),
-        )
-        cif_fc_total = (cif_inr_total / usd_rate).quantize(Decimal("0.01")) \
-            if usd_rate and usd_rate > 0 and cif_inr_total > 0 else None
-
-        prefill = {
-            "company_id": company.id if company else None,
-            "company_name": company.name if company else parsed.get("buyer_name"),
-            "company_created": company_created,
-            "port_id": port.id if port else None,
-            "port_code": parsed.get("port_code"),
-            "invoice": parsed.get("invoice_no"),
-            "exchange_rate": str(usd_rate) if usd_rate else None,
-            "item_name": parsed.get("item_description"),
-            "required_quantity": str(qty_total) if qty_total else None,
-            "cif_inr": str(cif_inr_total) if cif_inr_total else None,
-            "cif_fc": str(cif_fc_total) if cif_fc_total else None,
-            "estimated_arrival_date": None,
-            "is_boe": True,
-        }
+    State of an async parse started with `async=true`; once SUCCESS,
+    `result` holds the body the synchronous endpoint would have returned
+    and `status_code` its HTTP status.
+    """
+    permission_classes = [IsAuthenticated, AllotmentPermission]
 
-        return Response({
-            "parsed": parsed,
-            "prefill": prefill,
-            "matched_allotment_id": allotment.id if allotment else None,
-            "matched_company_id": company.id if company else None,
-            "company_created": company_created,
-            "matched_port_id": port.id if port else None,
-            "licences": licences,
-        })
+    def get(self, request, job_id):
+        return job_status_response(job_id, 'parse_boe_pdf_job')
@@ -0,0 +1,242 @@
+"""
+Batched, off-request writer for ActivityLog entries.
+
+ActivityLogMiddleware used to start a thread per authenticated API request,
+each doing its own ActivityLog.objects.create() on its own DB connection.
+Under load that exhausted Postgres connections and added latency jitter.
+
+Entries are now plain dicts of ActivityLog field values, built on the request
+thread and put on a bounded in-process queue. One daemon writer thread per
+process drains it and flushes with bulk_create every ACTIVITY_LOG_BATCH_SIZE
+entries or ACTIVITY_LOG_FLUSH_INTERVAL_MS milliseconds, whichever comes
+first, holding a single DB connection. Pending entries are flushed at
+interpreter exit.
+
+Backpressure: when the queue is full, enqueue() waits up to
+ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS for room and then drops the entry; drops are
+counted in stats().
+
+Redis spool (optional, for multi-worker gunicorn): with
+ACTIVITY_LOG_REDIS_STREAM set, the writer XADDs each batch to that Redis
+stream instead of writing the DB, so web workers hold no DB connection for
+logging at all. The core.tasks.drain_activity_log_spool Celery task moves
+the stream into ActivityLog with bulk_create.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger('core.activity')
+
+# Consumer group the spool drain reads the stream with.
+SPOOL_GROUP = 'activity_log_writer'
+
+# Pending spool entries idle this long belonged to a drain that died; reclaim them.
+SPOOL_RECLAIM_IDLE_MS = 5 * 60 * 1000
+
+_STOP = object()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def write_entries(entries):
+    """bulk_create ActivityLog rows from field dicts."""
+    from apps.core.models import ActivityLog
+
+    ActivityLog.objects.bulk_create([ActivityLog(**entry) for entry in entries])
+
+
+def spool_entries(entries, stream=None):
+    """XADD field dicts to the Redis spool stream (capped at ACTIVITY_LOG_SPOOL_MAXLEN)."""
+    stream = stream or _setting('ACTIVITY_LOG_REDIS_STREAM', '')
+    maxlen = _setting('ACTIVITY_LOG_SPOOL_MAXLEN', 100000)
+    pipe = _redis().pipeline(transaction=False)
+    for entry in entries:
+        pipe.xadd(stream, {'e': json.dumps(entry, default=str)}, maxlen=maxlen, approximate=True)
+    pipe.execute()
+
+
+class ActivityLogWriter:
+    """
+    Bounded queue plus one background thread flushing it in batches.
+
+    sink(entries) persists one batch; it runs on the writer thread only.
+    """
+
+    def __init__(self, sink, batch_size=100, flush_interval=1.0, maxsize=10000, enqueue_timeout=0.005):
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _ensure_started(self):
+        # Started lazily and per process: a writer thread does not survive a
+        # gunicorn fork, so a forked worker starts its own.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, entry):
+        """Queue one entry; False if it was dropped because the queue stayed full."""
+        self._ensure_started()
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _flush(self, batch):
+        close_old_connections()
+        try:
+            self.sink(batch)
+        except Exception:
+            self._count('failed', len(batch))
+            logger.exception('ActivityLog: failed to write %d entries', len(batch))
+            return
+        self._count('written', len(batch))
+        self._count('batches')
+
+    def stop(self, timeout=5.0):
+        """Flush everything queued so far and stop the writer thread."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning('ActivityLog: writer queue full at shutdown; unflushed entries are lost')
+            return
+        thread.join(timeout)
+        if not thread.is_alive():
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'queued': self._queue.qsize()}
+
+
+def _default_sink(entries):
+    if _setting('ACTIVITY_LOG_REDIS_STREAM', ''):
+        spool_entries(entries)
+    else:
+        write_entries(entries)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """The process-wide writer, configured from settings."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ActivityLogWriter(
+                    _default_sink,
+                    batch_size=_setting('ACTIVITY_LOG_BATCH_SIZE', 100),
+                    flush_interval=_setting('ACTIVITY_LOG_FLUSH_INTERVAL_MS', 1000) / 1000,
+                    maxsize=_setting('ACTIVITY_LOG_QUEUE_SIZE', 10000),
+                    enqueue_timeout=_setting('ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS', 5) / 1000,
+                )
+                atexit.register(_writer.stop)
+    return _writer
+
+
+def enqueue(entry):
+    return get_writer().enqueue(entry)
+
+
+def drain_spool(batch_size=1000, stream=None):
+    """
+    Move entries from the Redis spool stream into ActivityLog; returns the count.
+
+    Reads through a consumer group, so concurrent drains split the stream;
+    entries are acknowledged and deleted only after their bulk_create.
+    """
+    import redis
+
+    stream = stream or _setting('ACTIVITY_LOG_REDIS_STREAM', '')
+    if not stream:
+        return 0
+    client = _redis()
+    consumer = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        client.xgroup_create(stream, SPOOL_GROUP, id='0', mkstream=True)
+    except redis.ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+    # Entries a dead drain read but never acknowledged.
+    _, reclaimed, *_ = client.xautoclaim(stream, SPOOL_GROUP, consumer, SPOOL_RECLAIM_IDLE_MS, count=batch_size)
+    total = 0
+    messages = reclaimed
+    while True:
+        if not messages:
+            response = client.xreadgroup(SPOOL_GROUP, consumer, {stream: '>'}, count=batch_size)
+            messages = response[0][1] if response else []
+            if not messages:
+                return total
+        ids = [message_id for message_id, _ in messages]
+        entries = [json.loads(fields[b'e']) for _, fields in messages if fields]
+        if entries:
+            write_entries(entries)
+        client.xack(stream, SPOOL_GROUP, *ids)
+        client.xdel(stream, *ids)
+        total += len(entries)
+        messages = []
@@ -10,5 +10,7 @@ class CoreConfig(AppConfig):
         try:
             from apps.core import cache_signals  # noqa: F401
             cache_signals.connect_m2m_signals()
+            cache_signals.connect_mds_signals()
         except ImportError:
             pass
+        from apps.core import signals_materialized_views  # noqa: F401
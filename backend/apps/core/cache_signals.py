@@ -6,6 +6,10 @@ Automatically invalidates relevant caches when models are modified.
 
 This ensures cache consistency without manual invalidation in views.
 
+Each receiver bumps the generation of the cache tags the change affects
+(cache_utils.invalidate_tags): one INCR per tag, instead of SCANning the
+keyspace for every 'view:<family>*' pattern on every save.
+
 Usage:
     Import in apps.py ready() method:
 
@@ -19,7 +23,7 @@ import logging
 from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
-from apps.core.cache_utils import invalidate_cache, invalidate_model_caches
+from apps.core.cache_utils import invalidate_tags
 
 logger = logging.getLogger(__name__)
 
@@ -41,19 +45,15 @@ def invalidate_license_caches(sender, instance, **kwargs):
     """
     logger.debug(f"Invalidating caches for License: {instance.license_number}")
 
-    # Invalidate license-specific caches
-    patterns = [
-        f'view:license*',  # All license list/detail views
-        f'view:dashboard*',  # Dashboard shows license stats
-        f'license_balance:{instance.id}',  # Specific license balance
-        f'LicenseDetailsModel:*:{instance.id}:*',  # Method caches
-        f'view:item_report*',  # Item reports include license data
-        f'view:active_licenses*',  # Active license reports
-        f'view:expiring_licenses*',  # Expiring license reports
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(
+        'license',  # All license list/detail views
+        'dashboard',  # Dashboard shows license stats
+        f'license:{instance.id}',  # Detail view, balance and method caches
+        f'LicenseDetailsModel:{instance.id}',  # cache_method default tag
+        'item_report',  # Item reports include license data
+        'active_licenses',  # Active license reports
+        'expiring_licenses',  # Expiring license reports
+    )
 
 
 @receiver([post_save, post_delete], sender='license.LicenseImportItemsModel')
@@ -69,16 +69,12 @@ def invalidate_import_item_caches(sender, instance, **kwargs):
     """
     logger.debug(f"Invalidating caches for LicenseImportItem: {instance.id}")
 
-    patterns = [
-        f'view:item_report*',
-        f'view:item_pivot*',
-        f'view:inventory_balance*',
-        f'view:license*:{instance.license_id}*',  # Parent license detail
-        f'license_balance:{instance.license_id}',  # License balance affected
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(
+        'item_report',
+        'item_pivot',
+        'inventory_balance',
+        f'license:{instance.license_id}',  # Parent license detail and balance
+    )
 
 
 @receiver([post_save, post_delete], sender='license.LicenseExportItemModel')
@@ -86,14 +82,7 @@ def invalidate_export_item_caches(sender, instance, **kwargs):
     """Invalidate caches when export items are modified."""
     logger.debug(f"Invalidating caches for LicenseExportItem: {instance.id}")
 
-    patterns = [
-        f'view:license*:{instance.license_id}*',
-        f'license_balance:{instance.license_id}',
-        f'view:item_pivot*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(f'license:{instance.license_id}', 'item_pivot')
 
 
 # M2M signal for LicenseImportItemsModel.items will be connected in ready()
@@ -102,8 +91,7 @@ def invalidate_import_item_m2m_caches(sender, instance, **kwargs):
     """Invalidate caches when import item <-> item names relationship changes."""
     logger.debug(f"Invalidating M2M caches for import item: {instance.id}")
 
-    invalidate_cache(f'view:item_report*')
-    invalidate_cache(f'view:item_pivot*')
+    invalidate_tags('item_report', 'item_pivot')
 
 
 # ============================================================================
@@ -123,14 +111,7 @@ def invalidate_boe_caches(sender, instance, **kwargs):
     """
     logger.debug(f"Invalidating caches for BOE: {instance.bill_of_entry_number}")
 
-    patterns = [
-        f'view:boe*',
-        f'view:dashboard*',
-        f'view:bill_of_entry*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags('boe', 'dashboard', 'bill_of_entry', f'boe:{instance.id}')
 
 
 @receiver([post_save, post_delete], sender='bill_of_entry.RowDetails')
@@ -142,20 +123,17 @@ def invalidate_row_details_caches(sender, instance, **kwargs):
     """
     logger.debug(f"Invalidating caches for RowDetails: {instance.id}")
 
+    tags = [
+        f'boe:{instance.bill_of_entry_id}',
+        'item_report',  # Affects balance calculations in item reports
+        'inventory_balance',
+    ]
+
     # Invalidate license balance if linked to a license item
     if instance.sr_number and hasattr(instance.sr_number, 'license'):
-        license_id = instance.sr_number.license_id
-        invalidate_cache(f'license_balance:{license_id}')
-        invalidate_cache(f'view:license*:{license_id}*')
-
-    patterns = [
-        f'view:boe*:{instance.bill_of_entry_id}*',
-        f'view:item_report*',  # Affects balance calculations in item reports
-        f'view:inventory_balance*',
-    ]
+        tags.append(f'license:{instance.sr_number.license_id}')
 
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(*tags)
 
 
 # ============================================================================
@@ -168,13 +146,7 @@ def invalidate_allotment_caches(sender, instance, **kwargs):
     """Invalidate caches when allotment is modified."""
     logger.debug(f"Invalidating caches for Allotment: {instance.id}")
 
-    patterns = [
-        f'view:allotment*',
-        f'view:dashboard*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags('allotment', 'dashboard', f'allotment:{instance.id}')
 
 
 @receiver([post_save, post_delete], sender='allotment.AllotmentItems')
@@ -186,26 +158,31 @@ def invalidate_allotment_items_caches(sender, instance, **kwargs):
     """
     logger.debug(f"Invalidating caches for AllotmentItems: {instance.id}")
 
+    tags = [
+        f'allotment:{instance.allotment_id}',
+        'item_report',
+        'inventory_balance',
+    ]
+
     # Invalidate license balance if linked
     if instance.item and hasattr(instance.item, 'license'):
-        license_id = instance.item.license_id
-        invalidate_cache(f'license_balance:{license_id}')
-        invalidate_cache(f'view:license*:{license_id}*')
-
-    patterns = [
-        f'view:allotment*:{instance.allotment_id}*',
-        f'view:item_report*',
-        f'view:inventory_balance*',
-    ]
+        tags.append(f'license:{instance.item.license_id}')
 
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(*tags)
 
 
 # ============================================================================
 # Master Data Signals (Low-frequency invalidation)
 # ============================================================================
 
+# Tags each master's receivers invalidate; also used for MDS mirror syncs,
+# which write in bulk without per-row post_save.
+MASTER_CACHE_TAGS = {
+    'core.CompanyModel': ('company', 'license', 'boe', 'allotment'),  # License filters by company
+    'core.ItemNameModel': ('item', 'item_report', 'item_pivot'),
+    'core.HSCodeModel': ('hscode', 'item_report'),
+}
+
 
 @receiver([post_save, post_delete], sender='core.CompanyModel')
 def invalidate_company_caches(sender, instance, **kwargs):
@@ -216,15 +193,7 @@ def invalidate_company_caches(sender, instance, **kwargs):
     """
     logger.debug(f"Invalidating caches for Company: {instance.name}")
 
-    patterns = [
-        f'view:company*',
-        f'view:license*company*',  # License filters by company
-        f'view:boe*company*',
-        f'view:allotment*company*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(*MASTER_CACHE_TAGS['core.CompanyModel'])
 
 
 @receiver([post_save, post_delete], sender='core.ItemNameModel')
@@ -232,14 +201,7 @@ def invalidate_item_name_caches(sender, instance, **kwargs):
     """Invalidate caches when item names are modified."""
     logger.debug(f"Invalidating caches for ItemName: {instance.name}")
 
-    patterns = [
-        f'view:item*',
-        f'view:item_report*',
-        f'view:item_pivot*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(*MASTER_CACHE_TAGS['core.ItemNameModel'])
 
 
 @receiver([post_save, post_delete], sender='core.HSCodeModel')
@@ -247,13 +209,7 @@ def invalidate_hscode_caches(sender, instance, **kwargs):
     """Invalidate caches when HS codes are modified."""
     logger.debug(f"Invalidating caches for HSCode: {instance.hs_code}")
 
-    patterns = [
-        f'view:hscode*',
-        f'view:item_report*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags(*MASTER_CACHE_TAGS['core.HSCodeModel'])
 
 
 @receiver([post_save, post_delete], sender='core.PurchaseStatus')
@@ -262,59 +218,35 @@ def invalidate_purchase_status_caches(sender, instance, **kwargs):
     logger.debug(f"Invalidating caches for PurchaseStatus: {instance.code}")
 
     # Purchase status is heavily used in license filtering
-    patterns = [
-        f'view:license*',
-        f'view:dashboard*',
-        f'view:item_report*',
-    ]
-
-    for pattern in patterns:
-        invalidate_cache(pattern)
+    invalidate_tags('license', 'dashboard', 'item_report')
 
 
 # ============================================================================
 # Utility: Manual Cache Invalidation Endpoints
 # ============================================================================
 
-def get_invalidation_patterns_for_model(model_name: str) -> list:
+def get_invalidation_tags_for_model(model_name: str) -> list:
     """
-    Get recommended cache invalidation patterns for a model.
+    Get recommended cache tags to invalidate for a model.
 
-    Useful for manual cache clearing in admin interface.
+    Useful for manual cache clearing in admin interface:
+    invalidate_tags(*get_invalidation_tags_for_model('LicenseDetailsModel'))
 
     Args:
         model_name: Model name (e.g., 'LicenseDetailsModel')
 
     Returns:
-        List of cache key patterns to invalidate
+        List of cache tags to invalidate
     """
-    patterns_map = {
-        'LicenseDetailsModel': [
-            'view:license*',
-            'view:dashboard*',
-            'view:item_report*',
-            'license_balance:*',
-        ],
-        'BillOfEntryModel': [
-            'view:boe*',
-            'view:bill_of_entry*',
-            'view:dashboard*',
-        ],
-        'AllotmentModel': [
-            'view:allotment*',
-            'view:dashboard*',
-        ],
-        'CompanyModel': [
-            'view:company*',
-            'view:license*',
-            'view:boe*',
-        ],
-        'ItemNameModel': [
-            'view:item*',
-        ],
+    tags_map = {
+        'LicenseDetailsModel': ['license', 'dashboard', 'item_report'],
+        'BillOfEntryModel': ['boe', 'bill_of_entry', 'dashboard'],
+        'AllotmentModel': ['allotment', 'dashboard'],
+        'CompanyModel': ['company', 'license', 'boe'],
+        'ItemNameModel': ['item'],
     }
 
-    return patterns_map.get(model_name, [f'*{model_name.lower()}*'])
+    return tags_map.get(model_name, [model_name])
 
 
 # ============================================================================
@@ -383,3 +315,24 @@ def connect_m2m_signals():
         logger.info("Connected M2M cache invalidation signals")
     except Exception as e:
         logger.warning(f"Could not connect M2M signals: {e}")
+
+
+def invalidate_mirror_caches(sender, **kwargs):
+    """Invalidate a master's caches once after an MDS mirror sync batch."""
+    tags = MASTER_CACHE_TAGS.get(sender._meta.label)
+    if tags:
+        invalidate_tags(*tags)
+
+
+def connect_mds_signals():
+    """
+    Connect the MDS mirror-sync signal when mds_client is installed.
+    Call this from apps.py ready() after models are loaded.
+    """
+    from django.apps import apps
+
+    if not apps.is_installed('mds_client'):
+        return
+    from mds_client.signals import mirror_rows_upserted
+
+    mirror_rows_upserted.connect(invalidate_mirror_caches, dispatch_uid='invalidate_mirror_caches')
@@ -7,22 +7,33 @@ Provides decorators and utilities for implementing multi-tier caching strategy:
 - Query-level caching (expensive aggregations)
 - Object-level caching (frequently accessed objects)
 
+Invalidation is tag/generation based: every cached entry depends on a few
+tags ('license', 'license:<id>', 'boe', 'dashboard', ...), and its key embeds
+the current generation counter of each tag. invalidate_tags() INCRs those
+counters, so entries built under the old generation are never read again and
+age out by their TTL. That is O(1) per tag, where a wildcard delete_pattern
+SCANs the whole keyspace.
+
 Usage:
-    from apps.core.cache_utils import cache_view, cache_query, invalidate_cache
+    from apps.core.cache_utils import cache_view, cache_query, invalidate_tags
 
     @cache_view(timeout=300)
     def my_view(request):
         return Response(data)
 
-    @cache_query(key_prefix='license_balance', timeout=900)
+    @cache_query(key_prefix='license_balance', timeout=900,
+                 tags=lambda license_id: [f'license:{license_id}'])
     def get_license_balance(license_id):
         return expensive_calculation(license_id)
+
+    invalidate_tags('license', f'license:{license_id}')
 """
 
 import functools
 import hashlib
 import logging
-from typing import Any, Callable, Optional, Union
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
 from django.conf import settings
 from django.core.cache import cache
@@ -32,6 +43,96 @@ from rest_framework.response import Response
 
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# Tag Generations
+# ============================================================================
+
+TAG_GENERATION_PREFIX = 'cachegen'
+
+# View-name families. A cached view depends on every family its name starts
+# with (underscores ignored), mirroring the 'view:license*'-style patterns
+# the signals used to delete.
+VIEW_TAG_FAMILIES = (
+    'license',
+    'dashboard',
+    'item_report',
+    'item_pivot',
+    'item',
+    'inventory_balance',
+    'active_licenses',
+    'expiring_licenses',
+    'boe',
+    'bill_of_entry',
+    'allotment',
+    'company',
+    'hscode',
+)
+
+
+def _generation_key(tag: str) -> str:
+    return f"{TAG_GENERATION_PREFIX}:{tag}"
+
+
+def _initial_generation() -> int:
+    # Microseconds since the epoch: a generation key that was evicted and is
+    # re-created starts past every value handed out before (that would take
+    # more than one invalidation per microsecond).
+    return time.time_ns() // 1000
+
+
+def get_tag_generations(tags: Iterable[str]) -> Dict[str, Any]:
+    """
+    Current generation of each tag (one get_many; missing tags are created).
+
+    Returns:
+        {tag: generation}
+    """
+    keys = {_generation_key(tag): tag for tag in dict.fromkeys(tags)}
+    if not keys:
+        return {}
+    found = cache.get_many(list(keys))
+    generations = {}
+    for key, tag in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            cache.add(key, _initial_generation(), None)
+            generation = cache.get(key)
+        generations[tag] = generation
+    return generations
+
+
+def tagged_cache_key(base_key: str, tags: Iterable[str]) -> str:
+    """
+    base_key stamped with the current generations of tags.
+
+    Example:
+        >>> tagged_cache_key('view:license_list:user1:page=1', ['license'])
+        'view:license_list:user1:page=1@g3f9a0c21d7e4'
+    """
+    generations = get_tag_generations(tags)
+    if not generations:
+        return base_key
+    stamp = "|".join(f"{tag}={generations[tag]}" for tag in sorted(generations))
+    return f"{base_key}@g{hashlib.md5(force_bytes(stamp)).hexdigest()[:12]}"
+
+
+def default_view_tags(view_name: str) -> List[str]:
+    """
+    Tags for a cached view, from the VIEW_TAG_FAMILIES its name starts with.
+
+    Example:
+        >>> default_view_tags('view:item_report')
+        ['item_report', 'item']
+        >>> default_view_tags('LicenseDetailsViewSet')
+        ['license']
+    """
+    name = view_name.lower()
+    if name.startswith('view:'):
+        name = name[len('view:'):]
+    name = name.replace('_', '')
+    return [family for family in VIEW_TAG_FAMILIES if name.startswith(family.replace('_', ''))]
+
+
 # ============================================================================
 # Cache Key Generators
 # ============================================================================
@@ -101,7 +202,8 @@ def generate_view_cache_key(request: HttpRequest, view_name: str) -> str:
 # ============================================================================
 
 
-def cache_view(timeout: int = 300, key_prefix: Optional[str] = None):
+def cache_view(timeout: int = 300, key_prefix: Optional[str] = None,
+               tags: Optional[Iterable[str]] = None):
     """
     Decorator for view-level caching of entire API responses.
 
@@ -110,6 +212,7 @@ def cache_view(timeout: int = 300, key_prefix: Optional[str] = None):
     Args:
         timeout: Cache TTL in seconds (default: 5 minutes)
         key_prefix: Optional custom prefix (auto-generated from view name if None)
+        tags: Invalidation tags (default: default_view_tags() of the prefix)
 
     Usage:
         @cache_view(timeout=300)
@@ -118,9 +221,12 @@ def cache_view(timeout: int = 300, key_prefix: Optional[str] = None):
             return Response({'licenses': [...]})
 
     Cache Invalidation:
-        invalidate_cache('view:license_list:*')
+        invalidate_tags('license')
     """
     def decorator(view_func: Callable) -> Callable:
+        prefix = key_prefix or f"view:{view_func.__name__}"
+        view_tags = list(tags) if tags is not None else default_view_tags(prefix)
+
         @functools.wraps(view_func)
         def wrapper(request, *args, **kwargs):
             # Only cache GET requests
@@ -128,8 +234,7 @@ def cache_view(timeout: int = 300, key_prefix: Optional[str] = None):
                 return view_func(request, *args, **kwargs)
 
             # Generate cache key
-            prefix = key_prefix or f"view:{view_func.__name__}"
-            cache_key = generate_view_cache_key(request, prefix)
+            cache_key = tagged_cache_key(generate_view_cache_key(request, prefix), view_tags)
 
             # Try to get from cache
             cached_response = cache.get(cache_key)
@@ -158,7 +263,8 @@ def cache_view(timeout: int = 300, key_prefix: Optional[str] = None):
     return decorator
 
 
-def cache_query(key_prefix: str, timeout: int = 900):
+def cache_query(key_prefix: str, timeout: int = 900,
+                tags: Union[Iterable[str], Callable[..., Iterable[str]], None] = None):
     """
     Decorator for query-level caching of expensive database operations.
 
@@ -167,21 +273,30 @@ def cache_query(key_prefix: str, timeout: int = 900):
     Args:
         key_prefix: Cache key prefix (e.g., 'license_balance')
         timeout: Cache TTL in seconds (default: 15 minutes)
+        tags: Invalidation tags, or a callable taking the function's arguments
+            and returning them (default: [key_prefix])
 
     Usage:
-        @cache_query(key_prefix='license_balance', timeout=900)
+        @cache_query(key_prefix='license_balance', timeout=900,
+                     tags=lambda license_id: [f'license:{license_id}'])
         def calculate_license_balance(license_id):
             # Expensive aggregation
             return License.objects.filter(id=license_id).aggregate(...)
 
     Cache Invalidation:
-        invalidate_cache(f'license_balance:{license_id}')
+        invalidate_tags(f'license:{license_id}')
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key from function args
-            cache_key = generate_cache_key(key_prefix, *args, **kwargs)
+            if tags is None:
+                query_tags = [key_prefix]
+            elif callable(tags):
+                query_tags = tags(*args, **kwargs)
+            else:
+                query_tags = tags
+            cache_key = tagged_cache_key(generate_cache_key(key_prefix, *args, **kwargs), query_tags)
 
             # Try cache first
             cached_result = cache.get(cache_key)
@@ -203,33 +318,39 @@ def cache_query(key_prefix: str, timeout: int = 900):
     return decorator
 
 
-def cache_method(timeout: int = 300):
+def cache_method(timeout: int = 300, tag: Optional[str] = None):
     """
     Decorator for caching instance method results.
 
-    Includes instance ID in cache key for proper isolation.
+    Includes instance ID in cache key for proper isolation, and depends on
+    the instance tag '<tag>:<id>' (tag defaults to the class name).
 
     Usage:
         class License(models.Model):
-            @cache_method(timeout=600)
+            @cache_method(timeout=600, tag='license')
             def calculate_balance(self):
                 # Expensive calculation
                 return sum(...)
 
     Cache Invalidation:
         license.calculate_balance.invalidate_cache(license)
+        invalidate_tags(f'license:{license.id}')
     """
     def decorator(method: Callable) -> Callable:
-        @functools.wraps(method)
-        def wrapper(self, *args, **kwargs):
-            # Generate cache key including instance ID
+        def _key(self, *args, **kwargs):
             instance_id = getattr(self, 'id', None) or getattr(self, 'pk', 'unknown')
-            cache_key = generate_cache_key(
+            base_key = generate_cache_key(
                 f"{self.__class__.__name__}:{method.__name__}",
                 instance_id,
                 *args,
                 **kwargs
             )
+            return tagged_cache_key(base_key, [f"{tag or self.__class__.__name__}:{instance_id}"])
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            # Generate cache key including instance ID
+            cache_key = _key(self, *args, **kwargs)
 
             # Try cache
             cached_result = cache.get(cache_key)
@@ -248,14 +369,7 @@ def cache_method(timeout: int = 300):
 
         # Add invalidation helper
         def invalidate_cache(self, *args, **kwargs):
-            instance_id = getattr(self, 'id', None) or getattr(self, 'pk', 'unknown')
-            cache_key = generate_cache_key(
-                f"{self.__class__.__name__}:{method.__name__}",
-                instance_id,
-                *args,
-                **kwargs
-            )
-            cache.delete(cache_key)
+            cache.delete(_key(self, *args, **kwargs))
 
         wrapper.invalidate_cache = invalidate_cache
         return wrapper
@@ -268,10 +382,32 @@ def cache_method(timeout: int = 300):
 # ============================================================================
 
 
+def invalidate_tags(*tags: str) -> None:
+    """
+    Invalidate every cached entry that depends on any of tags.
+
+    One INCR per tag; nothing is scanned or deleted.
+
+    Usage:
+        invalidate_tags('license', f'license:{license_id}', 'dashboard')
+    """
+    for tag in dict.fromkeys(tags):
+        key = _generation_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No generation yet: nothing was cached under this tag.
+            cache.add(key, _initial_generation(), None)
+    logger.debug(f"Invalidated cache tags: {', '.join(tags)}")
+
+
 def invalidate_cache(pattern: str) -> int:
     """
     Invalidate cache keys matching a pattern.
 
+    SCANs the whole keyspace via delete_pattern; meant for manual clean-up
+    (cache_stats --pattern). Code paths should use invalidate_tags().
+
     Args:
         pattern: Cache key pattern (supports wildcards with django-redis)
 
@@ -304,6 +440,9 @@ def invalidate_model_caches(model_name: str, instance_id: Optional[int] = None):
     """
     Invalidate all caches related to a model.
 
+    Bumps the model tag (every view family the model name starts with) and,
+    with instance_id, the '<model_name>:<id>' tag cache_method uses by default.
+
     Args:
         model_name: Name of the model (e.g., 'LicenseDetailsModel')
         instance_id: Optional specific instance ID
@@ -315,20 +454,13 @@ def invalidate_model_caches(model_name: str, instance_id: Optional[int] = None):
         # Invalidate specific license
         invalidate_model_caches('LicenseDetailsModel', instance_id=123)
     """
-    patterns = [
-        f"view:*{model_name.lower()}*",
-        f"{model_name}:*",
-    ]
-
+    tags = [model_name, *default_view_tags(model_name)]
     if instance_id:
-        patterns.append(f"*:{instance_id}:*")
-
-    total_deleted = 0
-    for pattern in patterns:
-        total_deleted += invalidate_cache(pattern)
+        tags.append(f"{model_name}:{instance_id}")
 
-    logger.info(f"Invalidated {total_deleted} cache keys for {model_name}")
-    return total_deleted
+    invalidate_tags(*tags)
+    logger.info(f"Invalidated cache tags for {model_name}: {', '.join(tags)}")
+    return len(tags)
 
 
 # ============================================================================
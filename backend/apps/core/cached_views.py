@@ -4,6 +4,11 @@ Cached View Mixins and Classes
 
 Provides reusable mixins for adding caching to DRF viewsets and views.
 
+Cached responses depend on cache tags (see cache_utils.invalidate_tags):
+by default the VIEW_TAG_FAMILIES the viewset's class name starts with, e.g.
+'license' for LicenseDetailsViewSet; retrieve() also depends on
+'<tag>:<pk>'. Set cache_tags on the viewset to override.
+
 Usage:
     from apps.core.cached_views import CachedListModelMixin
 
@@ -21,11 +26,23 @@ from django.views.decorators.cache import cache_page
 from rest_framework import viewsets
 from rest_framework.response import Response
 
-from apps.core.cache_utils import generate_view_cache_key, CACHE_TIMEOUT_MEDIUM
+from apps.core.cache_utils import (
+    CACHE_TIMEOUT_MEDIUM,
+    default_view_tags,
+    generate_view_cache_key,
+    tagged_cache_key,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _view_cache_tags(view) -> list:
+    """cache_tags declared on the view, else derived from its class name."""
+    if view.cache_tags is not None:
+        return list(view.cache_tags)
+    return default_view_tags(view.__class__.__name__)
+
+
 class CachedListModelMixin:
     """
     Mixin to add caching to list() method of DRF viewsets.
@@ -38,12 +55,13 @@ class CachedListModelMixin:
             queryset = License.objects.all()
     """
     cache_timeout = CACHE_TIMEOUT_MEDIUM  # Default 5 minutes
+    cache_tags: Optional[list] = None  # Default: derived from the class name
 
     def list(self, request, *args, **kwargs):
         """Override list to add caching."""
         # Generate cache key
         view_name = self.__class__.__name__
-        cache_key = generate_view_cache_key(request, view_name)
+        cache_key = tagged_cache_key(generate_view_cache_key(request, view_name), _view_cache_tags(self))
 
         # Try cache first
         cached_data = cache.get(cache_key)
@@ -75,13 +93,18 @@ class CachedRetrieveModelMixin:
             queryset = License.objects.all()
     """
     cache_timeout = CACHE_TIMEOUT_MEDIUM * 2  # Default 10 minutes
+    cache_tags: Optional[list] = None  # Default: derived from the class name
 
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to add caching."""
         # Generate cache key including object ID
         view_name = self.__class__.__name__
         obj_id = kwargs.get('pk') or kwargs.get(self.lookup_field)
-        cache_key = f"{view_name}:retrieve:{obj_id}"
+        tags = _view_cache_tags(self)
+        cache_key = tagged_cache_key(
+            f"{view_name}:retrieve:{obj_id}",
+            tags + [f"{tag}:{obj_id}" for tag in tags],
+        )
 
         # Try cache first
         cached_data = cache.get(cache_key)
@@ -0,0 +1,121 @@
+"""
+Transaction-scoped batches of post-commit jobs.
+
+Row-level signals (RowDetails / AllotmentItems saves) used to register one
+transaction.on_commit job per row, so saving a BOE with 30 rows recomputed
+the same import items 30 times. Signals now add the ids they touched to a
+named batch instead:
+
+    add_to_commit_batch('import_item_balances', [item_id], update_balance_values_bulk)
+
+Each batch collects ids until the transaction commits, then its handler runs
+ONCE with the set of ids. Outside an atomic block the handler runs
+immediately, exactly like transaction.on_commit. A rolled-back transaction
+discards its batches along with its on_commit callbacks.
+
+Batches in use:
+    import_item_balances      import item ids -> update_balance_values_bulk
+    boe_exchange_rates        BOE ids -> _recalculate_boe_exchange_rates
+    license_balance_dirty     licence ids -> license_balance_mv dirty-set
+    license_balance_dirty_items  import item ids -> their licences' dirty-set entries
+
+get_commit_batch_stats() reports, per batch name, how many jobs were
+requested, how many ids actually ran, and how many were coalesced away.
+"""
+import logging
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name, requested, executed):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {'requested': 0, 'executed': 0, 'flushes': 0})
+        entry['requested'] += requested
+        entry['executed'] += executed
+        entry['flushes'] += 1
+
+
+def get_commit_batch_stats():
+    """
+    Per-process counters for every batch name since start-up.
+
+    Returns:
+        {name: {'requested', 'executed', 'coalesced', 'flushes'}} where
+        requested counts one per id per add_to_commit_batch() call and
+        coalesced = requested - executed
+    """
+    with _stats_lock:
+        return {
+            name: {**entry, 'coalesced': entry['requested'] - entry['executed']}
+            for name, entry in _stats.items()
+        }
+
+
+def reset_commit_batch_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _pending_batches(using):
+    """
+    {name: [handler, ids, requested]} for the current transaction on `using`, or None.
+
+    Batches are tied to the connection's run_on_commit list: Django replaces
+    that list when a transaction commits or rolls back, which retires the
+    batches (and their flush callback) with it.
+    """
+    connection = connections[using]
+    state = getattr(connection, '_commit_batches', None)
+    if state is None or state[0] is not connection.run_on_commit:
+        return None
+    return state[1]
+
+
+def _flush(batches):
+    for name, (handler, ids, requested) in batches.items():
+        _record(name, requested, len(ids))
+        if requested > len(ids):
+            logger.debug("Commit batch %s: %d jobs coalesced into %d ids", name, requested, len(ids))
+        try:
+            handler(ids)
+        except Exception as e:
+            logger.exception("Commit batch %s failed for %d ids: %s", name, len(ids), e)
+
+
+def add_to_commit_batch(name, ids, handler, using=None):
+    """
+    Run handler(ids) once when the current transaction commits.
+
+    Args:
+        name: Batch name; calls with the same name in one transaction share
+            one handler call over the union of their ids
+        ids: Primary keys touched by the caller (falsy values are ignored)
+        handler: Callable taking a set of ids
+        using: Database alias (default: DEFAULT_DB_ALIAS)
+    """
+    using = using or DEFAULT_DB_ALIAS
+    ids = [pk for pk in ids if pk]
+    if not ids:
+        return
+
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        unique = set(ids)
+        _flush({name: [handler, unique, len(ids)]})
+        return
+
+    batches = _pending_batches(using)
+    if batches is None:
+        batches = {}
+        transaction.on_commit(lambda: _flush(batches), using=using)
+        connection._commit_batches = (connection.run_on_commit, batches)
+
+    batch = batches.setdefault(name, [handler, set(), 0])
+    batch[1].update(ids)
+    batch[2] += len(ids)
@@ -6,12 +6,13 @@ Usage:
     python manage.py cache_stats
     python manage.py cache_stats --clear
     python manage.py cache_stats --pattern "license_*"
+    python manage.py cache_stats --tag license --tag dashboard
 """
 
 from django.core.cache import cache
 from django.core.management.base import BaseCommand
 
-from apps.core.cache_utils import get_cache_stats, invalidate_cache
+from apps.core.cache_utils import get_cache_stats, invalidate_cache, invalidate_tags
 
 
 class Command(BaseCommand):
@@ -28,6 +29,11 @@ class Command(BaseCommand):
             type=str,
             help='Clear cache keys matching pattern (e.g., "license_*")',
         )
+        parser.add_argument(
+            '--tag',
+            action='append',
+            help='Invalidate every cache entry tagged with TAG (repeatable, e.g. "license:42")',
+        )
         parser.add_argument(
             '--keys',
             action='store_true',
@@ -48,6 +54,13 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f'✅ Cleared {count} cache keys'))
             return
 
+        if options['tag']:
+            tags = options['tag']
+            self.stdout.write(f'Invalidating cache tags: {", ".join(tags)}')
+            invalidate_tags(*tags)
+            self.stdout.write(self.style.SUCCESS(f'✅ Invalidated {len(tags)} cache tags'))
+            return
+
         if options['keys']:
             try:
                 client = cache.client.get_client()
@@ -106,4 +119,5 @@ class Command(BaseCommand):
         self.stdout.write('  python manage.py cache_stats --keys           # List keys')
         self.stdout.write('  python manage.py cache_stats --clear          # Clear all')
         self.stdout.write('  python manage.py cache_stats --pattern "view:*"  # Clear pattern')
+        self.stdout.write('  python manage.py cache_stats --tag license    # Invalidate tag')
         self.stdout.write('')
@@ -5,12 +5,14 @@ Usage:
     python manage.py refresh_materialized_views
     python manage.py refresh_materialized_views --view license_balance_mv
     python manage.py refresh_materialized_views --all
+    python manage.py refresh_materialized_views --dirty
     python manage.py refresh_materialized_views --stats
 """
 
 from django.core.management.base import BaseCommand
 from apps.core.materialized_views import (
     refresh_all_materialized_views,
+    refresh_license_balance_summary,
     refresh_materialized_view,
     get_materialized_view_stats,
     check_materialized_view_freshness
@@ -31,6 +33,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Refresh all materialized views'
         )
+        parser.add_argument(
+            '--dirty',
+            action='store_true',
+            help='Refresh only the license_balance_mv rows of licences changed since the last refresh'
+        )
         parser.add_argument(
             '--no-concurrent',
             action='store_true',
@@ -52,6 +59,11 @@ class Command(BaseCommand):
             self.show_stats()
             return
 
+        if options.get('dirty'):
+            refreshed = refresh_license_balance_summary()
+            self.stdout.write(self.style.SUCCESS(f'✓ Refreshed {refreshed} license_balance_mv rows'))
+            return
+
         if view_name:
             self.stdout.write(f'Refreshing {view_name}...')
             try:
@@ -77,7 +89,7 @@ class Command(BaseCommand):
 
         else:
             self.stdout.write(self.style.WARNING(
-                'Please specify --view <name>, --all, or --stats'
+                'Please specify --view <name>, --all, --dirty, or --stats'
             ))
             self.stdout.write('\nAvailable views:')
             self.stdout.write('  - license_balance_mv')
@@ -11,10 +11,15 @@ Materialized views are refreshed:
 - On-demand via management command
 - After specific model saves (via signals)
 - Via scheduled Celery tasks
+
+license_balance_mv is the exception: it is a summary table refreshed per
+licence (see refresh_license_balance_summary) rather than with a wholesale
+REFRESH MATERIALIZED VIEW.
 """
 
-from django.db import connection
-from typing import List, Optional
+from django.db import connection, transaction
+from django.utils import timezone
+from typing import Iterable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,72 +29,27 @@ logger = logging.getLogger(__name__)
 # Materialized View Definitions
 # ============================================================================
 
+# license_balance_mv is a plain summary table (not a MATERIALIZED VIEW) so it
+# can be maintained one licence at a time. Rows are written exclusively by
+# refresh_license_balance_summary() from LicenseBalanceCalculator, so the
+# stored figures always match the application's balance formula. Licences
+# touched since the last refresh are queued in license_balance_mv_dirty by
+# signals_materialized_views and drained by refresh_license_balance_task.
 LICENSE_BALANCE_VIEW = """
-CREATE MATERIALIZED VIEW IF NOT EXISTS license_balance_mv AS
-SELECT
-    ld.id as license_id,
-    ld.license_number,
-    ld.exporter_id,
-    -- Calculate total CIF from export items
-    COALESCE((
-        SELECT SUM(lei.cif_fc)
-        FROM license_licenseexportitemmodel lei
-        WHERE lei.license_id = ld.id
-    ), 0) as total_cif,
-    ld.license_date,
-    ld.license_expiry_date,
-    lf.is_active,
-
-    -- Calculate utilized CIF from BOE (debits)
-    COALESCE(SUM(CASE
-        WHEN rd.transaction_type = 'DEBIT' THEN rd.cif_inr
-        ELSE 0
-    END), 0) as utilized_cif,
-
-    -- Calculate allotted CIF
-    COALESCE(SUM(CASE
-        WHEN ai.allotment_id IS NOT NULL THEN ai.cif_fc
-        ELSE 0
-    END), 0) as allotted_cif,
-
-    -- Calculate balance CIF (total - utilized - allotted)
-    COALESCE((
-        SELECT SUM(lei.cif_fc)
-        FROM license_licenseexportitemmodel lei
-        WHERE lei.license_id = ld.id
-    ), 0) -
-    COALESCE(SUM(CASE
-        WHEN rd.transaction_type = 'DEBIT' THEN rd.cif_inr
-        ELSE 0
-    END), 0) -
-    COALESCE(SUM(CASE
-        WHEN ai.allotment_id IS NOT NULL THEN ai.cif_fc
-        ELSE 0
-    END), 0) as balance_cif,
-
-    -- Metadata
-    NOW() as last_refreshed
-
-FROM license_licensedetailsmodel ld
-
-LEFT JOIN license_licenseflags lf
-    ON lf.license_id = ld.id
-
-LEFT JOIN license_licenseimportitemsmodel lii
-    ON lii.license_id = ld.id
-
-LEFT JOIN bill_of_entry_rowdetails rd
-    ON rd.sr_number_id = lii.id
-    AND rd.transaction_type IN ('DEBIT', 'CREDIT')
-
-LEFT JOIN allotment_allotmentitems ai
-    ON ai.item_id = lii.id
-
-GROUP BY ld.id, ld.license_number, ld.exporter_id,
-         ld.license_date, ld.license_expiry_date, lf.is_active;
-
-CREATE UNIQUE INDEX IF NOT EXISTS license_balance_mv_license_id_idx
-    ON license_balance_mv(license_id);
+CREATE TABLE IF NOT EXISTS license_balance_mv (
+    license_id bigint PRIMARY KEY,
+    license_number varchar(50),
+    exporter_id bigint,
+    license_date date,
+    license_expiry_date date,
+    is_active boolean,
+    total_cif numeric(18, 2) NOT NULL DEFAULT 0,
+    utilized_cif numeric(18, 2) NOT NULL DEFAULT 0,
+    allotted_cif numeric(18, 2) NOT NULL DEFAULT 0,
+    traded_cif numeric(18, 2) NOT NULL DEFAULT 0,
+    balance_cif numeric(18, 2) NOT NULL DEFAULT 0,
+    last_refreshed timestamp with time zone NOT NULL DEFAULT NOW()
+);
 
 CREATE INDEX IF NOT EXISTS license_balance_mv_exporter_id_idx
     ON license_balance_mv(exporter_id);
@@ -99,9 +59,18 @@ CREATE INDEX IF NOT EXISTS license_balance_mv_balance_cif_idx
 
 CREATE INDEX IF NOT EXISTS license_balance_mv_is_active_idx
     ON license_balance_mv(is_active);
+
+CREATE TABLE IF NOT EXISTS license_balance_mv_dirty (
+    license_id bigint PRIMARY KEY,
+    marked_at timestamp with time zone NOT NULL DEFAULT NOW()
+);
 """
 
 
+# Per-item figures follow ItemBalanceCalculator: debits are transaction_type
+# 'D' rows against the item, allotments only count while the allotment has no
+# BOE. Each source is pre-aggregated per item before joining so rows from
+# RowDetails and AllotmentItems never multiply each other.
 ITEM_BALANCE_VIEW = """
 CREATE MATERIALIZED VIEW IF NOT EXISTS item_balance_mv AS
 SELECT
@@ -114,34 +83,16 @@ SELECT
     lii.cif_fc as total_cif,
 
     -- Utilized via BOE
-    COALESCE(SUM(CASE
-        WHEN rd.transaction_type = 'DEBIT' THEN rd.qty
-        ELSE 0
-    END), 0) as utilized_quantity,
+    COALESCE(rd.qty, 0) as utilized_quantity,
+    COALESCE(rd.cif_fc, 0) as utilized_cif,
 
-    COALESCE(SUM(CASE
-        WHEN rd.transaction_type = 'DEBIT' THEN rd.cif_inr
-        ELSE 0
-    END), 0) as utilized_cif,
-
-    -- Allotted
-    COALESCE(SUM(ai.qty), 0) as allotted_quantity,
-    COALESCE(SUM(ai.cif_fc), 0) as allotted_cif,
+    -- Allotted (not yet converted to BOE)
+    COALESCE(ai.qty, 0) as allotted_quantity,
+    COALESCE(ai.cif_fc, 0) as allotted_cif,
 
     -- Balance (available)
-    lii.quantity -
-    COALESCE(SUM(CASE
-        WHEN rd.transaction_type = 'DEBIT' THEN rd.qty
-        ELSE 0
-    END), 0) -
-    COALESCE(SUM(ai.qty), 0) as available_quantity,
-
-    lii.cif_fc -
-    COALESCE(SUM(CASE
-        WHEN rd.transaction_type = 'DEBIT' THEN rd.cif_inr
-        ELSE 0
-    END), 0) -
-    COALESCE(SUM(ai.cif_fc), 0) as available_cif,
+    lii.quantity - COALESCE(rd.qty, 0) - COALESCE(ai.qty, 0) as available_quantity,
+    lii.cif_fc - COALESCE(rd.cif_fc, 0) - COALESCE(ai.cif_fc, 0) as available_cif,
 
     -- Item restrictions
     lii.is_restricted,
@@ -154,15 +105,22 @@ FROM license_licenseimportitemsmodel lii
 INNER JOIN license_licensedetailsmodel ld
     ON ld.id = lii.license_id
 
-LEFT JOIN bill_of_entry_rowdetails rd
-    ON rd.sr_number_id = lii.id
-    AND rd.transaction_type IN ('DEBIT', 'CREDIT')
-
-LEFT JOIN allotment_allotmentitems ai
-    ON ai.item_id = lii.id
-
-GROUP BY lii.id, lii.license_id, lii.serial_number, ld.license_number,
-         ld.exporter_id, lii.quantity, lii.cif_fc, lii.is_restricted;
+LEFT JOIN (
+    SELECT sr_number_id, SUM(qty) as qty, SUM(cif_fc) as cif_fc
+    FROM bill_of_entry_rowdetails
+    WHERE transaction_type = 'D'
+    GROUP BY sr_number_id
+) rd ON rd.sr_number_id = lii.id
+
+LEFT JOIN (
+    SELECT items.item_id, SUM(items.qty) as qty, SUM(items.cif_fc) as cif_fc
+    FROM allotment_allotmentitems items
+    WHERE NOT EXISTS (
+        SELECT 1 FROM bill_of_entry_billofentrymodel_allotment boe_allotment
+        WHERE boe_allotment.allotmentmodel_id = items.allotment_id
+    )
+    GROUP BY items.item_id
+) ai ON ai.item_id = lii.id;
 
 CREATE UNIQUE INDEX IF NOT EXISTS item_balance_mv_item_id_idx
     ON item_balance_mv(item_id);
@@ -235,8 +193,24 @@ CREATE UNIQUE INDEX IF NOT EXISTS dashboard_stats_mv_idx
 # Materialized View Management Functions
 # ============================================================================
 
+# Licences recomputed / upserted per statement by the summary refresh.
+SUMMARY_BATCH_SIZE = 500
+
+
+def _drop_legacy_license_balance_view(cursor):
+    """Drop license_balance_mv if it is still the old MATERIALIZED VIEW.
+
+    CASCADE also drops dashboard_stats_mv, which reads from it; callers
+    recreate that view afterwards.
+    """
+    cursor.execute("SELECT 1 FROM pg_matviews WHERE matviewname = 'license_balance_mv'")
+    if cursor.fetchone():
+        logger.info("Replacing legacy license_balance_mv materialized view with summary table")
+        cursor.execute("DROP MATERIALIZED VIEW license_balance_mv CASCADE")
+
+
 def create_materialized_views():
-    """Create all materialized views."""
+    """Create all materialized views (and the license_balance_mv summary table)."""
     views = [
         ('license_balance_mv', LICENSE_BALANCE_VIEW),
         ('item_balance_mv', ITEM_BALANCE_VIEW),
@@ -244,6 +218,7 @@ def create_materialized_views():
     ]
 
     with connection.cursor() as cursor:
+        _drop_legacy_license_balance_view(cursor)
         for view_name, sql in views:
             try:
                 logger.info(f"Creating materialized view: {view_name}")
@@ -262,7 +237,12 @@ def drop_materialized_views():
         for view_name in views:
             try:
                 logger.info(f"Dropping materialized view: {view_name}")
-                cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view_name} CASCADE")
+                if view_name == 'license_balance_mv':
+                    _drop_legacy_license_balance_view(cursor)
+                    cursor.execute("DROP TABLE IF EXISTS license_balance_mv CASCADE")
+                    cursor.execute("DROP TABLE IF EXISTS license_balance_mv_dirty")
+                else:
+                    cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view_name} CASCADE")
                 logger.info(f"✓ Dropped {view_name}")
             except Exception as e:
                 logger.error(f"✗ Failed to drop {view_name}: {e}")
@@ -272,10 +252,19 @@ def refresh_materialized_view(view_name: str, concurrently: bool = False):
     """
     Refresh a single materialized view.
 
+    license_balance_mv is a summary table; "refreshing" it rebuilds every
+    licence row (see rebuild_license_balance_summary).
+
     Args:
         view_name: Name of the materialized view
         concurrently: If True, refresh without locking (requires unique index)
     """
+    if view_name == 'license_balance_mv':
+        logger.info("Rebuilding license_balance_mv summary")
+        rebuild_license_balance_summary()
+        logger.info("✓ Refreshed license_balance_mv")
+        return
+
     concurrent_sql = "CONCURRENTLY " if concurrently else ""
 
     with connection.cursor() as cursor:
@@ -306,8 +295,8 @@ def get_materialized_view_stats() -> List[dict]:
     sql = """
     SELECT
         schemaname,
-        matviewname as view_name,
-        pg_size_pretty(pg_total_relation_size(schemaname||'.'||matviewname)) as size,
+        relname as view_name,
+        pg_size_pretty(pg_total_relation_size(relid)) as size,
         n_tup_ins as rows_inserted,
         n_tup_upd as rows_updated,
         n_tup_del as rows_deleted,
@@ -330,13 +319,14 @@ def check_materialized_view_freshness(view_name: str) -> Optional[dict]:
 
     Returns dict with last_refreshed timestamp or None if view doesn't exist.
     """
-    sql = f"SELECT last_refreshed FROM {view_name} LIMIT 1"
+    # MAX() rather than LIMIT 1: license_balance_mv rows are refreshed individually.
+    sql = f"SELECT MAX(last_refreshed) FROM {view_name}"
 
     try:
         with connection.cursor() as cursor:
             cursor.execute(sql)
             result = cursor.fetchone()
-            if result:
+            if result and result[0] is not None:
                 return {'view_name': view_name, 'last_refreshed': result[0]}
     except Exception as e:
         logger.warning(f"Could not check freshness of {view_name}: {e}")
@@ -344,27 +334,182 @@ def check_materialized_view_freshness(view_name: str) -> Optional[dict]:
     return None
 
 
+# ============================================================================
+# License Balance Summary (per-licence refresh)
+# ============================================================================
+
+_UPSERT_LICENSE_BALANCE_SQL = """
+INSERT INTO license_balance_mv (
+    license_id, license_number, exporter_id, license_date, license_expiry_date,
+    is_active, total_cif, utilized_cif, allotted_cif, traded_cif, balance_cif,
+    last_refreshed
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (license_id) DO UPDATE SET
+    license_number = EXCLUDED.license_number,
+    exporter_id = EXCLUDED.exporter_id,
+    license_date = EXCLUDED.license_date,
+    license_expiry_date = EXCLUDED.license_expiry_date,
+    is_active = EXCLUDED.is_active,
+    total_cif = EXCLUDED.total_cif,
+    utilized_cif = EXCLUDED.utilized_cif,
+    allotted_cif = EXCLUDED.allotted_cif,
+    traded_cif = EXCLUDED.traded_cif,
+    balance_cif = EXCLUDED.balance_cif,
+    last_refreshed = EXCLUDED.last_refreshed
+"""
+
+
+def mark_license_balances_dirty(license_ids: Iterable[int]) -> None:
+    """
+    Queue licences for the next license_balance_mv refresh.
+
+    Marking is idempotent: a licence touched many times between refreshes is
+    recomputed once.
+    """
+    ids = sorted({int(license_id) for license_id in license_ids if license_id})
+    if not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO license_balance_mv_dirty (license_id) "
+            "SELECT unnest(%s::bigint[]) ON CONFLICT (license_id) DO NOTHING",
+            [ids],
+        )
+
+
+def upsert_license_balances(license_ids: Iterable[int]) -> int:
+    """
+    Recompute and upsert license_balance_mv rows for the given licences.
+
+    Figures come from LicenseBalanceCalculator.calculate_balances_bulk, so the
+    summary matches the application's balance formula exactly. Rows for
+    licences that no longer exist are removed.
+
+    Returns:
+        Number of rows written
+    """
+    from apps.license.models import LicenseDetailsModel
+    from apps.license.services.balance_calculator import LicenseBalanceCalculator
+
+    ids = list(dict.fromkeys(license_ids))
+    if not ids:
+        return 0
+
+    licenses = list(
+        LicenseDetailsModel.objects.filter(pk__in=ids).values_list(
+            'pk', 'license_number', 'exporter_id', 'license_date',
+            'license_expiry_date', 'flags__is_active',
+        )
+    )
+    balances = LicenseBalanceCalculator.calculate_balances_bulk([row[0] for row in licenses])
+    now = timezone.now()
+
+    params = []
+    for pk, license_number, exporter_id, license_date, expiry_date, is_active in licenses:
+        balance = balances[pk]
+        params.append([
+            pk, license_number, exporter_id, license_date, expiry_date, is_active,
+            balance['credit'], balance['debit'], balance['allotment'], balance['trade'],
+            balance['balance'], now,
+        ])
+
+    with connection.cursor() as cursor:
+        removed = set(ids) - {row[0] for row in licenses}
+        if removed:
+            cursor.execute(
+                "DELETE FROM license_balance_mv WHERE license_id = ANY(%s)", [sorted(removed)]
+            )
+        if params:
+            cursor.executemany(_UPSERT_LICENSE_BALANCE_SQL, params)
+    return len(params)
+
+
+def refresh_license_balance_summary(batch_size: int = SUMMARY_BATCH_SIZE) -> int:
+    """
+    Drain the dirty-set: upsert every licence marked since the last refresh.
+
+    Each batch is claimed (DELETE ... RETURNING with SKIP LOCKED) and upserted
+    in one transaction, so a failed batch goes back on the queue and
+    concurrent workers never process the same licence twice.
+
+    Returns:
+        Number of licences refreshed
+    """
+    refreshed = 0
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    DELETE FROM license_balance_mv_dirty
+                    WHERE license_id IN (
+                        SELECT license_id FROM license_balance_mv_dirty
+                        ORDER BY license_id
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING license_id
+                    """,
+                    [batch_size],
+                )
+                claimed = [row[0] for row in cursor.fetchall()]
+            if not claimed:
+                break
+            upsert_license_balances(claimed)
+        refreshed += len(claimed)
+
+    if refreshed:
+        logger.info(f"Refreshed {refreshed} license_balance_mv rows")
+    return refreshed
+
+
+def rebuild_license_balance_summary(batch_size: int = SUMMARY_BATCH_SIZE) -> int:
+    """
+    Recompute license_balance_mv for every licence.
+
+    Used for the initial fill and as a periodic safety net; the dirty-set
+    refresh keeps the table current in between.
+
+    Returns:
+        Number of licences refreshed
+    """
+    from apps.license.models import LicenseDetailsModel
+
+    license_ids = list(LicenseDetailsModel.objects.order_by('pk').values_list('pk', flat=True))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Anything queued so far is covered by this rebuild.
+            cursor.execute("DELETE FROM license_balance_mv_dirty")
+            cursor.execute(
+                "DELETE FROM license_balance_mv WHERE NOT (license_id = ANY(%s))", [license_ids]
+            )
+    for start in range(0, len(license_ids), batch_size):
+        with transaction.atomic():
+            upsert_license_balances(license_ids[start:start + batch_size])
+    return len(license_ids)
+
+
 # ============================================================================
 # Smart Refresh Strategy
 # ============================================================================
 
 def refresh_license_related_views():
     """Refresh views related to license changes."""
-    refresh_materialized_view('license_balance_mv', concurrently=True)
+    refresh_license_balance_summary()
     refresh_materialized_view('item_balance_mv', concurrently=True)
     refresh_materialized_view('dashboard_stats_mv', concurrently=True)
 
 
 def refresh_boe_related_views():
     """Refresh views related to BOE changes."""
-    refresh_materialized_view('license_balance_mv', concurrently=True)
+    refresh_license_balance_summary()
     refresh_materialized_view('item_balance_mv', concurrently=True)
     refresh_materialized_view('dashboard_stats_mv', concurrently=True)
 
 
 def refresh_allotment_related_views():
     """Refresh views related to allotment changes."""
-    refresh_materialized_view('license_balance_mv', concurrently=True)
+    refresh_license_balance_summary()
     refresh_materialized_view('item_balance_mv', concurrently=True)
     refresh_materialized_view('dashboard_stats_mv', concurrently=True)
 
@@ -374,7 +519,7 @@ def refresh_allotment_related_views():
 # ============================================================================
 
 def get_license_balance(license_id: int) -> Optional[dict]:
-    """Get license balance from materialized view."""
+    """Get license balance from the license_balance_mv summary table."""
     sql = """
     SELECT
         license_id,
@@ -382,6 +527,7 @@ def get_license_balance(license_id: int) -> Optional[dict]:
         total_cif,
         utilized_cif,
         allotted_cif,
+        traded_cif,
         balance_cif,
         last_refreshed
     FROM license_balance_mv
@@ -398,8 +544,9 @@ def get_license_balance(license_id: int) -> Optional[dict]:
                 'total_cif': row[2],
                 'utilized_cif': row[3],
                 'allotted_cif': row[4],
-                'balance_cif': row[5],
-                'last_refreshed': row[6],
+                'traded_cif': row[5],
+                'balance_cif': row[6],
+                'last_refreshed': row[7],
             }
     return None
 
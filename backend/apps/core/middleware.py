@@ -22,7 +22,10 @@ class DisableCSRFForAPIMiddleware(MiddlewareMixin):
 import logging
 import os
 import sys
-import threading
+
+from django.utils import timezone
+
+from apps.core import activity_log_writer
 
 _logger = logging.getLogger('core.activity')
 
@@ -79,32 +82,48 @@ def _activity_logging_disabled():
     return "test" in sys.argv or "pytest" in argv0 or argv0.endswith("py.test")
 
 
+def _log_entry(user, request, action, module, description, status_code, resource_id=''):
+    """ActivityLog field values for one entry, built on the request thread."""
+    return {
+        'user_id': getattr(user, 'pk', None),
+        'username': getattr(user, 'username', '') or '',
+        'action': action,
+        'module': module,
+        'resource_id': resource_id,
+        'description': description[:500],
+        'endpoint': getattr(request, 'path', '')[:500],
+        'method': getattr(request, 'method', ''),
+        'ip_address': _get_client_ip(request),
+        'user_agent': (request.META.get('HTTP_USER_AGENT', '')[:400]
+                       if hasattr(request, 'META') else ''),
+        'status_code': status_code,
+        'timestamp': timezone.now(),
+    }
+
+
 def _write_log_entry(user, request, status_code):
     if _activity_logging_disabled():
         return
     try:
-        from apps.core.models import ActivityLog
         path   = request.path
         method = request.method
-        ActivityLog.objects.create(
-            user=user,
-            username=user.username or '',
-            action=_infer_action(method, path),
-            module=_infer_module(path),
+        action = _infer_action(method, path)
+        module = _infer_module(path)
+        activity_log_writer.enqueue(_log_entry(
+            user, request, action, module, f"{action} {module}", status_code,
             resource_id=_infer_resource_id(path),
-            description=f"{_infer_action(method,path)} {_infer_module(path)}"[:500],
-            endpoint=path[:500],
-            method=method,
-            ip_address=_get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:400],
-            status_code=status_code,
-        )
+        ))
     except Exception:
-        _logger.exception('ActivityLog: failed to write log entry')
+        _logger.exception('ActivityLog: failed to queue log entry')
 
 
 class ActivityLogMiddleware:
-    """Logs every authenticated API request asynchronously."""
+    """
+    Logs every authenticated API request off the request path.
+
+    Entries go to the batched writer in apps.core.activity_log_writer (one
+    background thread per process, bulk_create per batch).
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -117,11 +136,7 @@ class ActivityLogMiddleware:
             and hasattr(request, 'user')
             and getattr(request.user, 'is_authenticated', False)
         ):
-            threading.Thread(
-                target=_write_log_entry,
-                args=(request.user, request, response.status_code),
-                daemon=True,
-            ).start()
+            _write_log_entry(request.user, request, response.status_code)
         return response
 
 
@@ -138,23 +153,7 @@ def log_logout(user, request):
 def _explicit(user, request, action, description):
     if _activity_logging_disabled():
         return
-
-    def _do():
-        try:
-            from apps.core.models import ActivityLog
-            ActivityLog.objects.create(
-                user=user,
-                username=getattr(user, 'username', '') or '',
-                action=action,
-                module='auth',
-                description=description,
-                endpoint=getattr(request, 'path', '')[:500],
-                method=getattr(request, 'method', ''),
-                ip_address=_get_client_ip(request),
-                user_agent=(request.META.get('HTTP_USER_AGENT', '')[:400]
-                            if hasattr(request, 'META') else ''),
-                status_code=200,
-            )
-        except Exception:
-            _logger.exception('ActivityLog explicit write failed')
-    threading.Thread(target=_do, daemon=True).start()
+    try:
+        activity_log_writer.enqueue(_log_entry(user, request, action, 'auth', description, 200))
+    except Exception:
+        _logger.exception('ActivityLog explicit write failed')
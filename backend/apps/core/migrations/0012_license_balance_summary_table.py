@@ -0,0 +1,49 @@
+"""Replace the license_balance_mv materialized view with a per-licence summary table.
+
+The old view joined import items to both RowDetails and AllotmentItems in one
+GROUP BY (so rows multiplied), filtered on transaction_type 'DEBIT' instead of
+the stored 'D', and could only be refreshed wholesale. license_balance_mv is
+now a plain table upserted per licence from LicenseBalanceCalculator, with a
+license_balance_mv_dirty queue of licences changed since the last refresh.
+
+item_balance_mv had the same join fan-out and is recreated with per-item
+pre-aggregation; dashboard_stats_mv is recreated on top of the new table.
+Every existing licence is queued, so the first refresh_license_balance_task
+run fills the table.
+"""
+from django.db import migrations
+
+
+def _recreate_views(apps, schema_editor):
+    # Lazy import — keeps the migration importable even if the helper module
+    # changes later.
+    from apps.core.materialized_views import create_materialized_views
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP MATERIALIZED VIEW IF EXISTS dashboard_stats_mv")
+        cursor.execute("DROP MATERIALIZED VIEW IF EXISTS item_balance_mv")
+    # Drops the legacy license_balance_mv view before creating the table.
+    create_materialized_views()
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO license_balance_mv_dirty (license_id) "
+            "SELECT id FROM license_licensedetailsmodel "
+            "ON CONFLICT (license_id) DO NOTHING"
+        )
+
+
+def _drop_views(apps, schema_editor):
+    from apps.core.materialized_views import drop_materialized_views
+    drop_materialized_views()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_split_milk_into_swp_dwp_wpc"),
+        ("license", "0011_licensebalance_ledger_licenseconditionpool"),
+    ]
+
+    operations = [
+        migrations.RunPython(_recreate_views, reverse_code=_drop_views),
+    ]
@@ -0,0 +1,23 @@
+"""ActivityLog.timestamp: default=timezone.now instead of auto_now_add.
+
+Entries are bulk-inserted by the batched activity log writer up to a flush
+interval (or a Redis spool drain) after the request, so the timestamp is
+taken when the request is logged and must not be overwritten on insert.
+"""
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_license_balance_summary_table'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
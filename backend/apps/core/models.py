@@ -805,7 +805,8 @@ class ActivityLog(models.Model):
     user_agent  = models.CharField(max_length=400, blank=True)
     status_code = models.PositiveSmallIntegerField(null=True, blank=True)
     extra       = models.JSONField(default=dict, blank=True)
-    timestamp   = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Request time, set by the writer: rows are bulk-inserted later in batches.
+    timestamp   = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ['-timestamp']
@@ -0,0 +1,145 @@
+"""
+Debounced, coalescing refresh scheduler for the materialized views.
+
+Every commit that touches balance data used to enqueue its own refresh task,
+so a bulk ledger upload queued hundreds of identical full refreshes. Requests
+now go through request_refresh(), which keeps per-view state in the Django
+cache (Redis in every deployment):
+
+    mv_refresh:<view>:dirty     set while a refresh is pending; the first
+                                request in a window sets it and enqueues ONE
+                                task DEBOUNCE_SECONDS later, every further
+                                request before that task starts is coalesced
+    mv_refresh:<view>:lock      single-flight lock held while a refresh runs
+    mv_refresh:<view>:<counter> queued / coalesced / executed / deferred
+
+The task clears the dirty flag before refreshing, so a change committed
+while a refresh is running schedules exactly one follow-up refresh. If the
+lock is already held the task re-schedules itself instead of running in
+parallel.
+
+cache.add() is an atomic SET NX on Redis, which is what makes both the dirty
+flag and the lock safe across web and worker processes.
+"""
+
+import logging
+import uuid
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Seconds a view waits after its first change before refreshing; every
+# request inside the window collapses into that one refresh.
+DEBOUNCE_SECONDS = 5
+
+# Upper bound on a single refresh. The lock expires on its own after this,
+# so a crashed worker cannot block a view forever.
+LOCK_TIMEOUT = 600
+
+# The dirty flag outlives the debounce window so a task that is slow to be
+# picked up still sees it; it is always cleared by the task itself.
+DIRTY_TIMEOUT = LOCK_TIMEOUT + DEBOUNCE_SECONDS
+
+SCHEDULED_VIEWS = ('license_balance_mv', 'item_balance_mv', 'dashboard_stats_mv')
+COUNTERS = ('queued', 'coalesced', 'executed', 'deferred')
+
+
+def _key(view_name: str, suffix: str) -> str:
+    return f"mv_refresh:{view_name}:{suffix}"
+
+
+def _incr(view_name: str, counter: str) -> None:
+    key = _key(view_name, counter)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing key: create it (never expires) then count.
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def _enqueue(view_name: str) -> None:
+    # Lazy import: tasks_materialized_views imports this module.
+    from apps.core.tasks_materialized_views import run_scheduled_refresh_task
+
+    run_scheduled_refresh_task.apply_async(args=[view_name], countdown=DEBOUNCE_SECONDS)
+
+
+def request_refresh(view_name: str) -> bool:
+    """
+    Ask for a refresh of view_name.
+
+    Returns:
+        True if this request scheduled a refresh, False if it was coalesced
+        into one that is already pending.
+    """
+    _incr(view_name, 'queued')
+    if not cache.add(_key(view_name, 'dirty'), timezone.now().isoformat(), DIRTY_TIMEOUT):
+        _incr(view_name, 'coalesced')
+        return False
+    try:
+        _enqueue(view_name)
+    except Exception:
+        # Leave nothing pending that no task will ever clear.
+        cache.delete(_key(view_name, 'dirty'))
+        raise
+    return True
+
+
+def _refresh(view_name: str) -> None:
+    from apps.core.materialized_views import (
+        refresh_license_balance_summary,
+        refresh_materialized_view,
+    )
+
+    if view_name == 'license_balance_mv':
+        refresh_license_balance_summary()
+    else:
+        refresh_materialized_view(view_name, concurrently=True)
+
+
+def run_scheduled_refresh(view_name: str) -> str:
+    """
+    Run one pending refresh of view_name under the single-flight lock.
+
+    Returns:
+        'executed', or 'deferred' if another refresh held the lock (a new
+        attempt is scheduled after the debounce window).
+    """
+    token = uuid.uuid4().hex
+    lock_key = _key(view_name, 'lock')
+    if not cache.add(lock_key, token, LOCK_TIMEOUT):
+        _incr(view_name, 'deferred')
+        _enqueue(view_name)
+        return 'deferred'
+
+    try:
+        # Cleared before refreshing: anything committed from here on is not
+        # guaranteed to be in this refresh, so it must schedule another one.
+        cache.delete(_key(view_name, 'dirty'))
+        _refresh(view_name)
+        _incr(view_name, 'executed')
+        cache.set(_key(view_name, 'last_run'), timezone.now().isoformat(), None)
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return 'executed'
+
+
+def get_refresh_scheduler_stats(view_names=SCHEDULED_VIEWS) -> List[Dict]:
+    """Queued / coalesced / executed / deferred counts and state per view."""
+    stats = []
+    for view_name in view_names:
+        keys = {suffix: _key(view_name, suffix) for suffix in COUNTERS + ('dirty', 'lock', 'last_run')}
+        values = cache.get_many(list(keys.values()))
+        entry = {'view_name': view_name}
+        for counter in COUNTERS:
+            entry[counter] = values.get(keys[counter], 0)
+        entry['pending'] = keys['dirty'] in values
+        entry['running'] = keys['lock'] in values
+        entry['last_run'] = values.get(keys['last_run'])
+        stats.append(entry)
+    return stats
@@ -0,0 +1,113 @@
+"""
+Async PDF parse jobs for the licence (DFIA) and BOE parse-pdf endpoints.
+
+Parsing a scanned upload means OCR and possibly a DGFT QR download, which
+held a gunicorn worker for tens of seconds. With `async=true` the endpoint
+instead stores the upload under PDF_PARSE_UPLOAD_DIR, queues a Celery task
+and answers 202 with a job id; the client then polls the endpoint's
+jobs/<job_id>/ status view.
+
+The task result is {'status_code': ..., 'payload': ...} — the status and
+body the synchronous endpoint would have returned. While running, the task
+reports state PROGRESS with the current stage (digital_text, qr, ocr,
+item_parse, matching) and the stage timings so far.
+"""
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.utils.stage_timer import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+def save_upload(upload) -> str:
+    """Write an uploaded file to PDF_PARSE_UPLOAD_DIR and return its path."""
+    upload_dir = settings.PDF_PARSE_UPLOAD_DIR
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, f"{uuid.uuid4().hex}.pdf")
+    with open(path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+    return path
+
+
+def discard_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def enqueue_parse_job(task, upload, **kwargs) -> Response:
+    """
+    Store `upload` and queue task(path, **kwargs).
+
+    Returns a 202 response carrying the job id, or 503 if the job could not
+    be queued (the stored upload is removed again).
+    """
+    path = save_upload(upload)
+    try:
+        job = task.apply_async(args=[path], kwargs=kwargs)
+    except Exception as exc:
+        discard_upload(path)
+        logger.exception("Could not queue %s", task.name)
+        return Response(
+            {"detail": f"Could not queue the parse job: {exc}"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return Response({"job_id": job.id, "state": "PENDING"}, status=status.HTTP_202_ACCEPTED)
+
+
+def run_parse_job(task, path: str, parse) -> dict:
+    """
+    Run parse(path, timer) -> (status_code, payload) inside a bound Celery
+    task, publishing each stage as PROGRESS, and delete the upload afterwards.
+    """
+    def on_stage(stage):
+        task.update_state(state='PROGRESS', meta={'stage': stage, 'timings': dict(timer.timings)})
+
+    timer = StageTimer(on_stage=on_stage)
+    try:
+        status_code, payload = parse(path, timer)
+    finally:
+        discard_upload(path)
+    logger.info("%s finished with %s in stages %s", task.name, status_code, timer.timings)
+    return {'status_code': status_code, 'payload': payload}
+
+
+def job_status_response(job_id: str, task_name: str) -> Response:
+    """
+    Current state of a parse job, with the parsed payload once it succeeded.
+
+    Only jobs of `task_name` are reported: any other task id answers 404, so
+    the endpoint cannot be used to read other tasks' state or results. This
+    relies on CELERY_RESULT_EXTENDED, which stores the task name with the
+    state. A job no worker has picked up yet has no stored state at all and
+    is reported as PENDING, which is also what Celery says for unknown ids.
+    """
+    from celery.result import AsyncResult
+
+    result = AsyncResult(job_id)
+    state = result.state
+
+    if state == 'PENDING' and result.name is None:
+        return Response({'state': state})
+    if result.name != task_name:
+        return Response({"detail": "Parse job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    if state == 'PROGRESS':
+        info = result.info if isinstance(result.info, dict) else {}
+        body = {'state': state, 'stage': info.get('stage'), 'timings': info.get('timings', {})}
+    elif state == 'SUCCESS':
+        outcome = result.result if isinstance(result.result, dict) else {}
+        body = {'state': state, 'status_code': outcome.get('status_code'), 'result': outcome.get('payload')}
+    elif state == 'FAILURE':
+        body = {'state': state, 'error': str(result.info)}
+    else:
+        body = {'state': state}
+    return Response(body)
@@ -1,6 +1,8 @@
+from decimal import Decimal
+
 from django.db.models import Sum, Q
 
-from apps.core.constants import N2015
+from apps.core.constants import DEBIT, DEC_0, N2015
 from apps.core.utils.decimal_utils import round_decimal_down as round_down, to_float
 
 
@@ -152,8 +154,6 @@ def calculate_available_value(instance):
 
 
 def update_balance_values(item):
-    from decimal import Decimal
-
     # OPTIMIZATION: Get all aggregated values in just 2 queries instead of 6
     agg_values = _get_aggregated_values(item)
 
@@ -203,3 +203,240 @@ def update_balance_values(item):
                 license=license,
                 defaults={'is_null': is_null},
             )
+
+
+# Stored balance columns recomputed by update_balance_values(_bulk).
+BALANCE_FIELDS = [
+    'available_quantity', 'debited_quantity', 'allotted_quantity',
+    'allotted_value', 'debited_value', 'available_value',
+]
+
+# Max import item ids per IN (...) clause / bulk_update batch.
+BULK_CHUNK_SIZE = 1000
+
+
+def _first_linked_items(item_ids):
+    """
+    {import item id: (sion_norm_class_id, restriction_percentage)} of the first
+    linked ItemNameModel, in ItemNameModel's default ordering (the same row
+    instance.items.first() returns).
+    """
+    from apps.license.models import LicenseImportItemsModel
+
+    first = {}
+    for row in (
+        LicenseImportItemsModel.items.through.objects
+        .filter(licenseimportitemsmodel_id__in=item_ids)
+        .order_by(
+            'licenseimportitemsmodel_id',
+            'itemnamemodel__display_order',
+            'itemnamemodel__group__name',
+            'itemnamemodel__name',
+        )
+        .values_list(
+            'licenseimportitemsmodel_id',
+            'itemnamemodel__sion_norm_class_id',
+            'itemnamemodel__restriction_percentage',
+        )
+    ):
+        first.setdefault(row[0], row[1:])
+    return first
+
+
+def _aggregated_values_bulk(item_ids):
+    """Set-based _get_aggregated_values(): {item id: {...}} in two grouped queries."""
+    from apps.allotment.models import AllotmentItems
+    from apps.bill_of_entry.models import RowDetails
+
+    debits = {
+        row['sr_number_id']: row
+        for row in RowDetails.objects.filter(sr_number_id__in=item_ids)
+        .values('sr_number_id')
+        .annotate(
+            debited_qty=Sum('qty', filter=Q(transaction_type=DEBIT)),
+            debited_value=Sum('cif_fc', filter=Q(transaction_type=DEBIT)),
+        )
+        .order_by()
+    }
+    allotments = {
+        row['item_id']: row
+        for row in AllotmentItems.objects.filter(item_id__in=item_ids)
+        .values('item_id')
+        .annotate(
+            aro_qty=Sum('qty', filter=Q(allotment__type='ARO')),
+            aro_value=Sum('cif_fc', filter=Q(allotment__type='ARO')),
+            allotted_qty=Sum('qty', filter=Q(allotment__bill_of_entry__isnull=True, allotment__type='AT')),
+            allotted_value=Sum('cif_fc', filter=Q(allotment__bill_of_entry__isnull=True, allotment__type='AT')),
+        )
+        .order_by()
+    }
+
+    result = {}
+    for item_id in item_ids:
+        debit = debits.get(item_id, {})
+        allot = allotments.get(item_id, {})
+        result[item_id] = {
+            'debited_qty': to_float(debit.get('debited_qty')),
+            'debited_value': to_float(debit.get('debited_value')),
+            'aro_qty': to_float(allot.get('aro_qty')),
+            'aro_value': to_float(allot.get('aro_value')),
+            'allotted_qty': to_float(allot.get('allotted_qty')),
+            'allotted_value': to_float(allot.get('allotted_value')),
+        }
+    return result
+
+
+def _serial_one_uses_license_balance(license_ids):
+    """
+    Licence ids where every import item other than serial number 1 has zero
+    CIF (and there is at least one such item): serial 1 then carries the
+    stored licence balance_cif as its available value.
+    """
+    from apps.license.models import LicenseImportItemsModel
+
+    others = {}
+    for license_id, cif_fc, cif_inr in (
+        LicenseImportItemsModel.objects.filter(license_id__in=license_ids)
+        .exclude(serial_number=1)
+        .values_list('license_id', 'cif_fc', 'cif_inr')
+    ):
+        zero = to_float(cif_fc) == 0 and to_float(cif_inr) == 0
+        others[license_id] = others.get(license_id, True) and zero
+    return {license_id for license_id, all_zero in others.items() if all_zero}
+
+
+def update_balance_values_bulk(item_ids):
+    """
+    Batched update_balance_values() for many import items.
+
+    Same values as calling update_balance_values() per item, but computed
+    from grouped aggregates: two for debits/allotments, one for linked item
+    names, four for the licence balances, plus one each for the serial-1
+    rule and the condition pools when they apply. Changed items are written
+    with one bulk_update per chunk, and licence is_null flags are synced
+    once per licence.
+
+    Returns:
+        Number of import items whose stored balances changed
+    """
+    from apps.core.cache_utils import invalidate_tags
+    from apps.core.signals_materialized_views import mark_dirty_on_commit
+    from apps.license.models import LicenseFlags, LicenseImportItemsModel
+    from apps.license.services.balance_calculator import LicenseBalanceCalculator
+    from apps.license.services.condition_pool import _parse_pct, compute_condition_pools_bulk
+
+    ids = [pk for pk in dict.fromkeys(item_ids) if pk]
+    changed_total = 0
+
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_CHUNK_SIZE]
+        rows = list(
+            LicenseImportItemsModel.objects.filter(pk__in=chunk).values(
+                'id', 'license_id', 'serial_number', 'quantity', 'old_quantity', 'condition_type',
+                'license__notification_number__code', 'license__balance__balance_cif',
+                'license__flags__is_null', *BALANCE_FIELDS,
+            )
+        )
+        if not rows:
+            continue
+
+        item_ids_found = [row['id'] for row in rows]
+        license_ids = list({row['license_id'] for row in rows if row['license_id']})
+        agg_by_item = _aggregated_values_bulk(item_ids_found)
+        first_items = _first_linked_items(item_ids_found)
+        balances = LicenseBalanceCalculator.calculate_balances_bulk(license_ids)
+        serial_one_licenses = _serial_one_uses_license_balance(
+            {row['license_id'] for row in rows if row['license_id'] and row['serial_number'] == 1}
+        )
+        pool_licenses = {
+            row['license_id'] for row in rows
+            if row['license_id'] and (row['condition_type'] or '').strip().endswith('%')
+        }
+        pools = compute_condition_pools_bulk(pool_licenses) if pool_licenses else {}
+
+        to_update = []
+        for row in rows:
+            agg = agg_by_item[row['id']]
+            license_id = row['license_id']
+
+            # available_quantity (calculate_available_quantity)
+            credit = to_float(row['quantity'])
+            sion_norm_class_id, restriction = first_items.get(row['id'], (None, None))
+            if sion_norm_class_id and (restriction or 0) > 0:
+                if row['old_quantity'] or row['license__notification_number__code'] == N2015:
+                    credit = to_float(row['old_quantity']) or to_float(row['quantity'])
+            available_quantity = max(round(round_down(
+                credit - (agg['debited_qty'] + agg['aro_qty']) - agg['allotted_qty'], 0
+            ), 2), 0)
+
+            # available_value (calculate_available_value)
+            stored_balance = row['license__balance__balance_cif']
+            if license_id in serial_one_licenses and row['serial_number'] == 1:
+                available_value = round(to_float(stored_balance), 2)
+            else:
+                available_value = round(balances[license_id]['balance'], 2) if license_id else 0
+
+            values = {
+                'available_quantity': available_quantity,
+                'debited_quantity': round(agg['debited_qty'] + agg['aro_qty'], 2),
+                'allotted_quantity': round(agg['allotted_qty'], 2),
+                'allotted_value': round(agg['allotted_value'], 2),
+                'debited_value': round(agg['debited_value'] + agg['aro_value'], 2),
+                'available_value': available_value,
+            }
+            current = {attr: row[attr] for attr in BALANCE_FIELDS}
+            is_changed = False
+            for attr, value in values.items():
+                if to_float(current[attr]) != float(value):
+                    current[attr] = value
+                    is_changed = True
+
+            # Cap available_value at balance_cif_fc (stored licence balance,
+            # or the condition pool remaining when that is lower).
+            balance_cif_fc = DEC_0
+            if license_id:
+                balance_cif_fc = stored_balance or DEC_0
+                condition = (row['condition_type'] or '').strip()
+                pct = _parse_pct(condition) if condition.endswith('%') else None
+                if pct is not None and pct > DEC_0:
+                    remaining = pools.get(license_id, {}).get(
+                        condition, balances[license_id]['credit'] * pct / Decimal('100')
+                    )
+                    balance_cif_fc = min(remaining, balance_cif_fc)
+            balance_cif_fc = Decimal(str(balance_cif_fc))
+            if Decimal(str(current['available_value'] or 0)) > balance_cif_fc:
+                current['available_value'] = balance_cif_fc
+                is_changed = True
+
+            if is_changed:
+                to_update.append(LicenseImportItemsModel(id=row['id'], license_id=license_id, **current))
+
+        if to_update:
+            LicenseImportItemsModel.objects.bulk_update(to_update, BALANCE_FIELDS, batch_size=BULK_CHUNK_SIZE)
+            changed_total += len(to_update)
+            # bulk_update fires no post_save; do what the item save signals did.
+            changed_licenses = {item.license_id for item in to_update if item.license_id}
+            mark_dirty_on_commit(license_ids=changed_licenses)
+            invalidate_tags('item_report', 'item_pivot', 'inventory_balance',
+                            *(f'license:{pk}' for pk in changed_licenses))
+
+        # Sync licence is_null (live balance < 100) once per licence.
+        stored_is_null = {row['license_id']: bool(row['license__flags__is_null']) for row in rows}
+        for license_id in license_ids:
+            is_null = balances[license_id]['balance'] < Decimal('100')
+            if stored_is_null[license_id] != is_null:
+                LicenseFlags.objects.update_or_create(license_id=license_id, defaults={'is_null': is_null})
+
+    return changed_total
+
+
+def update_balance_values_on_commit(item_ids):
+    """
+    Recompute import item balances once the transaction commits.
+
+    Every call within one transaction joins the same batch, so a save that
+    touches 30 rows of the same items runs update_balance_values_bulk once.
+    """
+    from apps.core.commit_batch import add_to_commit_batch
+
+    add_to_commit_batch('import_item_balances', item_ids, update_balance_values_bulk)
@@ -8,6 +8,7 @@ from .mixins import (
     EmptyStringNormalizerMixin,
     NestedValidationMixin,
     FormDataNestedMixin,
+    SparseFieldsetMixin,
 )
 
 from .fields import (
@@ -50,6 +51,7 @@ __all__ = [
     'EmptyStringNormalizerMixin',
     'NestedValidationMixin',
     'FormDataNestedMixin',
+    'SparseFieldsetMixin',
     # Fields
     'SafeDateField',
     'SafeDateTimeField',
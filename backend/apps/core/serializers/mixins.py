@@ -5,6 +5,7 @@ This module provides reusable mixins for DRF serializers including:
 - FormDataParserMixin: Handle multipart/form-data nested array parsing
 - NestedObjectNormalizerMixin: Extract IDs from nested objects
 - EmptyStringNormalizerMixin: Convert empty strings to None/Zero
+- SparseFieldsetMixin: Serialize only the fields a read request asks for
 """
 
 import json
@@ -13,6 +14,7 @@ import re
 from typing import Dict, List, Any, Optional
 
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 
 logger = logging.getLogger(__name__)
 
@@ -334,6 +336,77 @@ class NestedValidationMixin:
                         })
 
 
+class SparseFieldsetMixin:
+    """
+    Mixin letting a read request choose which fields get serialized.
+
+    - ``?fields=id,license_number,balance_cif``: only these fields
+    - ``?view=compact``: the serializer's ``compact_fields``
+
+    Unrequested fields are dropped in ``__init__``, so their
+    SerializerMethodFields and related lookups never run. Only the top-level
+    serializer of a GET request is trimmed; nested serializers and writes are
+    untouched. ``sparse_always_fields`` (the pk) are always kept.
+
+    ``sparse_field_relations`` maps a field to the ``select_related`` paths it
+    reads, so the view can trim its joins with ``relations_for()``.
+
+    Usage:
+        class MySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+            compact_fields = ['id', 'name', 'company_name']
+            sparse_field_relations = {'company_name': ['company']}
+
+        # in the view
+        wanted = MySerializer.requested_fields(self.request)
+        qs = qs.select_related(*MySerializer.relations_for(wanted, ['company', 'port']))
+    """
+
+    # Override in subclass - the fields served for ?view=compact
+    compact_fields: List[str] = []
+
+    # Override in subclass - field name -> select_related paths it needs
+    sparse_field_relations: Dict[str, List[str]] = {}
+
+    sparse_always_fields: List[str] = ['id']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Declared nested serializers are built without a context; only the
+        # serializer the view constructs sees the request here.
+        self.sparse_fields = self.requested_fields(self.context.get('request'))
+        if self.sparse_fields is not None:
+            for name in list(self.fields):
+                if name not in self.sparse_fields:
+                    self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request) -> Optional[set]:
+        """Field names asked for by ``request``, or None to serialize everything."""
+        if request is None or getattr(request, 'method', None) not in SAFE_METHODS:
+            return None
+        params = getattr(request, 'query_params', None) or {}
+        raw = params.get('fields')
+        if raw:
+            names = {name.strip() for name in raw.split(',') if name.strip()}
+        elif params.get('view') == 'compact' and cls.compact_fields:
+            names = set(cls.compact_fields)
+        else:
+            return None
+        return names | set(cls.sparse_always_fields)
+
+    @classmethod
+    def relations_for(cls, fields: Optional[set], relations: List[str]) -> List[str]:
+        """The subset of ``relations`` the requested ``fields`` read (all of them when not sparse)."""
+        if fields is None:
+            return list(relations)
+        needed = {path for name in fields for path in cls.sparse_field_relations.get(name, ())}
+        return [path for path in relations if path in needed]
+
+    def wants_field(self, name: str) -> bool:
+        """False when the request left ``name`` out of a sparse fieldset."""
+        return self.sparse_fields is None or name in self.sparse_fields
+
+
 # Combined mixin for common use case
 class FormDataNestedMixin(
     FormDataParserMixin,
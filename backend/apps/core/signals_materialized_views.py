@@ -3,20 +3,26 @@ Signal handlers for automatic materialized view refresh.
 
 Refreshes materialized views when underlying data changes.
 
-Note: These are trigger-based refreshes. For most use cases, scheduled
-Celery tasks are preferred to avoid refresh overhead on every save.
+license_balance_mv is maintained per licence: every change that can move a
+licence's balance queues that licence in the dirty-set after the
+transaction commits, and refresh_license_balance_task upserts only the
+queued licences. Marking is always on; it is a single idempotent INSERT.
+
+With AUTO_REFRESH_ENABLED, changes also request view refreshes through
+mv_refresh_scheduler (debounced, at most one running refresh per view). For
+most use cases, scheduled Celery tasks are preferred to avoid refresh
+overhead on every save.
 """
 
 import logging
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.db import transaction
 
-from apps.core.tasks_materialized_views import (
-    refresh_license_balance_task,
-    refresh_item_balance_task,
-    refresh_dashboard_stats_task
-)
+from apps.bill_of_entry.models import BillOfEntryModel
+from apps.core.commit_batch import add_to_commit_batch
+from apps.core.materialized_views import mark_license_balances_dirty
+from apps.core.mv_refresh_scheduler import request_refresh
 
 logger = logging.getLogger(__name__)
 
@@ -24,25 +30,59 @@ logger = logging.getLogger(__name__)
 AUTO_REFRESH_ENABLED = False
 
 
-def refresh_on_commit(task_func):
+def refresh_on_commit(view_name):
     """
-    Schedule a refresh task to run after transaction commits.
+    Request a refresh of view_name after the transaction commits.
 
-    This prevents refreshing mid-transaction and reduces unnecessary refreshes.
+    This prevents refreshing mid-transaction. Requests go through
+    mv_refresh_scheduler, which debounces them and coalesces back-to-back
+    requests for the same view into a single refresh.
     """
     if not AUTO_REFRESH_ENABLED:
         return
 
     def _refresh():
         try:
-            # Use apply_async with countdown to debounce rapid saves
-            task_func.apply_async(countdown=5)
+            request_refresh(view_name)
         except Exception as e:
-            logger.warning(f"Could not schedule refresh task: {e}")
+            logger.warning(f"Could not schedule refresh of {view_name}: {e}")
 
     transaction.on_commit(_refresh)
 
 
+def mark_dirty_on_commit(license_ids=(), item_ids=()):
+    """
+    Queue licences for the next license_balance_mv refresh once the
+    transaction commits.
+
+    Ids join the transaction's commit batches (apps.core.commit_batch), so
+    every licence is marked once per transaction however many rows touched it.
+
+    Args:
+        license_ids: Licence primary keys touched by the change
+        item_ids: Import item primary keys touched by the change; resolved to
+            their licences after commit so the save itself pays no extra query
+    """
+    add_to_commit_batch('license_balance_dirty', license_ids, _mark_licenses_dirty)
+    add_to_commit_batch('license_balance_dirty_items', item_ids, _mark_items_dirty)
+
+
+def _mark_licenses_dirty(license_ids):
+    try:
+        mark_license_balances_dirty(license_ids)
+    except Exception as e:
+        # The nightly/manual rebuild still covers anything missed here.
+        logger.warning(f"Could not mark license balances dirty: {e}")
+
+
+def _mark_items_dirty(item_ids):
+    from apps.license.models import LicenseImportItemsModel
+
+    _mark_licenses_dirty(set(
+        LicenseImportItemsModel.objects.filter(pk__in=item_ids).values_list('license_id', flat=True)
+    ))
+
+
 # ============================================================================
 # License Model Signals
 # ============================================================================
@@ -51,16 +91,32 @@ def refresh_on_commit(task_func):
 def refresh_views_on_license_change(sender, instance, **kwargs):
     """Refresh views when license is created/updated/deleted."""
     logger.debug(f"License change detected: {instance.license_number}")
-    refresh_on_commit(refresh_license_balance_task)
-    refresh_on_commit(refresh_dashboard_stats_task)
+    mark_dirty_on_commit(license_ids=[instance.pk])
+    refresh_on_commit('license_balance_mv')
+    refresh_on_commit('dashboard_stats_mv')
+
+
+@receiver(post_save, sender='license.LicenseFlags')
+def refresh_views_on_license_flags_change(sender, instance, **kwargs):
+    """Refresh views when a licence's flags (is_active) change."""
+    mark_dirty_on_commit(license_ids=[instance.license_id])
+    refresh_on_commit('license_balance_mv')
+
+
+@receiver([post_save, post_delete], sender='license.LicenseExportItemModel')
+def refresh_views_on_export_item_change(sender, instance, **kwargs):
+    """Refresh views when export items (licence credit) change."""
+    mark_dirty_on_commit(license_ids=[instance.license_id])
+    refresh_on_commit('license_balance_mv')
 
 
 @receiver([post_save, post_delete], sender='license.LicenseImportItemsModel')
 def refresh_views_on_import_item_change(sender, instance, **kwargs):
     """Refresh views when import items are created/updated/deleted."""
     logger.debug(f"Import item change detected: {instance.id}")
-    refresh_on_commit(refresh_item_balance_task)
-    refresh_on_commit(refresh_license_balance_task)
+    mark_dirty_on_commit(license_ids=[instance.license_id])
+    refresh_on_commit('item_balance_mv')
+    refresh_on_commit('license_balance_mv')
 
 
 # ============================================================================
@@ -75,9 +131,38 @@ def refresh_views_on_row_details_change(sender, instance, **kwargs):
     CRITICAL: This affects balance calculations!
     """
     logger.debug(f"Row details change detected: {instance.id}")
-    refresh_on_commit(refresh_item_balance_task)
-    refresh_on_commit(refresh_license_balance_task)
-    refresh_on_commit(refresh_dashboard_stats_task)
+    mark_dirty_on_commit(item_ids=[instance.sr_number_id])
+    refresh_on_commit('item_balance_mv')
+    refresh_on_commit('license_balance_mv')
+    refresh_on_commit('dashboard_stats_mv')
+
+
+@receiver(m2m_changed, sender=BillOfEntryModel.allotment.through)
+def refresh_views_on_boe_allotment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Refresh views when allotments are attached to / detached from a BOE.
+
+    Allotments only count against a licence until they are on a BOE.
+    """
+    from apps.allotment.models import AllotmentItems
+
+    if action == 'pre_clear':
+        # pk_set is None for clear(); remember what is about to be detached.
+        instance._mv_cleared = set(
+            getattr(instance, 'bill_of_entry' if reverse else 'allotment').values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    related = getattr(instance, '_mv_cleared', set()) if action == 'post_clear' else (pk_set or set())
+    if not related:
+        return
+    allotment_ids = {instance.pk} if reverse else set(related)
+    mark_dirty_on_commit(item_ids=AllotmentItems.objects.filter(
+        allotment_id__in=allotment_ids,
+    ).values_list('item_id', flat=True))
+    refresh_on_commit('item_balance_mv')
+    refresh_on_commit('license_balance_mv')
 
 
 # ============================================================================
@@ -92,8 +177,66 @@ def refresh_views_on_allotment_items_change(sender, instance, **kwargs):
     CRITICAL: This affects balance calculations!
     """
     logger.debug(f"Allotment items change detected: {instance.id}")
-    refresh_on_commit(refresh_item_balance_task)
-    refresh_on_commit(refresh_license_balance_task)
+    mark_dirty_on_commit(item_ids=[instance.item_id])
+    refresh_on_commit('item_balance_mv')
+    refresh_on_commit('license_balance_mv')
+
+
+# ============================================================================
+# Trade Signals
+# ============================================================================
+
+@receiver([post_save, post_delete], sender='trade.LicenseTradeLine')
+def refresh_views_on_trade_line_change(sender, instance, **kwargs):
+    """Refresh views when SALE trade lines (licence trade component) change."""
+    mark_dirty_on_commit(item_ids=[instance.sr_number_id])
+    refresh_on_commit('license_balance_mv')
+
+
+@receiver(pre_save, sender='trade.LicenseTrade')
+def snapshot_trade_boe(sender, instance, **kwargs):
+    """Remember the BOE a trade was linked to before this save."""
+    if kwargs.get('raw', False) or not instance.pk:
+        return
+    instance._mv_boe_id = sender.objects.filter(pk=instance.pk).values_list('boe_id', flat=True).first()
+
+
+def _mark_trade_dirty(instance, boe_ids, lines=True):
+    from apps.bill_of_entry.models import RowDetails
+
+    item_ids = set(instance.lines.values_list('sr_number_id', flat=True)) if lines else set()
+    boe_ids = {boe_id for boe_id in boe_ids if boe_id}
+    if boe_ids:
+        item_ids.update(
+            RowDetails.objects.filter(bill_of_entry_id__in=boe_ids).values_list('sr_number_id', flat=True)
+        )
+    mark_dirty_on_commit(item_ids=item_ids)
+    refresh_on_commit('license_balance_mv')
+
+
+@receiver(post_save, sender='trade.LicenseTrade')
+def refresh_views_on_trade_change(sender, instance, created, **kwargs):
+    """
+    Refresh views when a trade is created or its direction or BOE link changes.
+
+    Both decide whether the trade's lines and its BOE's rows count as trade
+    or debit, so every licence they touch is re-queued — including the rows
+    of the BOE the trade was moved away from or unlinked from. A new trade
+    has no lines yet, only the rows of the BOE it was created on.
+    """
+    if created:
+        _mark_trade_dirty(instance, [instance.boe_id], lines=False)
+        return
+    _mark_trade_dirty(instance, [getattr(instance, '_mv_boe_id', None), instance.boe_id])
+
+
+@receiver(post_delete, sender='trade.LicenseTrade')
+def refresh_views_on_trade_delete(sender, instance, **kwargs):
+    """
+    Refresh views when a trade is deleted: its BOE's rows count as debit
+    again. The cascaded lines queue their own licences.
+    """
+    _mark_trade_dirty(instance, [instance.boe_id], lines=False)
 
 
 # ============================================================================
@@ -25,3 +25,18 @@ def fetch_exchange_rates():
     except Exception as e:
         logger.exception("Exchange rate sync failed: %s", e)
         return {"success": False, "error": str(e)}
+
+
+@shared_task(name="core.tasks.drain_activity_log_spool")
+def drain_activity_log_spool():
+    """
+    Move spooled ActivityLog entries from the Redis stream into the database.
+
+    Only scheduled when settings.ACTIVITY_LOG_REDIS_STREAM is set.
+    """
+    from apps.core.activity_log_writer import drain_spool
+
+    written = drain_spool()
+    if written:
+        logger.info("Drained %d activity log entries from the spool", written)
+    return {"success": True, "written": written}
@@ -7,9 +7,11 @@ Scheduled tasks to keep materialized views fresh.
 from celery import shared_task
 from apps.core.materialized_views import (
     refresh_all_materialized_views,
+    refresh_license_balance_summary,
     refresh_materialized_view,
     get_materialized_view_stats
 )
+from apps.core.mv_refresh_scheduler import get_refresh_scheduler_stats, run_scheduled_refresh
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,10 +35,16 @@ def refresh_all_views_task():
 
 @shared_task
 def refresh_license_balance_task():
-    """Refresh only license balance view (faster, more frequent)."""
+    """
+    Refresh license_balance_mv rows for licences changed since the last run.
+
+    Only licences queued in the dirty-set are recomputed, so this is cheap
+    enough to run after every change (faster, more frequent).
+    """
     try:
-        refresh_materialized_view('license_balance_mv', concurrently=True)
-        logger.info("✓ Refreshed license_balance_mv")
+        refreshed = refresh_license_balance_summary()
+        logger.info(f"✓ Refreshed license_balance_mv ({refreshed} licences)")
+        return {'refreshed': refreshed}
     except Exception as e:
         logger.error(f"✗ Failed to refresh license_balance_mv: {e}")
         raise
@@ -64,12 +72,29 @@ def refresh_dashboard_stats_task():
         raise
 
 
+@shared_task
+def run_scheduled_refresh_task(view_name):
+    """
+    Debounced refresh of one view, enqueued by mv_refresh_scheduler.
+
+    Runs under the scheduler's single-flight lock; see request_refresh().
+    """
+    try:
+        outcome = run_scheduled_refresh(view_name)
+        logger.info(f"Scheduled refresh of {view_name}: {outcome}")
+        return {'view_name': view_name, 'outcome': outcome}
+    except Exception as e:
+        logger.error(f"✗ Scheduled refresh of {view_name} failed: {e}")
+        raise
+
+
 @shared_task
 def check_materialized_view_health():
     """
     Check health of materialized views and log warnings.
 
-    Can be scheduled daily to monitor view freshness.
+    Can be scheduled daily to monitor view freshness. Also reports the
+    refresh scheduler's queued / coalesced / executed counts per view.
     """
     try:
         stats = get_materialized_view_stats()
@@ -82,7 +107,16 @@ def check_materialized_view_health():
                 f"Rows: {stat['rows_inserted']}"
             )
 
-        return {'status': 'healthy', 'views_checked': len(stats)}
+        scheduler = get_refresh_scheduler_stats()
+        for entry in scheduler:
+            logger.info(
+                f"{entry['view_name']} refreshes: "
+                f"queued {entry['queued']}, "
+                f"coalesced {entry['coalesced']}, "
+                f"executed {entry['executed']}"
+            )
+
+        return {'status': 'healthy', 'views_checked': len(stats), 'scheduler': scheduler}
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {'status': 'unhealthy', 'error': str(e)}
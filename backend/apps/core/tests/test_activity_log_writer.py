@@ -0,0 +1,59 @@
+"""
+Tests for apps.core.activity_log_writer (batched, off-request ActivityLog writes).
+"""
+import threading
+
+from django.test import SimpleTestCase
+
+from apps.core.activity_log_writer import ActivityLogWriter
+
+
+class TestActivityLogWriter(SimpleTestCase):
+
+    def test_flushes_full_batches_and_the_rest_on_stop(self):
+        """Should write in batch_size chunks and flush the remainder at shutdown"""
+        batches = []
+        writer = ActivityLogWriter(batches.append, batch_size=3, flush_interval=60)
+
+        for n in range(7):
+            writer.enqueue({'n': n})
+        writer.stop()
+
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert [entry['n'] for batch in batches for entry in batch] == list(range(7))
+        assert writer.stats()['written'] == 7
+
+    def test_flushes_a_partial_batch_after_the_interval(self):
+        """Should not hold a partial batch longer than flush_interval"""
+        flushed = threading.Event()
+        writer = ActivityLogWriter(lambda batch: flushed.set(), batch_size=100, flush_interval=0.05)
+
+        writer.enqueue({'n': 1})
+
+        assert flushed.wait(2)
+        writer.stop()
+
+    def test_drops_and_counts_when_the_queue_stays_full(self):
+        """Should drop entries instead of blocking the request once the queue is full"""
+        release = threading.Event()
+        writer = ActivityLogWriter(lambda batch: release.wait(2), batch_size=1, flush_interval=60,
+                                   maxsize=1, enqueue_timeout=0.01)
+
+        results = [writer.enqueue({'n': n}) for n in range(5)]
+        release.set()
+        writer.stop()
+
+        assert not all(results)
+        assert writer.stats()['dropped'] == results.count(False)
+
+    def test_sink_errors_are_counted_not_raised(self):
+        """Should keep the writer alive when a batch fails to persist"""
+        def sink(batch):
+            raise RuntimeError('db down')
+
+        writer = ActivityLogWriter(sink, batch_size=2, flush_interval=60)
+        writer.enqueue({'n': 1})
+        writer.enqueue({'n': 2})
+        writer.stop()
+
+        assert writer.stats()['failed'] == 2
@@ -0,0 +1,63 @@
+"""
+Tests for tag/generation cache invalidation in apps.core.cache_utils.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.core import cache_utils
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class TestCacheTags(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bumping_a_tag_moves_only_its_keys(self):
+        """Should change keys that depend on the bumped tag and leave the rest alone"""
+        license_key = cache_utils.tagged_cache_key('view:license_list', ['license'])
+        boe_key = cache_utils.tagged_cache_key('view:boe_list', ['boe'])
+        assert cache_utils.tagged_cache_key('view:license_list', ['license']) == license_key
+
+        cache_utils.invalidate_tags('license')
+
+        assert cache_utils.tagged_cache_key('view:license_list', ['license']) != license_key
+        assert cache_utils.tagged_cache_key('view:boe_list', ['boe']) == boe_key
+
+    def test_cached_query_recomputes_after_invalidation(self):
+        """Should serve the cached result until one of its tags is invalidated"""
+        calls = []
+
+        @cache_utils.cache_query(key_prefix='license_balance', tags=lambda pk: [f'license:{pk}'])
+        def balance(pk):
+            calls.append(pk)
+            return len(calls)
+
+        assert balance(1) == 1
+        assert balance(1) == 1
+        cache_utils.invalidate_tags('license:2')
+        assert balance(1) == 1
+
+        cache_utils.invalidate_tags('license:1')
+        assert balance(1) == 2
+
+    def test_evicted_generation_does_not_resurrect_old_entries(self):
+        """Should start a re-created generation past every value handed out before"""
+        with patch.object(cache_utils.time, 'time_ns', return_value=1_000_000_000):
+            cache_utils.tagged_cache_key('view:license_list', ['license'])
+            cache_utils.invalidate_tags('license')
+            old_key = cache_utils.tagged_cache_key('view:license_list', ['license'])
+        cache.delete(cache_utils._generation_key('license'))
+
+        with patch.object(cache_utils.time, 'time_ns', return_value=1_000_010_000):
+            assert cache_utils.tagged_cache_key('view:license_list', ['license']) != old_key
+
+    def test_default_view_tags_follow_name_families(self):
+        """Should derive the same families the old view:<family>* patterns matched"""
+        assert cache_utils.default_view_tags('view:item_report') == ['item_report', 'item']
+        assert cache_utils.default_view_tags('LicenseDetailsViewSet') == ['license']
+        assert cache_utils.default_view_tags('BillOfEntryViewSet') == ['bill_of_entry']
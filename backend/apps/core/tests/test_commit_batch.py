@@ -0,0 +1,63 @@
+"""
+Tests for apps.core.commit_batch (per-transaction coalescing of post-commit jobs).
+"""
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+
+from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+from apps.core.commit_batch import add_to_commit_batch, get_commit_batch_stats, reset_commit_batch_stats
+from apps.license.models import LicenseDetailsModel, LicenseImportItemsModel
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ids_coalesce_into_one_call_at_commit():
+    reset_commit_batch_stats()
+    calls = []
+
+    with transaction.atomic():
+        for pk in (1, 2, 1, 3, 2):
+            add_to_commit_batch('test_batch', [pk], calls.append)
+        assert calls == []
+
+    assert calls == [{1, 2, 3}]
+    assert get_commit_batch_stats()['test_batch'] == {
+        'requested': 5, 'executed': 3, 'coalesced': 2, 'flushes': 1,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_batch_never_runs():
+    calls = []
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            add_to_commit_batch('test_batch', [1], calls.append)
+            raise RuntimeError
+
+    with transaction.atomic():
+        add_to_commit_batch('test_batch', [2], calls.append)
+
+    assert calls == [{2}]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_boe_rows_recalculate_exchange_rate_once():
+    license_obj = LicenseDetailsModel.objects.create(license_number="TEST-BATCH01")
+    items = [LicenseImportItemsModel.objects.create(license=license_obj, serial_number=n) for n in (1, 2, 3)]
+    boe = BillOfEntryModel.objects.create()
+    reset_commit_batch_stats()
+
+    with transaction.atomic():
+        for item in items:
+            RowDetails.objects.create(
+                bill_of_entry=boe, sr_number=item, cif_fc=Decimal("100.00"), cif_inr=Decimal("8500.00"),
+            )
+
+    boe.refresh_from_db()
+    assert boe.exchange_rate == Decimal("85")
+    stats = get_commit_batch_stats()
+    assert stats['boe_exchange_rates']['executed'] == 1
+    assert stats['boe_exchange_rates']['coalesced'] == 2
+    assert stats['import_item_balances']['executed'] == 3
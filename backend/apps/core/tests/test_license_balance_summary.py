@@ -0,0 +1,118 @@
+"""
+Tests for the per-licence license_balance_mv summary table.
+
+The summary must agree with LicenseBalanceCalculator, and a dirty-set refresh
+must only touch the licences that were queued.
+"""
+from decimal import Decimal
+
+import pytest
+
+from apps.allotment.models import AllotmentItems, AllotmentModel
+from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+from apps.core.models import CompanyModel
+from apps.core.materialized_views import (
+    get_license_balance,
+    mark_license_balances_dirty,
+    rebuild_license_balance_summary,
+    refresh_license_balance_summary,
+)
+from apps.license.models import (
+    LicenseDetailsModel,
+    LicenseExportItemModel,
+    LicenseImportItemsModel,
+)
+from apps.license.services.balance_calculator import LicenseBalanceCalculator
+from apps.trade.models import LicenseTrade
+
+
+def _make_license(suffix, credit):
+    license_obj = LicenseDetailsModel.objects.create(license_number=f"TEST-MV{suffix}")
+    LicenseExportItemModel.objects.create(license=license_obj, cif_fc=credit)
+    item = LicenseImportItemsModel.objects.create(license=license_obj, serial_number=1)
+    return license_obj, item
+
+
+@pytest.mark.django_db
+def test_summary_matches_calculator_without_row_fan_out():
+    license_obj, item = _make_license("01", Decimal("1000.00"))
+    boe = BillOfEntryModel.objects.create()
+    RowDetails.objects.create(bill_of_entry=boe, sr_number=item, cif_fc=Decimal("120.000"))
+    company = CompanyModel.objects.create(name="Test Co MV")
+    allotment = AllotmentModel.objects.create(company=company, item_name="Test Commodity")
+    # Two allotment rows and one BOE row on the same item: the old view
+    # counted every row once per row of the other table.
+    AllotmentItems.objects.create(allotment=allotment, item=item, cif_fc=Decimal("50.00"))
+    AllotmentItems.objects.create(allotment=allotment, item=item, cif_fc=Decimal("25.50"))
+
+    rebuild_license_balance_summary()
+
+    row = get_license_balance(license_obj.pk)
+    expected = LicenseBalanceCalculator.calculate_all_components(license_obj)
+    assert row['total_cif'] == expected['credit']
+    assert row['utilized_cif'] == expected['debit'] == Decimal("120.00")
+    assert row['allotted_cif'] == expected['allotment'] == Decimal("75.50")
+    assert row['balance_cif'] == expected['balance'] == Decimal("804.50")
+
+
+@pytest.mark.django_db
+def test_dirty_refresh_only_touches_queued_licences():
+    lic_a, _ = _make_license("02", Decimal("500.00"))
+    lic_b, _ = _make_license("03", Decimal("700.00"))
+    rebuild_license_balance_summary()
+
+    LicenseExportItemModel.objects.create(license=lic_a, cif_fc=Decimal("100.00"))
+    LicenseExportItemModel.objects.create(license=lic_b, cif_fc=Decimal("100.00"))
+    mark_license_balances_dirty([lic_a.pk, lic_a.pk])
+
+    assert refresh_license_balance_summary() == 1
+    assert get_license_balance(lic_a.pk)['balance_cif'] == Decimal("600.00")
+    assert get_license_balance(lic_b.pk)['balance_cif'] == Decimal("700.00")
+    assert refresh_license_balance_summary() == 0
+
+
+@pytest.mark.django_db
+def test_moving_a_trade_between_boes_requeues_both(django_capture_on_commit_callbacks):
+    lic_a, item_a = _make_license("04", Decimal("900.00"))
+    lic_b, item_b = _make_license("05", Decimal("800.00"))
+    boe_a, boe_b = BillOfEntryModel.objects.create(), BillOfEntryModel.objects.create()
+    RowDetails.objects.create(bill_of_entry=boe_a, sr_number=item_a, cif_fc=Decimal("100.000"))
+    RowDetails.objects.create(bill_of_entry=boe_b, sr_number=item_b, cif_fc=Decimal("200.000"))
+    seller = CompanyModel.objects.create(name="Test Co MV Seller")
+    buyer = CompanyModel.objects.create(name="Test Co MV Buyer")
+    trade = LicenseTrade.objects.create(direction="SALE", from_company=seller, to_company=buyer, boe=boe_a)
+    rebuild_license_balance_summary()
+    refresh_license_balance_summary()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        trade.boe = boe_b
+        trade.save()
+
+    # lic_a sits on the BOE the trade left; it must be re-queued too.
+    assert refresh_license_balance_summary() == 2
+    for license_obj in (lic_a, lic_b):
+        expected = LicenseBalanceCalculator.calculate_all_components(license_obj)
+        assert get_license_balance(license_obj.pk)['balance_cif'] == expected['balance']
+
+
+@pytest.mark.django_db
+def test_creating_and_deleting_a_trade_on_a_boe_requeues_its_rows(django_capture_on_commit_callbacks):
+    license_obj, item = _make_license("06", Decimal("900.00"))
+    boe = BillOfEntryModel.objects.create()
+    RowDetails.objects.create(bill_of_entry=boe, sr_number=item, cif_fc=Decimal("100.000"))
+    seller = CompanyModel.objects.create(name="Test Co MV Seller 2")
+    buyer = CompanyModel.objects.create(name="Test Co MV Buyer 2")
+    rebuild_license_balance_summary()
+    refresh_license_balance_summary()
+    assert get_license_balance(license_obj.pk)['balance_cif'] == Decimal("800.00")
+
+    # The BOE's rows stop counting as debit once a trade is linked to it.
+    with django_capture_on_commit_callbacks(execute=True):
+        trade = LicenseTrade.objects.create(direction="SALE", from_company=seller, to_company=buyer, boe=boe)
+    assert refresh_license_balance_summary() == 1
+    assert get_license_balance(license_obj.pk)['balance_cif'] == Decimal("900.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        trade.delete()
+    assert refresh_license_balance_summary() == 1
+    assert get_license_balance(license_obj.pk)['balance_cif'] == Decimal("800.00")
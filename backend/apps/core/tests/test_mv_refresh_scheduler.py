@@ -0,0 +1,59 @@
+"""
+Tests for apps.core.mv_refresh_scheduler (debounced, coalescing view refresh).
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.core import mv_refresh_scheduler as scheduler
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _stats(view_name):
+    return scheduler.get_refresh_scheduler_stats([view_name])[0]
+
+
+@override_settings(CACHES=LOCMEM)
+class TestRefreshScheduler(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_back_to_back_requests_collapse_into_one_task(self):
+        """Should enqueue one task for a burst of requests and count the rest as coalesced"""
+        with patch.object(scheduler, '_enqueue') as mock_enqueue:
+            results = [scheduler.request_refresh('item_balance_mv') for _ in range(5)]
+
+        assert results == [True, False, False, False, False]
+        mock_enqueue.assert_called_once_with('item_balance_mv')
+        stats = _stats('item_balance_mv')
+        assert (stats['queued'], stats['coalesced'], stats['executed']) == (5, 4, 0)
+        assert stats['pending'] is True
+
+    def test_run_clears_pending_and_counts_execution(self):
+        """Should refresh once and let the next change schedule a new refresh"""
+        with patch.object(scheduler, '_enqueue') as mock_enqueue, \
+             patch.object(scheduler, '_refresh') as mock_refresh:
+            scheduler.request_refresh('dashboard_stats_mv')
+            assert scheduler.run_scheduled_refresh('dashboard_stats_mv') == 'executed'
+            assert scheduler.request_refresh('dashboard_stats_mv') is True
+
+        mock_refresh.assert_called_once_with('dashboard_stats_mv')
+        assert mock_enqueue.call_count == 2
+        stats = _stats('dashboard_stats_mv')
+        assert stats['executed'] == 1
+        assert stats['running'] is False
+
+    def test_single_flight_defers_while_locked(self):
+        """Should not refresh in parallel when another refresh holds the lock"""
+        cache.add(scheduler._key('license_balance_mv', 'lock'), 'other-worker', 60)
+
+        with patch.object(scheduler, '_enqueue') as mock_enqueue, \
+             patch.object(scheduler, '_refresh') as mock_refresh:
+            assert scheduler.run_scheduled_refresh('license_balance_mv') == 'deferred'
+
+        mock_refresh.assert_not_called()
+        mock_enqueue.assert_called_once_with('license_balance_mv')
+        assert _stats('license_balance_mv')['deferred'] == 1
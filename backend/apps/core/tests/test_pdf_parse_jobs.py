@@ -0,0 +1,97 @@
+"""
+Tests for apps.core.pdf_parse_jobs (async parse-pdf jobs) and StageTimer.
+"""
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.pdf_parse_jobs import enqueue_parse_job, job_status_response, run_parse_job, save_upload
+from apps.core.utils.stage_timer import StageTimer
+
+
+class _FakeTask:
+    name = 'fake_parse_job'
+
+    def __init__(self):
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append((state, meta))
+
+    def apply_async(self, args, kwargs):
+        raise ConnectionError('broker down')
+
+
+class _FakeResult:
+
+    def __init__(self, name, state, result=None):
+        self.name, self.state, self.result, self.info = name, state, result, result
+
+
+class TestPdfParseJobs(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_override = override_settings(PDF_PARSE_UPLOAD_DIR=self.tmp.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_stage_timer_accumulates_and_announces(self):
+        """Should sum repeated stages and call on_stage as each one starts"""
+        started = []
+        timer = StageTimer(on_stage=started.append)
+
+        for name in ('ocr', 'matching', 'ocr'):
+            with timer.stage(name):
+                pass
+
+        assert started == ['ocr', 'matching', 'ocr']
+        assert set(timer.timings) == {'ocr', 'matching'}
+
+    def test_run_reports_progress_and_removes_the_upload(self):
+        """Should publish PROGRESS per stage and delete the stored file afterwards"""
+        path = save_upload(SimpleUploadedFile('copy.pdf', b'%PDF-1.4 test'))
+        task = _FakeTask()
+
+        def parse(source, timer):
+            with open(source, 'rb') as f:
+                assert f.read() == b'%PDF-1.4 test'
+            with timer.stage('digital_text'):
+                pass
+            with timer.stage('matching'):
+                pass
+            return 200, {'timings': timer.timings}
+
+        outcome = run_parse_job(task, path, parse)
+
+        assert outcome['status_code'] == 200
+        assert set(outcome['payload']['timings']) == {'digital_text', 'matching'}
+        assert [meta['stage'] for state, meta in task.states] == ['digital_text', 'matching']
+        assert {state for state, meta in task.states} == {'PROGRESS'}
+        assert not os.path.exists(path)
+
+    def test_upload_is_removed_when_queueing_fails(self):
+        """Should answer 503 and not leave the stored upload behind"""
+        response = enqueue_parse_job(_FakeTask(), SimpleUploadedFile('copy.pdf', b'%PDF'))
+
+        assert response.status_code == 503
+        assert os.listdir(self.tmp.name) == []
+
+    def test_status_of_another_task_is_not_found(self):
+        """Should answer 404 for ids of other tasks instead of reporting them"""
+        with patch('celery.result.AsyncResult', return_value=_FakeResult('other_task', 'SUCCESS', [1, 2])):
+            response = job_status_response('some-id', 'parse_license_pdf_job')
+
+        assert response.status_code == 404
+
+    def test_status_tolerates_a_non_dict_result(self):
+        """Should report SUCCESS without the payload rather than fail on an unexpected result"""
+        with patch('celery.result.AsyncResult', return_value=_FakeResult('parse_boe_pdf_job', 'SUCCESS', 'done')):
+            response = job_status_response('some-id', 'parse_boe_pdf_job')
+
+        assert response.status_code == 200
+        assert response.data == {'state': 'SUCCESS', 'status_code': None, 'result': None}
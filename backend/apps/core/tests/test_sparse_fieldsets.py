@@ -0,0 +1,72 @@
+"""
+Tests for apps.core.serializers.SparseFieldsetMixin (?fields= / ?view=compact).
+"""
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.core.serializers import SparseFieldsetMixin
+
+FACTORY = APIRequestFactory()
+
+
+class _Row:
+    id = 7
+    name = 'DFIA-1'
+    company = 'Acme'
+
+
+class _RowSerializer(SparseFieldsetMixin, serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    company_name = serializers.SerializerMethodField()
+
+    compact_fields = ['name']
+    sparse_field_relations = {'company_name': ['company']}
+
+    calls = 0
+
+    def get_company_name(self, obj):
+        type(self).calls += 1
+        return obj.company
+
+
+def _request(method='get', **params):
+    return Request(getattr(FACTORY, method)('/rows/', params))
+
+
+class TestSparseFieldsets(SimpleTestCase):
+
+    def setUp(self):
+        _RowSerializer.calls = 0
+
+    def test_fields_param_skips_unrequested_method_fields(self):
+        """Should serialize only the requested fields plus the pk"""
+        data = _RowSerializer([_Row()], many=True, context={'request': _request(fields='name,unknown')}).data
+
+        assert data == [{'id': 7, 'name': 'DFIA-1'}]
+        assert _RowSerializer.calls == 0
+
+    def test_compact_view_and_full_view(self):
+        """Should use compact_fields for ?view=compact and every field otherwise"""
+        compact = _RowSerializer(_Row(), context={'request': _request(view='compact')}).data
+        full = _RowSerializer(_Row(), context={'request': _request()}).data
+
+        assert set(compact) == {'id', 'name'}
+        assert set(full) == {'id', 'name', 'company_name'}
+
+    def test_writes_are_not_trimmed(self):
+        """Should keep every field on a non-GET request"""
+        serializer = _RowSerializer(context={'request': _request('post', fields='name')})
+
+        assert serializer.sparse_fields is None
+        assert set(serializer.fields) == {'id', 'name', 'company_name'}
+
+    def test_relations_follow_the_requested_fields(self):
+        """Should keep only the joins the requested fields read"""
+        relations = ['company', 'port']
+
+        assert _RowSerializer.relations_for(None, relations) == relations
+        assert _RowSerializer.relations_for({'id', 'name'}, relations) == []
+        assert _RowSerializer.relations_for({'id', 'company_name'}, relations) == ['company']
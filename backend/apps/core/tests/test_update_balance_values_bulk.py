@@ -0,0 +1,86 @@
+"""
+Tests for update_balance_values_bulk and the per-transaction balance batch.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.db import transaction
+
+from apps.allotment.models import AllotmentItems, AllotmentModel
+from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+from apps.core.models import CompanyModel
+from apps.core.scripts import calculate_balance
+from apps.core.scripts.calculate_balance import (
+    BALANCE_FIELDS,
+    update_balance_values,
+    update_balance_values_bulk,
+)
+from apps.license.models import (
+    LicenseDetailsModel,
+    LicenseExportItemModel,
+    LicenseImportItemsModel,
+)
+
+
+def _make_items(suffix):
+    license_obj = LicenseDetailsModel.objects.create(license_number=f"TEST-BULK{suffix}")
+    LicenseExportItemModel.objects.create(license=license_obj, cif_fc=Decimal("1000.00"))
+    first = LicenseImportItemsModel.objects.create(
+        license=license_obj, serial_number=1, quantity=Decimal("500.000"), cif_fc=Decimal("600.00"),
+    )
+    second = LicenseImportItemsModel.objects.create(
+        license=license_obj, serial_number=2, quantity=Decimal("300.000"), cif_fc=Decimal("400.00"),
+    )
+    boe = BillOfEntryModel.objects.create()
+    RowDetails.objects.create(bill_of_entry=boe, sr_number=first, qty=Decimal("40.000"), cif_fc=Decimal("120.00"))
+    company = CompanyModel.objects.create(name=f"Test Co Bulk {suffix}")
+    allotment = AllotmentModel.objects.create(company=company, item_name="Test Commodity", type="AT")
+    AllotmentItems.objects.create(allotment=allotment, item=second, qty=Decimal("10.000"), cif_fc=Decimal("55.00"))
+    return [first, second]
+
+
+def _stored(items):
+    return list(
+        LicenseImportItemsModel.objects.filter(pk__in=[i.pk for i in items])
+        .order_by('pk').values(*BALANCE_FIELDS)
+    )
+
+
+def _reset(items):
+    LicenseImportItemsModel.objects.filter(pk__in=[i.pk for i in items]).update(
+        **{field: 0 for field in BALANCE_FIELDS}
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_matches_per_item_update():
+    items = _make_items("01")
+    _reset(items)
+    for item in LicenseImportItemsModel.objects.filter(pk__in=[i.pk for i in items]):
+        update_balance_values(item)
+    expected = _stored(items)
+
+    _reset(items)
+    assert update_balance_values_bulk([i.pk for i in items]) == 2
+
+    assert _stored(items) == expected
+    assert expected[0]['debited_quantity'] == Decimal("40.000")
+    assert expected[1]['allotted_value'] == Decimal("55.00")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_row_saves_in_one_transaction_recompute_once():
+    items = _make_items("02")
+    boe = BillOfEntryModel.objects.create()
+
+    with patch.object(calculate_balance, 'update_balance_values_bulk') as mock_bulk:
+        with transaction.atomic():
+            for n in range(3):
+                RowDetails.objects.create(
+                    bill_of_entry=boe, sr_number=items[n % 2], transaction_type='C' if n == 2 else 'D',
+                    cif_fc=Decimal("1.00"),
+                )
+            mock_bulk.assert_not_called()
+
+    mock_bulk.assert_called_once_with({items[0].pk, items[1].pk})
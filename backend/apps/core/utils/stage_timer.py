@@ -0,0 +1,35 @@
+"""
+Wall-clock timing of the named stages of a multi-step job.
+
+Used by the PDF parsers and the async parse jobs to report where the time
+went (digital text, QR, OCR, item parse, matching):
+
+    timer = StageTimer(on_stage=lambda name: ...)
+    with timer.stage("digital_text"):
+        text = extract(pdf)
+    timer.timings  # {"digital_text": 0.412}
+
+A stage entered more than once accumulates its time.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+
+class StageTimer:
+    """Collects seconds spent per stage, optionally announcing each stage as it starts."""
+
+    def __init__(self, on_stage: Optional[Callable[[str], None]] = None):
+        self.timings: Dict[str, float] = {}
+        self._on_stage = on_stage
+
+    @contextmanager
+    def stage(self, name: str):
+        if self._on_stage is not None:
+            self._on_stage(name)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - started
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 3)
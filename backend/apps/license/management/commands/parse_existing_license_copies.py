@@ -20,6 +20,12 @@ Pass 2 – Norm-to-description rule (ALL licences)
       E126 → "Pickle"
       E132 → "Namkeen"
 
+PDF text is cached on disk by content hash (settings.DFIA_TEXT_CACHE_DIR), so
+a re-run only rasterises / OCRs documents it has not read before. With
+--workers N, PDFs are parsed in N worker processes while the main process
+applies the results. Finished documents are recorded in a progress file;
+--resume skips them after an interrupted run.
+
 Usage:
     python manage.py parse_existing_license_copies --list     # show status, no changes
     python manage.py parse_existing_license_copies --dry-run
@@ -27,13 +33,18 @@ Usage:
     python manage.py parse_existing_license_copies --norm-desc-only
     python manage.py parse_existing_license_copies --parse-only
     python manage.py parse_existing_license_copies            # live run
+    python manage.py parse_existing_license_copies --workers 8 --resume
 """
 from __future__ import annotations
 
 import logging
+import multiprocessing
+import os
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from decimal import Decimal, InvalidOperation
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
@@ -70,6 +81,22 @@ def _dec(val, default=DEC_0) -> Decimal:
         return default
 
 
+def _read_document(doc) -> bytes:
+    doc.file.open("rb")
+    try:
+        return doc.file.read()
+    finally:
+        doc.file.close()
+
+
+def _load_progress(path) -> set[int]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {int(line) for line in f if line.strip().isdigit()}
+    except OSError:
+        return set()
+
+
 class Command(BaseCommand):
     help = "Parse saved LICENSE COPY PDFs to fill missing licence data"
 
@@ -94,6 +121,28 @@ class Command(BaseCommand):
             "--parse-only", action="store_true",
             help="Only run Pass 1 (PDF parsing, skip norm→description update)",
         )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Parse PDFs in this many worker processes (default 1: in-process)",
+        )
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Skip documents already finished by a previous run (see --progress-file)",
+        )
+        parser.add_argument(
+            "--progress-file", type=str, default=None,
+            help="Where finished document ids are recorded "
+                 "(default: <DFIA_TEXT_CACHE_DIR>/parse_existing_license_copies.progress)",
+        )
+        parser.add_argument(
+            "--no-cache", action="store_true",
+            help="Neither read nor write the extracted-text cache",
+        )
+        parser.add_argument(
+            "--full-ocr", action="store_true",
+            help="OCR every page of scanned copies at full DPI instead of only the "
+                 "header and condition-sheet pages",
+        )
 
     # ── helpers ──────────────────────────────────────────────────────────────
 
@@ -171,6 +220,46 @@ class Command(BaseCommand):
             if count_with == 0:
                 self._warn(f"No LICENSE COPY document found for {single}")
 
+    def _parsed_documents(self, docs_qs, workers, cache_dir, full_ocr=False):
+        """
+        Yield (doc, parsed, error) for every document.
+
+        PDF bytes are read here (storage access stays in the main process);
+        parsing runs inline or in a process pool with at most 2 × workers
+        documents in flight, so memory stays bounded however many there are.
+        """
+        if workers <= 1:
+            for doc in docs_qs.iterator():
+                try:
+                    yield doc, parse_dfia_pdf(_read_document(doc), cache_dir=cache_dir, full_ocr=full_ocr), None
+                except Exception as exc:
+                    yield doc, None, exc
+            return
+
+        # Spawned (not forked) workers import only the parser: no Django
+        # setup and no inherited database connections.
+        docs = iter(list(docs_qs))
+        pending = {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            while True:
+                while len(pending) < workers * 2:
+                    doc = next(docs, None)
+                    if doc is None:
+                        break
+                    try:
+                        data = _read_document(doc)
+                    except Exception as exc:
+                        yield doc, None, exc
+                        continue
+                    pending[pool.submit(parse_dfia_pdf, data, cache_dir, full_ocr)] = doc
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    doc = pending.pop(future)
+                    exc = future.exception()
+                    yield doc, None if exc else future.result(), exc
+
 
     # ── main ─────────────────────────────────────────────────────────────────
 
@@ -207,39 +296,57 @@ class Command(BaseCommand):
             if single:
                 docs_qs = docs_qs.filter(license__license_number=single)
 
+            progress_path = options["progress_file"] or os.path.join(
+                settings.DFIA_TEXT_CACHE_DIR, "parse_existing_license_copies.progress"
+            )
+            done_ids = _load_progress(progress_path) if options["resume"] else set()
+            if done_ids:
+                docs_qs = docs_qs.exclude(pk__in=done_ids)
+                self._info(f"Resuming — {len(done_ids)} document(s) already done.")
+
             total = docs_qs.count()
             self._info(f"Found {total} LICENSE COPY document(s) to process.")
 
-            for i, doc in enumerate(docs_qs.iterator(), 1):
-                lic = doc.license
-                prefix = f"[{i}/{total}] {lic.license_number}"
-                try:
-                    doc.file.open("rb")
-                    parsed = parse_dfia_pdf(doc.file)
-                    doc.file.close()
-                except Exception as exc:
-                    self._err(f"{prefix} — parse failed: {exc}")
-                    stats["parse_fail"] += 1
-                    continue
-
-                if not parsed.get("license_number"):
-                    self._warn(f"{prefix} — parser returned no license_number, skipping")
-                    stats["parse_skip"] += 1
-                    continue
+            progress = None
+            if not dry:
+                os.makedirs(os.path.dirname(progress_path) or ".", exist_ok=True)
+                progress = open(progress_path, "a" if options["resume"] else "w", encoding="utf-8")
+
+            cache_dir = None if options["no_cache"] else settings.DFIA_TEXT_CACHE_DIR
+            try:
+                parsed_docs = self._parsed_documents(docs_qs, options["workers"], cache_dir, options["full_ocr"])
+                for i, (doc, parsed, error) in enumerate(parsed_docs, 1):
+                    lic = doc.license
+                    prefix = f"[{i}/{total}] {lic.license_number}"
+                    if error is not None:
+                        self._err(f"{prefix} — parse failed: {error}")
+                        stats["parse_fail"] += 1
+                        continue
 
-                stats["parsed"] += 1
-                if ((parsed.get("condition_sheet") or "").strip()):
-                    stats["cond_sheet_found"] += 1
-                    self._info(f"{prefix} — condition sheet: FOUND")
-                else:
-                    stats["cond_sheet_missing"] += 1
-                    self._warn(f"{prefix} — condition sheet: not found")
-                changes = self._apply_parse(lic, parsed, dry, stats, prefix)
-                if changes:
-                    stats["updated"] += 1
-                    self._ok(f"{prefix} — updated: {', '.join(changes)}")
-                else:
-                    self._info(f"{prefix} — nothing new to update")
+                    if not parsed.get("license_number"):
+                        self._warn(f"{prefix} — parser returned no license_number, skipping")
+                        stats["parse_skip"] += 1
+                    else:
+                        stats["parsed"] += 1
+                        if ((parsed.get("condition_sheet") or "").strip()):
+                            stats["cond_sheet_found"] += 1
+                            self._info(f"{prefix} — condition sheet: FOUND")
+                        else:
+                            stats["cond_sheet_missing"] += 1
+                            self._warn(f"{prefix} — condition sheet: not found")
+                        changes = self._apply_parse(lic, parsed, dry, stats, prefix)
+                        if changes:
+                            stats["updated"] += 1
+                            self._ok(f"{prefix} — updated: {', '.join(changes)}")
+                        else:
+                            self._info(f"{prefix} — nothing new to update")
+
+                    if progress is not None:
+                        progress.write(f"{doc.pk}\n")
+                        progress.flush()
+            finally:
+                if progress is not None:
+                    progress.close()
 
         # ── Pass 2: norm → description ───────────────────────────────────────
         if not parse_only:
@@ -0,0 +1,212 @@
+# license/management/commands/reclassify_license_items.py
+"""
+Re-classify every LicenseImportItemsModel against the current item_matcher
+rules and bring its ItemNameModel links in line.
+
+Use after adding or changing a rule in get_item_filters(). Unlike
+bulk_auto_link_license_items (one licence, unlinked items only) this walks
+the whole catalogue:
+
+- import items are streamed in keyset-paginated chunks (pk > last pk)
+- each chunk is classified by the compiled rule engine in a process pool
+- the result is diffed against the existing items.through rows
+- missing links are bulk_create'd, stale rule links bulk deleted
+
+Only links to rule-managed ItemNames ("<base_name> - <norm>" for a rule in
+get_item_filters()) are ever removed; manually linked names are left alone.
+Item names follow bulk_auto_link_license_items: the first licence norm the
+rule applies to.
+
+Usage:
+    python manage.py reclassify_license_items --dry-run
+    python manage.py reclassify_license_items --workers 8 --chunk-size 5000
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from apps.core.models import ItemNameModel
+from apps.license.models import LicenseExportItemModel, LicenseImportItemsModel
+from apps.license.utils.item_matcher import get_item_filters
+from apps.license.utils.item_rule_engine import classify_rows, get_compiled_item_rules
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-classify all licence import items with the item_matcher rules and "
+        "sync their ItemNameModel links (adds and removes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Do not write any changes; just report what would be added/removed.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Import items per keyset page / worker task (default: 2000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Classifier processes (default: CPU count; 1 = classify in-process).",
+        )
+        parser.add_argument(
+            "--no-remove",
+            action="store_true",
+            help="Only add missing links; keep rule links the current rules no longer produce.",
+        )
+
+    def handle(self, *args, **opts):
+        dry_run = bool(opts.get("dry_run"))
+        chunk_size = max(1, opts.get("chunk_size"))
+        workers = max(1, opts.get("workers"))
+        self.remove_stale = not opts.get("no_remove")
+        self.dry_run = dry_run
+
+        self.stdout.write("=" * 80)
+        self.stdout.write("Re-classifying licence import items")
+        self.stdout.write("=" * 80)
+        self.stdout.write(f"Dry run: {dry_run}  Workers: {workers}  Chunk size: {chunk_size}")
+
+        # Warm the compiled rules before forking so workers inherit them.
+        get_compiled_item_rules()
+
+        managed_names = {
+            f"{config['base_name']} - {norm}"
+            for config in get_item_filters()
+            for norm in config['norms']
+        }
+        self.name_index = {
+            name: (pk, norm)
+            for name, pk, norm in ItemNameModel.objects.filter(name__in=managed_names)
+            .values_list("name", "id", "sion_norm_class__norm_class")
+        }
+        self.managed_ids = [pk for pk, _ in self.name_index.values()]
+        self.stdout.write(
+            f"Rule-managed item names: {len(managed_names)} ({len(self.name_index)} exist in database)"
+        )
+
+        self.license_norms = {}
+        for license_id, norm in (
+            LicenseExportItemModel.objects.exclude(norm_class__isnull=True)
+            .order_by("license_id", "id")
+            .values_list("license_id", "norm_class__norm_class")
+        ):
+            norms = self.license_norms.setdefault(license_id, [])
+            if norm not in norms:
+                norms.append(norm)
+
+        total = LicenseImportItemsModel.objects.count()
+        self.stats = {"processed": 0, "matched": 0, "added": 0, "removed": 0}
+        started = time.monotonic()
+
+        if workers == 1:
+            for rows in self._iter_chunks(chunk_size):
+                self._apply(rows, classify_rows(rows))
+                self._report_progress(total, started)
+        else:
+            # Forked workers must not share the parent's DB socket.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for rows in self._iter_chunks(chunk_size):
+                    pending.append((rows, executor.submit(classify_rows, rows)))
+                    # Keep a bounded number of chunks in flight; apply in order.
+                    while len(pending) >= workers * 2:
+                        self._drain_one(pending, total, started)
+                while pending:
+                    self._drain_one(pending, total, started)
+
+        elapsed = time.monotonic() - started
+        verb = "Would add" if dry_run else "Added"
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Processed {self.stats['processed']} import items in {elapsed:.1f}s "
+            f"({self.stats['matched']} matched a rule)\n"
+            f"   - {verb} {self.stats['added']} links\n"
+            f"   - {'Would remove' if dry_run else 'Removed'} {self.stats['removed']} stale rule links"
+        ))
+
+    def _iter_chunks(self, chunk_size):
+        """Yield [(id, description, hs_code, norms), ...] pages ordered by pk."""
+        last_pk = 0
+        while True:
+            page = list(
+                LicenseImportItemsModel.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("id", "license_id", "description", "hs_code__hs_code")[:chunk_size]
+            )
+            if not page:
+                return
+            last_pk = page[-1][0]
+            yield [
+                (item_id, description, hs_code, self.license_norms.get(license_id, []))
+                for item_id, license_id, description, hs_code in page
+            ]
+
+    def _drain_one(self, pending, total, started):
+        rows, future = pending.popleft()
+        self._apply(rows, future.result())
+        self._report_progress(total, started)
+
+    def _apply(self, rows, classified):
+        """Diff one chunk's desired links against items.through and write the difference."""
+        Through = LicenseImportItemsModel.items.through
+        item_ids = [row[0] for row in rows]
+        norms_by_item = {row[0]: row[3] for row in rows}
+
+        desired = set()
+        for item_id, names in classified.items():
+            for name in names:
+                entry = self.name_index.get(name)
+                # Same guard as bulk_auto_link_license_items: the ItemName's
+                # norm class must be one of the licence's norms.
+                if entry and entry[1] in norms_by_item[item_id]:
+                    desired.add((item_id, entry[0]))
+
+        current = {
+            (item_id, name_id): pk
+            for pk, item_id, name_id in Through.objects.filter(
+                licenseimportitemsmodel_id__in=item_ids,
+                itemnamemodel_id__in=self.managed_ids,
+            ).values_list("pk", "licenseimportitemsmodel_id", "itemnamemodel_id")
+        }
+
+        to_add = desired - current.keys()
+        to_remove = [pk for key, pk in current.items() if key not in desired] if self.remove_stale else []
+
+        if not self.dry_run and (to_add or to_remove):
+            with transaction.atomic():
+                if to_add:
+                    Through.objects.bulk_create(
+                        [Through(licenseimportitemsmodel_id=i, itemnamemodel_id=n) for i, n in sorted(to_add)],
+                        ignore_conflicts=True,
+                    )
+                if to_remove:
+                    Through.objects.filter(pk__in=to_remove).delete()
+
+        self.stats["processed"] += len(rows)
+        self.stats["matched"] += len(classified)
+        self.stats["added"] += len(to_add)
+        self.stats["removed"] += len(to_remove)
+
+    def _report_progress(self, total, started):
+        processed = self.stats["processed"]
+        elapsed = max(time.monotonic() - started, 1e-6)
+        pct = (processed / total * 100) if total else 100.0
+        self.stdout.write(
+            f"  {processed}/{total} ({pct:.1f}%)  "
+            f"+{self.stats['added']} -{self.stats['removed']}  "
+            f"{processed / elapsed:.0f} items/s"
+        )
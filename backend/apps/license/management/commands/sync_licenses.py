@@ -23,7 +23,13 @@ from django.core.management.base import BaseCommand
 from django.db.models import Sum
 from django.db import transaction
 
-from apps.license.models import LicenseDetailsModel, LicenseImportItemsModel
+from apps.license.models import (
+    LicenseBalance,
+    LicenseDetailsModel,
+    LicenseFlags,
+    LicenseImportItemsModel,
+)
+from apps.license.services.balance_calculator import LicenseBalanceCalculator
 from apps.allotment.models import AllotmentItems
 from apps.bill_of_entry.models import RowDetails
 from apps.core.constants import DEBIT
@@ -96,7 +102,10 @@ class Command(BaseCommand):
         batch_num = 0
         for i in range(0, total_count, batch_size):
             batch_num += 1
-            batch_qs = qs[i:i + batch_size]
+            batch = list(qs.order_by('pk').select_related('balance', 'flags')[i:i + batch_size])
+            # One set-based balance computation per batch instead of four
+            # SUM queries per licence.
+            balances = LicenseBalanceCalculator.calculate_balances_bulk([lic.pk for lic in batch])
 
             self.stdout.write(
                 self.style.HTTP_INFO(
@@ -105,8 +114,8 @@ class Command(BaseCommand):
                 )
             )
 
-            for lic in batch_qs:
-                self._process_license(lic, stats, skip_items, dry_run)
+            for lic in batch:
+                self._process_license(lic, balances[lic.pk]['balance'], stats, skip_items, dry_run)
 
         # Final summary
         self.stdout.write("")
@@ -124,15 +133,16 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.SUCCESS("💾 All changes saved to database"))
 
-    def _process_license(self, lic, stats, skip_items, dry_run):
+    def _process_license(self, lic, actual_balance, stats, skip_items, dry_run):
         """Process a single license: update flags, balance, and items"""
         stats['licenses_processed'] += 1
 
-        fields_to_update = []
+        # balance_cif lives on LicenseBalance; the is_* flags on LicenseFlags.
+        balance_updates = {}
+        flag_updates = {}
 
-        # 1. Update balance_cif from authoritative property
+        # 1. Update balance_cif from the bulk-computed authoritative balance
         try:
-            actual_balance = lic.get_balance_cif
             current_balance = lic.balance_cif or Decimal('0')
 
             # Compare at 2 decimals to avoid micro-diffs
@@ -145,14 +155,12 @@ class Command(BaseCommand):
                         f"  {lic.license_number}: balance_cif {have} → {want}"
                     )
                 if not dry_run:
-                    lic.balance_cif = float(want)
-                    fields_to_update.append("balance_cif")
+                    balance_updates["balance_cif"] = want
                 stats['balance_updated'] += 1
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f"  ERROR calculating balance for {lic.license_number}: {e}")
             )
-            actual_balance = Decimal('0')
             want = Decimal('0')
 
         # 2. Update is_null flag (balance < $500 threshold)
@@ -164,8 +172,7 @@ class Command(BaseCommand):
                     f"  {lic.license_number}: is_null {lic.is_null} → {should_be_null}"
                 )
             if not dry_run:
-                lic.is_null = should_be_null
-                fields_to_update.append("is_null")
+                flag_updates["is_null"] = should_be_null
             stats['is_null_updated'] += 1
 
         # 3. Update is_expired flag (expiry date < today)
@@ -178,13 +185,14 @@ class Command(BaseCommand):
                         f"  {lic.license_number}: is_expired {lic.is_expired} → {should_be_expired}"
                     )
                 if not dry_run:
-                    lic.is_expired = should_be_expired
-                    fields_to_update.append("is_expired")
+                    flag_updates["is_expired"] = should_be_expired
                 stats['is_expired_updated'] += 1
 
-        # Save license updates
-        if fields_to_update and not dry_run:
-            lic.save(update_fields=fields_to_update)
+        # Save license updates (update() avoids re-triggering save signals)
+        if balance_updates and not dry_run:
+            LicenseBalance.objects.filter(license_id=lic.pk).update(**balance_updates)
+        if flag_updates and not dry_run:
+            LicenseFlags.objects.filter(license_id=lic.pk).update(**flag_updates)
 
         # 4. Update import item balances (if not skipped)
         if not skip_items:
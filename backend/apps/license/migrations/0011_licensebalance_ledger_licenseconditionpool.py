@@ -0,0 +1,52 @@
+# Generated by Django 6.0.4 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0010_licenseitemplan_item_name_licenseitemplan_unit_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='licensebalance',
+            name='allotment_total',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.00'), max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='licensebalance',
+            name='credit_total',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.00'), max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='licensebalance',
+            name='debit_total',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.00'), max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='licensebalance',
+            name='ledger_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='licensebalance',
+            name='trade_total',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.00'), max_digits=18),
+        ),
+        migrations.CreateModel(
+            name='LicenseConditionPool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('condition_type', models.CharField(max_length=8)),
+                ('used_cif', models.DecimalField(decimal_places=3, default=Decimal('0.00'), max_digits=18)),
+                ('license', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='condition_pools', to='license.licensedetailsmodel')),
+            ],
+            options={
+                'unique_together': {('license', 'condition_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+"""Add the normalised LicenseDetailsModel.license_number_key (digits only,
+zero-padded) with an index, and fill it for existing licences."""
+from django.db import migrations, models
+
+from apps.license.utils.license_number import normalize_license_number
+
+BATCH_SIZE = 2000
+
+
+def fill_license_number_key(apps, schema_editor):
+    LicenseDetailsModel = apps.get_model('license', 'LicenseDetailsModel')
+    batch = []
+    for pk, number in LicenseDetailsModel.objects.values_list('pk', 'license_number').iterator(chunk_size=BATCH_SIZE):
+        batch.append(LicenseDetailsModel(pk=pk, license_number_key=normalize_license_number(number)))
+        if len(batch) >= BATCH_SIZE:
+            LicenseDetailsModel.objects.bulk_update(batch, ['license_number_key'])
+            batch = []
+    if batch:
+        LicenseDetailsModel.objects.bulk_update(batch, ['license_number_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('license', '0011_licensebalance_ledger_licenseconditionpool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='licensedetailsmodel',
+            name='license_number_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(fill_license_number_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='licensedetailsmodel',
+            index=models.Index(fields=['license_number_key'], name='license_lic_license_f2ced5_idx'),
+        ),
+    ]
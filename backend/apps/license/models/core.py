@@ -8,7 +8,7 @@ from typing import Dict, Any, Optional
 
 from django.conf import settings
 from django.core.validators import RegexValidator, MinValueValidator
-from django.db import models, transaction
+from django.db import models
 from django.db.models import Count, Sum, DecimalField, Value
 from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save
@@ -18,6 +18,7 @@ from django.utils.functional import cached_property
 
 from apps.allotment.models import AllotmentItems
 from apps.bill_of_entry.models import RowDetails
+from apps.license.utils.license_number import normalize_license_number
 # Removed: from bill_of_entry.tasks import update_balance_values_task
 # Now using direct synchronous balance updates for better performance
 from apps.core.constants import (
@@ -111,6 +112,9 @@ class LicenseDetailsModel(AuditModel):
     )
 
     license_number = models.CharField(max_length=50, unique=True)
+    # normalize_license_number(license_number): digits only, zero-padded. Kept in
+    # sync by save(); used to match licence numbers spelt differently.
+    license_number_key = models.CharField(max_length=50, blank=True, default="", editable=False)
     license_date = models.DateField(null=True, blank=True)
     license_expiry_date = models.DateField(null=True, blank=True)
     file_number = models.CharField(max_length=30, null=True, blank=True)
@@ -145,6 +149,7 @@ class LicenseDetailsModel(AuditModel):
         ordering = ("license_expiry_date", "license_date")
         indexes = [
             models.Index(fields=['license_number']),
+            models.Index(fields=['license_number_key']),
             models.Index(fields=['file_number']),
             models.Index(fields=['exporter', 'license_date']),
             models.Index(fields=['port', 'license_date']),
@@ -156,6 +161,13 @@ class LicenseDetailsModel(AuditModel):
     def __str__(self) -> str:
         return self.license_number
 
+    def save(self, *args, **kwargs):
+        self.license_number_key = normalize_license_number(self.license_number)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "license_number" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "license_number_key"}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self) -> str:
         return reverse("license:licenses-detail", kwargs={"pk": self.pk})
 
@@ -1326,15 +1338,15 @@ class LicenseInwardOutwardModel(models.Model):
 @receiver(post_save, sender=LicenseImportItemsModel)
 def update_balance(sender, instance, **kwargs):
     """
-    After an import item is saved, update derived balances synchronously.
-    Use transaction.on_commit so the update sees committed DB state.
+    After an import item is saved, update derived balances once the
+    transaction commits (batched with every other item touched in it).
 
     Guards against infinite recursion by checking if balance fields changed.
     Also honours the per-thread suspend flag used by bulk serializer save
     operations — `_update_all_import_items_available_value` will run once at
     the end of the bulk save instead of 38 times per item via this on_commit.
     """
-    from apps.core.scripts.calculate_balance import update_balance_values
+    from apps.core.scripts.calculate_balance import update_balance_values_on_commit
     from apps.license.signals import _flags_suspended
 
     # Bulk serializer operation in progress — skip the per-item on_commit
@@ -1353,16 +1365,7 @@ def update_balance(sender, instance, **kwargs):
         if set(update_fields).issubset(balance_fields):
             return
 
-    def _job():
-        try:
-            update_balance_values(instance)
-        except Exception:
-            pass
-
-    try:
-        transaction.on_commit(_job)
-    except Exception:
-        _job()
+    update_balance_values_on_commit([instance.pk])
 
     # Auto-tag blank items using a predefined filter list (lazy import)
     try:
@@ -1749,12 +1752,42 @@ class LicenseBalance(models.Model):
     )
     ledger_date = models.DateField(null=True, blank=True)
 
+    # Write-through ledger (apps.license.services.balance_ledger). Raw,
+    # unclamped component totals maintained by signed deltas from the licence
+    # signals; balance_cif is derived from them in the same UPDATE. Only
+    # trusted once seeded by a full recompute (ledger_synced_at set).
+    credit_total = models.DecimalField(max_digits=18, decimal_places=3, default=DEC_0)
+    debit_total = models.DecimalField(max_digits=18, decimal_places=3, default=DEC_0)
+    allotment_total = models.DecimalField(max_digits=18, decimal_places=3, default=DEC_0)
+    trade_total = models.DecimalField(max_digits=18, decimal_places=3, default=DEC_0)
+    ledger_synced_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         indexes = [
             models.Index(fields=["balance_cif"]),
         ]
 
 
+class LicenseConditionPool(models.Model):
+    """Running usage counter for one "N%" condition pool on a licence.
+
+    used_cif mirrors the `used` term of condition_pool.compute_condition_pools
+    (BOE debits + un-BOE'd allotments + trade lines for every item sharing the
+    condition_type). The pool size is derived from LicenseBalance.credit_total
+    at read time, so export-side changes need no pool write.
+    """
+    license = models.ForeignKey(
+        LicenseDetailsModel,
+        on_delete=models.CASCADE,
+        related_name="condition_pools",
+    )
+    condition_type = models.CharField(max_length=8)
+    used_cif = models.DecimalField(max_digits=18, decimal_places=3, default=DEC_0)
+
+    class Meta:
+        unique_together = (("license", "condition_type"),)
+
+
 class LicenseFlags(models.Model):
     """Boolean status flags for a license. Extracted so wide writes to flags
     don't touch the main license row.
@@ -14,20 +14,47 @@ Three ingestion paths, tried in order:
      installed; if either is missing OCR is skipped and the parser degrades
      gracefully (cover-page metadata only).
 
+OCR of scanned PDFs is page-targeted: only the first page(s), which hold the
+header fields, and the last page(s), which hold the condition sheet, are
+rasterised — first at a fast DPI, re-rendered at full DPI only when a page
+reads poorly — and header OCR stops as soon as the required header fields
+are found. Rendered pages are shared by the QR decode and the OCR. Pass
+`full_ocr=True` to OCR every page at full DPI instead. With a `cache_dir`, the extracted text is
+cached on disk keyed by the SHA-256 of the PDF bytes, so re-parsing the same
+document skips extraction entirely.
+
 Field regexes match both digital (English/Hindi bilingual) and OCR'd
 (English-only with typical OCR confusions) layouts.
 """
 from __future__ import annotations
 
+import hashlib
 import io
+import json
+import os
 import re
+import tempfile
 from datetime import datetime
 from typing import Any
 from urllib.parse import urljoin
 
 from pypdf import PdfReader
 
+from apps.core.utils.stage_timer import StageTimer
+
 _MIN_TEXT_CHARS = 800  # below this we treat the PDF as scanned
+_RASTER_DPI = 300
+
+# Targeted OCR: pages read for the header (from the front) and for the
+# condition sheet (from the back), the fast first-pass DPI, and the amount of
+# text below which a condition-sheet page is re-read at _RASTER_DPI.
+_OCR_HEADER_PAGES = 2
+_OCR_CONDITION_PAGES = 3
+_OCR_FAST_DPI = 200
+_OCR_MIN_PAGE_CHARS = 400
+
+# Bump when text extraction changes so stale cache entries are ignored.
+_TEXT_CACHE_VERSION = 2
 
 # Hosts we will follow QR links to (defence in depth — we don't want a
 # malicious uploaded PDF to coerce the server into making arbitrary outbound
@@ -571,42 +598,67 @@ def _digital_text(pdf_bytes: bytes) -> str:
     return "\n".join((p.extract_text() or "") for p in reader.pages)
 
 
-def _ocr_text(pdf_bytes: bytes) -> str:
-    """OCR fallback for scanned PDFs. Returns empty string if OCR tools missing."""
+def _rasterize(pdf_bytes: bytes, dpi: int = _RASTER_DPI, first_page: int | None = None,
+               last_page: int | None = None) -> list:
+    """Render pages (all by default) at `dpi`. Empty list if pdf2image/poppler is unavailable."""
     try:
         from pdf2image import convert_from_bytes
+    except ImportError:
+        return []
+    try:
+        return convert_from_bytes(pdf_bytes, dpi=dpi, first_page=first_page, last_page=last_page)
+    except Exception:
+        return []
+
+
+def _page_count(pdf_bytes: bytes) -> int | None:
+    """Number of pages, or None if pypdf cannot read the page tree."""
+    try:
+        return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception:
+        return None
+
+
+def _ocr_image(img) -> str:
+    try:
         import pytesseract
     except ImportError:
         return ""
     try:
-        images = convert_from_bytes(pdf_bytes, dpi=300)
+        return pytesseract.image_to_string(img, lang="eng")
     except Exception:
         return ""
-    parts = []
-    for img in images:
-        try:
-            parts.append(pytesseract.image_to_string(img, lang="eng"))
-        except Exception:
-            continue
-    return "\n".join(parts)
 
 
-def _decode_qr_urls(pdf_bytes: bytes) -> list[str]:
+def _ocr_text(pdf_bytes: bytes, images: list | None = None) -> str:
+    """Full-document OCR (every page). Returns empty string if OCR tools missing.
+
+    Pass `images` (from _rasterize) to reuse pages already rendered for the
+    QR decode instead of rasterising the PDF again.
+    """
+    try:
+        import pytesseract  # noqa: F401
+    except ImportError:
+        return ""
+    if images is None:
+        images = _rasterize(pdf_bytes)
+    return "\n".join(part for part in (_ocr_image(img) for img in images) if part)
+
+
+def _decode_qr_urls(pdf_bytes: bytes, images: list | None = None) -> list[str]:
     """Scan PDF pages for QR codes and return any decoded URLs.
 
     Returns an empty list if pyzbar/pdf2image aren't installed or no QR is
-    found. Scanning is best-effort and never raises.
+    found. Scanning is best-effort and never raises. Pass `images` to reuse
+    already rendered pages.
     """
     try:
-        from pdf2image import convert_from_bytes
         from pyzbar.pyzbar import decode as zbar_decode
     except ImportError:
         return []
     urls: list[str] = []
-    try:
-        images = convert_from_bytes(pdf_bytes, dpi=300)
-    except Exception:
-        return []
+    if images is None:
+        images = _rasterize(pdf_bytes)
     for img in images:
         try:
             for code in zbar_decode(img):
@@ -655,34 +707,187 @@ def _fetch_dgft_pdf_from_qr(qr_url: str) -> bytes | None:
         return None
 
 
-def _full_text(source) -> tuple[str, str]:
+def content_hash(pdf_bytes: bytes) -> str:
+    """SHA-256 hex digest of a PDF's bytes — the text cache key."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _cache_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, digest[:2], f"{digest}.json")
+
+
+def _read_text_cache(cache_dir: str, digest: str) -> tuple[str, str] | None:
+    try:
+        with open(_cache_path(cache_dir, digest), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("version") != _TEXT_CACHE_VERSION:
+        return None
+    return entry.get("text", ""), entry.get("source_kind", "empty")
+
+
+def _write_text_cache(cache_dir: str, digest: str, text: str, source_kind: str) -> None:
+    """Write atomically (temp file + rename) so concurrent workers never see a partial entry."""
+    path = _cache_path(cache_dir, digest)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": _TEXT_CACHE_VERSION, "source_kind": source_kind, "text": text}, f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _header_complete(text: str) -> bool:
+    """True once the OCR text yields the header fields parse_dfia_pdf needs."""
+    text = _normalize(text)
+    return bool(
+        _LICENSE_NUMBER_RX.search(text)
+        and _IMPORT_VALIDITY_RX.search(text)
+        and _find_iec_near_label(text)
+    )
+
+
+class _PageRenderer:
+    """Renders single pages on demand and keeps them for reuse (QR, OCR, re-reads)."""
+
+    def __init__(self, pdf_bytes: bytes):
+        self.pdf_bytes = pdf_bytes
+        self._pages: dict[tuple[int, int], Any] = {}
+
+    def render(self, page_no: int, dpi: int):
+        key = (page_no, dpi)
+        if key not in self._pages:
+            images = _rasterize(self.pdf_bytes, dpi=dpi, first_page=page_no, last_page=page_no)
+            self._pages[key] = images[0] if images else None
+        return self._pages[key]
+
+    def ocr(self, page_no: int, good_enough) -> str:
+        """OCR a page at the fast DPI; re-read it at full DPI if good_enough(text) fails."""
+        img = self.render(page_no, _OCR_FAST_DPI)
+        text = _ocr_image(img) if img is not None else ""
+        if good_enough(text):
+            return text
+        img = self.render(page_no, _RASTER_DPI)
+        retry = _ocr_image(img) if img is not None else ""
+        return retry if len(retry.strip()) >= len(text.strip()) else text
+
+
+def _targeted_pages(page_count: int) -> tuple[list[int], list[int]]:
+    """(header pages from the front, condition-sheet pages from the back, last first)."""
+    header = list(range(1, min(page_count, _OCR_HEADER_PAGES) + 1))
+    condition = [
+        n for n in range(page_count, max(page_count - _OCR_CONDITION_PAGES, 0), -1)
+        if n not in header
+    ]
+    return header, condition
+
+
+def _targeted_ocr_text(renderer: _PageRenderer, header_pages: list[int], condition_pages: list[int]) -> str:
+    """OCR the header pages until the header is complete, then the condition-sheet pages."""
+    header_parts: list[str] = []
+    for n in header_pages:
+        header_parts.append(renderer.ocr(n, lambda t: bool(_LICENSE_NUMBER_RX.search(_normalize(t)))))
+        if _header_complete("\n".join(header_parts)):
+            break
+    if "CONDITION SHEET" in "\n".join(header_parts):
+        return "\n".join(header_parts)
+
+    # The condition sheet runs to the end of the document: walk back from the
+    # last page until the page carrying its heading has been read.
+    condition_parts: list[str] = []
+    for n in condition_pages:
+        page_text = renderer.ocr(
+            n, lambda t: "CONDITION SHEET" in t or len(t.strip()) >= _OCR_MIN_PAGE_CHARS
+        )
+        condition_parts.insert(0, page_text)
+        if "CONDITION SHEET" in page_text:
+            break
+    return "\n".join(header_parts + condition_parts)
+
+
+def _extract_text(pdf_bytes: bytes, full_ocr: bool = False,
+                  timer: StageTimer | None = None) -> tuple[str, str]:
+    timer = timer or StageTimer()
+    with timer.stage("digital_text"):
+        text = _digital_text(pdf_bytes)
+    if len(text.strip()) >= _MIN_TEXT_CHARS:
+        return text, "digital"
+
+    # Without a page count the targeted pages cannot be picked (pypdf could
+    # not open the scan, though poppler may), so OCR the whole document.
+    page_count = None if full_ocr else _page_count(pdf_bytes)
+    full_ocr = page_count is None
+
+    with timer.stage("qr"):
+        if full_ocr:
+            # Render every page once for both the QR decode and the OCR.
+            images = _rasterize(pdf_bytes)
+            qr_images = images
+        else:
+            renderer = _PageRenderer(pdf_bytes)
+            header_pages, condition_pages = _targeted_pages(page_count)
+            # The DGFT QR sits on the first or the last page; both are read by
+            # the targeted OCR anyway, so rendering them here costs nothing extra.
+            qr_pages = header_pages[:1] + condition_pages[:1]
+            qr_images = [img for img in (renderer.render(n, _OCR_FAST_DPI) for n in qr_pages) if img is not None]
+
+        # Scanned upload — try the DGFT QR fast-path first because it yields
+        # an authoritative digital PDF.
+        for url in _decode_qr_urls(pdf_bytes, qr_images):
+            downloaded = _fetch_dgft_pdf_from_qr(url)
+            if not downloaded:
+                continue
+            dgft_text = _digital_text(downloaded)
+            if len(dgft_text.strip()) >= _MIN_TEXT_CHARS:
+                return dgft_text, "dgft_qr"
+
+    # OCR fallback — useful only for the header fields and the condition
+    # sheet. The items table rarely OCRs cleanly enough to parse.
+    with timer.stage("ocr"):
+        if full_ocr:
+            ocr = _ocr_text(pdf_bytes, images)
+        else:
+            ocr = _targeted_ocr_text(renderer, header_pages, condition_pages)
+    if len(ocr.strip()) > len(text.strip()):
+        return ocr, "ocr"
+    return text, "empty" if not text.strip() else "digital"
+
+
+def _full_text(source, cache_dir: str | None = None, full_ocr: bool = False,
+               timer: StageTimer | None = None) -> tuple[str, str]:
     """Return (text, source_kind). source_kind is one of:
         - "digital"   : text came from pypdf directly
         - "dgft_qr"   : QR was decoded, digital PDF downloaded from DGFT, text from pypdf
         - "ocr"       : neither QR nor digital text worked — OCR fallback used
         - "empty"     : nothing usable
+
+    With `cache_dir`, results are cached by content hash (and OCR mode).
+    "empty" results are not cached, so a later run with OCR tools installed
+    can still succeed. `timer` receives the time spent per extraction stage.
     """
+    timer = timer or StageTimer()
     pdf_bytes = _read_bytes(source)
-    text = _digital_text(pdf_bytes)
-    if len(text.strip()) >= _MIN_TEXT_CHARS:
-        return text, "digital"
+    if not cache_dir:
+        return _extract_text(pdf_bytes, full_ocr=full_ocr, timer=timer)
 
-    # Scanned upload — try the DGFT QR fast-path first because it yields
-    # an authoritative digital PDF.
-    for url in _decode_qr_urls(pdf_bytes):
-        downloaded = _fetch_dgft_pdf_from_qr(url)
-        if not downloaded:
-            continue
-        dgft_text = _digital_text(downloaded)
-        if len(dgft_text.strip()) >= _MIN_TEXT_CHARS:
-            return dgft_text, "dgft_qr"
-
-    # OCR fallback — useful only for the header fields. The items table
-    # rarely OCRs cleanly enough to parse.
-    ocr = _ocr_text(pdf_bytes)
-    if len(ocr.strip()) > len(text.strip()):
-        return ocr, "ocr"
-    return text, "empty" if not text.strip() else "digital"
+    digest = content_hash(pdf_bytes) + ("-full" if full_ocr else "")
+    with timer.stage("text_cache"):
+        cached = _read_text_cache(cache_dir, digest)
+    if cached is not None:
+        return cached
+    text, source_kind = _extract_text(pdf_bytes, full_ocr=full_ocr, timer=timer)
+    if source_kind != "empty":
+        _write_text_cache(cache_dir, digest, text, source_kind)
+    return text, source_kind
 
 
 def _parse_items(text: str) -> list[dict[str, Any]]:
@@ -858,7 +1063,8 @@ def _parse_items(text: str) -> list[dict[str, Any]]:
     return rows
 
 
-def parse_dfia_pdf(source) -> dict[str, Any]:
+def parse_dfia_pdf(source, cache_dir: str | None = None, full_ocr: bool = False,
+                   timer: StageTimer | None = None) -> dict[str, Any]:
     """
     Parse a DFIA licence PDF into a flat dict of extracted fields plus an
     `items` list. Dates are converted to ISO YYYY-MM-DD.
@@ -870,8 +1076,18 @@ def parse_dfia_pdf(source) -> dict[str, Any]:
         - "ocr"      — OCR fallback (items table likely empty)
         - "empty"    — no usable text found
     Also exposes `is_ocr` for backward compatibility.
+
+    `cache_dir` enables the on-disk text cache (see _full_text). Scanned
+    PDFs get page-targeted OCR unless `full_ocr` is set. Pass a StageTimer
+    to collect per-stage timings (digital_text, qr, ocr, item_parse).
     """
-    raw_text, source_kind = _full_text(source)
+    timer = timer or StageTimer()
+    raw_text, source_kind = _full_text(source, cache_dir=cache_dir, full_ocr=full_ocr, timer=timer)
+    with timer.stage("item_parse"):
+        return _parse_fields(raw_text, source_kind)
+
+
+def _parse_fields(raw_text: str, source_kind: str) -> dict[str, Any]:
     text = _normalize(raw_text)
     used_ocr = source_kind == "ocr"
 
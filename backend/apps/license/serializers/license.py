@@ -5,7 +5,7 @@ from typing import Any, Dict, Iterable
 from rest_framework import serializers
 
 from apps.core.models import ItemNameModel, ProductDescriptionModel, SchemeCode, NotificationNumber
-from apps.core.serializers import HSCodeSerializer, SionNormClassNestedSerializer
+from apps.core.serializers import SparseFieldsetMixin
 from apps.core.serializers.fields import IndianDateField
 from apps.license.serializers._license_write import LicenseWriteMixin  # write-path mixin
 from apps.license.models import (
@@ -57,7 +57,7 @@ class SafeDateTimeField(serializers.DateTimeField):
 
 
 class LicenseExportItemSerializer(serializers.ModelSerializer):
-    norm_class_detail = SionNormClassNestedSerializer(source='norm_class', read_only=True)
+    norm_class_detail = serializers.SerializerMethodField()
     norm_class_label = serializers.SerializerMethodField()
     item_label = serializers.SerializerMethodField()
     unit = serializers.CharField(required=False, allow_blank=True, default='kg')
@@ -97,19 +97,18 @@ class LicenseExportItemSerializer(serializers.ModelSerializer):
             validated_data['unit'] = 'kg'
         return super().update(instance, validated_data)
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        # Add norm_class nested data for display
-        if instance.norm_class:
-            representation['norm_class_detail'] = {
-                'id': instance.norm_class.id,
-                'norm_class': instance.norm_class.norm_class,
-                'description': instance.norm_class.description
-            }
-        return representation
+    def get_norm_class_detail(self, obj):
+        """norm_class nested data for display"""
+        if not obj.norm_class:
+            return None
+        return {
+            'id': obj.norm_class.id,
+            'norm_class': obj.norm_class.norm_class,
+            'description': obj.norm_class.description
+        }
 
 
-class LicenseImportItemSerializer(serializers.ModelSerializer):
+class LicenseImportItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     @staticmethod
     def _cached_float(obj, key: str, calculator) -> float:
         """Run *calculator(obj)*, cache the result on the instance, return it as float."""
@@ -131,7 +130,7 @@ class LicenseImportItemSerializer(serializers.ModelSerializer):
     notification_number = serializers.SlugRelatedField(source="license.notification_number", slug_field="code", read_only=True)
     exporter_name = serializers.CharField(source="license.exporter.name", read_only=True, allow_null=True)
     notes = serializers.CharField(source="license.balance_report_notes", read_only=True, allow_null=True, allow_blank=True)
-    hs_code_detail = HSCodeSerializer(source='hs_code', read_only=True)
+    hs_code_detail = serializers.SerializerMethodField()
     hs_code_label = serializers.SerializerMethodField()
 
     # Calculate at runtime instead of reading from database
@@ -192,6 +191,16 @@ class LicenseImportItemSerializer(serializers.ModelSerializer):
 
         return items_data
 
+    def get_hs_code_detail(self, obj):
+        """hs_code nested data for display"""
+        if not obj.hs_code:
+            return None
+        return {
+            'id': obj.hs_code.id,
+            'hs_code': obj.hs_code.hs_code,
+            'product_description': obj.hs_code.product_description
+        }
+
     def get_hs_code_label(self, obj):
         if obj.hs_code:
             return f"{obj.hs_code.hs_code}"
@@ -238,17 +247,6 @@ class LicenseImportItemSerializer(serializers.ModelSerializer):
         """
         return float(obj.available_value or 0)
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        # Add hs_code nested data for display
-        if instance.hs_code:
-            representation['hs_code_detail'] = {
-                'id': instance.hs_code.id,
-                'hs_code': instance.hs_code.hs_code,
-                'product_description': instance.hs_code.product_description
-            }
-        return representation
-
 
 class LicenseDocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -275,7 +273,7 @@ class LicensePurchaseSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class LicenseDetailsSerializer(LicenseWriteMixin, serializers.ModelSerializer):
+class LicenseDetailsSerializer(SparseFieldsetMixin, LicenseWriteMixin, serializers.ModelSerializer):
     # Explicit DateFields for model.DateField columns
     license_date = IndianDateField(required=False, allow_null=True)
     license_expiry_date = IndianDateField(required=False, allow_null=True)
@@ -355,6 +353,35 @@ class LicenseDetailsSerializer(LicenseWriteMixin, serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ("created_by", "modified_by", "created_on", "modified_on")
 
+    # ?view=compact: the columns the licence grid renders.
+    compact_fields = [
+        "id", "license_number", "license_date", "license_expiry_date", "ledger_date",
+        "exporter_name", "exporter_iec", "port_name", "purchase_status_code", "purchase_status_label",
+        "get_norm_class", "latest_transfer", "get_balance_cif", "balance_cif",
+        "is_manually_planned", "has_tl", "has_copy", "has_condition_sheet",
+    ]
+    # Sub-table / FK joins each field reads (see LicenseDetailsViewSet.get_queryset);
+    # FK fields themselves serialize the *_id column and exporter_name / port_name
+    # are annotations, so exporter and port are never needed.
+    sparse_field_relations = {
+        "purchase_status_code": ["purchase_status"],
+        "purchase_status_label": ["purchase_status"],
+        "balance_cif": ["balance"],
+        "get_balance_cif": ["balance"],
+        "ledger_date": ["balance"],
+        **{name: ["flags"] for name in (
+            "is_active", "is_audit", "is_mnm", "is_not_registered", "is_null", "is_au",
+            "is_incomplete", "is_expired", "is_individual",
+        )},
+        "current_owner": ["ownership", "ownership__current_owner"],
+        "file_transfer_status": ["ownership"],
+        "last_ownership_fetch": ["ownership"],
+        "latest_transfer": ["ownership", "ownership__current_owner"],
+        **{name: ["notes"] for name in (
+            "user_comment", "condition_sheet", "user_restrictions", "balance_report_notes", "has_condition_sheet",
+        )},
+    }
+
     def to_internal_value(self, data):
         """
         Override to parse FormData nested arrays.
@@ -638,14 +665,16 @@ class LicenseDetailsSerializer(LicenseWriteMixin, serializers.ModelSerializer):
 
         if is_list_view:
             # For list view, add empty arrays for nested items (fields were removed in __init__)
-            rep['export_license'] = []
-            rep['import_license'] = []
+            for name in ('export_license', 'import_license'):
+                if self.wants_field(name):
+                    rep[name] = []
             # For license_documents, emit at most one stub so the frontend can
             # display a merge link.  The queryset is prefetched by the viewset
             # for both list and retrieve actions, so reading .all() here hits the
             # prefetch cache — no per-row DB queries.
-            _docs = list(instance.license_documents.all())
-            rep['license_documents'] = [{'id': _docs[0].id}] if _docs else []
+            if self.wants_field('license_documents'):
+                _docs = list(instance.license_documents.all())
+                rep['license_documents'] = [{'id': _docs[0].id}] if _docs else []
         else:
             # Detail view - rename the read-only fields back to their original names for frontend compatibility
             if 'export_license_read' in rep:
@@ -659,14 +688,15 @@ class LicenseDetailsSerializer(LicenseWriteMixin, serializers.ModelSerializer):
         # and keeps the "fresh" guarantee); the LIST view keeps the stored column, which
         # signals keep in sync and which avoids N balance-aggregate queries per row.
         # (The stored column is what get_get_balance_cif() returns.)
-        if not is_list_view:
+        if not is_list_view and (self.wants_field('balance_cif') or self.wants_field('get_balance_cif')):
             from decimal import Decimal
             fresh = instance.get_balance_cif
             # Clamp to match the list path (stored column) so both views agree; the
             # live calculator can yield a negative-zero that serializes as '-0.00'.
             if fresh is not None and fresh <= 0:
                 fresh = Decimal('0.00')
-            rep['balance_cif'] = fresh
+            if 'balance_cif' in rep:
+                rep['balance_cif'] = fresh
             if 'get_balance_cif' in rep:
                 rep['get_balance_cif'] = fresh
 
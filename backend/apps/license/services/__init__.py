@@ -3,6 +3,7 @@ License services for business logic.
 
 - balance_calculator: License and item balance calculations
 - condition_pool: Per-condition_type pool calculations (NEW restriction model)
+- balance_ledger: Incremental (write-through) licence balance ledger
 - validation_service: Business rule validation
 """
 
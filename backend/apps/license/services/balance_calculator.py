@@ -8,7 +8,7 @@ This module centralizes all balance calculation logic for:
 """
 
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, Tuple, Optional
+from typing import Dict, Iterable, Tuple, Optional
 
 from django.db.models import Sum, DecimalField, Value
 from django.db.models.functions import Coalesce
@@ -23,11 +23,31 @@ from apps.bill_of_entry.models import RowDetails  # noqa: E402
 from apps.allotment.models import AllotmentItems  # noqa: E402
 
 
+# Max licence ids per IN (...) clause in the bulk engine; keeps the parameter
+# list well inside PostgreSQL limits and the per-query plan cheap.
+BULK_CHUNK_SIZE = 1000
+
+
 def quantize_2dp(value: Decimal) -> Decimal:
     """Quantize decimal to 2 decimal places."""
     return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
+def _sum_cif_by_license(queryset, license_field: str) -> Dict[int, Decimal]:
+    """
+    SUM(cif_fc) grouped by licence id.
+
+    Args:
+        queryset: Pre-filtered queryset of rows carrying a cif_fc column
+        license_field: Lookup path from the row to the licence id
+
+    Returns:
+        Dictionary mapping licence id to total cif_fc (licences without rows are absent)
+    """
+    rows = queryset.values(license_field).annotate(total=Sum("cif_fc")).order_by()
+    return {row[license_field]: to_decimal(row["total"], DEC_0) for row in rows}
+
+
 class LicenseBalanceCalculator:
     """
     Service for calculating license-level balances.
@@ -186,6 +206,99 @@ class LicenseBalanceCalculator:
             'balance': balance if balance >= DEC_0 else DEC_0,
         }
 
+    @classmethod
+    def calculate_component_totals_bulk(cls, license_ids: Iterable[int]) -> Dict[int, Dict[str, Decimal]]:
+        """
+        Raw (unquantized) credit, debit, allotment and trade totals for many licences.
+
+        Each component is a single grouped aggregate per chunk of licence ids,
+        so the query count is 4 * ceil(len(license_ids) / BULK_CHUNK_SIZE)
+        regardless of how many rows each licence has. Filters are identical to
+        the per-licence calculate_* methods.
+
+        Args:
+            license_ids: Iterable of LicenseDetailsModel primary keys
+
+        Returns:
+            Dictionary keyed by licence id with credit, debit, allotment and
+            trade. Every requested id is present.
+        """
+        from apps.trade.models import LicenseTradeLine
+
+        ids = list(dict.fromkeys(license_ids))
+        results: Dict[int, Dict[str, Decimal]] = {}
+
+        for start in range(0, len(ids), BULK_CHUNK_SIZE):
+            chunk = ids[start:start + BULK_CHUNK_SIZE]
+
+            credits = _sum_cif_by_license(
+                LicenseExportItemModel.objects.filter(license_id__in=chunk),
+                "license_id",
+            )
+            debits = _sum_cif_by_license(
+                RowDetails.objects.filter(
+                    sr_number__license_id__in=chunk,
+                    transaction_type=DEBIT,
+                    bill_of_entry__license_trades__isnull=True,
+                ),
+                "sr_number__license_id",
+            )
+            allotments = _sum_cif_by_license(
+                AllotmentItems.objects.filter(
+                    item__license_id__in=chunk,
+                    allotment__bill_of_entry__isnull=True,
+                ),
+                "item__license_id",
+            )
+            trades = _sum_cif_by_license(
+                LicenseTradeLine.objects.filter(
+                    sr_number__license_id__in=chunk,
+                    trade__direction='SALE',
+                ),
+                "sr_number__license_id",
+            )
+
+            for license_id in chunk:
+                results[license_id] = {
+                    'credit': credits.get(license_id, DEC_0),
+                    'debit': debits.get(license_id, DEC_0),
+                    'allotment': allotments.get(license_id, DEC_0),
+                    'trade': trades.get(license_id, DEC_0),
+                }
+
+        return results
+
+    @classmethod
+    def calculate_balances_bulk(cls, license_ids: Iterable[int]) -> Dict[int, Dict[str, Decimal]]:
+        """
+        Calculate all balance components for many licences at once.
+
+        Set-based equivalent of calculate_all_components(), built on
+        calculate_component_totals_bulk().
+
+        Args:
+            license_ids: Iterable of LicenseDetailsModel primary keys
+
+        Returns:
+            Dictionary keyed by licence id with credit, debit, allotment, trade,
+            and balance (all quantized to 2dp). Every requested id is present.
+        """
+        results: Dict[int, Dict[str, Decimal]] = {}
+        for license_id, totals in cls.calculate_component_totals_bulk(license_ids).items():
+            credit = totals['credit']
+            debit = totals['debit']
+            allotment = totals['allotment']
+            trade = totals['trade']
+            balance = quantize_2dp(credit - (debit + allotment + trade))
+            results[license_id] = {
+                'credit': quantize_2dp(credit),
+                'debit': quantize_2dp(debit),
+                'allotment': quantize_2dp(allotment),
+                'trade': quantize_2dp(trade),
+                'balance': balance if balance >= DEC_0 else DEC_0,
+            }
+        return results
+
 
 class ItemBalanceCalculator:
     """
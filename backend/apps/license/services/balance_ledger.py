@@ -0,0 +1,410 @@
+"""
+Write-through (incremental) licence balance ledger.
+
+With ``settings.LICENSE_BALANCE_INCREMENTAL`` on, the licence signals stop
+running the full ``update_license_flags`` recompute (~13+ SUM queries) for
+every RowDetails / AllotmentItems / LicenseTradeLine / export-item save.
+Instead each row is reduced to its *contribution* to its licence ledger:
+
+    credit_total     export cif_fc                              (credit)
+    debit_total      BOE debit cif_fc, BOE not linked to a trade (debit)
+    allotment_total  allotment cif_fc, allotment not on a BOE    (allotment)
+    trade_total      SALE trade line cif_fc                      (trade)
+    balance_cif      max(round(credit - debit - allotment - trade, 2), 0)
+
+plus its usage of the item's "N%" condition pool (LicenseConditionPool).
+The signed delta between the row's contribution before and after the write is
+applied with a single ``UPDATE ... SET x = x + delta`` on LicenseBalance and on
+the pool counter, so concurrent saves compose correctly without re-reading
+any ledger rows.
+
+The filters mirror LicenseBalanceCalculator and condition_pool exactly.
+Licences whose ledger has never been seeded (``ledger_synced_at IS NULL``),
+or whose change cannot be expressed as a delta (new condition group, item
+condition change), fall back to the full recompute, which re-seeds the ledger.
+``reconcile_ledgers`` verifies every ledger against the full recompute and
+repairs drift; it runs periodically via ``license.tasks``.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db.models import DecimalField, Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from apps.core.constants import DEC_0, DEBIT
+from apps.core.utils.decimal_utils import to_decimal
+from apps.license.services.balance_calculator import LicenseBalanceCalculator, quantize_2dp
+from apps.license.services.condition_pool import _parse_pct, compute_condition_usage_bulk
+
+logger = logging.getLogger(__name__)
+
+# Ledger column per balance component.
+COMPONENT_FIELDS = {
+    'credit': 'credit_total',
+    'debit': 'debit_total',
+    'allotment': 'allotment_total',
+    'trade': 'trade_total',
+}
+
+NULL_THRESHOLD = Decimal('500')
+MARKER_VALUE = Decimal('0.01')
+
+
+def ledger_enabled() -> bool:
+    """True when licence signals should apply deltas instead of full recomputes."""
+    return getattr(settings, 'LICENSE_BALANCE_INCREMENTAL', False)
+
+
+@dataclass(frozen=True)
+class LedgerContribution:
+    """What one source row adds to its licence ledger."""
+    license_id: int
+    condition_type: str
+    component: str
+    amount: Decimal
+    pool_amount: Decimal
+
+
+# ---------------------------------------------------------------------------
+# Contributions — one PK lookup per source row
+# ---------------------------------------------------------------------------
+
+def _row_details_contribution(pk) -> Optional[LedgerContribution]:
+    from apps.bill_of_entry.models import RowDetails
+    from apps.trade.models import LicenseTrade
+
+    row = (
+        RowDetails.objects.filter(pk=pk)
+        .annotate(traded=Exists(LicenseTrade.objects.filter(boe_id=OuterRef('bill_of_entry_id'))))
+        .values('cif_fc', 'transaction_type', 'traded', 'sr_number__license_id', 'sr_number__condition_type')
+        .first()
+    )
+    if not row or row['sr_number__license_id'] is None:
+        return None
+    cif = to_decimal(row['cif_fc'], DEC_0)
+    is_debit = row['transaction_type'] == DEBIT
+    return LedgerContribution(
+        license_id=row['sr_number__license_id'],
+        condition_type=row['sr_number__condition_type'] or '',
+        component='debit',
+        # BOEs linked to a trade are counted by the trade lines instead.
+        amount=cif if is_debit and not row['traded'] else DEC_0,
+        pool_amount=cif if is_debit else DEC_0,
+    )
+
+
+def _allotment_item_contribution(pk) -> Optional[LedgerContribution]:
+    from apps.allotment.models import AllotmentItems
+    from apps.bill_of_entry.models import BillOfEntryModel
+
+    # BOE <-> allotment is a many-to-many, so test membership with EXISTS
+    # rather than joining (which would repeat the row once per BOE).
+    on_boe = BillOfEntryModel.allotment.through.objects.filter(allotmentmodel_id=OuterRef('allotment_id'))
+    row = (
+        AllotmentItems.objects.filter(pk=pk)
+        .annotate(on_boe=Exists(on_boe))
+        .values('cif_fc', 'on_boe', 'item__license_id', 'item__condition_type')
+        .first()
+    )
+    if not row or row['item__license_id'] is None:
+        return None
+    # Only allotments not yet converted to a BOE debit the licence.
+    cif = to_decimal(row['cif_fc'], DEC_0) if not row['on_boe'] else DEC_0
+    return LedgerContribution(
+        license_id=row['item__license_id'],
+        condition_type=row['item__condition_type'] or '',
+        component='allotment',
+        amount=cif,
+        pool_amount=cif,
+    )
+
+
+def _trade_line_contribution(pk) -> Optional[LedgerContribution]:
+    from apps.trade.models import LicenseTradeLine
+
+    row = (
+        LicenseTradeLine.objects.filter(pk=pk)
+        .values('cif_fc', 'trade__direction', 'sr_number__license_id', 'sr_number__condition_type')
+        .first()
+    )
+    if not row or row['sr_number__license_id'] is None:
+        return None
+    cif = to_decimal(row['cif_fc'], DEC_0)
+    return LedgerContribution(
+        license_id=row['sr_number__license_id'],
+        condition_type=row['sr_number__condition_type'] or '',
+        component='trade',
+        # Only SALE trades debit the licence; pools count every trade line.
+        amount=cif if row['trade__direction'] == 'SALE' else DEC_0,
+        pool_amount=cif,
+    )
+
+
+def _export_item_contribution(pk) -> Optional[LedgerContribution]:
+    from apps.license.models import LicenseExportItemModel
+
+    row = LicenseExportItemModel.objects.filter(pk=pk).values('cif_fc', 'license_id').first()
+    if not row or row['license_id'] is None:
+        return None
+    return LedgerContribution(
+        license_id=row['license_id'],
+        condition_type='',
+        component='credit',
+        amount=to_decimal(row['cif_fc'], DEC_0),
+        pool_amount=DEC_0,
+    )
+
+
+_CONTRIBUTION_LOOKUPS = {
+    'bill_of_entry.rowdetails': _row_details_contribution,
+    'allotment.allotmentitems': _allotment_item_contribution,
+    'trade.licensetradeline': _trade_line_contribution,
+    'license.licenseexportitemmodel': _export_item_contribution,
+}
+
+
+def is_ledger_source(model) -> bool:
+    """True for models whose rows feed the licence ledger."""
+    return model._meta.label_lower in _CONTRIBUTION_LOOKUPS
+
+
+def get_contribution(model, pk) -> Optional[LedgerContribution]:
+    """Current contribution of the stored row ``pk`` (None if absent)."""
+    if pk is None:
+        return None
+    return _CONTRIBUTION_LOOKUPS[model._meta.label_lower](pk)
+
+
+# ---------------------------------------------------------------------------
+# Applying deltas
+# ---------------------------------------------------------------------------
+
+def apply_contribution_change(before: Optional[LedgerContribution],
+                              after: Optional[LedgerContribution]) -> Set[int]:
+    """
+    Apply ``after - before`` to the affected licence ledger(s).
+
+    Returns the licence ids the delta could not be applied to (ledger not yet
+    seeded, or a pool counter missing); the caller must run the full
+    recompute for those.
+    """
+    components: Dict[int, Dict[str, Decimal]] = {}
+    pools: Dict[int, Dict[str, Decimal]] = {}
+
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution is None:
+            continue
+        lid = contribution.license_id
+        comp = components.setdefault(lid, {})
+        comp[contribution.component] = comp.get(contribution.component, DEC_0) + sign * contribution.amount
+        pct = _parse_pct(contribution.condition_type)
+        if pct is not None and pct > DEC_0 and contribution.pool_amount:
+            lp = pools.setdefault(lid, {})
+            lp[contribution.condition_type] = (
+                lp.get(contribution.condition_type, DEC_0) + sign * contribution.pool_amount
+            )
+
+    needs_recompute = set()
+    for lid, comp in components.items():
+        comp = {k: v for k, v in comp.items() if v}
+        license_pools = {k: v for k, v in pools.get(lid, {}).items() if v}
+        if not comp and not license_pools:
+            continue
+        if apply_license_delta(lid, comp, license_pools):
+            refresh_license_state(lid)
+        else:
+            needs_recompute.add(lid)
+    return needs_recompute
+
+
+def apply_license_delta(license_id: int, components: Dict[str, Decimal],
+                        pool_deltas: Dict[str, Decimal]) -> bool:
+    """
+    Add signed deltas to one licence's ledger.
+
+    One UPDATE per touched pool counter plus one UPDATE on LicenseBalance
+    that moves the component totals and re-derives balance_cif from them.
+    Returns False (writing nothing to LicenseBalance) when the ledger is not
+    seeded or a pool counter does not exist yet.
+    """
+    from apps.license.models import LicenseBalance, LicenseConditionPool
+
+    if not LicenseBalance.objects.filter(license_id=license_id, ledger_synced_at__isnull=False).exists():
+        return False
+
+    for condition_type, delta in pool_deltas.items():
+        updated = LicenseConditionPool.objects.filter(
+            license_id=license_id, condition_type=condition_type,
+        ).update(used_cif=F('used_cif') + delta)
+        if not updated:
+            return False
+
+    if not components:
+        return True
+
+    dec = DecimalField(max_digits=18, decimal_places=3)
+    new_totals = {
+        field: F(field) + Value(components.get(component, DEC_0), output_field=dec)
+        for component, field in COMPONENT_FIELDS.items()
+    }
+    # PostgreSQL evaluates every SET expression against the pre-update row,
+    # so balance_cif is derived from the new totals spelled out in full.
+    raw_balance = (
+        new_totals['credit_total']
+        - new_totals['debit_total']
+        - new_totals['allotment_total']
+        - new_totals['trade_total']
+    )
+    updates = {field: new_totals[field] for component, field in COMPONENT_FIELDS.items()
+               if component in components}
+    updates['balance_cif'] = Greatest(
+        Round(raw_balance, 2, output_field=dec),
+        Value(DEC_0, output_field=dec),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    return bool(
+        LicenseBalance.objects.filter(license_id=license_id, ledger_synced_at__isnull=False).update(**updates)
+    )
+
+
+def _remaining_pools(credit_total: Decimal, used_by_condition: Dict[str, Decimal]) -> Dict[str, Decimal]:
+    """Pool remaining per condition, as in condition_pool.compute_condition_pools."""
+    pools = {}
+    for condition_type, used in used_by_condition.items():
+        pct = _parse_pct(condition_type)
+        if pct is None or pct <= DEC_0:
+            continue
+        remaining = credit_total * pct / Decimal('100') - used
+        pools[condition_type] = remaining if remaining >= DEC_0 else DEC_0
+    return pools
+
+
+def refresh_license_state(license_id: int) -> None:
+    """
+    Propagate the ledger to is_null and every import item's available_value.
+
+    Reads the ledger (2 queries) and issues one filtered UPDATE per value
+    class — items whose stored value already matches are not rewritten.
+    Semantics match signals._update_all_import_items_available_value.
+    """
+    from apps.license.models import LicenseBalance, LicenseConditionPool, LicenseFlags, LicenseImportItemsModel
+
+    ledger = LicenseBalance.objects.filter(license_id=license_id).values('balance_cif', 'credit_total').first()
+    if ledger is None:
+        return
+    balance = to_decimal(ledger['balance_cif'], DEC_0)
+    credit = to_decimal(ledger['credit_total'], DEC_0)
+    pools = _remaining_pools(credit, dict(
+        LicenseConditionPool.objects.filter(license_id=license_id).values_list('condition_type', 'used_cif')
+    ))
+
+    is_null = balance < NULL_THRESHOLD
+    LicenseFlags.objects.filter(license_id=license_id).exclude(is_null=is_null).update(is_null=is_null)
+
+    items = LicenseImportItemsModel.objects.filter(license_id=license_id)
+    marker = Q(cif_inr=MARKER_VALUE) | Q(cif_fc=MARKER_VALUE)
+    items.filter(marker).exclude(available_value=MARKER_VALUE).update(available_value=MARKER_VALUE)
+    for condition_type, remaining in pools.items():
+        value = quantize_2dp(min(remaining, balance))
+        (items.filter(condition_type=condition_type).exclude(marker)
+         .exclude(available_value=value).update(available_value=value))
+    (items.exclude(condition_type__in=list(pools)).exclude(marker)
+     .exclude(available_value=balance).update(available_value=balance))
+
+
+# ---------------------------------------------------------------------------
+# Seeding / reconciliation
+# ---------------------------------------------------------------------------
+
+def reconcile_ledgers(license_ids: Iterable[int], repair: bool = True) -> Dict[str, object]:
+    """
+    Verify ledgers against the full recompute and (optionally) repair them.
+
+    Uses LicenseBalanceCalculator.calculate_component_totals_bulk and
+    condition_pool.compute_condition_usage_bulk, so the cost is a fixed
+    number of grouped queries per call. Unseeded ledgers are seeded.
+
+    Returns:
+        dict with checked / seeded / drifted counts and the drifted licence ids
+    """
+    from apps.license.models import LicenseBalance, LicenseConditionPool
+
+    ids = list(dict.fromkeys(license_ids))
+    stats = {'checked': 0, 'seeded': 0, 'drifted': 0, 'drifted_ids': []}
+    if not ids:
+        return stats
+
+    totals = LicenseBalanceCalculator.calculate_component_totals_bulk(ids)
+    usage = compute_condition_usage_bulk(ids)
+    ledgers = {
+        row['license_id']: row
+        for row in LicenseBalance.objects.filter(license_id__in=ids).values(
+            'license_id', 'ledger_synced_at', 'balance_cif', *COMPONENT_FIELDS.values())
+    }
+    stored_pools: Dict[int, Dict[str, Decimal]] = {}
+    for lid, condition_type, used in LicenseConditionPool.objects.filter(
+            license_id__in=ids).values_list('license_id', 'condition_type', 'used_cif'):
+        stored_pools.setdefault(lid, {})[condition_type] = used
+
+    now = timezone.now()
+    to_write: List[LicenseBalance] = []
+    repaired: List[int] = []
+    for lid in ids:
+        ledger = ledgers.get(lid)
+        if ledger is None:
+            continue  # Sub-row missing — repair_license_subtables owns that.
+        stats['checked'] += 1
+        expected = totals[lid]
+        balance = quantize_2dp(expected['credit'] - expected['debit'] - expected['allotment'] - expected['trade'])
+        balance = balance if balance >= DEC_0 else DEC_0
+        expected_pools = usage.get(lid, {})
+
+        if ledger['ledger_synced_at'] is None:
+            stats['seeded'] += 1
+        elif (any(ledger[field] != expected[component] for component, field in COMPONENT_FIELDS.items())
+              or ledger['balance_cif'] != balance
+              or stored_pools.get(lid, {}) != expected_pools):
+            stats['drifted'] += 1
+            stats['drifted_ids'].append(lid)
+            logger.warning("Licence %s ledger drifted from full recompute", lid)
+        else:
+            continue
+
+        to_write.append(LicenseBalance(
+            license_id=lid,
+            balance_cif=balance,
+            ledger_synced_at=now,
+            **{field: expected[component] for component, field in COMPONENT_FIELDS.items()},
+        ))
+        repaired.append(lid)
+
+    if repair and to_write:
+        LicenseBalance.objects.bulk_update(
+            to_write,
+            ['balance_cif', 'ledger_synced_at', *COMPONENT_FIELDS.values()],
+            batch_size=500,
+        )
+        LicenseConditionPool.objects.filter(license_id__in=repaired).delete()
+        LicenseConditionPool.objects.bulk_create([
+            LicenseConditionPool(license_id=lid, condition_type=condition_type, used_cif=used)
+            for lid in repaired
+            for condition_type, used in usage.get(lid, {}).items()
+        ])
+        for lid in repaired:
+            refresh_license_state(lid)
+
+    return stats
+
+
+def reseed_license(license_id: int) -> None:
+    """Force a full re-seed of one licence's ledger (after a full recompute)."""
+    from apps.license.models import LicenseBalance
+
+    LicenseBalance.objects.filter(license_id=license_id).update(ledger_synced_at=None)
+    reconcile_ledgers([license_id])
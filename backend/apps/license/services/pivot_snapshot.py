@@ -0,0 +1,239 @@
+"""
+Snapshot cache for the item pivot report.
+
+The pivot is requested over and over with the same handful of filter
+combinations, and every request used to rebuild it from scratch. Computed
+reports are now kept in the Django cache (Redis in every deployment) per
+normalised filter fingerprint:
+
+    pivot_snapshot:<fingerprint>            {'version', 'built_at', 'report'}
+    pivot_snapshot:<fingerprint>:rebuilding set while a background rebuild
+                                            is queued or running
+
+Each snapshot records the data version it was built from. The version is
+derived from PostgreSQL's per-table write counters (pg_stat_user_tables
+n_tup_ins / n_tup_upd / n_tup_del) on the tables the report reads, so it
+moves on every insert, update (including queryset .update()) or delete,
+whichever code path made it. The counters are published when a
+transaction ends, so a commit can take about a second to show up.
+
+get_pivot_report() serves a snapshot whose version still matches as-is. A
+snapshot whose version has moved is still served immediately, and ONE
+background rebuild per fingerprint is queued to replace it. Only a filter
+combination that has never been built is computed in the request.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.constants import CO, GE, MI
+
+logger = logging.getLogger(__name__)
+
+# Snapshots outlive many version changes (each one is replaced in the
+# background); the timeout only evicts filter combinations nobody asks for.
+SNAPSHOT_TIMEOUT = 24 * 3600
+
+# Upper bound on one background rebuild; the flag expires on its own so a
+# crashed worker cannot block rebuilds of a fingerprint forever.
+REBUILD_LOCK_TIMEOUT = 600
+
+# Snapshot statuses, as reported to callers.
+FRESH = 'fresh'   # built from the current data version
+STALE = 'stale'   # older version served while a rebuild runs
+BUILT = 'built'   # no snapshot yet; computed in this request
+
+FILTER_DEFAULTS = {
+    'sion_norm': None,
+    'company_ids': None,
+    'exclude_company_ids': None,
+    'min_balance': 200,
+    'license_status': 'active',
+    'expiry_date_from': None,
+    'expiry_date_to': None,
+    'purchase_status': None,
+}
+
+
+def _id_list(value):
+    """Comma-separated ids -> sorted unique ints (raw string if not numeric)."""
+    if not value:
+        return None
+    try:
+        return sorted({int(part.strip()) for part in str(value).split(',') if part.strip()}) or None
+    except ValueError:
+        return str(value)
+
+
+def normalize_filters(days=None, **filters) -> Dict[str, Any]:
+    """
+    Canonical form of the pivot filters, in generate_report() keyword names.
+
+    Equivalent requests (re-ordered ids, blank vs. missing values, the
+    default purchase statuses spelt out) normalise to the same dict. `days`
+    is accepted for call-compatibility but dropped: it does not change the
+    report rows.
+    """
+    unknown = set(filters) - set(FILTER_DEFAULTS)
+    if unknown:
+        raise TypeError(f"Unknown pivot filters: {', '.join(sorted(unknown))}")
+    values = {**FILTER_DEFAULTS, **{k: v for k, v in filters.items() if v not in (None, '')}}
+
+    purchase_status = values['purchase_status']
+    codes = [c.strip() for c in str(purchase_status).split(',') if c.strip()] if purchase_status else []
+    return {
+        'sion_norm': (str(values['sion_norm']).strip() or None) if values['sion_norm'] else None,
+        'company_ids': _id_list(values['company_ids']),
+        'exclude_company_ids': _id_list(values['exclude_company_ids']),
+        'min_balance': int(values['min_balance']),
+        'license_status': str(values['license_status']),
+        'expiry_date_from': str(values['expiry_date_from']).strip() if values['expiry_date_from'] else None,
+        'expiry_date_to': str(values['expiry_date_to']).strip() if values['expiry_date_to'] else None,
+        'purchase_status': ','.join(sorted(set(codes) or {GE, MI, CO})),
+    }
+
+
+def filter_fingerprint(filters: Dict[str, Any]) -> str:
+    """Stable hash of a normalize_filters() dict."""
+    payload = json.dumps(filters, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _key(fingerprint: str, suffix: str = '') -> str:
+    return f"pivot_snapshot:{fingerprint}{':' + suffix if suffix else ''}"
+
+
+def _version_tables():
+    """db_table of every table the pivot report reads."""
+    from apps.allotment.models import AllotmentItems, AllotmentModel
+    from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+    from apps.core.models import ItemNameModel
+    from apps.license.models import (
+        LicenseBalance,
+        LicenseDetailsModel,
+        LicenseDocumentModel,
+        LicenseExportItemModel,
+        LicenseFlags,
+        LicenseImportItemsModel,
+        LicenseItemPlan,
+        LicenseNotes,
+        LicenseOwnership,
+        LicenseTransferModel,
+    )
+    from apps.trade.models import LicenseTrade, LicenseTradeLine
+
+    models = (
+        LicenseDetailsModel, LicenseBalance, LicenseFlags, LicenseNotes, LicenseOwnership,
+        LicenseImportItemsModel, LicenseImportItemsModel.items.through, LicenseExportItemModel,
+        LicenseItemPlan, LicenseTransferModel, LicenseDocumentModel, ItemNameModel,
+        RowDetails, BillOfEntryModel.allotment.through, AllotmentModel, AllotmentItems,
+        LicenseTrade, LicenseTradeLine,
+    )
+    return sorted({model._meta.db_table for model in models})
+
+
+def current_data_version() -> str:
+    """
+    Version of the pivot's source data; changes whenever any of its tables is
+    written, and at midnight (licence status filters are relative to today).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT relname, n_tup_ins, n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+            WHERE relname = ANY(%s)
+            ORDER BY relname
+            """,
+            [_version_tables()],
+        )
+        rows = cursor.fetchall()
+    return f"{date.today().isoformat()}:{hashlib.sha256(repr(rows).encode()).hexdigest()[:32]}"
+
+
+def report_kwargs(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """normalize_filters() output back in the string form generate_report() takes."""
+    kwargs = dict(filters)
+    for name in ('company_ids', 'exclude_company_ids'):
+        if isinstance(kwargs[name], list):
+            kwargs[name] = ','.join(str(pk) for pk in kwargs[name])
+    return kwargs
+
+
+def _build(filters: Dict[str, Any]) -> Dict[str, Any]:
+    from apps.license.views.item_pivot_report import ItemPivotReportView
+
+    return ItemPivotReportView().generate_report(**report_kwargs(filters))
+
+
+def store_snapshot(filters: Dict[str, Any], version: str, report: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = {'version': version, 'built_at': timezone.now().isoformat(), 'report': report}
+    cache.set(_key(filter_fingerprint(filters)), snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_fresh_snapshot(filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The snapshot for these normalised filters if it matches the current data version."""
+    snapshot = cache.get(_key(filter_fingerprint(filters)))
+    if snapshot and snapshot['version'] == current_data_version():
+        return snapshot
+    return None
+
+
+def _schedule_rebuild(filters: Dict[str, Any]) -> bool:
+    """Queue one background rebuild per fingerprint; False if one is already pending."""
+    if not cache.add(_key(filter_fingerprint(filters), 'rebuilding'), 1, REBUILD_LOCK_TIMEOUT):
+        return False
+    from apps.license.tasks import rebuild_item_pivot_snapshot
+
+    try:
+        rebuild_item_pivot_snapshot.delay(filters)
+    except Exception as e:
+        cache.delete(_key(filter_fingerprint(filters), 'rebuilding'))
+        logger.warning(f"Could not queue item pivot snapshot rebuild: {e}")
+        return False
+    return True
+
+
+def rebuild_snapshot(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild and store the snapshot for normalised filters (Celery task body).
+
+    The version is read before the report is built, so a change committed
+    mid-build leaves the snapshot stale and the next request rebuilds again.
+    """
+    try:
+        version = current_data_version()
+        return store_snapshot(filters, version, _build(filters))
+    finally:
+        cache.delete(_key(filter_fingerprint(filters), 'rebuilding'))
+
+
+def get_pivot_report(**filters) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Item pivot report for generate_report() filters, served from the snapshot cache.
+
+    Returns:
+        (report, info) where info is {'status': FRESH | STALE | BUILT,
+        'built_at': ISO timestamp, 'rebuild_queued': bool}
+    """
+    filters = normalize_filters(**filters)
+    version = current_data_version()
+    snapshot = cache.get(_key(filter_fingerprint(filters)))
+
+    if snapshot and snapshot['version'] == version:
+        return snapshot['report'], {'status': FRESH, 'built_at': snapshot['built_at'], 'rebuild_queued': False}
+
+    if snapshot:
+        queued = _schedule_rebuild(filters)
+        return snapshot['report'], {'status': STALE, 'built_at': snapshot['built_at'], 'rebuild_queued': queued}
+
+    snapshot = store_snapshot(filters, version, _build(filters))
+    return snapshot['report'], {'status': BUILT, 'built_at': snapshot['built_at'], 'rebuild_queued': False}
@@ -63,3 +63,25 @@ def live_allotted_value_for(item_ids) -> Decimal:
     return AllotmentItems.objects.filter(_ALLOTTED_FILTER, item_id__in=ids).aggregate(
         total=Coalesce(Sum("cif_fc"), Value(DEC_0), output_field=DecimalField()),
     )["total"] or DEC_0
+
+
+def live_allotted_by_item(item_ids) -> dict:
+    """
+    Already-allotted (qty, CIF-FC) per import item in one grouped query.
+
+    Returns {item_id: (qty, cif_fc)}; items with nothing allotted are absent.
+    """
+    from apps.allotment.models import AllotmentItems
+    ids = list(item_ids)
+    if not ids:
+        return {}
+    rows = (
+        AllotmentItems.objects.filter(_ALLOTTED_FILTER, item_id__in=ids)
+        .values("item_id")
+        .annotate(
+            qty=Coalesce(Sum("qty"), Value(DEC_000), output_field=DecimalField()),
+            value=Coalesce(Sum("cif_fc"), Value(DEC_0), output_field=DecimalField()),
+        )
+        .order_by()
+    )
+    return {row["item_id"]: (row["qty"], row["value"]) for row in rows}
@@ -41,3 +41,25 @@ def group_ids_of(item) -> list:
         if plan_group_key(sib) == key:
             ids.append(sib.id)
     return ids
+
+
+def group_ids_by_license(license_ids) -> dict:
+    """
+    Batched group_ids_of() for every import item of the given licenses.
+
+    Returns {import_item_id: [ids sharing its group]} in two queries, however
+    many items are looked up.
+    """
+    from apps.license.models import LicenseImportItemsModel
+
+    groups = {}
+    siblings = (
+        LicenseImportItemsModel.objects
+        .filter(license_id__in=list(license_ids))
+        .only("id", "license_id", "description")
+        .order_by("license_id", "serial_number")
+        .prefetch_related("items")
+    )
+    for sib in siblings:
+        groups.setdefault((sib.license_id, plan_group_key(sib)), []).append(sib.id)
+    return {item_id: ids for ids in groups.values() for item_id in ids}
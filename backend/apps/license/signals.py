@@ -3,14 +3,15 @@ import threading
 from contextlib import contextmanager
 from decimal import Decimal
 
-from django.db.models.signals import post_save, post_delete, pre_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from apps.license.models import LicenseDetailsModel, LicenseExportItemModel, LicenseImportItemsModel
+from apps.license.services import balance_ledger
 from apps.allotment.models import AllotmentItems
-from apps.bill_of_entry.models import RowDetails
-from apps.trade.models import LicenseTradeLine
+from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+from apps.trade.models import LicenseTrade, LicenseTradeLine
 from apps.core.models import CompanyModel
 
 
@@ -43,35 +44,81 @@ def suspend_license_flag_recalc():
         _bulk_state.suspended = prev
 
 
-def _update_all_import_items_available_value(license_instance):
+def update_import_items_available_value_bulk(license_balances):
     """
-    Update available_value for ALL import items in a license, using the
-    pool-based condition_type model.
+    Update available_value for ALL import items of many licences at once,
+    using the pool-based condition_type model.
 
-    Cost is O(M) where M = number of distinct %-condition groups on this
-    licence (typically 1–5), rather than O(N²) per-item — the helper
-    `condition_pool.compute_condition_pools` issues ~3 SUM queries per group
-    and reuses the result across every item that shares that condition_type.
+    Args:
+        license_balances: {license_id: current licence balance_cif}
+
+    Pools for every licence come from one
+    `condition_pool.compute_condition_pools_bulk` call (a fixed handful of
+    grouped queries), items are read in one query, and only changed rows are
+    written back with one bulk_update — no post_save signals fire.
 
     Semantics (see `available_value_calculated`):
       • `condition_type` ending in "%"  → pool-limited, capped at licence balance
       • `condition_type == "AU"`         → licence balance (non-transferable)
       • empty condition_type             → licence balance (open)
 
-    Uses bulk `.update()` to bypass post_save signals and prevent recursion.
+    Returns:
+        Number of import items whose available_value changed.
+    """
+    from apps.license.services.condition_pool import compute_condition_pools_bulk
+
+    DEC_0 = Decimal("0")
+    marker = Decimal("0.01")
+    license_ids = list(license_balances)
+    if not license_ids:
+        return 0
+
+    pools_by_license = compute_condition_pools_bulk(license_ids)
+
+    changed = []
+    for item in (
+        LicenseImportItemsModel.objects
+        .filter(license_id__in=license_ids)
+        .only("id", "license_id", "cif_inr", "cif_fc", "condition_type", "available_value")
+    ):
+        license_balance = license_balances[item.license_id] or DEC_0
+        if item.cif_inr == marker or item.cif_fc == marker:
+            new_av = marker
+        else:
+            cond = (item.condition_type or "").strip()
+            pools = pools_by_license.get(item.license_id, {})
+            if cond.endswith("%") and cond in pools:
+                new_av = min(pools[cond], license_balance)
+            else:
+                # "AU" or empty: just track licence balance.
+                new_av = license_balance
+
+        if item.available_value != new_av:
+            item.available_value = new_av
+            changed.append(item)
+
+    if changed:
+        LicenseImportItemsModel.objects.bulk_update(changed, ["available_value"], batch_size=500)
+    return len(changed)
+
+
+def _update_all_import_items_available_value(license_instance):
+    """
+    Update available_value for ALL import items in a license, using the
+    pool-based condition_type model.
+
+    Single-licence entry point of `update_import_items_available_value_bulk`:
+    a constant number of queries regardless of how many %-condition groups or
+    items the licence has.
+
+    Uses bulk updates to bypass post_save signals and prevent recursion.
     """
     import logging
-    from decimal import Decimal
-    from apps.license.services.condition_pool import compute_condition_pools
 
     logger = logging.getLogger(__name__)
     DEC_0 = Decimal("0")
 
     try:
-        import_items = list(license_instance.import_license.all())
-        if not import_items:
-            return
-
         # `update_license_flags` writes the new balance via .filter().update()
         # on the LicenseBalance sub-table — refresh that sub-row, not the parent.
         # (balance_cif is no longer a field on LicenseDetailsModel.)
@@ -79,30 +126,7 @@ def _update_all_import_items_available_value(license_instance):
             license_instance.balance.refresh_from_db(fields=["balance_cif"])
         license_balance = license_instance.balance_cif or DEC_0
 
-        # One-shot computation of remaining pools for every %-condition on
-        # this licence (handles 0 groups too — returns an empty dict).
-        pools = compute_condition_pools(license_instance)
-
-        updates_made = 0
-        for item in import_items:
-            try:
-                if item.cif_inr == Decimal("0.01") or item.cif_fc == Decimal("0.01"):
-                    new_av = Decimal("0.01")
-                else:
-                    cond = (item.condition_type or "").strip()
-                    if cond.endswith("%") and cond in pools:
-                        new_av = min(pools[cond], license_balance)
-                    else:
-                        # "AU" or empty: just track licence balance.
-                        new_av = license_balance
-
-                if item.available_value != new_av:
-                    LicenseImportItemsModel.objects.filter(pk=item.pk).update(
-                        available_value=new_av
-                    )
-                    updates_made += 1
-            except Exception as e:
-                logger.error(f"Error updating available_value for item {item.id}: {e}")
+        updates_made = update_import_items_available_value_bulk({license_instance.pk: license_balance})
 
         if updates_made > 0:
             logger.info(
@@ -166,6 +190,160 @@ def update_license_flags(license_instance):
     if balance_changed:
         _update_all_import_items_available_value(license_instance)
 
+    # Incremental mode: a full recompute is also the point where the
+    # write-through ledger is (re-)seeded, so later deltas start from truth.
+    if balance_ledger.ledger_enabled():
+        balance_ledger.reseed_license(license_instance.pk)
+
+
+# ── Incremental balance ledger ───────────────────────────────────────────────
+# With settings.LICENSE_BALANCE_INCREMENTAL on, row saves apply a signed delta
+# to the licence ledger (services.balance_ledger) instead of running the full
+# update_license_flags recompute. Each row's ledger contribution is captured
+# before the write (pre_save / pre_delete) and diffed against the stored row
+# afterwards. Licences the delta cannot be applied to fall back to the full
+# recompute, which re-seeds their ledger.
+
+def _recompute_license(license_id):
+    license_obj = LicenseDetailsModel.objects.filter(pk=license_id).first()
+    if license_obj is not None:
+        update_license_flags(license_obj)
+
+
+def _apply_ledger_change(sender, instance, deleted=False):
+    before = getattr(instance, '_ledger_before', None)
+    after = None if deleted else balance_ledger.get_contribution(sender, instance.pk)
+    # A later save of the same instance diffs against what is stored now.
+    instance._ledger_before = after
+    for license_id in balance_ledger.apply_contribution_change(before, after):
+        _recompute_license(license_id)
+
+
+@receiver([pre_save, pre_delete], sender=RowDetails)
+@receiver([pre_save, pre_delete], sender=AllotmentItems)
+@receiver([pre_save, pre_delete], sender=LicenseTradeLine)
+@receiver([pre_save, pre_delete], sender=LicenseExportItemModel)
+def snapshot_ledger_contribution(sender, instance, **kwargs):
+    """Record what the stored row contributes to its licence ledger."""
+    if kwargs.get('raw', False) or not balance_ledger.ledger_enabled():
+        return
+    if sender is LicenseExportItemModel and _flags_suspended():
+        return
+    instance._ledger_before = balance_ledger.get_contribution(sender, instance.pk)
+
+
+@receiver(pre_save, sender=LicenseImportItemsModel)
+def snapshot_import_item_grouping(sender, instance, **kwargs):
+    """Record the stored (license, condition_type) of an import item."""
+    if kwargs.get('raw', False) or not balance_ledger.ledger_enabled() or not instance.pk:
+        return
+    instance._ledger_grouping = (
+        LicenseImportItemsModel.objects.filter(pk=instance.pk)
+        .values_list('license_id', 'condition_type').first()
+    )
+
+
+def _refresh_license_for_import_item(instance):
+    """
+    Import items carry no balance themselves; in incremental mode only a move
+    to another licence or a condition_type change (pool regrouping) needs the
+    full recompute — anything else just re-derives available_value.
+    """
+    if not balance_ledger.ledger_enabled():
+        update_license_flags(instance.license)
+        return
+    before = getattr(instance, '_ledger_grouping', None)
+    before_license_id = before[0] if before else instance.license_id
+    before_condition = (before[1] if before else '') or ''
+    if before_license_id != instance.license_id or before_condition != (instance.condition_type or ''):
+        update_license_flags(instance.license)
+        if before_license_id != instance.license_id:
+            _recompute_license(before_license_id)
+    else:
+        balance_ledger.refresh_license_state(instance.license_id)
+
+
+@receiver(pre_save, sender=LicenseTrade)
+def snapshot_ledger_parent(sender, instance, **kwargs):
+    """Record trade fields that decide whether child rows count (BOE link, direction)."""
+    if kwargs.get('raw', False) or not balance_ledger.ledger_enabled() or not instance.pk:
+        return
+    instance._ledger_parent = sender.objects.filter(pk=instance.pk).values_list('boe_id', 'direction').first()
+
+
+def _boe_row_license_ids(boe_ids):
+    boe_ids = {boe_id for boe_id in boe_ids if boe_id}
+    if not boe_ids:
+        return set()
+    return set(
+        RowDetails.objects.filter(bill_of_entry_id__in=boe_ids)
+        .values_list('sr_number__license_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=LicenseTrade)
+def reconcile_on_ledger_parent_change(sender, instance, created, **kwargs):
+    """
+    (Un)linking a trade's BOE or changing its direction re-classifies every
+    child row at once — no single row save carries that delta, so the
+    affected ledgers are reconciled instead. A new trade has no lines yet,
+    but if it is created on a BOE that BOE's rows stop counting as debit.
+    """
+    if kwargs.get('raw', False) or not balance_ledger.ledger_enabled():
+        return
+    if created:
+        license_ids = _boe_row_license_ids([instance.boe_id])
+    else:
+        before = getattr(instance, '_ledger_parent', None)
+        if before is None or before == (instance.boe_id, instance.direction):
+            return
+        license_ids = set(
+            LicenseTradeLine.objects.filter(trade=instance).values_list('sr_number__license_id', flat=True)
+        )
+        license_ids |= _boe_row_license_ids([before[0], instance.boe_id])
+    license_ids.discard(None)
+    balance_ledger.reconcile_ledgers(license_ids)
+
+
+@receiver(post_delete, sender=LicenseTrade)
+def reconcile_on_ledger_parent_delete(sender, instance, **kwargs):
+    """
+    Deleting a trade puts its BOE's rows back into the debit. The cascaded
+    lines carry their own deltas; the BOE rows have none, so reconcile.
+    """
+    if not balance_ledger.ledger_enabled():
+        return
+    license_ids = _boe_row_license_ids([instance.boe_id])
+    license_ids.discard(None)
+    balance_ledger.reconcile_ledgers(license_ids)
+
+
+@receiver(m2m_changed, sender=BillOfEntryModel.allotment.through)
+def reconcile_on_allotment_boe_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Attaching an allotment to a BOE (or detaching it) moves all of its items
+    in or out of the allotment component in one go; reconcile their ledgers.
+    """
+    if not balance_ledger.ledger_enabled():
+        return
+    if action == 'pre_clear':
+        # pk_set is None for clear(); remember what is about to be detached.
+        instance._ledger_cleared = set(
+            getattr(instance, 'bill_of_entry' if reverse else 'allotment').values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    related = getattr(instance, '_ledger_cleared', set()) if action == 'post_clear' else (pk_set or set())
+    allotment_ids = {instance.pk} if reverse else set(related)
+    if not allotment_ids or (reverse and not related):
+        return
+    license_ids = set(
+        AllotmentItems.objects.filter(allotment_id__in=allotment_ids).values_list('item__license_id', flat=True)
+    )
+    license_ids.discard(None)
+    balance_ledger.reconcile_ledgers(license_ids)
+
 
 @receiver(post_save, sender=LicenseDetailsModel)
 def auto_fetch_import_items(sender, instance, created, **kwargs):
@@ -227,6 +405,9 @@ def update_license_on_export_item_change(sender, instance, created, **kwargs):
         return
     if _flags_suspended():
         return
+    if balance_ledger.ledger_enabled():
+        _apply_ledger_change(sender, instance)
+        return
 
     if instance.license:
         update_license_flags(instance.license)
@@ -241,6 +422,9 @@ def update_license_on_export_item_delete(sender, instance, **kwargs):
         return
     if _flags_suspended():
         return
+    if balance_ledger.ledger_enabled():
+        _apply_ledger_change(sender, instance, deleted=True)
+        return
 
     if instance.license:
         update_license_flags(instance.license)
@@ -284,7 +468,7 @@ def update_license_on_import_item_change(sender, instance, created, **kwargs):
     logger.info(f"Signal fired for import item {instance.id} (created={created})")
 
     if instance.license:
-        update_license_flags(instance.license)
+        _refresh_license_for_import_item(instance)
 
         # Only auto-link items if no items are currently linked (items field is empty)
         if instance.items.exists():
@@ -333,6 +517,11 @@ def update_license_on_import_item_delete(sender, instance, **kwargs):
     if _flags_suspended():
         return
 
+    if balance_ledger.ledger_enabled():
+        # Child rows were cascade-deleted first and applied their own deltas.
+        balance_ledger.refresh_license_state(instance.license_id)
+        return
+
     if instance.license:
         update_license_flags(instance.license)
 
@@ -347,6 +536,9 @@ def update_license_on_allotment_item_change(sender, instance, **kwargs):
     """
     if kwargs.get('raw', False):
         return
+    if balance_ledger.ledger_enabled():
+        _apply_ledger_change(sender, instance, deleted=kwargs.get('signal') is post_delete)
+        return
 
     # Get the license from the allotment item
     if hasattr(instance, 'item') and instance.item:
@@ -364,6 +556,9 @@ def update_license_on_boe_item_change(sender, instance, **kwargs):
     """
     if kwargs.get('raw', False):
         return
+    if balance_ledger.ledger_enabled():
+        _apply_ledger_change(sender, instance, deleted=kwargs.get('signal') is post_delete)
+        return
 
     # Get the license from the BOE row detail via sr_number (LicenseImportItemsModel)
     if hasattr(instance, 'sr_number') and instance.sr_number:
@@ -381,6 +576,9 @@ def update_license_on_trade_line_change(sender, instance, **kwargs):
     """
     if kwargs.get('raw', False):
         return
+    if balance_ledger.ledger_enabled():
+        _apply_ledger_change(sender, instance, deleted=kwargs.get('signal') is post_delete)
+        return
 
     # Get the license from the trade line via sr_number (LicenseImportItemsModel)
     if hasattr(instance, 'sr_number') and instance.sr_number:
@@ -8,20 +8,103 @@ from apps.license.models import LicenseImportItemsModel
 
 logger = logging.getLogger(__name__)
 
+# Licences per bulk balance round-trip in the balance refresh tasks.
+BALANCE_BATCH_SIZE = 500
+
+# Current-state columns read alongside each licence so change detection needs
+# no per-licence access to the LicenseBalance / LicenseFlags sub-rows.
+_LICENSE_STATE_FIELDS = (
+    'pk',
+    'license_number',
+    'license_expiry_date',
+    'balance__balance_cif',
+    'flags__is_expired',
+    'flags__is_null',
+    'flags__is_active',
+)
+
+
+def _iter_license_balance_batches(licenses, batch_size=BALANCE_BATCH_SIZE):
+    """
+    Yield (rows, balances) for a licence queryset, one batch at a time.
+
+    rows are values() dicts with _LICENSE_STATE_FIELDS; balances is the
+    LicenseBalanceCalculator.calculate_balances_bulk() result for the batch.
+    """
+    from apps.license.services.balance_calculator import LicenseBalanceCalculator
+
+    batch = []
+    for row in licenses.order_by('pk').values(*_LICENSE_STATE_FIELDS).iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch, LicenseBalanceCalculator.calculate_balances_bulk([r['pk'] for r in batch])
+            batch = []
+    if batch:
+        yield batch, LicenseBalanceCalculator.calculate_balances_bulk([r['pk'] for r in batch])
+
+
+def _target_license_state(row, balance, today):
+    """Compute the balance_cif / is_* values a licence row should have."""
+    from decimal import Decimal
+
+    expiry = row['license_expiry_date']
+    is_expired = expiry < today if expiry else False
+    return {
+        'balance_cif': balance,
+        'is_expired': is_expired,
+        'is_null': balance < Decimal('500'),
+        'is_active': not is_expired,  # Mark inactive if expired
+    }
+
+
+def _license_state_changed(row, target):
+    """True when the stored balance/flags differ from the target state."""
+    return (row['balance__balance_cif'] != target['balance_cif'] or
+            row['flags__is_expired'] != target['is_expired'] or
+            row['flags__is_null'] != target['is_null'] or
+            row['flags__is_active'] != target['is_active'])
+
+
+def _write_license_states(states):
+    """
+    Persist {license_id: target_state} with one bulk UPDATE per sub-table.
+
+    balance_cif lives on LicenseBalance; the is_* flags on LicenseFlags. Both
+    are keyed by license_id, so unsaved instances carrying only the pk and the
+    changed columns are enough for bulk_update (no signals fire), so the
+    licences are queued for the license_balance_mv summary explicitly.
+    """
+    from apps.core.signals_materialized_views import mark_dirty_on_commit
+    from apps.license.models import LicenseBalance, LicenseFlags
+
+    if not states:
+        return
+    LicenseBalance.objects.bulk_update(
+        [LicenseBalance(license_id=pk, balance_cif=s['balance_cif']) for pk, s in states.items()],
+        ['balance_cif'],
+        batch_size=BALANCE_BATCH_SIZE,
+    )
+    LicenseFlags.objects.bulk_update(
+        [LicenseFlags(license_id=pk, is_expired=s['is_expired'], is_null=s['is_null'],
+                      is_active=s['is_active']) for pk, s in states.items()],
+        ['is_expired', 'is_null', 'is_active'],
+        batch_size=BALANCE_BATCH_SIZE,
+    )
+    mark_dirty_on_commit(license_ids=states.keys())
+
 
 @shared_task
 def update_items():
-    """Update balance values for license items (optimized - now synchronous)"""
-    from apps.core.scripts.calculate_balance import update_balance_values
+    """Update balance values for license items (batched grouped aggregates)"""
+    from apps.core.scripts.calculate_balance import update_balance_values_bulk
 
     current_date = datetime.now()
     date_90_days_ago = current_date - timedelta(days=90)
-    items = LicenseImportItemsModel.objects.filter(
+    item_ids = LicenseImportItemsModel.objects.filter(
         license__license_expiry_date__gte=date_90_days_ago
-    ).order_by('license__license_expiry_date', 'license__license_date')
+    ).order_by('license__license_expiry_date', 'license__license_date').values_list('id', flat=True)
 
-    for item in items:
-        update_balance_values(item)
+    update_balance_values_bulk(list(item_ids))
 
 
 @shared_task(bind=True)
@@ -44,14 +127,7 @@ def update_all_license_balances(self, license_status='all'):
         dict with status, counts, and timing info
     """
     from django.utils import timezone
-    from decimal import Decimal
-    from apps.license.models import (
-        LicenseDetailsModel,
-        LicenseImportItemsModel,
-        LicenseBalance,
-        LicenseFlags,
-    )
-    from apps.license.services.balance_calculator import LicenseBalanceCalculator
+    from apps.license.models import LicenseDetailsModel
 
     logger.info(f"Starting update_all_license_balances task: task_id={self.request.id}, license_status={license_status}")
     start_time = datetime.now()
@@ -80,57 +156,37 @@ def update_all_license_balances(self, license_status='all'):
         updated_count = 0
         skipped_count = 0
         error_count = 0
+        processed = 0
         today = timezone.now().date()
 
-        # Process licenses in batches
-        batch_size = 50
-        for i, license_obj in enumerate(licenses.iterator(chunk_size=batch_size)):
-            try:
-                # Calculate balance using centralized service
-                balance = LicenseBalanceCalculator.calculate_balance(license_obj)
-
-                # Determine flags
-                is_expired = license_obj.license_expiry_date < today if license_obj.license_expiry_date else False
-                is_null = balance < Decimal('500')
-                is_active = not is_expired  # Mark inactive if expired
-
-                # Check if any value changed - skip update if nothing changed (optimization)
-                if (license_obj.balance_cif == balance and
-                    license_obj.is_expired == is_expired and
-                    license_obj.is_null == is_null and
-                    license_obj.is_active == is_active):
+        # Balances are computed set-based per batch (LicenseBalanceCalculator.
+        # calculate_balances_bulk) and only changed licences are written back.
+        for rows, balances in _iter_license_balance_batches(licenses):
+            changed = {}
+            for row in rows:
+                target = _target_license_state(row, balances[row['pk']]['balance'], today)
+                if _license_state_changed(row, target):
+                    changed[row['pk']] = target
+                else:
                     # Nothing changed, skip this license to reduce DB writes
                     skipped_count += 1
-                    continue
-
-                # Update license fields only if something changed.
-                # balance_cif lives on LicenseBalance; the is_* flags on LicenseFlags.
-                LicenseBalance.objects.filter(license_id=license_obj.pk).update(
-                    balance_cif=balance,
-                )
-                LicenseFlags.objects.filter(license_id=license_obj.pk).update(
-                    is_expired=is_expired,
-                    is_null=is_null,
-                    is_active=is_active,
-                )
-
-                updated_count += 1
-
-                # Update progress every batch
-                if (i + 1) % batch_size == 0:
-                    progress = int(((i + 1) / total_licenses) * 90)  # Reserve 10% for restrictions
-                    self.update_state(
-                        state='PROGRESS',
-                        meta={
-                            'current': i + 1,
-                            'total': total_licenses,
-                            'status': f'Updated {updated_count} licenses, skipped {skipped_count}...'
-                        }
-                    )
 
+            try:
+                _write_license_states(changed)
+                updated_count += len(changed)
             except Exception as e:
-                error_count += 1
-                logger.error(f"Error updating license {license_obj.license_number}: {str(e)}")
+                error_count += len(changed)
+                logger.error(f"Error updating balances for licenses {rows[0]['license_number']}..{rows[-1]['license_number']}: {str(e)}")
+
+            processed += len(rows)
+            self.update_state(
+                state='PROGRESS',
+                meta={
+                    'current': processed,
+                    'total': total_licenses,
+                    'status': f'Updated {updated_count} licenses, skipped {skipped_count}...'
+                }
+            )
 
         # Refresh per-item available_value via the new pool model and keep
         # is_restricted in sync with condition_type. The old path that derived
@@ -141,14 +197,27 @@ def update_all_license_balances(self, license_status='all'):
             meta={'current': 90, 'total': 100, 'status': 'Refreshing per-item balances...'}
         )
 
+        # Batched: balances via calculate_balances_bulk, pools via
+        # compute_condition_pools_bulk, one bulk_update per batch — instead
+        # of update_license_flags (~13+ SUMs) per licence.
         restriction_count = 0
-        from apps.license.signals import update_license_flags
-        for license_obj in LicenseDetailsModel.objects.all().iterator(chunk_size=50):
+        from apps.license.signals import update_import_items_available_value_bulk
+        for rows, balances in _iter_license_balance_batches(LicenseDetailsModel.objects.all()):
             try:
-                update_license_flags(license_obj)
-                restriction_count += 1
+                targets = {
+                    row['pk']: _target_license_state(row, balances[row['pk']]['balance'], today)
+                    for row in rows
+                }
+                _write_license_states({
+                    row['pk']: targets[row['pk']]
+                    for row in rows if _license_state_changed(row, targets[row['pk']])
+                })
+                update_import_items_available_value_bulk(
+                    {pk: target['balance_cif'] for pk, target in targets.items()}
+                )
+                restriction_count += len(rows)
             except Exception as e:
-                logger.error(f"Error refreshing balances for license {license_obj.license_number}: {e}")
+                logger.error(f"Error refreshing balances for licenses {rows[0]['license_number']}..{rows[-1]['license_number']}: {e}")
 
         elapsed = (datetime.now() - start_time).total_seconds()
 
@@ -238,7 +307,8 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
         dict with file_path and metadata
     """
     from django.conf import settings
-    from apps.license.views.item_pivot_report import ItemPivotReportView
+    from apps.license.services.pivot_snapshot import get_fresh_snapshot, normalize_filters
+    from apps.license.views.item_pivot_report import ItemPivotReportView, PivotRowSpool
     import openpyxl
     from openpyxl.styles import Font, Alignment, PatternFill
     from openpyxl.cell import WriteOnlyCell
@@ -254,20 +324,29 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
 
         logger.info(f"Generating report with params: sion_norm={sion_norm}, days={days}, min_balance={min_balance}")
 
-        report_data = view.generate_report(
-            days=days,
+        # Reuse the cached pivot snapshot when it is built from the current data.
+        snapshot = get_fresh_snapshot(normalize_filters(
             sion_norm=sion_norm,
             company_ids=company_ids,
             exclude_company_ids=exclude_company_ids,
             min_balance=min_balance,
             license_status=license_status
-        )
-
-        # Check if report_data contains an error
-        if isinstance(report_data, dict) and 'error' in report_data:
-            raise ValueError(report_data['error'])
-
-        self.update_state(state='PROGRESS', meta={'current': 50, 'total': 100, 'status': 'Creating Excel file...'})
+        ))
+        snapshot_status = 'fresh' if snapshot else None
+        if snapshot:
+            spool = PivotRowSpool.from_report(snapshot['report'])
+        else:
+            spool = view.spool_report(
+                days=days,
+                sion_norm=sion_norm,
+                company_ids=company_ids,
+                exclude_company_ids=exclude_company_ids,
+                min_balance=min_balance,
+                license_status=license_status
+            )
+
+        self.update_state(state='PROGRESS', meta={'current': 50, 'total': 100, 'status': 'Creating Excel file...',
+                                                  'snapshot': snapshot_status})
 
         # Create exports directory if it doesn't exist
         exports_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
@@ -281,29 +360,29 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
         # Use write_only mode for memory efficiency
         workbook = openpyxl.Workbook(write_only=True)
 
-        licenses_by_norm_notification = report_data.get('licenses_by_norm_notification', {})
-
-        # Check if there's data to export
-        if not licenses_by_norm_notification:
-            raise ValueError('No data found matching the filters. Try adjusting the parameters.')
+        with spool:
+            sheets = spool.sheets
 
-        total_sheets = sum(len(notif_dict) for notif_dict in licenses_by_norm_notification.values())
-        current_sheet = 0
+            # Check if there's data to export
+            if not sheets:
+                raise ValueError('No data found matching the filters. Try adjusting the parameters.')
 
-        logger.info(f"Generating {total_sheets} sheets for task {self.request.id}")
+            total_sheets = len(sheets)
+            logger.info(f"Generating {total_sheets} sheets for task {self.request.id}")
 
-        # Create a sheet for each norm-notification combination
-        for norm_class in sorted(licenses_by_norm_notification.keys()):
-            notifications_dict = licenses_by_norm_notification[norm_class]
-            for notification, licenses_list in sorted(notifications_dict.items()):
-                current_sheet += 1
+            # Create a sheet for each norm-notification combination; rows are
+            # read back from the spool one at a time and totals kept as
+            # running counters.
+            for current_sheet, sheet in enumerate(sheets, 1):
+                norm_class, notification = sheet
                 progress = 50 + int((current_sheet / total_sheets) * 40)
                 self.update_state(
                     state='PROGRESS',
                     meta={
                         'current': progress,
                         'total': 100,
-                        'status': f'Creating sheet {current_sheet}/{total_sheets}: {norm_class} - {notification}'
+                        'status': f'Creating sheet {current_sheet}/{total_sheets}: {norm_class} - {notification}',
+                        'snapshot': snapshot_status,
                     }
                 )
 
@@ -322,18 +401,7 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
                 # Build headers - only include items that have data in this norm-notification
                 base_headers = ['Sr no', 'DFIA No', 'DFIA Dt', 'Expiry Dt', 'Exporter', 'Total CIF', 'Balance CIF']
                 item_headers = []
-
-                # Filter items to only those with data in this norm-notification
-                items_with_data = []
-                for item in report_data['items']:
-                    item_name = item['name']
-                    # Check if ANY license in this list has this item
-                    has_data = any(
-                        license_data['items'].get(item_name, {}).get('quantity', 0) > 0
-                        for license_data in licenses_list
-                    )
-                    if has_data:
-                        items_with_data.append(item)
+                items_with_data = spool.items_with_data(sheet)
 
                 for item in items_with_data:
                     item_name = item['name']
@@ -362,8 +430,16 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
                     header_row.append(cell)
                 worksheet.append(header_row)
 
+                qty_types = ['quantity', 'allotted_quantity', 'debited_quantity', 'available_quantity']
+                total_cif = 0
+                balance_cif = 0
+                item_totals = {
+                    item['name']: dict.fromkeys(qty_types + ['restriction_value'], 0)
+                    for item in items_with_data
+                }
+
                 # Write data rows
-                for idx, license_data in enumerate(licenses_list, 1):
+                for idx, license_data in enumerate(spool.rows(sheet), 1):
                     row_data = [
                         idx,
                         license_data['license_number'],
@@ -373,6 +449,8 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
                         license_data['total_cif'],
                         license_data['balance_cif']
                     ]
+                    total_cif += license_data['total_cif']
+                    balance_cif += license_data['balance_cif']
 
                     for item in items_with_data:
                         item_name = item['name']
@@ -397,6 +475,11 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
                             row_data.append(restriction_val if restriction_val else '')
                             row_data.append(item_data.get('restriction_value', 0) if item_data.get('restriction_value') else '')
 
+                        totals = item_totals[item_name]
+                        for qty_type in qty_types:
+                            totals[qty_type] += item_data.get(qty_type, 0)
+                        totals['restriction_value'] += item_data.get('restriction_value', 0)
+
                     worksheet.append(row_data)
 
                 # Add totals row
@@ -404,9 +487,6 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
                 totals_row[0].font = Font(bold=True)
                 totals_row.extend([None, None, None, None])
 
-                total_cif = sum(lic['total_cif'] for lic in licenses_list)
-                balance_cif = sum(lic['balance_cif'] for lic in licenses_list)
-
                 total_cif_cell = WriteOnlyCell(worksheet, value=total_cif)
                 total_cif_cell.font = Font(bold=True)
                 totals_row.append(total_cif_cell)
@@ -416,21 +496,18 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
                 totals_row.append(balance_cif_cell)
 
                 for item in items_with_data:
-                    item_name = item['name']
-                    has_restriction = item.get('has_restriction', False)
+                    totals = item_totals[item['name']]
 
                     totals_row.extend([None, None])  # Skip HSN and Description
 
-                    for qty_type in ['quantity', 'allotted_quantity', 'debited_quantity', 'available_quantity']:
-                        total = sum(lic['items'].get(item_name, {}).get(qty_type, 0) for lic in licenses_list)
-                        cell = WriteOnlyCell(worksheet, value=total)
+                    for qty_type in qty_types:
+                        cell = WriteOnlyCell(worksheet, value=totals[qty_type])
                         cell.font = Font(bold=True)
                         totals_row.append(cell)
 
-                    if has_restriction:
+                    if item.get('has_restriction', False):
                         totals_row.append(None)
-                        total_restriction = sum(lic['items'].get(item_name, {}).get('restriction_value', 0) for lic in licenses_list)
-                        cell = WriteOnlyCell(worksheet, value=total_restriction)
+                        cell = WriteOnlyCell(worksheet, value=totals['restriction_value'])
                         cell.font = Font(bold=True)
                         totals_row.append(cell)
 
@@ -454,7 +531,8 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
             'file_size': file_size,
             'download_url': f'/media/exports/{filename}',
             'generated_at': datetime.now().isoformat(),
-            'task_id': self.request.id
+            'task_id': self.request.id,
+            'snapshot': snapshot_status,
         }
 
     except Exception as e:
@@ -471,6 +549,23 @@ def generate_item_pivot_excel(self, days=30, sion_norm=None, company_ids=None,
         raise
 
 
+@shared_task
+def rebuild_item_pivot_snapshot(filters):
+    """
+    Rebuild the cached item pivot snapshot for one filter fingerprint.
+
+    Queued by pivot_snapshot.get_pivot_report() when it served a snapshot
+    whose data version had moved.
+
+    Args:
+        filters: normalize_filters() dict
+    """
+    from apps.license.services.pivot_snapshot import rebuild_snapshot
+
+    snapshot = rebuild_snapshot(filters)
+    return {'version': snapshot['version'], 'built_at': snapshot['built_at']}
+
+
 @shared_task(name='identify_licenses_needing_update')
 def identify_licenses_needing_update():
     """
@@ -488,9 +583,7 @@ def identify_licenses_needing_update():
         - If no updates needed: Returns immediately with 0 tasks created
     """
     from django.utils import timezone
-    from decimal import Decimal
     from apps.license.models import LicenseDetailsModel
-    from apps.license.services.balance_calculator import LicenseBalanceCalculator
     from apps.core.models import CeleryTaskTracker
 
     task_id = identify_licenses_needing_update.request.id
@@ -512,25 +605,13 @@ def identify_licenses_needing_update():
 
         licenses_to_update = []
 
-        # Identify licenses that need updates
-        for license_obj in licenses.iterator(chunk_size=200):
-            try:
-                # Calculate what the values should be
-                balance = LicenseBalanceCalculator.calculate_balance(license_obj)
-                is_expired = license_obj.license_expiry_date < today if license_obj.license_expiry_date else False
-                is_null = balance < Decimal('500')
-                is_active = not is_expired
-
-                # Check if any value changed
-                if (license_obj.balance_cif != balance or
-                    license_obj.is_expired != is_expired or
-                    license_obj.is_null != is_null or
-                    license_obj.is_active != is_active):
+        # Identify licenses that need updates (balances computed per batch)
+        for rows, balances in _iter_license_balance_batches(licenses):
+            for row in rows:
+                target = _target_license_state(row, balances[row['pk']]['balance'], today)
+                if _license_state_changed(row, target):
                     # This license needs update
-                    licenses_to_update.append(license_obj.id)
-
-            except Exception as e:
-                logger.error(f"Error checking license {license_obj.license_number}: {str(e)}")
+                    licenses_to_update.append(row['pk'])
 
         elapsed = (datetime.now() - start_time).total_seconds()
 
@@ -592,9 +673,7 @@ def update_identified_licenses(license_ids):
         dict with update statistics
     """
     from django.utils import timezone
-    from decimal import Decimal
-    from apps.license.models import LicenseDetailsModel, LicenseBalance, LicenseFlags
-    from apps.license.services.balance_calculator import LicenseBalanceCalculator
+    from apps.license.models import LicenseDetailsModel
     from apps.core.models import CeleryTaskTracker
 
     task_id = update_identified_licenses.request.id
@@ -617,40 +696,25 @@ def update_identified_licenses(license_ids):
 
         updated_count = 0
         error_count = 0
-        batch_size = 100
 
-        for i, license_obj in enumerate(licenses.iterator(chunk_size=batch_size)):
+        for rows, balances in _iter_license_balance_batches(licenses):
+            # Update licenses (we already know they need updating from level-1),
+            # recomputing the balance in case it moved since identification.
+            states = {
+                row['pk']: _target_license_state(row, balances[row['pk']]['balance'], today)
+                for row in rows
+            }
             try:
-                # Calculate balance
-                balance = LicenseBalanceCalculator.calculate_balance(license_obj)
-
-                # Determine flags
-                is_expired = license_obj.license_expiry_date < today if license_obj.license_expiry_date else False
-                is_null = balance < Decimal('500')
-                is_active = not is_expired
-
-                # Update license (we already know it needs updating from level-1).
-                # balance_cif is on LicenseBalance; is_* flags on LicenseFlags.
-                LicenseBalance.objects.filter(license_id=license_obj.pk).update(
-                    balance_cif=balance,
-                )
-                LicenseFlags.objects.filter(license_id=license_obj.pk).update(
-                    is_expired=is_expired,
-                    is_null=is_null,
-                    is_active=is_active,
-                )
-
-                updated_count += 1
-
-                # Update progress every batch
-                if (i + 1) % batch_size == 0:
-                    tracker.current = i + 1
-                    tracker.progress_message = f'Updated {updated_count} licenses...'
-                    tracker.save(update_fields=['current', 'progress_message'])
-
+                _write_license_states(states)
+                updated_count += len(states)
             except Exception as e:
-                error_count += 1
-                logger.error(f"Error updating license {license_obj.license_number}: {str(e)}")
+                error_count += len(states)
+                logger.error(f"Error updating licenses {rows[0]['license_number']}..{rows[-1]['license_number']}: {str(e)}")
+
+            # Update progress every batch
+            tracker.current = updated_count + error_count
+            tracker.progress_message = f'Updated {updated_count} licenses...'
+            tracker.save(update_fields=['current', 'progress_message'])
 
         elapsed = (datetime.now() - start_time).total_seconds()
 
@@ -690,6 +754,54 @@ def update_identified_licenses(license_ids):
         }
 
 
+@shared_task(name='reconcile_license_ledgers')
+def reconcile_license_ledgers(batch_size=BALANCE_BATCH_SIZE):
+    """
+    Verify the incremental balance ledger against the full recompute.
+
+    Walks every licence in batches through balance_ledger.reconcile_ledgers,
+    which seeds unseeded ledgers and repairs any that drifted (rows written
+    with queryset.update()/bulk_create bypass the delta signals).
+
+    Returns:
+        dict with checked / seeded / drifted counts
+    """
+    from apps.license.models import LicenseDetailsModel
+    from apps.license.services import balance_ledger
+
+    logger.info("Starting licence ledger reconciliation")
+    start_time = datetime.now()
+
+    totals = {'checked': 0, 'seeded': 0, 'drifted': 0}
+    drifted_ids = []
+    batch = []
+    for license_id in LicenseDetailsModel.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(license_id)
+        if len(batch) >= batch_size:
+            stats = balance_ledger.reconcile_ledgers(batch)
+            batch = []
+            drifted_ids.extend(stats.pop('drifted_ids'))
+            for key in totals:
+                totals[key] += stats[key]
+    if batch:
+        stats = balance_ledger.reconcile_ledgers(batch)
+        drifted_ids.extend(stats.pop('drifted_ids'))
+        for key in totals:
+            totals[key] += stats[key]
+
+    if drifted_ids:
+        logger.warning(f"Ledger drift repaired for {len(drifted_ids)} licenses: {drifted_ids[:50]}")
+
+    result = {
+        'status': 'success',
+        **totals,
+        'elapsed_seconds': (datetime.now() - start_time).total_seconds(),
+        'timestamp': datetime.now().isoformat()
+    }
+    logger.info(f"Ledger reconciliation completed: {result}")
+    return result
+
+
 @shared_task(name='cleanup_old_task_records')
 def cleanup_old_task_records():
     """
@@ -907,4 +1019,25 @@ def process_single_license(self, dict_data):
         }
     except Exception as e:
         logger.error(f"Error processing license {license_no}: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+
+
+@shared_task(bind=True, name='parse_license_pdf_job')
+def parse_license_pdf_job(self, path, create_company=True):
+    """
+    Parse an uploaded DFIA licence PDF off the request (LicensePdfParseView
+    with async=true). The upload at `path` is deleted once parsed.
+
+    Returns:
+        dict with the status_code and payload of the synchronous endpoint
+    """
+    from django.conf import settings
+    from apps.core.pdf_parse_jobs import run_parse_job
+    from apps.license.views.parse_pdf import run_license_pdf_parse
+
+    def parse(source, timer):
+        return run_license_pdf_parse(
+            source, create_company, timer=timer, cache_dir=settings.DFIA_TEXT_CACHE_DIR,
+        )
+
+    return run_parse_job(self, path, parse)
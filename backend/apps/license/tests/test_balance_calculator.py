@@ -193,6 +193,39 @@ class TestLicenseBalanceCalculator(TestCase):
             # Assert
             assert result['balance'] == DEC_0
 
+    @patch('apps.trade.models.LicenseTradeLine')
+    @patch('apps.license.services.balance_calculator.AllotmentItems')
+    @patch('apps.license.services.balance_calculator.RowDetails')
+    @patch('apps.license.services.balance_calculator.LicenseExportItemModel')
+    def test_calculate_balances_bulk(self, mock_export, mock_rows, mock_allot, mock_trade):
+        """Should compute every licence's components from grouped aggregates"""
+        def grouped(model, field, totals):
+            qs = model.objects.filter.return_value
+            qs.values.return_value.annotate.return_value.order_by.return_value = [
+                {field: pk, 'total': total} for pk, total in totals.items()
+            ]
+
+        grouped(mock_export, 'license_id', {1: Decimal('1000.00'), 2: Decimal('100.00')})
+        grouped(mock_rows, 'sr_number__license_id', {1: Decimal('300.00'), 2: Decimal('150.00')})
+        grouped(mock_allot, 'item__license_id', {1: Decimal('200.00')})
+        grouped(mock_trade, 'sr_number__license_id', {1: Decimal('50.005')})
+
+        # Execute
+        result = LicenseBalanceCalculator.calculate_balances_bulk([1, 2, 3, 1])
+
+        # Assert: one grouped query per component, not per licence
+        assert mock_export.objects.filter.call_count == 1
+        assert mock_rows.objects.filter.call_count == 1
+        assert mock_allot.objects.filter.call_count == 1
+        assert mock_trade.objects.filter.call_count == 1
+        assert set(result) == {1, 2, 3}
+        assert result[1]['trade'] == Decimal('50.01')
+        assert result[1]['balance'] == Decimal('450.00')  # 1000 - (300 + 200 + 50.005), rounded half-up
+        assert result[2]['balance'] == DEC_0  # Should not return negative
+        assert result[3] == {
+            'credit': DEC_0, 'debit': DEC_0, 'allotment': DEC_0, 'trade': DEC_0, 'balance': DEC_0,
+        }
+
 
 class TestItemBalanceCalculator(TestCase):
     """Tests for ItemBalanceCalculator class"""
@@ -0,0 +1,168 @@
+"""
+Tests for apps.license.services.balance_ledger (incremental licence ledger).
+"""
+import pytest
+from decimal import Decimal
+from unittest import TestCase as UnitTestCase
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from apps.allotment.models import AllotmentItems, AllotmentModel
+from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+from apps.core.constants import DEC_0
+from apps.core.models import CompanyModel
+from apps.license.models import (
+    LicenseBalance,
+    LicenseDetailsModel,
+    LicenseExportItemModel,
+    LicenseImportItemsModel,
+)
+from apps.license.services import balance_ledger
+from apps.license.services.balance_calculator import LicenseBalanceCalculator
+from apps.license.services.balance_ledger import LedgerContribution
+from apps.trade.models import LicenseTrade, LicenseTradeLine
+
+
+class TestApplyContributionChange(UnitTestCase):
+    """Signed-delta arithmetic, independent of the database."""
+
+    def _apply(self, before, after):
+        with patch.object(balance_ledger, 'apply_license_delta', return_value=True) as mock_apply, \
+             patch.object(balance_ledger, 'refresh_license_state') as mock_refresh:
+            pending = balance_ledger.apply_contribution_change(before, after)
+        return pending, mock_apply, mock_refresh
+
+    def test_update_applies_difference(self):
+        """Should apply new - old to the component and the % pool"""
+        before = LedgerContribution(1, '5%', 'debit', Decimal('100.000'), Decimal('100.000'))
+        after = LedgerContribution(1, '5%', 'debit', Decimal('140.500'), Decimal('140.500'))
+
+        pending, mock_apply, mock_refresh = self._apply(before, after)
+
+        assert pending == set()
+        mock_apply.assert_called_once_with(1, {'debit': Decimal('40.500')}, {'5%': Decimal('40.500')})
+        mock_refresh.assert_called_once_with(1)
+
+    def test_delete_reverses_contribution(self):
+        """Should subtract the whole contribution on delete"""
+        before = LedgerContribution(1, '', 'allotment', Decimal('25.00'), Decimal('25.00'))
+
+        _, mock_apply, _ = self._apply(before, None)
+
+        mock_apply.assert_called_once_with(1, {'allotment': Decimal('-25.00')}, {})
+
+    def test_move_between_licences(self):
+        """Should debit one licence and credit the other when a row is re-pointed"""
+        before = LedgerContribution(1, '', 'trade', Decimal('10.00'), Decimal('10.00'))
+        after = LedgerContribution(2, '', 'trade', Decimal('10.00'), Decimal('10.00'))
+
+        _, mock_apply, _ = self._apply(before, after)
+
+        assert mock_apply.call_count == 2
+        mock_apply.assert_any_call(1, {'trade': Decimal('-10.00')}, {})
+        mock_apply.assert_any_call(2, {'trade': Decimal('10.00')}, {})
+
+    def test_no_change_is_noop(self):
+        """Should not write anything when the contribution is unchanged"""
+        same = LedgerContribution(1, '3%', 'debit', Decimal('5.00'), Decimal('5.00'))
+
+        _, mock_apply, mock_refresh = self._apply(same, same)
+
+        mock_apply.assert_not_called()
+        mock_refresh.assert_not_called()
+
+    def test_unseeded_licence_requests_recompute(self):
+        """Should hand back licences whose ledger could not take the delta"""
+        after = LedgerContribution(7, '', 'credit', Decimal('1.00'), DEC_0)
+
+        with patch.object(balance_ledger, 'apply_license_delta', return_value=False), \
+             patch.object(balance_ledger, 'refresh_license_state') as mock_refresh:
+            pending = balance_ledger.apply_contribution_change(None, after)
+
+        assert pending == {7}
+        mock_refresh.assert_not_called()
+
+
+@pytest.mark.django_db
+@override_settings(LICENSE_BALANCE_INCREMENTAL=True)
+class TestLedgerMatchesCalculator(TestCase):
+    """Deltas applied by the signals must land on the full-recompute result."""
+
+    def test_export_item_deltas(self):
+        license_obj = LicenseDetailsModel.objects.create(license_number="TEST-LEDGER01")
+        LicenseImportItemsModel.objects.create(license=license_obj, serial_number=1)
+
+        export = LicenseExportItemModel.objects.create(license=license_obj, cif_fc=Decimal("1000.00"))
+        export.cif_fc = Decimal("1250.50")
+        export.save()
+        LicenseExportItemModel.objects.create(license=license_obj, cif_fc=Decimal("99.50"))
+
+        ledger = LicenseBalance.objects.get(license=license_obj)
+        expected = LicenseBalanceCalculator.calculate_all_components(license_obj)
+        assert ledger.ledger_synced_at is not None
+        assert ledger.credit_total == expected['credit']
+        assert ledger.balance_cif == expected['balance'] == Decimal("1350.00")
+
+        stats = balance_ledger.reconcile_ledgers([license_obj.pk])
+        assert stats['drifted'] == 0
+
+    def _licence(self, suffix, credit=Decimal("1000.00")):
+        license_obj = LicenseDetailsModel.objects.create(license_number=f"TEST-LEDGER{suffix}")
+        item = LicenseImportItemsModel.objects.create(license=license_obj, serial_number=1)
+        LicenseExportItemModel.objects.create(license=license_obj, cif_fc=credit)
+        return license_obj, item
+
+    def _assert_in_sync(self, license_obj, balance):
+        ledger = LicenseBalance.objects.get(license=license_obj)
+        expected = LicenseBalanceCalculator.calculate_all_components(license_obj)
+        assert ledger.balance_cif == expected['balance'] == balance
+        assert balance_ledger.reconcile_ledgers([license_obj.pk], repair=False)['drifted'] == 0
+
+    def test_row_details_deltas(self):
+        license_obj, item = self._licence("02")
+        boe = BillOfEntryModel.objects.create()
+
+        row = RowDetails.objects.create(bill_of_entry=boe, sr_number=item, cif_fc=Decimal("120.000"))
+        self._assert_in_sync(license_obj, Decimal("880.00"))
+        row.cif_fc = Decimal("200.000")
+        row.save()
+        self._assert_in_sync(license_obj, Decimal("800.00"))
+        row.delete()
+        self._assert_in_sync(license_obj, Decimal("1000.00"))
+
+    def test_allotment_deltas_and_boe_link(self):
+        license_obj, item = self._licence("03")
+        company = CompanyModel.objects.create(name="Test Co Ledger")
+        allotment = AllotmentModel.objects.create(company=company, item_name="Test Commodity")
+
+        AllotmentItems.objects.create(allotment=allotment, item=item, cif_fc=Decimal("50.00"))
+        allotted = AllotmentItems.objects.create(allotment=allotment, item=item, cif_fc=Decimal("25.50"))
+        self._assert_in_sync(license_obj, Decimal("924.50"))
+        allotted.delete()
+        self._assert_in_sync(license_obj, Decimal("950.00"))
+
+        # Once on a BOE the allotment no longer counts; detaching restores it.
+        boe = BillOfEntryModel.objects.create()
+        boe.allotment.add(allotment)
+        self._assert_in_sync(license_obj, Decimal("1000.00"))
+        boe.allotment.clear()
+        self._assert_in_sync(license_obj, Decimal("950.00"))
+
+    def test_trade_created_on_boe_then_deleted(self):
+        license_obj, item = self._licence("04")
+        boe = BillOfEntryModel.objects.create()
+        RowDetails.objects.create(bill_of_entry=boe, sr_number=item, cif_fc=Decimal("100.000"))
+        seller = CompanyModel.objects.create(name="Test Co Ledger Seller")
+        buyer = CompanyModel.objects.create(name="Test Co Ledger Buyer")
+        self._assert_in_sync(license_obj, Decimal("900.00"))
+
+        # A trade created on the BOE takes over its rows: the debit drops out
+        # and only the trade lines count.
+        trade = LicenseTrade.objects.create(direction="SALE", from_company=seller, to_company=buyer, boe=boe)
+        self._assert_in_sync(license_obj, Decimal("1000.00"))
+        LicenseTradeLine.objects.create(trade=trade, sr_number=item, cif_fc=Decimal("100.00"))
+        self._assert_in_sync(license_obj, Decimal("900.00"))
+
+        trade.delete()
+        self._assert_in_sync(license_obj, Decimal("900.00"))
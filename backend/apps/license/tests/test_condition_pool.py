@@ -0,0 +1,63 @@
+"""
+Tests for the batched condition-pool path in apps.license.services.condition_pool
+and the bulk available_value refresh built on it.
+"""
+import pytest
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.bill_of_entry.models import BillOfEntryModel, RowDetails
+from apps.license.models import (
+    LicenseDetailsModel,
+    LicenseExportItemModel,
+    LicenseImportItemsModel,
+)
+from apps.license.services.condition_pool import (
+    compute_condition_pools,
+    compute_condition_pools_bulk,
+)
+from apps.license.signals import update_import_items_available_value_bulk
+
+
+def _make_license(suffix, credit, conditions):
+    license_obj = LicenseDetailsModel.objects.create(license_number=f"TEST-{suffix}")
+    LicenseExportItemModel.objects.create(license=license_obj, cif_fc=credit)
+    items = [
+        LicenseImportItemsModel.objects.create(
+            license=license_obj, serial_number=serial, condition_type=condition,
+        )
+        for serial, condition in enumerate(conditions, start=1)
+    ]
+    return license_obj, items
+
+
+@pytest.mark.django_db
+class TestComputeConditionPoolsBulk(TestCase):
+
+    def test_matches_per_licence_computation(self):
+        lic_a, items_a = _make_license("POOL01", Decimal("10000.00"), ["5%", "5%", "2%", "AU"])
+        lic_b, _ = _make_license("POOL02", Decimal("500.00"), ["", "AU"])
+        boe = BillOfEntryModel.objects.create()
+        RowDetails.objects.create(bill_of_entry=boe, sr_number=items_a[0], cif_fc=Decimal("120.000"))
+        RowDetails.objects.create(bill_of_entry=boe, sr_number=items_a[1], cif_fc=Decimal("30.500"))
+        RowDetails.objects.create(bill_of_entry=boe, sr_number=items_a[2], cif_fc=Decimal("400.000"))
+
+        result = compute_condition_pools_bulk([lic_a.pk, lic_b.pk])
+
+        assert result[lic_a.pk] == compute_condition_pools(lic_a)
+        assert result[lic_a.pk]["5%"] == Decimal("349.500")  # 500 - (120 + 30.5)
+        assert result[lic_a.pk]["2%"] == Decimal("0")  # 200 - 400, clamped
+        assert result[lic_b.pk] == {}
+
+    def test_bulk_available_value_refresh(self):
+        lic, items = _make_license("POOL03", Decimal("10000.00"), ["5%", ""])
+
+        changed = update_import_items_available_value_bulk({lic.pk: Decimal("800.00")})
+
+        assert changed == 2
+        items[0].refresh_from_db()
+        items[1].refresh_from_db()
+        assert items[0].available_value == Decimal("500.00")  # pool below licence balance
+        assert items[1].available_value == Decimal("800.00")  # open item tracks balance
+        assert update_import_items_available_value_bulk({lic.pk: Decimal("800.00")}) == 0
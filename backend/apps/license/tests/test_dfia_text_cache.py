@@ -0,0 +1,83 @@
+"""
+Tests for DFIA PDF text extraction: page-targeted OCR, shared rasterisation
+and the content-hash text cache.
+"""
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from apps.license.parsers import dfia_pdf
+
+
+class TestDfiaTextExtraction(TestCase):
+
+    def test_scanned_pdf_is_rasterised_once_for_qr_and_ocr(self):
+        """Should hand the same rendered pages to the QR decode and the OCR fallback"""
+        pages = ["page-1", "page-2"]
+        with patch.object(dfia_pdf, "_digital_text", return_value=""), \
+                patch.object(dfia_pdf, "_rasterize", return_value=pages) as rasterize, \
+                patch.object(dfia_pdf, "_decode_qr_urls", return_value=[]) as decode_qr, \
+                patch.object(dfia_pdf, "_ocr_text", return_value="OCR TEXT") as ocr:
+            text, kind = dfia_pdf._full_text(b"%PDF-scan", full_ocr=True)
+
+        assert (text, kind) == ("OCR TEXT", "ocr")
+        rasterize.assert_called_once()
+        assert decode_qr.call_args.args[1] is pages
+        assert ocr.call_args.args[1] is pages
+
+    def test_targeted_ocr_reads_only_header_and_condition_pages(self):
+        """Should stop header OCR once the fields are found and walk back only to the condition sheet"""
+        header = "Authorisation Number 0311007518 Date 01/04/2024\nImport Validity 01/04/2025\nIEC: ABCDE1234F\n"
+        page_text = {1: header, 5: "CONDITION SHEET\n" + "x" * 500, 6: "y" * 500}
+
+        def rasterize(pdf_bytes, dpi=300, first_page=None, last_page=None):
+            return [(first_page, dpi)]
+
+        with patch.object(dfia_pdf, "_digital_text", return_value=""), \
+                patch.object(dfia_pdf, "_page_count", return_value=6), \
+                patch.object(dfia_pdf, "_rasterize", side_effect=rasterize), \
+                patch.object(dfia_pdf, "_decode_qr_urls", return_value=[]), \
+                patch.object(dfia_pdf, "_ocr_image", side_effect=lambda img: page_text.get(img[0], "")) as ocr:
+            text, kind = dfia_pdf._full_text(b"%PDF-scan")
+
+        assert kind == "ocr"
+        assert text.startswith("Authorisation Number") and "CONDITION SHEET" in text
+        assert [img for (img,), _ in ocr.call_args_list] == [
+            (1, dfia_pdf._OCR_FAST_DPI), (6, dfia_pdf._OCR_FAST_DPI), (5, dfia_pdf._OCR_FAST_DPI),
+        ]
+
+    def test_unreadable_page_tree_falls_back_to_full_ocr(self):
+        """Should OCR every page when pypdf cannot count the pages of a scan"""
+        malformed = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\nnot really a pdf"
+        assert dfia_pdf._page_count(malformed) is None
+
+        pages = ["page-1", "page-2"]
+        with patch.object(dfia_pdf, "_digital_text", return_value=""), \
+                patch.object(dfia_pdf, "_rasterize", return_value=pages) as rasterize, \
+                patch.object(dfia_pdf, "_decode_qr_urls", return_value=[]), \
+                patch.object(dfia_pdf, "_ocr_text", return_value="OCR TEXT") as ocr:
+            text, kind = dfia_pdf._full_text(malformed)
+
+        assert (text, kind) == ("OCR TEXT", "ocr")
+        rasterize.assert_called_once_with(malformed)
+        assert ocr.call_args.args[1] is pages
+
+    def test_text_is_cached_by_content_hash(self):
+        """Should extract a document once and serve repeats from the cache"""
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch.object(dfia_pdf, "_extract_text", return_value=("LICENCE TEXT", "digital")) as extract:
+            first = dfia_pdf._full_text(b"%PDF-one", cache_dir=cache_dir)
+            again = dfia_pdf._full_text(b"%PDF-one", cache_dir=cache_dir)
+            other = dfia_pdf._full_text(b"%PDF-two", cache_dir=cache_dir)
+
+        assert first == again == other == ("LICENCE TEXT", "digital")
+        assert extract.call_count == 2
+
+    def test_empty_results_are_not_cached(self):
+        """Should retry extraction for documents that yielded no text"""
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch.object(dfia_pdf, "_extract_text", return_value=("", "empty")) as extract:
+            dfia_pdf._full_text(b"%PDF-blank", cache_dir=cache_dir)
+            dfia_pdf._full_text(b"%PDF-blank", cache_dir=cache_dir)
+
+        assert extract.call_count == 2
@@ -0,0 +1,93 @@
+"""
+Tests for the columnar ItemPivotReportView.generate_report.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import TestCase
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import ItemNameModel, PurchaseStatus
+from apps.license.models import (
+    LicenseBalance,
+    LicenseDetailsModel,
+    LicenseExportItemModel,
+    LicenseImportItemsModel,
+)
+from apps.license.views.item_pivot_report import ItemPivotReportView, PivotRowSpool
+
+
+def _make_licenses(count, start=0):
+    status, _ = PurchaseStatus.objects.get_or_create(code="GE", defaults={"label": "Global Exim"})
+    item, _ = ItemNameModel.objects.get_or_create(name="TEST PIVOT ITEM")
+    for n in range(start, start + count):
+        license_obj = LicenseDetailsModel.objects.create(
+            license_number=f"TEST-PIVOT{n:03d}",
+            license_expiry_date=date(2030, 1, 1),
+            purchase_status=status,
+        )
+        LicenseExportItemModel.objects.create(license=license_obj, cif_fc=Decimal("1000.00"))
+        import_item = LicenseImportItemsModel.objects.create(
+            license=license_obj, serial_number=1, quantity=Decimal("10.000"),
+        )
+        import_item.items.add(item)
+        LicenseBalance.objects.filter(license=license_obj).update(balance_cif=Decimal("1000.00"))
+
+
+def _generate():
+    return ItemPivotReportView().generate_report(license_status="all", purchase_status="GE", min_balance=0)
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_licences():
+    _make_licenses(2)
+    with CaptureQueriesContext(connection) as few:
+        report = _generate()
+    assert sum(len(rows) for groups in report["licenses_by_norm_notification"].values()
+               for rows in groups.values()) == 2
+
+    _make_licenses(8, start=2)
+    with CaptureQueriesContext(connection) as many:
+        report = _generate()
+
+    rows = [row for groups in report["licenses_by_norm_notification"].values()
+            for group_rows in groups.values() for row in group_rows]
+    assert len(rows) == 10
+    assert len(many.captured_queries) == len(few.captured_queries)
+    assert rows[0]["items"]["TEST PIVOT ITEM"]["quantity"] == 10.0
+    assert rows[0]["total_cif"] == 1000.0
+
+
+def _row(license_number, quantity, restriction=None):
+    cell = {'quantity': quantity, 'restriction': restriction, 'planned_cif': Decimal('1.50')}
+    return {'license_number': license_number, 'items': {'BORAX': cell, 'RUTILE': dict(cell, quantity=0)}}
+
+
+class TestPivotRowSpool(TestCase):
+
+    def test_rows_come_back_per_sheet_in_insertion_order(self):
+        """Should keep each sheet's rows apart, in the order they were added"""
+        with PivotRowSpool([(1, 'BORAX'), (2, 'RUTILE')]) as spool:
+            spool.add('E5', 'GE — B', _row('L1', 5))
+            spool.add('A3627', 'GE — A', _row('L2', 0))
+            spool.add('E5', 'GE — B', _row('L3', 7, restriction=3.0))
+
+            assert spool.sheets == [('A3627', 'GE — A'), ('E5', 'GE — B')]
+            rows = list(spool.rows(('E5', 'GE — B')))
+            assert [r['license_number'] for r in rows] == ['L1', 'L3']
+            assert rows[0]['items']['BORAX']['planned_cif'] == 1.5
+
+    def test_tracks_item_columns_and_restrictions(self):
+        """Should report items with data per sheet and restriction flags report-wide"""
+        with PivotRowSpool([(1, 'BORAX'), (2, 'RUTILE')]) as spool:
+            spool.add('E5', 'GE — B', _row('L1', 5, restriction=3.0))
+            spool.add('A3627', 'GE — A', _row('L2', 0))
+
+            assert [i['name'] for i in spool.items_with_data(('E5', 'GE — B'))] == ['BORAX']
+            assert spool.items_with_data(('A3627', 'GE — A')) == []
+            assert spool.items == [
+                {'id': 1, 'name': 'BORAX', 'has_restriction': True},
+                {'id': 2, 'name': 'RUTILE', 'has_restriction': True},
+            ]
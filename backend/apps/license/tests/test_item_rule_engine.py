@@ -0,0 +1,81 @@
+"""
+Tests for apps.license.utils.item_rule_engine (compiled item_matcher rules).
+"""
+import random
+from unittest import TestCase
+
+from django.db.models import Q
+
+from apps.license.utils.item_matcher import get_item_filters
+from apps.license.utils.item_rule_engine import AhoCorasick, CompiledItemRules, PrefixTrie
+
+
+class TestMatchers(TestCase):
+
+    def test_aho_corasick_matches_naive_substring_search(self):
+        """Should report exactly the patterns a naive `in` check finds"""
+        rng = random.Random(7)
+        patterns = sorted({''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(30)})
+        automaton = AhoCorasick(patterns)
+
+        for _ in range(500):
+            text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 15)))
+            assert automaton.search(text) == {i for i, p in enumerate(patterns) if p in text}
+
+    def test_prefix_trie_returns_every_matching_prefix(self):
+        """Should return all stored prefixes of the value, and nothing else"""
+        trie = PrefixTrie(['28', '2811', '3206'])
+
+        assert trie.match('28110000') == {0, 1}
+        assert trie.match('2901') == set()
+
+
+class TestCompiledItemRules(TestCase):
+
+    def _rules(self):
+        return CompiledItemRules([
+            {
+                'base_name': 'SILICA',
+                'norms': ['A3627'],
+                'filters': [
+                    Q(hs_code__hs_code__startswith='28110000') &
+                    Q(description__icontains='Silica') &
+                    ~Q(description__icontains='Fumed Silica')
+                ],
+            },
+            {
+                'base_name': 'BORAX',
+                'norms': ['A3627', 'E1'],
+                'filters': [Q(hs_code__hs_code__startswith='28401900'), Q(description__icontains='Borax')],
+            },
+        ])
+
+    def test_and_not_semantics(self):
+        """Should honour AND / NOT and match case-insensitively"""
+        rules = self._rules()
+
+        assert rules.match('precipitated SILICA', '28110000', ['A3627']) == [('SILICA', ['A3627'])]
+        assert rules.match('Fumed silica', '28110000', ['A3627']) == []
+        assert rules.match('Silica', '29110000', ['A3627']) == []
+
+    def test_null_columns_behave_like_sql(self):
+        """Should treat NULL description / HS code as matching no positive lookup"""
+        rules = self._rules()
+
+        assert rules.match(None, None, ['A3627']) == []
+        assert rules.match(None, '28401900', ['E1', 'A3627']) == [('BORAX', ['E1', 'A3627'])]
+
+    def test_norms_filter_rules(self):
+        """Should only return rules whose norms overlap the licence norms"""
+        assert self._rules().match('borax', None, ['E5']) == []
+
+    def test_compiles_the_full_rule_list(self):
+        """Should compile every rule in get_item_filters() (only supported lookups)"""
+        rules = CompiledItemRules(get_item_filters())
+
+        assert len(rules.rules) == len(get_item_filters())
+
+    def test_rejects_unsupported_lookup(self):
+        """Should fail loudly rather than silently mis-classify"""
+        with self.assertRaises(ValueError):
+            CompiledItemRules([{'base_name': 'X', 'norms': ['E1'], 'filters': [Q(description__iexact='x')]}])
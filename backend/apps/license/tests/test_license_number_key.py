@@ -0,0 +1,46 @@
+"""
+Tests for the normalised licence-number key and the BOE PDF batch resolver.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.bill_of_entry.views.parse_pdf import resolve_licence_rows
+from apps.license.models import LicenseDetailsModel, LicenseImportItemsModel
+from apps.license.utils.license_number import normalize_license_number
+
+
+def test_normalize_license_number():
+    assert normalize_license_number("L-311007518") == "0311007518"
+    assert normalize_license_number("0311007518") == "0311007518"
+    assert normalize_license_number("ABC") == ""
+    assert normalize_license_number(None) == ""
+
+
+@pytest.mark.django_db
+def test_save_keeps_key_in_sync():
+    license_obj = LicenseDetailsModel.objects.create(license_number="L-0311009999")
+    assert license_obj.license_number_key == "0311009999"
+
+    license_obj.license_number = "0311008888"
+    license_obj.save(update_fields=["license_number"])
+    license_obj.refresh_from_db()
+    assert license_obj.license_number_key == "0311008888"
+
+
+@pytest.mark.django_db
+def test_resolver_matches_variants_in_two_queries():
+    exact = LicenseDetailsModel.objects.create(license_number="0311007518")
+    prefixed = LicenseDetailsModel.objects.create(license_number="L-0311007519")
+    item = LicenseImportItemsModel.objects.create(license=exact, serial_number=3, description="BORAX")
+    pairs = [("311007518", 3), ("0311007518", 4), ("3411007519", 1), ("0311007519", None), ("9999999999", 1)]
+
+    with CaptureQueriesContext(connection) as queries:
+        licences, items = resolve_licence_rows(pairs)
+
+    assert len(queries.captured_queries) == 2
+    assert licences["311007518"]["id"] == exact.pk
+    assert licences["0311007519"]["id"] == prefixed.pk
+    assert "3411007519" not in licences and "9999999999" not in licences
+    assert items[(exact.pk, 3)]["id"] == item.pk
+    assert (exact.pk, 4) not in items
@@ -0,0 +1,87 @@
+"""
+Tests for apps.license.services.pivot_snapshot (cached item pivot reports).
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.constants import CO, GE, MI
+from apps.license.services import pivot_snapshot
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class TestNormalizeFilters(SimpleTestCase):
+
+    def test_equivalent_filters_share_a_fingerprint(self):
+        """Should ignore id order, blanks, days and the spelt-out default statuses"""
+        a = pivot_snapshot.normalize_filters(days=30, company_ids='3, 1,3', sion_norm='E5 ')
+        b = pivot_snapshot.normalize_filters(
+            days=90, company_ids='1,3', sion_norm='E5', exclude_company_ids='', purchase_status=f'{MI},{GE},{CO}',
+        )
+
+        assert pivot_snapshot.filter_fingerprint(a) == pivot_snapshot.filter_fingerprint(b)
+        assert pivot_snapshot.report_kwargs(a)['company_ids'] == '1,3'
+
+    def test_different_filters_differ(self):
+        """Should separate filter combinations that change the report"""
+        a = pivot_snapshot.normalize_filters(min_balance=200)
+        b = pivot_snapshot.normalize_filters(min_balance='500')
+
+        assert pivot_snapshot.filter_fingerprint(a) != pivot_snapshot.filter_fingerprint(b)
+
+    def test_rejects_unknown_filters(self):
+        """Should fail loudly on a misspelt filter instead of caching under it"""
+        with self.assertRaises(TypeError):
+            pivot_snapshot.normalize_filters(sion_nrom='E5')
+
+
+@override_settings(CACHES=LOCMEM)
+class TestGetPivotReport(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, version, report=None):
+        with patch.object(pivot_snapshot, 'current_data_version', return_value=version), \
+             patch.object(pivot_snapshot, '_build', return_value=report or {'items': []}) as mock_build, \
+             patch.object(pivot_snapshot, '_schedule_rebuild', return_value=True) as mock_schedule:
+            report, info = pivot_snapshot.get_pivot_report(sion_norm='E5')
+        return report, info, mock_build, mock_schedule
+
+    def test_first_request_builds_then_serves_fresh(self):
+        """Should compute once, then serve the stored snapshot while the version holds"""
+        _, info, mock_build, _ = self._get('v1', {'items': ['built']})
+        assert info['status'] == pivot_snapshot.BUILT
+        mock_build.assert_called_once()
+
+        report, info, mock_build, mock_schedule = self._get('v1')
+        assert info['status'] == pivot_snapshot.FRESH
+        assert report == {'items': ['built']}
+        mock_build.assert_not_called()
+        mock_schedule.assert_not_called()
+
+    def test_moved_version_serves_stale_and_queues_rebuild(self):
+        """Should return the old snapshot immediately and rebuild in the background"""
+        self._get('v1', {'items': ['old']})
+
+        report, info, mock_build, mock_schedule = self._get('v2')
+
+        assert info['status'] == pivot_snapshot.STALE
+        assert info['rebuild_queued'] is True
+        assert report == {'items': ['old']}
+        mock_build.assert_not_called()
+        mock_schedule.assert_called_once()
+
+    def test_rebuild_stores_new_version_and_releases_flag(self):
+        """Should store the rebuilt report and let the next version change queue again"""
+        filters = pivot_snapshot.normalize_filters(sion_norm='E5')
+        cache.add(pivot_snapshot._key(pivot_snapshot.filter_fingerprint(filters), 'rebuilding'), 1)
+
+        with patch.object(pivot_snapshot, 'current_data_version', return_value='v2'), \
+             patch.object(pivot_snapshot, '_build', return_value={'items': ['new']}):
+            pivot_snapshot.rebuild_snapshot(filters)
+            assert pivot_snapshot.get_fresh_snapshot(filters)['report'] == {'items': ['new']}
+
+        assert cache.get(pivot_snapshot._key(pivot_snapshot.filter_fingerprint(filters), 'rebuilding')) is None
@@ -0,0 +1,88 @@
+"""
+Tests for the reclassify_license_items management command.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.core.models import HeadSIONNormsModel, ItemNameModel, SionNormClassModel
+from apps.license.models import LicenseDetailsModel, LicenseExportItemModel, LicenseImportItemsModel
+
+Through = LicenseImportItemsModel.items.through
+
+
+@pytest.fixture
+def catalogue(db):
+    """
+    One A3627 licence with two import items:
+    - "Sodium Nitrate" matches a rule but is not linked yet (an add)
+    - "Packing material" is linked to a rule name it no longer matches (a
+      stale link to remove) and to a manual name (never touched)
+    """
+    head = HeadSIONNormsModel.objects.create(name="Glass")
+    norm = SionNormClassModel.objects.create(head_norm=head, norm_class="A3627", is_active=True)
+    nitrate = ItemNameModel.objects.create(name="SODIUM NITRATE - A3627", sion_norm_class=norm)
+    borax = ItemNameModel.objects.create(name="BORAX - A3627", sion_norm_class=norm)
+    manual = ItemNameModel.objects.create(name="MANUAL PACKING")
+
+    license_obj = LicenseDetailsModel.objects.create(license_number="TEST-RECLASS01")
+    LicenseExportItemModel.objects.create(license=license_obj, norm_class=norm)
+    matched = LicenseImportItemsModel.objects.create(license=license_obj, serial_number=1, description="Sodium Nitrate")
+    stale = LicenseImportItemsModel.objects.create(license=license_obj, serial_number=2, description="Packing material")
+
+    # Start from a known link state, whatever save-time auto-linking did.
+    Through.objects.filter(licenseimportitemsmodel_id__in=[matched.pk, stale.pk]).delete()
+    Through.objects.bulk_create([
+        Through(licenseimportitemsmodel_id=stale.pk, itemnamemodel_id=borax.pk),
+        Through(licenseimportitemsmodel_id=stale.pk, itemnamemodel_id=manual.pk),
+    ])
+    return {'matched': matched, 'stale': stale, 'nitrate': nitrate, 'borax': borax, 'manual': manual}
+
+
+def _links(*items):
+    return set(
+        Through.objects.filter(licenseimportitemsmodel_id__in=[i.pk for i in items])
+        .values_list('licenseimportitemsmodel_id', 'itemnamemodel_id')
+    )
+
+
+def _run(*args):
+    out = StringIO()
+    call_command('reclassify_license_items', '--workers', '1', *args, stdout=out)
+    return out.getvalue()
+
+
+def test_dry_run_reports_the_diff_and_writes_nothing(catalogue):
+    before = _links(catalogue['matched'], catalogue['stale'])
+
+    output = _run('--dry-run')
+
+    assert _links(catalogue['matched'], catalogue['stale']) == before
+    assert 'Would add 1 links' in output
+    assert 'Would remove 1 stale rule links' in output
+
+
+def test_run_applies_exactly_the_diff(catalogue):
+    matched, stale = catalogue['matched'], catalogue['stale']
+
+    output = _run()
+
+    assert _links(matched, stale) == {
+        (matched.pk, catalogue['nitrate'].pk),
+        (stale.pk, catalogue['manual'].pk),
+    }
+    assert 'Added 1 links' in output
+    assert 'Removed 1 stale rule links' in output
+
+
+def test_no_remove_keeps_stale_links(catalogue):
+    matched, stale = catalogue['matched'], catalogue['stale']
+
+    _run('--no-remove')
+
+    assert _links(matched, stale) == {
+        (matched.pk, catalogue['nitrate'].pk),
+        (stale.pk, catalogue['borax'].pk),
+        (stale.pk, catalogue['manual'].pk),
+    }
@@ -15,7 +15,7 @@ from apps.license.views.item_plan import LicenseItemPlanViewSet
 from apps.license.views.dashboard import DashboardDataView
 from apps.license.views.ledger_upload import LedgerUploadView, LedgerTaskStatusView
 from apps.license.views.ledger import LicenseLedgerViewSet
-from apps.license.views.parse_pdf import LicensePdfParseView
+from apps.license.views.parse_pdf import LicensePdfParseJobView, LicensePdfParseView
 from apps.license.views_actions import LicenseActionViewSet
 from apps.license.views_incentive import IncentiveLicenseViewSet
 
@@ -38,6 +38,7 @@ urlpatterns = [
     path("dashboard/", DashboardDataView.as_view(), name="dashboard"),
     # License PDF parse (DFIA licence copy → prefill License form)
     path("licenses/parse-pdf/", LicensePdfParseView.as_view(), name="licenses-parse-pdf"),
+    path("licenses/parse-pdf/jobs/<str:job_id>/", LicensePdfParseJobView.as_view(), name="licenses-parse-pdf-job"),
     # Ledger Upload endpoint
     path("upload-ledger/", LedgerUploadView.as_view(), name="upload-ledger"),
     # Ledger Task Status endpoint
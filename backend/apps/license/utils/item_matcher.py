@@ -737,9 +737,9 @@ def get_item_filters():
 def bulk_auto_link_license_items(license_instance):
     """
     Bulk auto-link ItemNameModel rows to all unlinked import items on a
-    licence. Runs ~M queries (one per filter config that applies to this
-    licence's norms) instead of N×M (one per item × filter), and writes M2M
-    rows via bulk_create.
+    licence. The unlinked items are read in one query and classified in
+    process by the compiled rule engine (see item_rule_engine), ItemNames
+    are resolved in one query, and M2M rows are written via bulk_create.
 
     Returns the number of import items that had ItemNames linked.
 
@@ -747,11 +747,10 @@ def bulk_auto_link_license_items(license_instance):
     this does the same work the post_save signal would have done one-at-a-time,
     just batched.
     """
-    from functools import reduce
-    from operator import or_
     from django.db.models import Count
     from apps.core.models import ItemNameModel
     from apps.license.models import LicenseImportItemsModel
+    from apps.license.utils.item_rule_engine import classify_rows
 
     norm_classes = list(
         license_instance.export_license.values_list("norm_class__norm_class", flat=True).distinct()
@@ -760,42 +759,24 @@ def bulk_auto_link_license_items(license_instance):
         return 0
 
     # Items already linked to ItemNames are skipped.
-    unlinked_ids = list(
+    unlinked = list(
         LicenseImportItemsModel.objects
         .filter(license=license_instance)
         .annotate(_link_count=Count("items"))
         .filter(_link_count=0)
-        .values_list("id", flat=True)
+        .values_list("id", "description", "hs_code__hs_code")
     )
-    if not unlinked_ids:
+    if not unlinked:
         return 0
 
-    filter_configs = get_item_filters()
-    needed_names = set()  # (base_name, norm) pairs we'll look up
-    item_to_basenames: dict[int, list[tuple[str, str]]] = {}
-
-    for item_config in filter_configs:
-        applicable_norms = [n for n in norm_classes if n in item_config["norms"]]
-        if not applicable_norms:
-            continue
-        combined_q = reduce(or_, item_config["filters"])
-        matching_ids = list(
-            LicenseImportItemsModel.objects
-            .filter(id__in=unlinked_ids)
-            .filter(combined_q)
-            .values_list("id", flat=True)
-        )
-        if not matching_ids:
-            continue
-        base_name = f"{item_config['base_name']} - {applicable_norms[0]}"
-        needed_names.add(base_name)
-        for iid in matching_ids:
-            item_to_basenames.setdefault(iid, []).append(base_name)
-
+    item_to_basenames = classify_rows(
+        [(iid, description, hs_code, norm_classes) for iid, description, hs_code in unlinked]
+    )
     if not item_to_basenames:
         return 0
 
     # Resolve all ItemNames in a single query.
+    needed_names = {name for names in item_to_basenames.values() for name in names}
     name_to_obj = {
         it.name: it
         for it in ItemNameModel.objects
@@ -829,6 +810,9 @@ def match_import_item_to_items(import_item, license_norm_classes):
     """
     Match a single import item to ItemNameModel items based on comprehensive filters.
 
+    The filters are evaluated in process by the compiled rule engine, so
+    this costs one ItemNameModel query instead of one query per rule.
+
     Args:
         import_item: LicenseImportItemsModel instance
         license_norm_classes: List of norm class strings for the license
@@ -837,40 +821,19 @@ def match_import_item_to_items(import_item, license_norm_classes):
         QuerySet: ItemNameModel items that match this import item
     """
     from apps.core.models import ItemNameModel
+    from apps.license.utils.item_rule_engine import get_compiled_item_rules
 
     if not license_norm_classes:
         return ItemNameModel.objects.none()
 
-    filters = get_item_filters()
-    matched_item_names = []
-
-    for item_config in filters:
-        # Check if this item config applies to any of the license norms
-        if not any(norm in item_config['norms'] for norm in license_norm_classes):
-            continue
-
-        # Check if the import item matches any of the filters for this item type
-        for filter_q in item_config['filters']:
-            # Create a queryset with just this import item and apply the filter
-            from apps.license.models import LicenseImportItemsModel
-            test_qs = LicenseImportItemsModel.objects.filter(id=import_item.id).filter(filter_q)
-
-            if test_qs.exists():
-                # This import item matches this filter, find the corresponding ItemNameModel
-                item_name = f"{item_config['base_name']} - {license_norm_classes[0]}"
-
-                # Try to find the ItemNameModel (it might not exist yet)
-                matching_items = ItemNameModel.objects.filter(
-                    name=item_name,
-                    sion_norm_class__norm_class__in=license_norm_classes
-                )
-
-                matched_item_names.extend(matching_items)
-                break  # Found a match for this item config, move to next
-
-    # Return unique ItemNameModel items
-    if matched_item_names:
-        item_ids = list(set(item.id for item in matched_item_names))
-        return ItemNameModel.objects.filter(id__in=item_ids)
+    hs_code = import_item.hs_code.hs_code if import_item.hs_code_id else None
+    matches = get_compiled_item_rules().match(import_item.description, hs_code, license_norm_classes)
+    if not matches:
+        return ItemNameModel.objects.none()
 
-    return ItemNameModel.objects.none()
+    # Item names carry the licence's first norm, whichever norm the rule matched on.
+    item_names = {f"{base_name} - {license_norm_classes[0]}" for base_name, _ in matches}
+    return ItemNameModel.objects.filter(
+        name__in=item_names,
+        sion_norm_class__norm_class__in=license_norm_classes
+    )
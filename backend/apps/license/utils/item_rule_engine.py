@@ -0,0 +1,226 @@
+"""
+In-process evaluation of the item_matcher classification rules.
+
+``get_item_filters()`` expresses every rule as Django ``Q`` objects built from
+two lookups only:
+
+    description__icontains=<term>
+    hs_code__hs_code__startswith=<prefix>
+
+Evaluating them through the ORM costs one query per rule per import item.
+This module compiles the rule list once per process into:
+
+  • a lowercase Aho–Corasick automaton over every ``icontains`` term, so one
+    scan of a description yields every term it contains;
+  • a prefix trie over every HS-code prefix, so one walk of an HS code yields
+    every prefix it starts with;
+  • per rule, a small boolean tree (AND / OR / NOT) over term and prefix ids.
+
+Classifying an item is then two scans plus set lookups, with no database
+round-trips. NULL columns behave like the SQL Django generates: a NULL
+description/HS code matches no positive lookup, and a negated lookup on it
+is true.
+"""
+from __future__ import annotations
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db.models import Q
+
+DESCRIPTION_LOOKUP = 'description__icontains'
+HS_CODE_LOOKUP = 'hs_code__hs_code__startswith'
+
+# Compiled predicate nodes:
+#   ('term', term_id) | ('prefix', prefix_id)
+#   ('and', (node, ...)) | ('or', (node, ...)) | ('not', node)
+Node = tuple
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher over lowercase text."""
+
+    def __init__(self, patterns: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[int]] = [set()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                state = nxt
+            self._out[state].add(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Set[int]:
+        """Ids of every pattern occurring in ``text`` (already lowercased)."""
+        found: Set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class PrefixTrie:
+    """Set of string prefixes; ``match`` returns every prefix a value starts with."""
+
+    _END = object()
+
+    def __init__(self, prefixes: Sequence[str]):
+        self._root: dict = {}
+        for prefix_id, prefix in enumerate(prefixes):
+            node = self._root
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, set()).add(prefix_id)
+
+    def match(self, value: str) -> Set[int]:
+        found: Set[int] = set()
+        node = self._root
+        if self._END in node:
+            found |= node[self._END]
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+            if self._END in node:
+                found |= node[self._END]
+        return found
+
+
+class CompiledItemRules:
+    """
+    The rule list from ``get_item_filters()`` compiled for in-process matching.
+
+    Rule order is preserved, so results come back in the same order the ORM
+    loops produced them.
+    """
+
+    def __init__(self, item_configs: Sequence[dict]):
+        self._terms: Dict[str, int] = {}
+        self._prefixes: Dict[str, int] = {}
+        # (base_name, norms, compiled predicate — OR of the config's filters)
+        self.rules: List[Tuple[str, Tuple[str, ...], Node]] = []
+
+        for config in item_configs:
+            filters = tuple(self._compile(q) for q in config['filters'])
+            predicate = filters[0] if len(filters) == 1 else ('or', filters)
+            self.rules.append((config['base_name'], tuple(config['norms']), predicate))
+
+        self._automaton = AhoCorasick(list(self._terms))
+        self._trie = PrefixTrie(list(self._prefixes))
+
+    def _compile(self, q) -> Node:
+        if not isinstance(q, Q):
+            lookup, value = q
+            if lookup == DESCRIPTION_LOOKUP:
+                node = ('term', self._terms.setdefault(str(value).lower(), len(self._terms)))
+            elif lookup == HS_CODE_LOOKUP:
+                node = ('prefix', self._prefixes.setdefault(str(value), len(self._prefixes)))
+            else:
+                raise ValueError(f"Unsupported item filter lookup: {lookup!r}")
+            return node
+
+        children = tuple(self._compile(child) for child in q.children)
+        node = children[0] if len(children) == 1 else (q.connector.lower(), children)
+        return ('not', node) if q.negated else node
+
+    @staticmethod
+    def _evaluate(node: Node, terms: Set[int], prefixes: Set[int]) -> bool:
+        kind = node[0]
+        if kind == 'term':
+            return node[1] in terms
+        if kind == 'prefix':
+            return node[1] in prefixes
+        if kind == 'not':
+            return not CompiledItemRules._evaluate(node[1], terms, prefixes)
+        if kind == 'and':
+            return all(CompiledItemRules._evaluate(child, terms, prefixes) for child in node[1])
+        return any(CompiledItemRules._evaluate(child, terms, prefixes) for child in node[1])
+
+    def match(
+            self,
+            description: Optional[str],
+            hs_code: Optional[str],
+            norm_classes: Iterable[str],
+    ) -> List[Tuple[str, List[str]]]:
+        """
+        Classify one import item.
+
+        Args:
+            description: Import item description (None is treated as NULL)
+            hs_code: HSCodeModel.hs_code of the item, or None
+            norm_classes: Norm classes of the item's licence
+
+        Returns:
+            ``(base_name, applicable_norms)`` for every matching rule whose
+            norms overlap ``norm_classes``; applicable_norms keeps the order
+            of ``norm_classes``.
+        """
+        norm_classes = list(norm_classes)
+        terms = self._automaton.search(description.lower()) if description else set()
+        prefixes = self._trie.match(hs_code) if hs_code else set()
+
+        matches = []
+        for base_name, norms, predicate in self.rules:
+            applicable = [norm for norm in norm_classes if norm in norms]
+            if applicable and self._evaluate(predicate, terms, prefixes):
+                matches.append((base_name, applicable))
+        return matches
+
+
+@lru_cache(maxsize=1)
+def get_compiled_item_rules() -> CompiledItemRules:
+    """Compiled form of ``get_item_filters()``, built once per process."""
+    from apps.license.utils.item_matcher import get_item_filters
+
+    return CompiledItemRules(get_item_filters())
+
+
+def classify_rows(rows) -> Dict[int, List[str]]:
+    """
+    Classify a batch of import items to item names.
+
+    Module-level and free of model imports so it can run in a process pool
+    (see the reclassify_license_items command).
+
+    Args:
+        rows: [(item_id, description, hs_code, norm_classes), ...]
+
+    Returns:
+        {item_id: ["<base_name> - <norm>", ...]} for items matching any rule,
+        named after the first licence norm each rule applies to
+    """
+    rules = get_compiled_item_rules()
+    result = {}
+    for item_id, description, hs_code, norm_classes in rows:
+        names = [
+            f"{base_name} - {applicable_norms[0]}"
+            for base_name, applicable_norms in rules.match(description, hs_code, norm_classes)
+        ]
+        if names:
+            result[item_id] = names
+    return result
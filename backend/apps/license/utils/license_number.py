@@ -0,0 +1,27 @@
+"""
+Normalised licence-number keys.
+
+Licence numbers reach us in several spellings: "0311007518", "311007518",
+"L-0311007518", "l-311007518". normalize_license_number() reduces them to one
+indexed form (digits only, zero-padded to 10), stored on
+LicenseDetailsModel.license_number_key, so a lookup by any spelling is a
+single indexed equality instead of a chain of exact / iexact / endswith
+fallbacks.
+"""
+import re
+
+LICENSE_NUMBER_KEY_WIDTH = 10
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_license_number(value) -> str:
+    """
+    Digits of value, zero-padded to LICENSE_NUMBER_KEY_WIDTH ('' if none).
+
+    Example:
+        >>> normalize_license_number("L-311007518")
+        '0311007518'
+    """
+    digits = _NON_DIGITS.sub("", str(value or ""))
+    return digits.zfill(LICENSE_NUMBER_KEY_WIDTH) if digits else ""
@@ -5,12 +5,14 @@ Shows licenses with items as column headers, displaying quantities and values pe
 Similar to the GE DFIA report format.
 """
 
+import json
 import logging
+import tempfile
 from collections import defaultdict
 from decimal import Decimal
 from typing import Dict, List, Any
 
-from django.db.models import Sum, Prefetch
+from django.db.models import Sum
 from django.http import JsonResponse, HttpResponse
 from django.views import View
 from rest_framework import viewsets
@@ -18,10 +20,29 @@ from rest_framework.decorators import action
 from apps.accounts.permissions import ReportPermission
 from rest_framework.response import Response
 
-from apps.core.constants import DEC_0, DEC_000, GE, MI, CO
+from apps.core.constants import DEC_0, GE, MI, CO
 from apps.core.models import ItemNameModel
 from apps.license.models import LicenseDetailsModel, LicenseImportItemsModel, LicenseExportItemModel
 
+# Licences per batch in the report's second pass. Every batch costs the same
+# fixed set of flat queries; the size also bounds IN-list length.
+PIVOT_CHUNK_SIZE = 500
+
+# items.through rows ordered like ItemNameModel.Meta.ordering within each
+# import item, so "first attached item" matches import_item.items.first().
+_LINK_ORDERING = (
+    'licenseimportitemsmodel_id',
+    'itemnamemodel__display_order',
+    'itemnamemodel__group__name',
+    'itemnamemodel__name',
+)
+
+
+def _chunked(seq, size=PIVOT_CHUNK_SIZE):
+    for start in range(0, len(seq), size):
+        yield seq[start:start + size]
+
+
 def _safe_int(value, default):
     try:
         return int(value)
@@ -55,6 +76,86 @@ def _xlsx_safe_row(row):
 
 
 
+class PivotRowSpool:
+    """
+    Licence rows of an item pivot report, spooled to disk per sheet.
+
+    Excel sheets need their item columns (items with quantity in that
+    norm/notification group) and the report-wide restriction flags before the
+    first data row can be written, but licences arrive in expiry order across
+    all groups. Rows are therefore appended to one temporary JSON-lines file
+    per group as they are built and read back one at a time per sheet, so the
+    exporters never hold the whole report in memory.
+    """
+
+    def __init__(self, sorted_items: List[tuple]):
+        self._sorted_items = sorted_items
+        self._files = {}
+        self._names_with_data = defaultdict(set)
+        self._restricted_ids = set()
+
+    @classmethod
+    def from_report(cls, report: Dict[str, Any]) -> 'PivotRowSpool':
+        """Spool the rows of an already computed generate_report() result."""
+        spool = cls([(item['id'], item['name']) for item in report['items']])
+        for norm_class, notification_dict in report['licenses_by_norm_notification'].items():
+            for notification_key, rows in notification_dict.items():
+                for row in rows:
+                    spool.add(norm_class, notification_key, row)
+        return spool
+
+    def add(self, norm_class: str, notification_key: str, row: Dict[str, Any]) -> None:
+        key = (norm_class, notification_key)
+        spool_file = self._files.get(key)
+        if spool_file is None:
+            spool_file = self._files[key] = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+        spool_file.write(json.dumps(row, default=float))
+        spool_file.write('\n')
+
+        names_with_data = self._names_with_data[key]
+        for item_id, item_name in self._sorted_items:
+            cell = row['items'][item_name]
+            if cell['quantity'] > 0:
+                names_with_data.add(item_name)
+            if cell['restriction'] is not None:
+                self._restricted_ids.add(item_id)
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """Report item columns, as in generate_report()['items']."""
+        return [
+            {'id': item_id, 'name': item_name, 'has_restriction': item_id in self._restricted_ids}
+            for item_id, item_name in self._sorted_items
+        ]
+
+    @property
+    def sheets(self) -> List[tuple]:
+        """(norm_class, notification_key) of every non-empty group, sorted."""
+        return sorted(self._files)
+
+    def items_with_data(self, sheet: tuple) -> List[Dict[str, Any]]:
+        """Item columns with a non-zero quantity on at least one row of the sheet."""
+        names = self._names_with_data[sheet]
+        return [item for item in self.items if item['name'] in names]
+
+    def rows(self, sheet: tuple):
+        spool_file = self._files[sheet]
+        spool_file.seek(0)
+        for line in spool_file:
+            yield json.loads(line)
+
+    def close(self) -> None:
+        for spool_file in self._files.values():
+            spool_file.close()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -89,16 +190,24 @@ class ItemPivotReportView(View):
                     'error': str(e)
                 }, status=500)
 
-        # For JSON, generate full report
+        # For JSON, serve the cached snapshot for these filters (built on first use,
+        # rebuilt in the background once the underlying data changes).
+        from apps.license.services.pivot_snapshot import get_pivot_report
         try:
-            report_data = self.generate_report(days, sion_norm, company_ids, exclude_company_ids, min_balance,
-                                               license_status, expiry_date_from, expiry_date_to, purchase_status)
+            report_data, snapshot = get_pivot_report(
+                sion_norm=sion_norm, company_ids=company_ids, exclude_company_ids=exclude_company_ids,
+                min_balance=min_balance, license_status=license_status, expiry_date_from=expiry_date_from,
+                expiry_date_to=expiry_date_to, purchase_status=purchase_status,
+            )
         except Exception as e:
             return JsonResponse({
                 'error': str(e)
             }, status=500)
 
-        return JsonResponse(report_data, safe=False)
+        response = JsonResponse(report_data, safe=False)
+        response['X-Pivot-Snapshot'] = snapshot['status']
+        response['X-Pivot-Snapshot-Built-At'] = snapshot['built_at']
+        return response
 
     def generate_report(self, days: int = 30, sion_norm: str = None,
                         company_ids: str = None, exclude_company_ids: str = None,
@@ -108,6 +217,11 @@ class ItemPivotReportView(View):
         """
         Generate item-wise pivot report.
 
+        Built columnar: flat values() rows are fetched per batch of
+        PIVOT_CHUNK_SIZE licences and joined with dict lookups, so the number
+        of queries per batch and the working set are fixed regardless of how
+        many licences match.
+
         Args:
             days: Number of days to look back for active licenses
             sion_norm: Filter by specific SION norm class (optional)
@@ -119,9 +233,90 @@ class ItemPivotReportView(View):
         Returns:
             Dictionary with report data
         """
-        from datetime import date, timedelta
+        from datetime import date
         today = date.today()
-        start_date = today - timedelta(days=days)
+
+        sorted_items, license_rows = self._report_rows(
+            today, sion_norm, company_ids, exclude_company_ids, min_balance,
+            license_status, expiry_date_from, expiry_date_to, purchase_status,
+        )
+
+        # Build license data with item columns, grouped by norm first, then notification.
+        licenses_by_norm_notification = defaultdict(lambda: defaultdict(list))
+        items_with_restrictions = set()
+        for norm_class, notification_key, license_row in license_rows:
+            licenses_by_norm_notification[norm_class][notification_key].append(license_row)
+            for item_id, item_name in sorted_items:
+                if license_row['items'][item_name]['restriction'] is not None:
+                    items_with_restrictions.add(item_id)
+
+        # Convert nested defaultdict to regular dict
+        result_dict = {}
+        for norm, notification_dict in licenses_by_norm_notification.items():
+            result_dict[norm] = dict(notification_dict)
+
+        return {
+            'items': [
+                {
+                    'id': item_id,
+                    'name': item_name,
+                    'has_restriction': item_id in items_with_restrictions
+                }
+                for item_id, item_name in sorted_items
+            ],
+            'licenses_by_norm_notification': result_dict,
+            'norm_notes_conditions': self._norm_notes_conditions(list(result_dict.keys())),
+            'report_date': today.isoformat(),
+        }
+
+    def spool_report(self, days: int = 30, sion_norm: str = None,
+                     company_ids: str = None, exclude_company_ids: str = None,
+                     min_balance: int = 200, license_status: str = 'active',
+                     expiry_date_from: str = None, expiry_date_to: str = None,
+                     purchase_status: str = None) -> PivotRowSpool:
+        """
+        Build the report rows once and spool them per sheet for the Excel
+        exporters. Same filters and rows as generate_report(); the caller
+        must close() the returned spool (it is a context manager).
+        """
+        from datetime import date
+
+        sorted_items, license_rows = self._report_rows(
+            date.today(), sion_norm, company_ids, exclude_company_ids, min_balance,
+            license_status, expiry_date_from, expiry_date_to, purchase_status,
+        )
+        spool = PivotRowSpool(sorted_items)
+        try:
+            for norm_class, notification_key, license_row in license_rows:
+                spool.add(norm_class, notification_key, license_row)
+        except Exception:
+            spool.close()
+            raise
+        return spool
+
+    def _report_rows(self, today, sion_norm=None, *filters):
+        """
+        (sorted_items, row iterator) for the report filters (in
+        _filter_licenses() order); the iterator yields
+        (norm_class, notification_key, license_row) in licence order.
+        """
+        licenses = self._filter_licenses(today, sion_norm, *filters)
+        license_ids = list(
+            licenses.order_by('license_expiry_date', 'license_date', 'id').values_list('id', flat=True)
+        )
+        sorted_items, item_meta, plan_totals_by_license, licenses_with_plans = self._collect_columns(
+            license_ids, sion_norm
+        )
+        return sorted_items, self._iter_license_rows(
+            license_ids, sorted_items, item_meta, sion_norm,
+            plan_totals_by_license, licenses_with_plans,
+        )
+
+    def _filter_licenses(self, today, sion_norm=None, company_ids=None, exclude_company_ids=None,
+                         min_balance=200, license_status='active', expiry_date_from=None,
+                         expiry_date_to=None, purchase_status=None):
+        """Licences matching the report filters (unordered, nothing prefetched)."""
+        from datetime import timedelta
 
         # Base query - licenses with required purchase status.
         # The frontend sends the chosen codes as a comma-separated string;
@@ -178,63 +373,65 @@ class ItemPivotReportView(View):
 
         # Filter by min_balance at database level using stored balance_cif field
         # This dramatically reduces the number of licenses we need to process
-        licenses = licenses.filter(balance__balance_cif__gte=min_balance)
-
-        # Build filtered prefetch querysets based on sion_norm
-        import_items_qs = LicenseImportItemsModel.objects.select_related('hs_code')
-        export_items_qs = LicenseExportItemModel.objects.select_related('norm_class')
-        # NOTE: do NOT filter is_active here. Inactive item names are still needed
-        # so a manually-planned-but-inactive item (e.g. WALNUT planned on an E132
-        # DFIA) gets its quantities into item_quantities and renders. The column
-        # set (all_items) still hides inactive items via its own is_active check,
-        # except those that are explicitly planned (added back below).
-        item_names_qs = ItemNameModel.objects.select_related('sion_norm_class')
-
-        # If sion_norm specified, filter prefetch queries to only that norm.
-        if sion_norm:
-            item_names_qs = item_names_qs.filter(sion_norm_class__norm_class=sion_norm)
-            export_items_qs = export_items_qs.filter(norm_class__norm_class=sion_norm)
-
-        # Optimize with select_related and prefetch_related to reduce queries.
-        # balance_cif / balance_report_notes / condition_sheet / current_owner now
-        # live on OneToOne sub-tables (LicenseBalance / LicenseNotes / LicenseOwnership);
-        # they're accessed via @property shims, so pull the sub-rows in one shot.
-        licenses = licenses.select_related(
-            'exporter',
-            'port',
-            'balance',
-            'notes',
-            'ownership__current_owner',
-            'purchase_status',
-        ).prefetch_related(
-            Prefetch('import_license',
-                     queryset=import_items_qs.prefetch_related(
-                         Prefetch('items', queryset=item_names_qs)
-                     ).only('id', 'license_id', 'hs_code_id', 'quantity', 'allotted_quantity',
-                            'debited_quantity', 'available_quantity', 'debited_value', 'cif_fc', 'description',
-                            'condition_type', 'serial_number')),
-            Prefetch('export_license',
-                     queryset=export_items_qs.only('id', 'license_id', 'norm_class_id', 'cif_fc')),
-            'license_documents',
-            'transfers'
-        ).order_by('license_expiry_date', 'license_date')
-
-        # Collect all unique items across all licenses
-        # Use list() with prefetch_related for optimal performance (iterator breaks prefetch)
-        all_items = {}  # Changed to dict to store item object for sorting
-        valid_licenses = list(licenses)  # Licenses already filtered by balance_cif at DB level
-
-        for license_obj in valid_licenses:
-            for import_item in license_obj.import_license.all():
-                for item in import_item.items.all():
-                    # Only add items with valid names and that are active (is_active=False hides from pivot)
-                    if item and item.name and item.is_active:
-                        # If filtering by norm, only include items matching that norm
-                        if sion_norm:
-                            if item.sion_norm_class and item.sion_norm_class.norm_class == sion_norm:
-                                all_items[item.id] = item
-                        else:
-                            all_items[item.id] = item
+        return licenses.filter(balance__balance_cif__gte=min_balance)
+
+    @staticmethod
+    def _load_item_meta(item_meta: Dict[int, dict], item_ids) -> None:
+        """Add {id: {name, is_active, display_order, norm}} for ids not yet in item_meta."""
+        missing = sorted(set(item_ids) - item_meta.keys())
+        for chunk in _chunked(missing):
+            for item_id, name, is_active, display_order, norm in (
+                    ItemNameModel.objects.filter(id__in=chunk)
+                    .values_list('id', 'name', 'is_active', 'display_order', 'sion_norm_class__norm_class')):
+                item_meta[item_id] = {
+                    'name': name,
+                    'is_active': is_active,
+                    'display_order': display_order,
+                    'norm': norm,
+                }
+
+    def _collect_columns(self, license_ids: List[int], sion_norm: str = None):
+        """
+        First pass: the report's item columns and the manual plan totals.
+
+        Returns:
+            (sorted_items, item_meta, plan_totals_by_license, licenses_with_plans)
+            where sorted_items is [(item_id, item_name)] in column order and
+            item_meta caches ItemNameModel fields for the second pass.
+        """
+        from apps.license.models import LicenseItemPlan
+
+        Through = LicenseImportItemsModel.items.through
+        linked_item_ids = set()
+        plan_rows = []
+        licenses_with_plans = set()
+        for chunk in _chunked(license_ids):
+            linked_item_ids.update(
+                Through.objects.filter(licenseimportitemsmodel__license_id__in=chunk)
+                .values_list('itemnamemodel_id', flat=True).distinct()
+            )
+            for plan in (LicenseItemPlan.objects
+                         .filter(license_id__in=chunk)
+                         .values('license_id', 'import_item_id', 'item_name_id',
+                                 'planned_quantity', 'planned_cif_fc')):
+                licenses_with_plans.add(plan['license_id'])
+                plan_rows.append(plan)
+
+        item_meta: Dict[int, dict] = {}
+        self._load_item_meta(
+            item_meta, linked_item_ids | {p['item_name_id'] for p in plan_rows if p['item_name_id']}
+        )
+
+        def _in_norm(meta):
+            return not sion_norm or meta['norm'] == sion_norm
+
+        # Collect all unique items across all licenses: items with valid names
+        # that are active (is_active=False hides from pivot), within the norm.
+        all_items = {
+            item_id: item_meta[item_id] for item_id in linked_item_ids
+            if item_meta.get(item_id) and item_meta[item_id]['name']
+            and item_meta[item_id]['is_active'] and _in_norm(item_meta[item_id])
+        }
 
         # ── "As per planning" per-DFIA item map ────────────────────────────
         # When a DFIA carries a manual utilization plan (LicenseItemPlan), the
@@ -247,16 +444,20 @@ class ItemPivotReportView(View):
         # import items as before — so norm-driven norms (E1 / E5 / E132) are
         # unaffected. Column headers remain the union across the report; the
         # filtering is per row/cell in _build_license_row().
-        from apps.license.models import LicenseItemPlan
 
-        # import_item_id -> first attached item id, mirroring how a plan's
-        # totals are attributed to a single item name in _build_license_row().
+        # import_item_id -> first attached item id (within the norm), only for
+        # the import items an untagged plan line needs it for.
+        untagged = sorted({p['import_item_id'] for p in plan_rows
+                           if not p['item_name_id'] and p['import_item_id']})
         first_item_of_import = {}
-        for _lo in valid_licenses:
-            for _ii in _lo.import_license.all():
-                for _it in _ii.items.all():
-                    first_item_of_import[_ii.id] = _it.id
-                    break
+        for chunk in _chunked(untagged):
+            links = list(Through.objects.filter(licenseimportitemsmodel_id__in=chunk)
+                         .order_by(*_LINK_ORDERING)
+                         .values_list('licenseimportitemsmodel_id', 'itemnamemodel_id'))
+            self._load_item_meta(item_meta, [item_id for _, item_id in links])
+            for import_item_id, item_id in links:
+                if import_item_id not in first_item_of_import and _in_norm(item_meta[item_id]):
+                    first_item_of_import[import_item_id] = item_id
 
         # license_id -> {item_id: {'q': planned qty, 'cif': planned CIF-FC}}.
         # Attributed to the plan LINE's own item_name (not the import item's
@@ -268,10 +469,7 @@ class ItemPivotReportView(View):
             lambda: defaultdict(lambda: {'q': Decimal('0.000'), 'cif': Decimal('0.00')})
         )
         planned_item_ids_all = set()
-        for _pl in (LicenseItemPlan.objects
-                    .filter(license_id__in=[_lo.id for _lo in valid_licenses])
-                    .values('license_id', 'import_item_id', 'item_name_id',
-                            'planned_quantity', 'planned_cif_fc')):
+        for _pl in plan_rows:
             _iname = _pl['item_name_id'] or first_item_of_import.get(_pl['import_item_id'])
             if _iname is None:
                 continue
@@ -284,133 +482,218 @@ class ItemPivotReportView(View):
         # in the master (is_active=False) — the user explicitly planned it, so it
         # would otherwise vanish (the column builder above skips inactive items).
         # Add any planned item ids missing from all_items, honouring the norm filter.
-        _missing_planned = [iid for iid in planned_item_ids_all if iid not in all_items]
-        if _missing_planned:
-            for _it in ItemNameModel.objects.filter(id__in=_missing_planned).select_related('sion_norm_class'):
-                if not _it.name:
-                    continue
-                if sion_norm and not (_it.sion_norm_class and _it.sion_norm_class.norm_class == sion_norm):
-                    continue
-                all_items[_it.id] = _it
+        for _iid in planned_item_ids_all:
+            _meta = item_meta.get(_iid)
+            if _iid not in all_items and _meta and _meta['name'] and _in_norm(_meta):
+                all_items[_iid] = _meta
 
         # Sort items by display_order first, then by name for consistent column order
         sorted_items = sorted(
-            [(item.id, item.name) for item in all_items.values()],
-            key=lambda x: (all_items[x[0]].display_order, x[1] or '')
+            [(item_id, meta['name']) for item_id, meta in all_items.items()],
+            key=lambda x: (all_items[x[0]]['display_order'], x[1] or '')
         )
+        return sorted_items, item_meta, plan_totals_by_license, licenses_with_plans
+
+    def _iter_license_rows(self, license_ids: List[int], sorted_items: List[tuple],
+                           item_meta: Dict[int, dict], sion_norm: str,
+                           plan_totals_by_license, licenses_with_plans):
+        """
+        Second pass: yield (norm_class, notification_key, license_row) in
+        licence order, one batch of PIVOT_CHUNK_SIZE licences at a time.
+        """
+        for chunk in _chunked(license_ids):
+            for lic in self._fetch_license_chunk(chunk, item_meta, sion_norm, licenses_with_plans):
+                license_row = self._build_license_row(
+                    lic, sorted_items,
+                    item_plan_totals=plan_totals_by_license.get(lic['id']),
+                )
+                norm_class, notification_key = self._group_keys(lic, license_row)
+                yield norm_class, notification_key, license_row
 
-        # Batch document-type lookups: one query for the whole page instead of two
-        # .exists() calls per licence inside _build_license_row (an N+1 over the report).
-        from apps.license.models import LicenseDocumentModel
-        doc_types_by_license = defaultdict(set)
-        for _lid, _dt in (LicenseDocumentModel.objects
-                          .filter(license_id__in=[_lo.id for _lo in valid_licenses])
-                          .values_list('license_id', 'type')):
-            doc_types_by_license[_lid].add(_dt)
-
-        # Batch the condition-pool computation (was ~13 queries PER licence inside
-        # _build_license_row — the report's dominant N+1) into a handful of queries.
+    def _fetch_license_chunk(self, license_ids: List[int], item_meta: Dict[int, dict],
+                             sion_norm: str, licenses_with_plans) -> List[Dict[str, Any]]:
+        """
+        Everything _build_license_row needs for a batch of licences, as one
+        flat dict per licence (in license_ids order).
+
+        A fixed number of values() queries: licences (with their one-to-one
+        sub-tables), import items, item links, export items, allotted CIF,
+        documents, latest transfers and the condition pools.
+        """
+        from apps.allotment.models import AllotmentItems
+        from apps.license.models import LicenseDocumentModel, LicenseTransferModel
         from apps.license.services.condition_pool import compute_condition_pools_bulk
-        cond_pools_by_license = compute_condition_pools_bulk([_lo.id for _lo in valid_licenses])
 
-        # Build license data with item columns, grouped by norm first, then notification
-        # (defaultdict is imported at module level).
-        licenses_by_norm_notification = defaultdict(lambda: defaultdict(list))
+        # balance_cif / balance_report_notes / condition_sheet / current_owner
+        # live on OneToOne sub-tables (LicenseBalance / LicenseNotes /
+        # LicenseOwnership); read them through the joins.
+        licenses = {
+            row['id']: row for row in LicenseDetailsModel.objects.filter(id__in=license_ids).values(
+                'id', 'license_number', 'license_date', 'license_expiry_date',
+                'exporter_id', 'exporter__name', 'exporter__iec', 'port_id', 'port__code',
+                'notification_number__code', 'purchase_status_id',
+                'purchase_status__code', 'purchase_status__label',
+                'balance__balance_cif', 'balance__ledger_date',
+                'notes__balance_report_notes', 'notes__condition_sheet',
+                'ownership__current_owner_id', 'ownership__current_owner__name',
+            )
+        }
 
-        for license_obj in valid_licenses:
-            license_row = self._build_license_row(
-                license_obj, sorted_items,
-                item_plan_totals=plan_totals_by_license.get(license_obj.id),
-                document_types=doc_types_by_license.get(license_obj.id, frozenset()),
-                condition_pools=cond_pools_by_license.get(license_obj.id, {}),
+        # Import items in the same order the licence's import_license manager
+        # returns them (serial number within a licence).
+        import_items_by_license = defaultdict(list)
+        import_items_by_id = {}
+        for row in (LicenseImportItemsModel.objects
+                    .filter(license_id__in=license_ids)
+                    .order_by('license_id', 'serial_number', 'id')
+                    .values('id', 'license_id', 'hs_code_id', 'hs_code__hs_code', 'quantity',
+                            'allotted_quantity', 'debited_quantity', 'available_quantity',
+                            'debited_value', 'cif_fc', 'description', 'condition_type')):
+            row['item_ids'] = []  # linked item names within the norm, in ItemNameModel order
+            row['names'] = []     # every linked item name (E1 / E5 classification key)
+            import_items_by_license[row['license_id']].append(row)
+            import_items_by_id[row['id']] = row
+
+        links = list(LicenseImportItemsModel.items.through.objects
+                     .filter(licenseimportitemsmodel__license_id__in=license_ids)
+                     .order_by(*_LINK_ORDERING)
+                     .values_list('licenseimportitemsmodel_id', 'itemnamemodel_id'))
+        self._load_item_meta(item_meta, [item_id for _, item_id in links])
+        for import_item_id, item_id in links:
+            import_item = import_items_by_id.get(import_item_id)
+            if import_item is None:
+                continue
+            meta = item_meta[item_id]
+            import_item['names'].append(meta['name'])
+            if not sion_norm or meta['norm'] == sion_norm:
+                import_item['item_ids'].append(item_id)
+
+        # Export items (credit), restricted to the norm when filtering by one.
+        # The first export row (by pk) supplies the licence's primary norm.
+        exports = LicenseExportItemModel.objects.filter(license_id__in=license_ids)
+        if sion_norm:
+            exports = exports.filter(norm_class__norm_class=sion_norm)
+        total_cif = defaultdict(lambda: Decimal('0'))
+        first_export_norm = {}
+        for license_id, norm_class_id, norm, cif_fc in (
+                exports.order_by('license_id', 'id')
+                .values_list('license_id', 'norm_class_id', 'norm_class__norm_class', 'cif_fc')):
+            total_cif[license_id] += cif_fc if cif_fc is not None else Decimal('0')
+            first_export_norm.setdefault(license_id, norm if norm_class_id else None)
+
+        # Alloted CIF from DFIA allotments marked allotted and NOT linked to any
+        # bill of entry (meaning no BOE exists for this allotment).
+        alloted_cif = dict(
+            AllotmentItems.objects.filter(
+                item__license_id__in=license_ids,
+                allotment__is_allotted=True,
+                allotment__bill_of_entry__isnull=True,
+            ).values('item__license_id').annotate(total=Sum('cif_fc'))
+            .values_list('item__license_id', 'total')
+        )
+
+        document_types = defaultdict(set)
+        for license_id, doc_type in (LicenseDocumentModel.objects
+                                     .filter(license_id__in=license_ids)
+                                     .values_list('license_id', 'type')):
+            document_types[license_id].add(doc_type)
+
+        # Latest transfer per licence (same ordering as transfers.order_by(...).first()).
+        latest_transfers = {
+            row['license_id']: row for row in (
+                LicenseTransferModel.objects.filter(license_id__in=license_ids)
+                .order_by('license_id', '-transfer_date', '-id')
+                .distinct('license_id')
+                .values('license_id', 'transfer_status', 'transfer_date', 'transfer_initiation_date',
+                        'from_company_id', 'from_company__name', 'to_company_id', 'to_company__name')
             )
+        }
 
-            if license_row:
-                # Handle blank/empty notification numbers
-                notification = (license_obj.notification_number.code if license_obj.notification_number_id else '').strip()
-                if not notification:
-                    notification = 'Unknown'
-
-                # Get norm class from license
-                norm_class = 'Unknown'
-                if license_obj.export_license.exists():
-                    first_export = license_obj.export_license.first()
-                    if first_export and first_export.norm_class:
-                        norm_class = first_export.norm_class.norm_class
-
-                # Define conversion norms
-                conversion_norms = ['E1', 'E5', 'E126', 'E132']
-                is_conversion = license_obj.purchase_status and license_obj.purchase_status.code == CO
-
-                # Get exporter name for split sheet logic
-                exporter_name = (license_obj.exporter.name or '') if license_obj.exporter else ''
-                exporter_name_upper = exporter_name.upper()
-
-                # Determine exporter category for split sheets
-                exporter_category = None
-                if 'PARLE' in exporter_name_upper:
-                    exporter_category = 'Parle'
-                elif 'HALDIRAM SNACKS' in exporter_name_upper:
-                    exporter_category = 'Haldiram Snacks'
-                elif 'HALDIRAM FOODS' in exporter_name_upper:
-                    exporter_category = 'Haldiram Foods'
-                elif 'HARIOMKAR FOOD' in exporter_name_upper:
-                    exporter_category = 'Hariomkar Food'
-
-                # Build notification key based on norm class and purchase status
-                if norm_class in conversion_norms and is_conversion:
-                    # For conversion licenses in E1, E5, E126, E132
-                    if norm_class in ['E5', 'E132']:
-                        # E5 and E132 Conversion: split by exporter category
-                        if exporter_category:
-                            notification_key = f"{notification} - Conversion - {exporter_category}"
-                        else:
-                            notification_key = f"{notification} - Conversion"
-                    else:
-                        # E1, E126 Conversion
-                        notification_key = f"{notification} - Conversion"
-
-                elif norm_class in ['E5', 'E132']:
-                    # E5 and E132 non-conversion: split by exporter category
-                    if exporter_category:
-                        notification_key = f"{notification} - {exporter_category}"
-                    else:
-                        notification_key = f"{notification} - Others"
+        condition_pools = compute_condition_pools_bulk(license_ids)
 
+        chunk = []
+        for license_id in license_ids:
+            lic = licenses.get(license_id)
+            if lic is None:
+                continue
+            lic['import_items'] = import_items_by_license.get(license_id, [])
+            lic['total_cif'] = total_cif.get(license_id, Decimal('0'))
+            lic['alloted_cif'] = alloted_cif.get(license_id) or Decimal('0')
+            lic['primary_export_norm'] = first_export_norm.get(license_id)
+            lic['document_types'] = document_types.get(license_id, frozenset())
+            lic['latest_transfer'] = latest_transfers.get(license_id)
+            lic['condition_pools'] = condition_pools.get(license_id, {})
+            lic['has_manual_plan'] = license_id in licenses_with_plans
+            chunk.append(lic)
+        return chunk
+
+    @staticmethod
+    def _group_keys(lic: Dict[str, Any], license_row: Dict[str, Any]):
+        """(norm_class, notification_key) a licence row is grouped under."""
+        notification = license_row['notification_number']
+
+        # Norm class of the licence's first export row
+        norm_class = lic['primary_export_norm']
+        if norm_class is None:
+            norm_class = 'Unknown'
+
+        # Define conversion norms
+        conversion_norms = ['E1', 'E5', 'E126', 'E132']
+        is_conversion = lic['purchase_status_id'] and lic['purchase_status__code'] == CO
+
+        # Get exporter name for split sheet logic
+        exporter_name = (lic['exporter__name'] or '') if lic['exporter_id'] else ''
+        exporter_name_upper = exporter_name.upper()
+
+        # Determine exporter category for split sheets
+        exporter_category = None
+        if 'PARLE' in exporter_name_upper:
+            exporter_category = 'Parle'
+        elif 'HALDIRAM SNACKS' in exporter_name_upper:
+            exporter_category = 'Haldiram Snacks'
+        elif 'HALDIRAM FOODS' in exporter_name_upper:
+            exporter_category = 'Haldiram Foods'
+        elif 'HARIOMKAR FOOD' in exporter_name_upper:
+            exporter_category = 'Hariomkar Food'
+
+        # Build notification key based on norm class and purchase status
+        if norm_class in conversion_norms and is_conversion:
+            # For conversion licenses in E1, E5, E126, E132
+            if norm_class in ['E5', 'E132']:
+                # E5 and E132 Conversion: split by exporter category
+                if exporter_category:
+                    notification_key = f"{notification} - Conversion - {exporter_category}"
                 else:
-                    # Regular grouping by notification for other norms
-                    notification_key = notification
-
-                # Split every pivot table by PURCHASE STATUS: prefix the group
-                # key with the licence's purchase-status label so each rendered
-                # table (and its summary / totals / Excel sheet, which all key off
-                # this group) contains a single purchase status. The " — " (em
-                # dash) delimiter is distinct from the " - " used inside
-                # notification_key, so the frontend can split it back apart.
-                ps_label = (license_row.get('purchase_status_label')
-                            or license_row.get('purchase_status_code') or 'Unknown')
-                notification_key = f"{ps_label} — {notification_key}"
-
-                licenses_by_norm_notification[norm_class][notification_key].append(license_row)
-
-        # Determine which items have restrictions
-        items_with_restrictions = set()
-        for norm_dict in licenses_by_norm_notification.values():
-            for licenses_list in norm_dict.values():
-                for license_row in licenses_list:
-                    for item_id, item_name in sorted_items:
-                        item_data = license_row.get('items', {}).get(item_name, {})
-                        if item_data.get('restriction') is not None:
-                            items_with_restrictions.add(item_id)
+                    notification_key = f"{notification} - Conversion"
+            else:
+                # E1, E126 Conversion
+                notification_key = f"{notification} - Conversion"
 
-        # Convert nested defaultdict to regular dict
-        result_dict = {}
-        for norm, notification_dict in licenses_by_norm_notification.items():
-            result_dict[norm] = dict(notification_dict)
+        elif norm_class in ['E5', 'E132']:
+            # E5 and E132 non-conversion: split by exporter category
+            if exporter_category:
+                notification_key = f"{notification} - {exporter_category}"
+            else:
+                notification_key = f"{notification} - Others"
 
-        # Fetch notes and conditions for all norms in a single query
+        else:
+            # Regular grouping by notification for other norms
+            notification_key = notification
+
+        # Split every pivot table by PURCHASE STATUS: prefix the group
+        # key with the licence's purchase-status label so each rendered
+        # table (and its summary / totals / Excel sheet, which all key off
+        # this group) contains a single purchase status. The " — " (em
+        # dash) delimiter is distinct from the " - " used inside
+        # notification_key, so the frontend can split it back apart.
+        ps_label = (license_row.get('purchase_status_label')
+                    or license_row.get('purchase_status_code') or 'Unknown')
+        return norm_class, f"{ps_label} — {notification_key}"
+
+    @staticmethod
+    def _norm_notes_conditions(norm_classes_list: List[str]) -> Dict[str, Any]:
+        """SION notes and conditions for the report's norms, in a single query."""
         from apps.core.models import SionNormClassModel
-        norm_classes_list = list(result_dict.keys())
         sion_norms = SionNormClassModel.objects.filter(
             norm_class__in=norm_classes_list
         ).prefetch_related('notes', 'conditions')
@@ -434,29 +717,28 @@ class ItemPivotReportView(View):
                 }
             else:
                 norm_notes_conditions[norm_class] = {'notes': [], 'conditions': []}
+        return norm_notes_conditions
 
-        return {
-            'items': [
-                {
-                    'id': item_id,
-                    'name': item_name,
-                    'has_restriction': item_id in items_with_restrictions
-                }
-                for item_id, item_name in sorted_items
-            ],
-            'licenses_by_norm_notification': result_dict,
-            'norm_notes_conditions': norm_notes_conditions,
-            'report_date': today.isoformat(),
-        }
+    @staticmethod
+    def _transfer_text(transfer: Dict[str, Any]) -> str:
+        """LicenseTransferModel.__str__ for a values() row."""
+        fd = transfer['transfer_date'] or (
+            transfer['transfer_initiation_date'].date() if transfer['transfer_initiation_date'] else None
+        )
+        fd_str = str(fd) if fd else "N/A"
+        return (
+            f"{transfer['transfer_status']} from "
+            f"{transfer['from_company__name'] if transfer['from_company_id'] else 'N/A'} to "
+            f"{transfer['to_company__name'] if transfer['to_company_id'] else 'N/A'} on {fd_str}"
+        )
 
-    def _build_license_row(self, license_obj: LicenseDetailsModel, all_items: List[tuple],
-                           item_plan_totals=None, document_types=None,
-                           condition_pools=None) -> Dict[str, Any]:
+    def _build_license_row(self, lic: Dict[str, Any], all_items: List[tuple],
+                           item_plan_totals=None) -> Dict[str, Any]:
         """
         Build a single license row with item columns.
 
         Args:
-            license_obj: LicenseDetailsModel instance
+            lic: Flat licence dict from _fetch_license_chunk()
             all_items: List of (item_id, item_name) tuples
             item_plan_totals: When the DFIA is manually planned, a map
                 {item_id: {'q': planned qty, 'cif': planned CIF-FC}} of the items
@@ -468,34 +750,16 @@ class ItemPivotReportView(View):
         Returns:
             Dictionary with license data and item quantities
         """
-        # Calculate total CIF from export license items (already prefetched)
-        # Start with Decimal('0') to ensure result is always Decimal type
-        total_cif = Decimal('0')
-        for item in license_obj.export_license.all():
-            # Convert to Decimal to handle cases where database returns float
-            cif_value = Decimal(str(item.cif_fc)) if item.cif_fc is not None else Decimal('0')
-            total_cif += cif_value
-
-        # Calculate Alloted CIF from DFIA allotments that don't have BOE
-        from apps.allotment.models import AllotmentItems
-        alloted_cif = Decimal('0')
-        # Get allotment items for this license where allotment is marked as allotted
-        # and is NOT linked to any bill_of_entry (meaning no BOE exists for this allotment)
-        allotment_items = AllotmentItems.objects.filter(
-            item__license=license_obj,
-            allotment__is_allotted=True,
-            allotment__bill_of_entry__isnull=True  # No BOE linked to this allotment
-        ).select_related('allotment')
-
-        for allot_item in allotment_items:
-            alloted_cif += Decimal(str(allot_item.cif_fc)) if allot_item.cif_fc is not None else Decimal('0')
+        total_cif = lic['total_cif']
+        alloted_cif = lic['alloted_cif']
+        condition_pools = lic['condition_pools']
 
         # Debited CIF = CIF already debited (via BOE) across this licence's import
         # items — the same `debited_value` field the restriction pools treat as
-        # debited_cif below. import_license is prefetched, so no extra query.
+        # debited_cif below.
         debited_cif = Decimal('0')
-        for import_item in license_obj.import_license.all():
-            debited_cif += Decimal(str(import_item.debited_value)) if import_item.debited_value is not None else DEC_0
+        for import_item in lic['import_items']:
+            debited_cif += import_item['debited_value'] if import_item['debited_value'] is not None else DEC_0
 
         # Aggregate quantities by item (sum across all serial numbers)
         item_quantities = defaultdict(lambda: {
@@ -503,145 +767,72 @@ class ItemPivotReportView(View):
             'allotted_quantity': Decimal('0.000'),
             'debited_quantity': Decimal('0.000'),
             'available_quantity': Decimal('0.000'),
-            'debited_value': Decimal('0.00'),
-            'cif_value': Decimal('0.00'),
             'hs_code': '',
             'description': '',
-            'sion_norm_class': None,
-            'restriction_percentage': None,
             'condition_type': '',
-            # User-authored utilization plan (summed across an item's splits).
-            'plan_quantity': Decimal('0.000'),
-            'plan_cif': Decimal('0.00'),
         })
 
-        # Per-import-item utilization plan totals for this license (one query).
-        from apps.license.services.plan_reporting import plan_map_for_license
-        _plan_map = plan_map_for_license(license_obj.id)
-
-        # Per condition_type pool — new restriction model. Each "N%" pool is
-        # shared by every import item on this licence with that condition_type,
-        # and provides the per-cell `restriction_value` shown in the pivot.
-        # Use the report's batched pools when provided; else compute per-licence
-        # (standalone callers).
-        if condition_pools is None:
-            from apps.license.services.condition_pool import compute_condition_pools
-            condition_pools = compute_condition_pools(license_obj)
-        # condition_pools = {"2%": Decimal(...), "3%": Decimal(...), ...}
-
-        # (Legacy restriction_groups kept ONLY for backward compatibility with
-        # callers that still read it; unused for the cell-level value now.)
-        restriction_groups = defaultdict(lambda: {
-            'total_cif': Decimal('0.00'),
-            'debited_cif': Decimal('0.00'),
-            'available_cif': Decimal('0.00'),
-            'restriction_percentage': None,
-            'sion_norm_class': None,
-            'item_ids': []
-        })
+        for import_item in lic['import_items']:
+            for item_id in import_item['item_ids']:
+                quantities = item_quantities[item_id]
+                for field in ('quantity', 'allotted_quantity', 'debited_quantity', 'available_quantity'):
+                    if import_item[field] is not None:
+                        quantities[field] += import_item[field]
 
-        for import_item in license_obj.import_license.all():
-            # Plan totals are now sourced per plan-line item_name via
-            # `item_plan_totals` (see the item-columns loop below); the old
-            # first-attached-name attribution is gone as it mis-assigned plans
-            # on multi-name import items (e.g. RUTILE on a BORAX+RUTILE item).
-            for item in import_item.items.all():
-                # Convert all numeric fields to Decimal to handle potential float values from database
-                item_quantities[item.id]['quantity'] += Decimal(str(import_item.quantity)) if import_item.quantity is not None else DEC_000
-                item_quantities[item.id]['allotted_quantity'] += Decimal(str(import_item.allotted_quantity)) if import_item.allotted_quantity is not None else DEC_000
-                item_quantities[item.id]['debited_quantity'] += Decimal(str(import_item.debited_quantity)) if import_item.debited_quantity is not None else DEC_000
-                item_quantities[item.id]['available_quantity'] += Decimal(str(import_item.available_quantity)) if import_item.available_quantity is not None else DEC_000
-                item_quantities[item.id]['debited_value'] += Decimal(str(import_item.debited_value)) if import_item.debited_value is not None else DEC_0
-                item_quantities[item.id]['cif_value'] += Decimal(str(import_item.cif_fc)) if import_item.cif_fc is not None else DEC_0
-
-                if import_item.hs_code and not item_quantities[item.id]['hs_code']:
-                    item_quantities[item.id]['hs_code'] = import_item.hs_code.hs_code
-
-                if import_item.description and not item_quantities[item.id]['description']:
-                    item_quantities[item.id]['description'] = import_item.description
+                if import_item['hs_code_id'] and not quantities['hs_code']:
+                    quantities['hs_code'] = import_item['hs_code__hs_code']
+
+                if import_item['description'] and not quantities['description']:
+                    quantities['description'] = import_item['description']
 
                 # Carry the licence-condition badge through to the pivot cell.
                 # If multiple import-item rows map to the same item-name, the
                 # first non-empty condition wins (typical case: each item-name
                 # appears on one serial number per licence).
-                if import_item.condition_type and not item_quantities[item.id]['condition_type']:
-                    item_quantities[item.id]['condition_type'] = import_item.condition_type
-
-                # Get restriction from item's sion_norm_class and restriction_percentage
-                if item and hasattr(item, 'sion_norm_class') and item.sion_norm_class:
-                    sion_norm = item.sion_norm_class.norm_class
-                    restriction_pct = item.restriction_percentage
-
-                    item_quantities[item.id]['sion_norm_class'] = sion_norm
-                    item_quantities[item.id]['restriction_percentage'] = restriction_pct
-
-                    # Group by (sion_norm_class, restriction_percentage) for shared restriction calculation
-                    # Items in same SION norm with same restriction % share the restriction limit
-                    restriction_key = f"{sion_norm}_{restriction_pct}"
-                    restriction_groups[restriction_key]['sion_norm_class'] = sion_norm
-                    restriction_groups[restriction_key]['restriction_percentage'] = restriction_pct
-                    # Convert to Decimal to handle potential float values from database
-                    restriction_groups[restriction_key]['total_cif'] += Decimal(str(import_item.cif_fc)) if import_item.cif_fc is not None else DEC_0
-                    restriction_groups[restriction_key]['debited_cif'] += Decimal(str(import_item.debited_value)) if import_item.debited_value is not None else DEC_0
-                    if item.id not in restriction_groups[restriction_key]['item_ids']:
-                        restriction_groups[restriction_key]['item_ids'].append(item.id)
-
-        # Calculate available CIF within restriction for each group
-        # Use stored balance_cif field instead of property to avoid extra queries
-        # Convert to Decimal to handle potential float value from database
-        balance_cif = Decimal(str(license_obj.balance_cif)) if license_obj.balance_cif is not None else Decimal('0')
-        for group_name, group_data in restriction_groups.items():
-            if group_data['restriction_percentage'] and total_cif > 0:
-                # Convert restriction_percentage to Decimal to avoid float * Decimal error
-                restriction_pct_decimal = Decimal(str(group_data['restriction_percentage']))
-                # Maximum allowed CIF for this restriction group
-                max_allowed_cif = (total_cif * restriction_pct_decimal) / Decimal('100')
-                # Available CIF = max_allowed - debited
-                available_cif = max_allowed_cif - group_data['debited_cif']
-                # Cap at balance_cif - restriction cannot exceed available balance
-                available_cif = min(available_cif, balance_cif)
-                group_data['available_cif'] = max(available_cif, Decimal('0'))
+                if import_item['condition_type'] and not quantities['condition_type']:
+                    quantities['condition_type'] = import_item['condition_type']
+
+        balance_cif = lic['balance__balance_cif'] if lic['balance__balance_cif'] is not None else Decimal('0')
 
         # Build row data
         # Handle blank/empty notification numbers
-        notification_display = (license_obj.notification_number.code if license_obj.notification_number_id else '').strip()
+        notification_display = (lic['notification_number__code'] or '').strip()
         if not notification_display:
             notification_display = 'Unknown'
 
-        # Check for document types — use the batched map when the report supplies it,
-        # else fall back to a per-object query (standalone callers).
-        if document_types is None:
-            document_types = {d.type for d in license_obj.license_documents.all()}
+        document_types = lic['document_types']
         has_tl = 'TRANSFER LETTER' in document_types
         has_copy = 'LICENSE COPY' in document_types
 
         # Get latest transfer
-        latest_transfer_text = ''
-        transfer_qs = license_obj.transfers.order_by("-transfer_date", "-id")
-        if transfer_qs.exists():
-            transfer = transfer_qs.first()
-            latest_transfer_text = str(transfer)
-        elif license_obj.current_owner:
-            latest_transfer_text = f"Current Owner is {license_obj.current_owner.name}"
+        if lic['latest_transfer']:
+            latest_transfer_text = self._transfer_text(lic['latest_transfer'])
+        elif lic['ownership__current_owner_id']:
+            latest_transfer_text = f"Current Owner is {lic['ownership__current_owner__name']}"
         else:
             latest_transfer_text = "Data Not Found"
 
         # Purchase Status — emitted so the frontend can colour-code each row.
-        ps_code  = ''
+        ps_code = ''
         ps_label = ''
-        if license_obj.purchase_status_id:
-            ps = license_obj.purchase_status
-            ps_code  = ps.code or ''
-            ps_label = ps.label or ''
+        if lic['purchase_status_id']:
+            ps_code = lic['purchase_status__code'] or ''
+            ps_label = lic['purchase_status__label'] or ''
+
+        if lic['exporter_id']:
+            # CompanyModel.__str__
+            exporter = lic['exporter__name'] if lic['exporter__name'] else lic['exporter__iec']
+        else:
+            exporter = ''
 
         row_data = {
-            'id': license_obj.id,
-            'license_number': license_obj.license_number,
-            'license_date': license_obj.license_date.isoformat() if license_obj.license_date else None,
-            'license_expiry_date': license_obj.license_expiry_date.isoformat(),
-            'ledger_date': license_obj.ledger_date.isoformat() if license_obj.ledger_date else None,
-            'exporter': str(license_obj.exporter) if license_obj.exporter else '',
-            'port': str(license_obj.port) if license_obj.port else '',
+            'id': lic['id'],
+            'license_number': lic['license_number'],
+            'license_date': lic['license_date'].isoformat() if lic['license_date'] else None,
+            'license_expiry_date': lic['license_expiry_date'].isoformat(),
+            'ledger_date': lic['balance__ledger_date'].isoformat() if lic['balance__ledger_date'] else None,
+            'exporter': exporter,
+            'port': f"{lic['port__code']}" if lic['port_id'] else '',
             'notification_number': notification_display,
             'purchase_status_code': ps_code,
             'purchase_status_label': ps_label,
@@ -649,15 +840,15 @@ class ItemPivotReportView(View):
             'debited_cif': float(debited_cif),
             'alloted_cif': float(alloted_cif),
             'balance_cif': float(balance_cif),  # Reuse already calculated balance
-            'balance_report_notes': license_obj.balance_report_notes or '',
-            'condition_sheet': license_obj.condition_sheet or '',
+            'balance_report_notes': lic['notes__balance_report_notes'] or '',
+            'condition_sheet': lic['notes__condition_sheet'] or '',
             'latest_transfer': latest_transfer_text,
             'has_tl': has_tl,
             'has_copy': has_copy,
             # Per-license plan source: 'manual' if the license has any manual
             # plan line, else 'norm'. The frontend uses this to show EITHER the
             # manual plan OR the norm plan for the whole license — never both.
-            'plan_source': 'manual' if _plan_map else 'norm',
+            'plan_source': 'manual' if lic['has_manual_plan'] else 'norm',
             'items': {}
         }
 
@@ -682,11 +873,7 @@ class ItemPivotReportView(View):
         # item we classify it into a category, compute the category's
         # effective rate (planned_cif / util_qty), then allocate this item's
         # share of the category's planned CIF proportionally to its util qty.
-        primary_norm = ''
-        if license_obj.export_license.exists():
-            first_export = license_obj.export_license.first()
-            if first_export and first_export.norm_class:
-                primary_norm = first_export.norm_class.norm_class or ''
+        primary_norm = lic['primary_export_norm'] or ''
 
         # `item_plan_data[item_name]` → {'planned_cif': float, 'unit_price': float}
         item_plan_data: Dict[str, Dict[str, float]] = {}
@@ -706,28 +893,21 @@ class ItemPivotReportView(View):
             # Build a bal_agg-equivalent over each import_item (need per-item
             # condition_type to honour the Display/Util qty split for E1).
             # Items inactive in the master are still included so qty isn't lost.
-            from collections import defaultdict as _dd
-            import_items = (
-                LicenseImportItemsModel.objects
-                .filter(license=license_obj)
-                .select_related('hs_code')
-                .prefetch_related('items')
-            )
             display_qty = {c: 0.0 for c in _CATS}
             util_qty    = {c: 0.0 for c in _CATS}
             # Track per ITEM-NAME so we can attribute the right share back.
             per_item_util: Dict[str, float] = {}
             per_item_category: Dict[str, str] = {}
-            for ii in import_items:
-                names = list(ii.items.values_list('name', flat=True))
-                key = ', '.join(sorted(names)) if names else (ii.description or '-')
-                hs = ii.hs_code.hs_code if ii.hs_code else ''
-                cat = _classify(key, hs, ii.description)
+            for ii in lic['import_items']:
+                names = ii['names']
+                key = ', '.join(sorted(names)) if names else (ii['description'] or '-')
+                hs = ii['hs_code__hs_code'] if ii['hs_code_id'] else ''
+                cat = _classify(key, hs, ii['description'])
                 if not cat or cat not in display_qty:
                     continue
-                avail = float(ii.available_quantity or 0)
+                avail = float(ii['available_quantity'] or 0)
                 display_qty[cat] += avail
-                cond = (ii.condition_type or '').strip()
+                cond = (ii['condition_type'] or '').strip()
                 if _EXCL is not None:
                     excluded = _EXCL.get(cat, frozenset())
                     util_inc = 0.0 if cond in excluded else avail
@@ -742,7 +922,7 @@ class ItemPivotReportView(View):
                         per_item_category[nm] = cat
                 else:
                     # No master items linked — attribute to description.
-                    nm = ii.description or '-'
+                    nm = ii['description'] or '-'
                     per_item_util[nm] = per_item_util.get(nm, 0.0) + util_inc
                     per_item_category[nm] = cat
 
@@ -1187,8 +1367,12 @@ class ItemPivotReportView(View):
                                   exclude_company_ids=None, min_balance=200, license_status='active',
                                   expiry_date_from=None, expiry_date_to=None, purchase_status=None):
         """
-        Export report to Excel - uses existing generate_report for data, then formats as Excel.
-        This ensures consistency with JSON output.
+        Export report to Excel - rows come from spool_report(), the same row
+        builder generate_report uses, so the output matches the JSON report.
+
+        Rows are read back one sheet at a time and written as they are read;
+        column totals are running counters, so memory does not grow with the
+        report.
 
         Returns:
             StreamingHttpResponse with Excel file
@@ -1197,7 +1381,6 @@ class ItemPivotReportView(View):
         from openpyxl.styles import Font, Alignment, PatternFill
         from openpyxl.cell import WriteOnlyCell
         from django.http import StreamingHttpResponse
-        import tempfile
         import os
         from apps.license.utils.condition_excel import annotate_cell as _annotate_condition_cell
 
@@ -1206,25 +1389,14 @@ class ItemPivotReportView(View):
         temp_file.close()
 
         try:
-            # Use the working generate_report method
-            report_data = self.generate_report(days, sion_norm, company_ids, exclude_company_ids, min_balance, license_status, expiry_date_from, expiry_date_to, purchase_status)
-
+            spool = self.spool_report(days, sion_norm, company_ids, exclude_company_ids, min_balance, license_status, expiry_date_from, expiry_date_to, purchase_status)
             workbook = openpyxl.Workbook(write_only=True)
-            licenses_by_norm_notif = report_data.get('licenses_by_norm_notification', {})
 
-            for norm_class in sorted(licenses_by_norm_notif.keys()):
-                notifications_dict = licenses_by_norm_notif[norm_class]
-                for notification, licenses_list in sorted(notifications_dict.items()):
-                    # Filter items to only those with data in THIS norm-notification
-                    items_with_data = []
-                    for item in report_data['items']:
-                        item_name = item['name']
-                        has_data = any(
-                            lic['items'].get(item_name, {}).get('quantity', 0) > 0
-                            for lic in licenses_list
-                        )
-                        if has_data:
-                            items_with_data.append(item)
+            with spool:
+                for sheet in spool.sheets:
+                    norm_class, notification = sheet
+                    # Only items with data in THIS norm-notification
+                    items_with_data = spool.items_with_data(sheet)
 
                     # Create sheet
                     sheet_name = f"{norm_class}_{notification}"[:31].replace('/', '-').replace('\\', '-').replace('*', '-')
@@ -1243,7 +1415,6 @@ class ItemPivotReportView(View):
                     for item in items_with_data:
                         item_name = item['name']
                         has_restriction = item.get('has_restriction', False)
-                        is_rutile = item_name == 'RUTILE - A3627'
                         headers = [
                             f"{item_name} HSN Code",
                             f"{item_name} Product Description",
@@ -1276,8 +1447,16 @@ class ItemPivotReportView(View):
                         header_row.append(cell)
                     worksheet.append(_xlsx_safe_row(header_row))
 
+                    # Running column totals, accumulated while rows are written.
+                    cif_totals = {'total_cif': 0, 'debited_cif': 0, 'alloted_cif': 0, 'balance_cif': 0}
+                    qty_types = ['quantity', 'allotted_quantity', 'debited_quantity', 'available_quantity']
+                    item_totals = {
+                        item['name']: dict.fromkeys(qty_types + ['restriction_value', 'planned_cif'], 0)
+                        for item in items_with_data
+                    }
+
                     # Data rows
-                    for idx, lic in enumerate(licenses_list, 1):
+                    for idx, lic in enumerate(spool.rows(sheet), 1):
                         row_data = [
                             idx,
                             lic['license_number'],
@@ -1291,11 +1470,12 @@ class ItemPivotReportView(View):
                             lic.get('balance_report_notes', ''),
                             lic.get('condition_sheet', '')
                         ]
+                        for field in cif_totals:
+                            cif_totals[field] += lic.get(field, 0)
 
                         for item in items_with_data:
                             item_name = item['name']
                             has_restriction = item.get('has_restriction', False)
-                            is_rutile = item_name == 'RUTILE - A3627'
                             item_data = lic['items'].get(item_name, {})
                             cond = item_data.get('condition_type') or ''
                             # Tint the HSN-code cell for this (licence, item)
@@ -1320,6 +1500,12 @@ class ItemPivotReportView(View):
                             row_data.append(item_data.get('unit_price') or 0)
                             row_data.append(item_data.get('planned_cif') or 0)
 
+                            totals = item_totals[item_name]
+                            for qty_type in qty_types:
+                                totals[qty_type] += item_data.get(qty_type, 0)
+                            totals['restriction_value'] += item_data.get('restriction_value', 0)
+                            totals['planned_cif'] += item_data.get('planned_cif') or 0
+
                         worksheet.append(_xlsx_safe_row(row_data))
 
                     # Totals row
@@ -1327,43 +1513,27 @@ class ItemPivotReportView(View):
                     totals_row[0].font = Font(bold=True)
                     totals_row.extend([None, None, None, None, None, None])
 
-                    total_cif_cell = WriteOnlyCell(worksheet, value=sum(l['total_cif'] for l in licenses_list))
-                    total_cif_cell.font = Font(bold=True)
-                    totals_row.append(total_cif_cell)
-
-                    debited_cif_cell = WriteOnlyCell(worksheet, value=sum(l.get('debited_cif', 0) for l in licenses_list))
-                    debited_cif_cell.font = Font(bold=True)
-                    totals_row.append(debited_cif_cell)
-
-                    alloted_cif_cell = WriteOnlyCell(worksheet, value=sum(l['alloted_cif'] for l in licenses_list))
-                    alloted_cif_cell.font = Font(bold=True)
-                    totals_row.append(alloted_cif_cell)
-
-                    balance_cif_cell = WriteOnlyCell(worksheet, value=sum(l['balance_cif'] for l in licenses_list))
-                    balance_cif_cell.font = Font(bold=True)
-                    totals_row.append(balance_cif_cell)
+                    for field in ('total_cif', 'debited_cif', 'alloted_cif', 'balance_cif'):
+                        cell = WriteOnlyCell(worksheet, value=cif_totals[field])
+                        cell.font = Font(bold=True)
+                        totals_row.append(cell)
 
                     for item in items_with_data:
-                        item_name = item['name']
-                        has_restriction = item.get('has_restriction', False)
-                        is_rutile = item_name == 'RUTILE - A3627'
+                        totals = item_totals[item['name']]
                         totals_row.extend([None, None])  # HSN, Description
-                        for qty_type in ['quantity', 'allotted_quantity', 'debited_quantity', 'available_quantity']:
-                            total = sum(l['items'].get(item_name, {}).get(qty_type, 0) for l in licenses_list)
-                            cell = WriteOnlyCell(worksheet, value=total)
+                        for qty_type in qty_types:
+                            cell = WriteOnlyCell(worksheet, value=totals[qty_type])
                             cell.font = Font(bold=True)
                             totals_row.append(cell)
-                        if has_restriction:
+                        if item.get('has_restriction', False):
                             totals_row.append(None)  # Restriction %
-                            total_restriction = sum(l['items'].get(item_name, {}).get('restriction_value', 0) for l in licenses_list)
-                            cell = WriteOnlyCell(worksheet, value=total_restriction)
+                            cell = WriteOnlyCell(worksheet, value=totals['restriction_value'])
                             cell.font = Font(bold=True)
                             totals_row.append(cell)
                         # Unit Price column total stays blank (it's a rate);
                         # Planned CIF totals across the column.
                         totals_row.append(None)
-                        total_planned = sum((l['items'].get(item_name, {}).get('planned_cif') or 0) for l in licenses_list)
-                        cell = WriteOnlyCell(worksheet, value=total_planned)
+                        cell = WriteOnlyCell(worksheet, value=totals['planned_cif'])
                         cell.font = Font(bold=True)
                         totals_row.append(cell)
 
@@ -1516,7 +1686,8 @@ class ItemPivotViewSet(viewsets.ViewSet):
                 'state': task.state,
                 'current': task.info.get('current', 0),
                 'total': task.info.get('total', 100),
-                'status': task.info.get('status', '')
+                'status': task.info.get('status', ''),
+                'snapshot': task.info.get('snapshot'),
             }
         elif task.state == 'SUCCESS':
             response = {
@@ -1524,7 +1695,9 @@ class ItemPivotViewSet(viewsets.ViewSet):
                 'current': 100,
                 'total': 100,
                 'status': 'Completed!',
-                'result': task.info
+                'result': task.info,
+                # 'fresh' when the Excel was written from a cached pivot snapshot
+                'snapshot': task.info.get('snapshot') if isinstance(task.info, dict) else None,
             }
         else:
             # Something went wrong
@@ -302,21 +302,29 @@ class LicenseDetailsViewSet(_LicenseDetailsViewSetBase):
         # current_owner now lives on LicenseOwnership sub-table; balance and flags
         # are also sub-tables we want pre-joined so the back-compat @property
         # accessors don't issue separate queries.
-        qs = qs.select_related(
+        # A list request with ?fields= / ?view=compact only joins what its
+        # fields read (LicenseDetailsSerializer.sparse_field_relations).
+        wanted = LicenseDetailsSerializer.requested_fields(self.request) if self.action == 'list' else None
+        qs = qs.select_related(*LicenseDetailsSerializer.relations_for(wanted, [
             'exporter', 'port', 'purchase_status',
             'balance', 'flags', 'ownership', 'ownership__current_owner', 'notes',
-        )
+        ]))
 
         # Flag licenses that have a manual utilization plan (drives list colour) and
         # which document types they carry — annotated so the list serializer doesn't
         # fire an .exists() query per row (was 2 extra queries/row for has_tl/has_copy).
         from django.db.models import Exists, OuterRef
         from apps.license.models import LicenseItemPlan, LicenseDocumentModel
-        qs = qs.annotate(
-            _has_manual_plan=Exists(LicenseItemPlan.objects.filter(license=OuterRef('pk'))),
-            _has_tl=Exists(LicenseDocumentModel.objects.filter(license=OuterRef('pk'), type='TRANSFER LETTER')),
-            _has_copy=Exists(LicenseDocumentModel.objects.filter(license=OuterRef('pk'), type='LICENSE COPY')),
-        )
+        flag_subqueries = {
+            'is_manually_planned': ('_has_manual_plan', LicenseItemPlan.objects.filter(license=OuterRef('pk'))),
+            'has_tl': ('_has_tl', LicenseDocumentModel.objects.filter(license=OuterRef('pk'), type='TRANSFER LETTER')),
+            'has_copy': ('_has_copy', LicenseDocumentModel.objects.filter(license=OuterRef('pk'), type='LICENSE COPY')),
+        }
+        qs = qs.annotate(**{
+            alias: Exists(subquery)
+            for field, (alias, subquery) in flag_subqueries.items()
+            if wanted is None or field in wanted
+        })
 
         # Only prefetch deep nested items for detail view (single object).
         # For list view, those relations cause massive performance issues,
@@ -336,7 +344,7 @@ class LicenseDetailsViewSet(_LicenseDetailsViewSetBase):
                 'import_license__item_details',
                 'license_documents',
             )
-        else:
+        elif wanted is None or 'license_documents' in wanted:
             # List view: prefetch only license_documents so the serializer can
             # read the prefetch cache (zero per-row queries) instead of calling
             # .exists() + .all()[:1] which fired 2 queries per row.
@@ -1,7 +1,8 @@
 """
 Endpoint to parse an uploaded DFIA licence PDF and return the extracted
 fields, ready to prefill the License create/update form. Also returns hints
-for matched/created company, matched port, and import-item rows.
+for matched/created company, matched port, and import-item rows. Scanned
+copies can be parsed asynchronously (see apps.core.pdf_parse_jobs).
 """
 from __future__ import annotations
 
@@ -22,6 +23,8 @@ from apps.core.models import (
     PortModel,
     SchemeCode,
 )
+from apps.core.pdf_parse_jobs import enqueue_parse_job, job_status_response
+from apps.core.utils.stage_timer import StageTimer
 from apps.license.models import LicenseDetailsModel
 from apps.license.parsers.dfia_pdf import parse_dfia_pdf
 
@@ -116,14 +119,94 @@ def _annotate_items(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return out
 
 
+def run_license_pdf_parse(source, create_company: bool = True, timer: StageTimer | None = None,
+                          cache_dir: str | None = None) -> tuple[int, dict[str, Any]]:
+    """
+    Parse a DFIA licence PDF and match it against local masters.
+
+    Returns (http_status, payload) — the response LicensePdfParseView sends,
+    whether it runs in the request or in the parse_license_pdf_job task.
+    `timer` collects per-stage timings, reported in the payload's `timings`.
+    """
+    timer = timer or StageTimer()
+    try:
+        parsed = parse_dfia_pdf(source, cache_dir=cache_dir, timer=timer)
+    except Exception as exc:
+        return status.HTTP_400_BAD_REQUEST, {"detail": f"Failed to parse PDF: {exc}"}
+
+    if not parsed.get("license_number"):
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {
+            "detail": "Could not detect a licence number — this may not be a "
+                      "DGFT DFIA licence PDF, or the layout is unsupported.",
+            "parsed": parsed,
+            "timings": timer.timings,
+        }
+
+    with timer.stage("matching"):
+        # Check for duplicate before creating any company side-effects.
+        existing = LicenseDetailsModel.objects.filter(
+            license_number=parsed["license_number"]
+        ).only("id", "license_number").first()
+
+        company, company_created = _match_or_create_company(parsed, create_company)
+        port = _match_port(parsed.get("port_code"))
+        notification = _resolve_notification_number(parsed.get("notification_number"))
+        scheme = _resolve_scheme_code(DFIA_DEFAULT_SCHEME_CODE)
+
+        items = _annotate_items(parsed.get("items") or [])
+
+    # Auto-calculate registration_number (license_number with any
+    # leading zero stripped) to match the form's existing autofill rule.
+    reg_number = None
+    lic_no = parsed.get("license_number") or ""
+    if lic_no:
+        reg_number = lic_no[1:] if lic_no.startswith("0") else lic_no
+
+    prefill = {
+        "license_number": parsed.get("license_number"),
+        "license_date": parsed.get("license_date"),
+        "license_expiry_date": parsed.get("license_expiry_date"),
+        "file_number": parsed.get("file_number"),
+        "registration_number": reg_number,
+        "registration_date": parsed.get("license_date"),
+        # scheme_code / notification_number on the License serializer are
+        # SlugRelatedField(slug_field="code"), so the form expects the
+        # CODE string ("26", "025/2023") — not the PK. Pass the code
+        # straight through; AsyncSelectField resolves the label via the
+        # masters detail endpoint, whose lookup_field is also "code".
+        "notification_number": notification.code if notification else None,
+        "scheme_code": scheme.code if scheme else None,
+        "exporter": company.id if company else None,
+        "port": port.id if port else None,
+        "condition_sheet": parsed.get("condition_sheet"),
+    }
+
+    return status.HTTP_200_OK, {
+        "parsed": parsed,
+        "prefill": prefill,
+        "item_conditions": parsed.get("item_conditions") or [],
+        "matched_company_id": company.id if company else None,
+        "matched_company_name": company.name if company else parsed.get("company_name"),
+        "company_created": company_created,
+        "matched_port_id": port.id if port else None,
+        "matched_port_code": parsed.get("port_code"),
+        "items": items,
+        "existing_license_id": existing.id if existing else None,
+        "timings": timer.timings,
+    }
+
+
 class LicensePdfParseView(APIView):
     """
     POST /api/licenses/parse-pdf/
         multipart-form: file=<DFIA Licence PDF>
         optional form:  create_company=true|false (default true)
+                        async=true|false (default false)
 
     Returns parsed fields plus a `prefill` block suitable for prefilling the
-    License create/update form on the frontend.
+    License create/update form on the frontend. With async=true the parse
+    runs in a Celery worker and the response is 202 {"job_id": ...}; poll
+    LicensePdfParseJobView for the result.
     """
     permission_classes = [IsAuthenticated, LicensePermission]
     parser_classes = [MultiPartParser, FormParser]
@@ -136,72 +219,24 @@ class LicensePdfParseView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            parsed = parse_dfia_pdf(upload)
-        except Exception as exc:
-            return Response(
-                {"detail": f"Failed to parse PDF: {exc}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not parsed.get("license_number"):
-            return Response(
-                {
-                    "detail": "Could not detect a licence number — this may not be a "
-                              "DGFT DFIA licence PDF, or the layout is unsupported.",
-                    "parsed": parsed,
-                },
-                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            )
+        create_company = str(request.data.get("create_company", "true")).lower() != "false"
+        if str(request.data.get("async", "false")).lower() == "true":
+            from apps.license.tasks import parse_license_pdf_job
+            return enqueue_parse_job(parse_license_pdf_job, upload, create_company=create_company)
 
-        # Check for duplicate before creating any company side-effects.
-        existing = LicenseDetailsModel.objects.filter(
-            license_number=parsed["license_number"]
-        ).only("id", "license_number").first()
+        status_code, payload = run_license_pdf_parse(upload, create_company)
+        return Response(payload, status=status_code)
 
-        create_company = str(request.data.get("create_company", "true")).lower() != "false"
-        company, company_created = _match_or_create_company(parsed, create_company)
-        port = _match_port(parsed.get("port_code"))
-        notification = _resolve_notification_number(parsed.get("notification_number"))
-        scheme = _resolve_scheme_code(DFIA_DEFAULT_SCHEME_CODE)
 
-        items = _annotate_items(parsed.get("items") or [])
+class LicensePdfParseJobView(APIView):
+    """
+    GET /api/licenses/parse-pdf/jobs/<job_id>/
 
-        # Auto-calculate registration_number (license_number with any
-        # leading zero stripped) to match the form's existing autofill rule.
-        reg_number = None
-        lic_no = parsed.get("license_number") or ""
-        if lic_no:
-            reg_number = lic_no[1:] if lic_no.startswith("0") else lic_no
-
-        prefill = {
-            "license_number": parsed.get("license_number"),
-            "license_date": parsed.get("license_date"),
-            "license_expiry_date": parsed.get("license_expiry_date"),
-            "file_number": parsed.get("file_number"),
-            "registration_number": reg_number,
-            "registration_date": parsed.get("license_date"),
-            # scheme_code / notification_number on the License serializer are
-            # SlugRelatedField(slug_field="code"), so the form expects the
-            # CODE string ("26", "025/2023") — not the PK. Pass the code
-            # straight through; AsyncSelectField resolves the label via the
-            # masters detail endpoint, whose lookup_field is also "code".
-            "notification_number": notification.code if notification else None,
-            "scheme_code": scheme.code if scheme else None,
-            "exporter": company.id if company else None,
-            "port": port.id if port else None,
-            "condition_sheet": parsed.get("condition_sheet"),
-        }
+    State of an async parse started with `async=true`; once SUCCESS,
+    `result` holds the body the synchronous endpoint would have returned
+    and `status_code` its HTTP status.
+    """
+    permission_classes = [IsAuthenticated, LicensePermission]
 
-        return Response({
-            "parsed": parsed,
-            "prefill": prefill,
-            "item_conditions": parsed.get("item_conditions") or [],
-            "matched_company_id": company.id if company else None,
-            "matched_company_name": company.name if company else parsed.get("company_name"),
-            "company_created": company_created,
-            "matched_port_id": port.id if port else None,
-            "matched_port_code": parsed.get("port_code"),
-            "items": items,
-            "existing_license_id": existing.id if existing else None,
-        })
+    def get(self, request, job_id):
+        return job_status_response(job_id, 'parse_license_pdf_job')
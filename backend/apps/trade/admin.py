@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 from .models import (
-    LicenseTrade, LicenseTradeLine, LicenseTradePayment
+    InvoiceSequence, LicenseTrade, LicenseTradeLine, LicenseTradePayment
 )
 
 
@@ -132,3 +132,10 @@ class LicenseTradePaymentAdmin(admin.ModelAdmin):
 
 
 # =============================================================================
+
+
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ['direction', 'prefix', 'fy', 'last_number']
+    list_filter = ['direction', 'fy']
+    search_fields = ['prefix']
@@ -0,0 +1,51 @@
+"""Add InvoiceSequence (last issued number per direction / prefix / FY) and
+seed it from the invoice numbers already on LicenseTrade."""
+import re
+
+from django.db import migrations, models
+
+INVOICE_NUMBER_RE = re.compile(r"^(?P<prefix>.{1,64})/(?P<fy>\d{4}-\d{2})/(?P<number>\d{1,9})$")
+
+
+def seed_invoice_sequences(apps, schema_editor):
+    LicenseTrade = apps.get_model('trade', 'LicenseTrade')
+    InvoiceSequence = apps.get_model('trade', 'InvoiceSequence')
+    last = {}
+    rows = LicenseTrade.objects.exclude(invoice_number='').values_list('direction', 'invoice_number')
+    for direction, invoice_number in rows.iterator(chunk_size=2000):
+        match = INVOICE_NUMBER_RE.match(invoice_number or '')
+        if not match:
+            continue
+        key = (direction, match.group('prefix'), match.group('fy'))
+        last[key] = max(last.get(key, 0), int(match.group('number')))
+    InvoiceSequence.objects.bulk_create(
+        [
+            InvoiceSequence(direction=direction, prefix=prefix, fy=fy, last_number=number)
+            for (direction, prefix, fy), number in last.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0002_alter_licensetrade_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(max_length=20)),
+                ('prefix', models.CharField(max_length=64)),
+                ('fy', models.CharField(max_length=7)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('direction', 'prefix', 'fy'), name='uniq_invoice_sequence_series')],
+            },
+        ),
+        migrations.RunPython(seed_invoice_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+"""Make a series invoice number (PREFIX/YYYY-YY/NNNN) unique per direction
+across all counterparties. Free-form supplier numbers are left alone.
+
+Existing duplicates would make the constraint fail half-way through a
+deploy, so they are reported up front instead."""
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+INVOICE_SERIES_DB_PATTERN = r"^.{1,64}/\d{4}-\d{2}/\d{1,9}$"
+
+
+def check_no_duplicate_invoice_numbers(apps, schema_editor):
+    LicenseTrade = apps.get_model('trade', 'LicenseTrade')
+    duplicates = list(
+        LicenseTrade.objects.filter(invoice_number__regex=INVOICE_SERIES_DB_PATTERN)
+        .values('direction', 'invoice_number')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)[:20]
+    )
+    if duplicates:
+        listed = ', '.join(f"{row['direction']} {row['invoice_number']}" for row in duplicates)
+        raise RuntimeError(
+            f'Renumber the duplicate trade invoice numbers before migrating: {listed}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0003_invoicesequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_duplicate_invoice_numbers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='licensetrade',
+            constraint=models.UniqueConstraint(
+                condition=Q(invoice_number__regex=INVOICE_SERIES_DB_PATTERN),
+                fields=('direction', 'invoice_number'),
+                name='uniq_direction_series_invoice_number',
+            ),
+        ),
+    ]
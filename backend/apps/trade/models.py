@@ -3,7 +3,7 @@ import re
 from decimal import Decimal, ROUND_HALF_UP
 
 from django.conf import settings
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.db.models import Sum, Q, F
 from django.db.models.signals import pre_delete, post_save
 from django.dispatch import receiver
@@ -69,7 +69,98 @@ def company_prefix(name: str) -> str:
         return ''.join([word[0] for word in words if word])
 
 
-def get_next_invoice_number(direction: str, company_name: str, invoice_date=None) -> str:
+# Series number at the end of an invoice number: PREFIX/YYYY-YY/NNNN
+INVOICE_NUMBER_RE = re.compile(r"^(?P<prefix>.{1,64})/(?P<fy>\d{4}-\d{2})/(?P<number>\d{1,9})$")
+# The same shape without group names, for database regex lookups.
+INVOICE_SERIES_DB_PATTERN = r"^.{1,64}/\d{4}-\d{2}/\d{1,9}$"
+
+
+def invoice_prefix(direction: str, company_name: str) -> str:
+    """Series prefix for a direction: P-/COM-P-/COM- + company prefix (none for SALE)."""
+    base_prefix = company_prefix(company_name)
+    if direction == 'PURCHASE':
+        return f"P-{base_prefix}"
+    elif direction == 'COMMISSION_PURCHASE':
+        return f"COM-P-{base_prefix}"
+    elif direction == 'COMMISSION_SALE':
+        return f"COM-{base_prefix}"
+    return base_prefix  # SALE
+
+
+def format_invoice_number(prefix: str, fy: str, number: int) -> str:
+    """Format: PREFIX/YYYY-YY/NNNN (4 digits padded)"""
+    return f"{prefix}/{fy}/{number:04d}"
+
+
+def parse_invoice_number(invoice_number: str):
+    """Split an invoice number into (prefix, fy, number); None if it is not in series form."""
+    match = INVOICE_NUMBER_RE.match(invoice_number or "")
+    if not match:
+        return None
+    return match.group("prefix"), match.group("fy"), int(match.group("number"))
+
+
+# -----------------------------------------------------------------------------
+# InvoiceSequence (per-series counter)
+# -----------------------------------------------------------------------------
+class InvoiceSequence(models.Model):
+    """
+    Last issued number of one invoice series (direction, prefix, FY).
+
+    Replaces scanning every invoice of the series for the highest number:
+    reading or advancing a series is a single-row operation, and advancing
+    runs as one UPDATE whose row lock serialises concurrent creates, so two
+    trades can no longer be handed the same number.
+
+    LicenseTrade.save() advances the series past any number saved into it
+    (typed by hand, imported, or taken from the prefill), so the counter
+    never falls behind the invoices that exist.
+    """
+    direction = models.CharField(max_length=20)
+    prefix = models.CharField(max_length=64)
+    fy = models.CharField(max_length=7)
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["direction", "prefix", "fy"], name="uniq_invoice_sequence_series"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.direction} {self.prefix}/{self.fy} @ {self.last_number}"
+
+    @classmethod
+    def _series(cls, direction: str, prefix: str, fy: str):
+        return cls.objects.filter(direction=direction, prefix=prefix, fy=fy)
+
+    @classmethod
+    def peek(cls, direction: str, prefix: str, fy: str) -> int:
+        """Next number of the series without reserving it."""
+        last = cls._series(direction, prefix, fy).values_list("last_number", flat=True).first()
+        return (last or 0) + 1
+
+    @classmethod
+    def allocate(cls, direction: str, prefix: str, fy: str) -> int:
+        """Reserve and return the next number of the series."""
+        with transaction.atomic():
+            cls.objects.get_or_create(direction=direction, prefix=prefix, fy=fy)
+            series = cls._series(direction, prefix, fy)
+            # The UPDATE takes the row lock; it is held until the caller's
+            # transaction ends, so the number read back is ours alone.
+            series.update(last_number=F("last_number") + 1)
+            return series.values_list("last_number", flat=True).get()
+
+    @classmethod
+    def advance_to(cls, direction: str, prefix: str, fy: str, number: int) -> bool:
+        """
+        Record `number` as issued. True if it was beyond the last issued
+        number (the series moved to it), False if it was already passed.
+        """
+        cls.objects.get_or_create(direction=direction, prefix=prefix, fy=fy)
+        return cls._series(direction, prefix, fy).filter(last_number__lt=number).update(last_number=number) == 1
+
+
+def get_next_invoice_number(direction: str, company_name: str, invoice_date=None, reserve: bool = False) -> str:
     """
     Generate the next invoice number in format:
     - PURCHASE: P-PREFIX/YYYY-YY/NNNN (e.g., P-LM/2025-26/0024)
@@ -78,8 +169,9 @@ def get_next_invoice_number(direction: str, company_name: str, invoice_date=None
     - COMMISSION_SALE: COM-PREFIX/YYYY-YY/NNNN (e.g., COM-LM/2025-26/0001)
 
     Logic:
-    - Finds the highest invoice number in the same financial year
-    - Increments by 1 (skips gaps, e.g., if 17, 19, 83 exist, next is 84, not 18)
+    - One past the highest number issued in the same financial year, read
+      from the series' InvoiceSequence row
+    - Gaps are skipped (e.g., if 17, 19, 83 exist, next is 84, not 18)
     - Restarts from 0001 for each new financial year
     - PURCHASE invoices are prefixed with 'P-'
     - COMMISSION invoices are prefixed with 'COM-' (and 'COM-P-' for commission purchase)
@@ -88,46 +180,71 @@ def get_next_invoice_number(direction: str, company_name: str, invoice_date=None
         direction: 'PURCHASE', 'SALE', 'COMMISSION_PURCHASE', or 'COMMISSION_SALE'
         company_name: Company name to generate prefix
         invoice_date: Date to determine financial year (defaults to today)
+        reserve: Reserve the number (for a trade created right away) instead
+            of only previewing it (prefill)
 
     Returns:
         Next invoice number string
     """
-    # Get prefix and FY
-    base_prefix = company_prefix(company_name)
+    prefix = invoice_prefix(direction, company_name)
     fy = indian_fy_label(invoice_date)
+    if reserve:
+        number = InvoiceSequence.allocate(direction, prefix, fy)
+    else:
+        number = InvoiceSequence.peek(direction, prefix, fy)
+    return format_invoice_number(prefix, fy, number)
 
-    # Add prefixes based on direction
-    if direction == 'PURCHASE':
-        prefix = f"P-{base_prefix}"
-    elif direction == 'COMMISSION_PURCHASE':
-        prefix = f"COM-P-{base_prefix}"
-    elif direction == 'COMMISSION_SALE':
-        prefix = f"COM-{base_prefix}"
-    else:  # SALE
-        prefix = base_prefix
-
-    # Build the pattern for this prefix + FY
-    pattern_prefix = f"{prefix}/{fy}/"
-
-    # Find all invoice numbers with this prefix + FY pattern
-    existing_invoices = LicenseTrade.objects.filter(
-        direction=direction,
-        invoice_number__startswith=pattern_prefix
-    ).values_list('invoice_number', flat=True)
 
-    # Extract the numeric part from each invoice
-    max_number = 0
-    for inv in existing_invoices:
-        match = re.search(r'/(\d+)$', inv)
-        if match:
-            num = int(match.group(1))
-            max_number = max(max_number, num)
+def claim_invoice_number(direction: str, invoice_number: str) -> str:
+    """
+    Claim a submitted invoice number for a new trade.
 
-    # Next number is max + 1
-    next_number = max_number + 1
+    A series number nobody has issued yet is claimed atomically. If another
+    trade claimed it first (two users saving the same prefilled number), or
+    it is already in use, the trade gets the next free number of the series
+    instead. Numbers outside the series format are returned unchanged.
+    """
+    parsed = parse_invoice_number(invoice_number)
+    if parsed is None:
+        return invoice_number
+    prefix, fy, number = parsed
+    with transaction.atomic():
+        # Lock the series row first: concurrent claims on one series queue
+        # here, so the "is it taken?" check below cannot race. The lock is
+        # held until the caller's transaction ends.
+        InvoiceSequence.objects.get_or_create(direction=direction, prefix=prefix, fy=fy)
+        InvoiceSequence._series(direction, prefix, fy).select_for_update().get()
+        if InvoiceSequence.advance_to(direction, prefix, fy, number):
+            return invoice_number
+        if not LicenseTrade.objects.filter(direction=direction, invoice_number=invoice_number).exists():
+            # Filling a gap below the series head.
+            return invoice_number
+        return format_invoice_number(prefix, fy, InvoiceSequence.allocate(direction, prefix, fy))
+
+
+def create_trade(**fields) -> "LicenseTrade":
+    """
+    LicenseTrade.objects.create(**fields) for a new trade whose number was
+    claimed or reserved in its series.
 
-    # Format: PREFIX/YYYY-YY/NNNN (4 digits padded)
-    return f"{prefix}/{fy}/{next_number:04d}"
+    The unique (direction, series number) constraint is the last line of
+    defence against a duplicate; if it rejects the number (another trade
+    saved it in the meantime), the trade gets the next free number of the
+    series instead. Any other IntegrityError is re-raised.
+    """
+    try:
+        with transaction.atomic():
+            return LicenseTrade.objects.create(**fields)
+    except IntegrityError:
+        direction, invoice_number = fields.get("direction"), fields.get("invoice_number") or ""
+        parsed = parse_invoice_number(invoice_number)
+        if parsed is None or not LicenseTrade.objects.filter(
+            direction=direction, invoice_number=invoice_number,
+        ).exists():
+            raise
+        prefix, fy, _ = parsed
+        fields["invoice_number"] = format_invoice_number(prefix, fy, InvoiceSequence.allocate(direction, prefix, fy))
+        return LicenseTrade.objects.create(**fields)
 
 
 # -----------------------------------------------------------------------------
@@ -266,6 +383,13 @@ class LicenseTrade(AuditModel):
                 condition=Q(direction='SALE') & ~Q(invoice_number=""),
                 name="uniq_sale_buyer_invoice_nonblank",
             ),
+            # D) One series number (PREFIX/YYYY-YY/NNNN) per direction across all
+            #    counterparties; free-form supplier numbers may repeat (see B)
+            models.UniqueConstraint(
+                fields=["direction", "invoice_number"],
+                condition=Q(invoice_number__regex=INVOICE_SERIES_DB_PATTERN),
+                name="uniq_direction_series_invoice_number",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -352,48 +476,16 @@ class LicenseTrade(AuditModel):
     def build_invoice_pattern(prefix: str, fy: str) -> str:
         return f"{prefix}/{fy}/"
 
-    @classmethod
-    def next_invoice_number(cls, *, seller_company: CompanyModel, invoice_date=None, prefix: str = None) -> str:
-        """
-        Compute next invoice number for SALE:
-          <PREFIX>/<FY>/<NNNN>
-        - PREFIX: first 3 letters of seller company (alpha only)
-        - FY: Indian FY (Apr–Mar)
-        - NNNN: zero-padded 4-digit sequence
-        """
-        if not seller_company:
-            return ""
-        if invoice_date is None:
-            invoice_date = timezone.now().date()
-
-        fy = indian_fy_label(invoice_date)
-        px = (prefix or company_prefix(getattr(seller_company, "name", ""))).upper()
-        base = cls.build_invoice_pattern(px, fy)
-
-        with transaction.atomic():
-            # lock rows for this series to prevent race conditions
-            qs = (
-                cls.objects.select_for_update()
-                .filter(direction=cls.DIR_SALE, from_company=seller_company, invoice_number__startswith=base)
-                .order_by("-invoice_number")
-            )
-            last = qs.first()
-            seq = 0
-            if last and last.invoice_number:
-                # Expect forms like 'LAB/2025-26/0007'
-                m = re.match(rf"^{re.escape(base)}(\d+)$", last.invoice_number)
-                if m:
-                    try:
-                        seq = int(m.group(1))
-                    except Exception:
-                        seq = 0
-            next_seq = seq + 1
-            return f"{base}{str(next_seq).zfill(4)}"
-
     def save(self, *args, **kwargs) -> None:
         if self.invoice_date is None:
             self.invoice_date = timezone.now().date()
         super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "invoice_number" in update_fields:
+            # keep the series counter at or past every saved number
+            parsed = parse_invoice_number(self.invoice_number)
+            if parsed is not None:
+                InvoiceSequence.advance_to(self.direction, *parsed)
         # keep totals consistent even if header saved first
         self.recompute_totals()
 
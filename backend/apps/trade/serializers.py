@@ -1,10 +1,10 @@
 # trade/serializers.py
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
 from .models import (
-    LicenseTrade, LicenseTradeLine, IncentiveTradeLine, LicenseTradePayment
+    LicenseTrade, LicenseTradeLine, IncentiveTradeLine, LicenseTradePayment, create_trade
 )
 
 
@@ -233,6 +233,10 @@ class LicenseTradeSerializer(serializers.ModelSerializer):
     class Meta:
         model = LicenseTrade
         fields = '__all__'
+        # No auto-generated unique-together checks for the invoice-number
+        # constraints: create() claims the number in its series (renumbering
+        # a taken one) and _save_header() reports real conflicts.
+        validators = []
 
     def to_representation(self, instance):
         """Customize output representation to include nested company and BOE objects"""
@@ -263,6 +267,25 @@ class LicenseTradeSerializer(serializers.ModelSerializer):
 
         return data
 
+    @staticmethod
+    def _save_header(save, direction, invoice_number, exclude_pk=None):
+        """
+        Run `save` in a savepoint and turn an invoice-number clash with
+        another trade into a 400 instead of a 500.
+        """
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            clash = invoice_number and LicenseTrade.objects.filter(
+                direction=direction, invoice_number=invoice_number,
+            ).exclude(pk=exclude_pk).exists()
+            if not clash:
+                raise
+            raise serializers.ValidationError({
+                'invoice_number': f"Invoice number {invoice_number} is already used by another {direction} trade."
+            })
+
     @transaction.atomic
     def create(self, validated_data):
         """Create trade with nested lines and payments.
@@ -282,8 +305,19 @@ class LicenseTradeSerializer(serializers.ModelSerializer):
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug("CREATE: lines=%d, incentive=%d, payments=%d", len(lines_data), len(incentive_lines_data), len(payments_data))
 
+        # Claim the invoice number in its series; a number someone else
+        # saved first is replaced with the next free one.
+        if validated_data.get('invoice_number') and validated_data.get('direction'):
+            from apps.trade.models import claim_invoice_number
+            validated_data['invoice_number'] = claim_invoice_number(
+                validated_data['direction'], validated_data['invoice_number'],
+            )
+
         # Create trade header
-        trade = LicenseTrade.objects.create(**validated_data)
+        trade = self._save_header(
+            lambda: create_trade(**validated_data),
+            validated_data.get('direction'), validated_data.get('invoice_number'),
+        )
 
         # Snapshot party details
         trade.snapshot_parties()
@@ -327,9 +361,10 @@ class LicenseTradeSerializer(serializers.ModelSerializer):
                 direction=paired_direction,
                 company_name=paired_from.name if paired_from else '',
                 invoice_date=trade.invoice_date,
+                reserve=True,
             )
 
-            paired_trade = LicenseTrade.objects.create(
+            paired_trade = create_trade(
                 direction=paired_direction,
                 license_type=trade.license_type,
                 incentive_license=trade.incentive_license,
@@ -397,7 +432,7 @@ class LicenseTradeSerializer(serializers.ModelSerializer):
         # Update header fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        self._save_header(instance.save, instance.direction, instance.invoice_number, exclude_pk=instance.pk)
 
         # Snapshot party details if companies changed
         instance.snapshot_parties()
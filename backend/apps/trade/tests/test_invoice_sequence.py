@@ -0,0 +1,106 @@
+# trade/tests/test_invoice_sequence.py
+"""
+Tests for the per-series invoice counter (InvoiceSequence) in trade/models.py.
+"""
+
+import itertools
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from rest_framework import serializers
+
+from apps.core.models import CompanyModel
+from apps.trade.models import (
+    InvoiceSequence,
+    LicenseTrade,
+    claim_invoice_number,
+    create_trade,
+    get_next_invoice_number,
+)
+from apps.trade.serializers import LicenseTradeSerializer
+
+_iec_counter = itertools.count(900001)
+
+
+def _company(name):
+    return CompanyModel.objects.create(name=name, iec=f"{next(_iec_counter):010d}")
+
+
+class InvoiceSequenceTests(TestCase):
+
+    def test_preview_does_not_consume_a_number(self):
+        first = get_next_invoice_number("SALE", "Series Test Co", invoice_date=date(2025, 6, 1))
+        again = get_next_invoice_number("SALE", "Series Test Co", invoice_date=date(2025, 6, 1))
+        self.assertEqual(first, "STC/2025-26/0001")
+        self.assertEqual(again, first)
+
+    def test_reserved_numbers_are_unique_and_per_fy(self):
+        numbers = [
+            get_next_invoice_number("PURCHASE", "Series Test Co", invoice_date=date(2025, 6, 1), reserve=True)
+            for _ in range(3)
+        ]
+        self.assertEqual(numbers, ["P-STC/2025-26/0001", "P-STC/2025-26/0002", "P-STC/2025-26/0003"])
+        self.assertEqual(
+            get_next_invoice_number("PURCHASE", "Series Test Co", invoice_date=date(2026, 4, 1)),
+            "P-STC/2026-27/0001",
+        )
+
+    def test_saving_a_typed_number_moves_the_series_past_it(self):
+        seller, buyer = _company("Typed Seller"), _company("Typed Buyer")
+        LicenseTrade.objects.create(
+            direction="SALE", from_company=seller, to_company=buyer,
+            invoice_number="TS/2025-26/0083", invoice_date=date(2025, 6, 1),
+        )
+        self.assertEqual(InvoiceSequence.peek("SALE", "TS", "2025-26"), 84)
+
+    def test_claiming_a_taken_number_gets_the_next_free_one(self):
+        seller, buyer = _company("Claim Seller"), _company("Claim Buyer")
+        number = get_next_invoice_number("SALE", "Claim Seller", invoice_date=date(2025, 6, 1))
+        self.assertEqual(claim_invoice_number("SALE", number), number)
+        LicenseTrade.objects.create(
+            direction="SALE", from_company=seller, to_company=buyer,
+            invoice_number=number, invoice_date=date(2025, 6, 1),
+        )
+
+        self.assertEqual(claim_invoice_number("SALE", number), "CS/2025-26/0002")
+        self.assertEqual(claim_invoice_number("SALE", "manual-42"), "manual-42")
+
+    def test_one_number_per_direction_across_buyers(self):
+        seller = _company("Unique Seller")
+        buyer_a, buyer_b = _company("Unique Buyer A"), _company("Unique Buyer B")
+        fields = dict(direction="SALE", from_company=seller, invoice_number="US/2025-26/0005",
+                      invoice_date=date(2025, 6, 1))
+        LicenseTrade.objects.create(to_company=buyer_a, **fields)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LicenseTrade.objects.create(to_company=buyer_b, **fields)
+
+        # A number taken since it was claimed is swapped for the next free one.
+        trade = create_trade(to_company=buyer_b, **fields)
+        self.assertEqual(trade.invoice_number, "US/2025-26/0006")
+
+    def test_free_form_supplier_numbers_may_repeat_across_suppliers(self):
+        buyer = _company("Free Form Buyer")
+        for supplier in (_company("Free Form Supplier A"), _company("Free Form Supplier B")):
+            LicenseTrade.objects.create(
+                direction="PURCHASE", from_company=supplier, to_company=buyer,
+                invoice_number="INV-42", invoice_date=date(2025, 6, 1),
+            )
+        self.assertEqual(LicenseTrade.objects.filter(invoice_number="INV-42").count(), 2)
+
+    def test_serializer_leaves_taken_numbers_to_the_claim(self):
+        # DRF's generated unique-together check would 400 before create()
+        # gets to renumber a taken series number.
+        self.assertEqual(LicenseTradeSerializer().validators, [])
+
+    def test_updating_to_a_taken_number_is_a_validation_error(self):
+        seller = _company("Update Seller")
+        buyer_a, buyer_b = _company("Update Buyer A"), _company("Update Buyer B")
+        fields = dict(direction="SALE", from_company=seller, invoice_date=date(2025, 6, 1))
+        LicenseTrade.objects.create(to_company=buyer_a, invoice_number="US/2025-26/0001", **fields)
+        other = LicenseTrade.objects.create(to_company=buyer_b, invoice_number="US/2025-26/0002", **fields)
+
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            LicenseTradeSerializer().update(other, {"invoice_number": "US/2025-26/0001"})
+        self.assertIn("invoice_number", ctx.exception.detail)
@@ -78,6 +78,17 @@ app.conf.beat_schedule = {
     # to license-manager; the existing master-sync cron replicates it to the
     # other servers.  See: fetch-and-push-rates.sh
 
+    # Upsert license_balance_mv rows for licences changed since the last run
+    # (dirty-set drain; a no-op DELETE when nothing changed).
+    "refresh-license-balance-summary-every-5-min": {
+        "task": "apps.core.tasks_materialized_views.refresh_license_balance_task",
+        "schedule": crontab(minute="*/5"),
+        "args": (),
+        "options": {
+            "expires": 300,
+        }
+    },
+
     # Cleanup old task records every hour
     "cleanup-old-tasks-hourly": {
         "task": "cleanup_old_task_records",
@@ -111,6 +122,41 @@ if getattr(settings, "MDS_ENABLED", False):
     }
 
 
+# ---------------------------------------------------------------------------
+# Incremental licence balance ledger — OFF by default.
+#
+# With LICENSE_BALANCE_INCREMENTAL on, licence signals apply signed deltas
+# instead of full recomputes; this hourly job verifies every ledger against
+# the full (set-based) recompute and repairs any drift.
+# ---------------------------------------------------------------------------
+if getattr(settings, "LICENSE_BALANCE_INCREMENTAL", False):
+    app.conf.beat_schedule["reconcile-license-ledgers-hourly"] = {
+        "task": "reconcile_license_ledgers",
+        "schedule": crontab(minute=15),  # every hour at :15
+        "args": (),
+        "options": {
+            "expires": 3600,
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Activity log Redis spool — OFF by default.
+#
+# With ACTIVITY_LOG_REDIS_STREAM set, web workers spool activity log batches
+# to that stream; this drains it into ActivityLog every minute.
+# ---------------------------------------------------------------------------
+if getattr(settings, "ACTIVITY_LOG_REDIS_STREAM", ""):
+    app.conf.beat_schedule["drain-activity-log-spool-every-minute"] = {
+        "task": "core.tasks.drain_activity_log_spool",
+        "schedule": crontab(),  # every minute
+        "args": (),
+        "options": {
+            "expires": 60,
+        },
+    }
+
+
 @signals.worker_process_init.connect
 def reset_db_connections(**kwargs):
     """Close inherited DB connections after each worker fork so psycopg2 gets a fresh connection."""
@@ -265,6 +265,9 @@ CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# Store the task name with each result so job-status endpoints can refuse
+# ids of unrelated tasks (apps.core.pdf_parse_jobs.job_status_response).
+CELERY_RESULT_EXTENDED = True
 CELERY_TIMEZONE = TIME_ZONE
 
 # ---------------------------------------------------------------------
@@ -394,6 +397,38 @@ DATA_UPLOAD_MAX_NUMBER_FIELDS = 50000
 # Override per environment via env var if the owning company differs.
 BISCUIT_COMPANY_ID = int(os.getenv("BISCUIT_COMPANY_ID", "567"))
 
+# Incremental licence balance ledger (apps.license.services.balance_ledger).
+# When true, BOE / allotment / trade / export-item saves apply signed deltas to
+# LicenseBalance and the condition-pool counters instead of running the full
+# update_license_flags recompute, and `license.tasks.reconcile_license_ledgers`
+# is scheduled to verify the deltas against the full recompute.
+LICENSE_BALANCE_INCREMENTAL = os.getenv("LICENSE_BALANCE_INCREMENTAL", "False").lower() == "true"
+
+# Activity log writer (apps.core.activity_log_writer). Request entries are
+# queued in-process and bulk-inserted by one background thread per worker
+# every ACTIVITY_LOG_BATCH_SIZE entries or ACTIVITY_LOG_FLUSH_INTERVAL_MS ms;
+# when the queue is full an entry waits up to ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS
+# and is then dropped (counted). With ACTIVITY_LOG_REDIS_STREAM set, batches
+# are spooled to that Redis stream and core.tasks.drain_activity_log_spool
+# writes them to the database instead (multi-worker gunicorn).
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", "100"))
+ACTIVITY_LOG_FLUSH_INTERVAL_MS = int(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL_MS", "1000"))
+ACTIVITY_LOG_QUEUE_SIZE = int(os.getenv("ACTIVITY_LOG_QUEUE_SIZE", "10000"))
+ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS = int(os.getenv("ACTIVITY_LOG_ENQUEUE_TIMEOUT_MS", "5"))
+ACTIVITY_LOG_REDIS_STREAM = os.getenv("ACTIVITY_LOG_REDIS_STREAM", "")
+ACTIVITY_LOG_SPOOL_MAXLEN = int(os.getenv("ACTIVITY_LOG_SPOOL_MAXLEN", "100000"))
+
+# On-disk cache of text extracted from DFIA licence PDFs, keyed by the PDF's
+# SHA-256 (apps.license.parsers.dfia_pdf). Used by parse_existing_license_copies
+# so re-runs skip rasterising/OCR of documents already read. Kept outside
+# MEDIA_ROOT so it is never served.
+DFIA_TEXT_CACHE_DIR = os.getenv("DFIA_TEXT_CACHE_DIR", str(BASE_DIR / ".cache" / "dfia_text"))
+
+# Uploads queued for async parsing (parse-pdf endpoints with async=true; see
+# apps.core.pdf_parse_jobs). Must be on storage the Celery workers can read;
+# each file is deleted once its job has run.
+PDF_PARSE_UPLOAD_DIR = os.getenv("PDF_PARSE_UPLOAD_DIR", str(BASE_DIR / ".cache" / "pdf_parse_uploads"))
+
 # ---------------------------------------------------------------------
 # Master-Data Service integration (ADR-001) — OFF by default
 # ---------------------------------------------------------------------
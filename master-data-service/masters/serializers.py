@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
 from .models import MASTER_REGISTRY, MasterChange
 
@@ -6,6 +7,63 @@ from .models import MASTER_REGISTRY, MasterChange
 _NATURAL_KEY_BY_MODEL = {model: nk for model, nk, _ in MASTER_REGISTRY}
 
 
+class NaturalKeyRelatedField(serializers.SlugRelatedField):
+    """``SlugRelatedField`` that can be primed with the parents a whole batch
+    refers to (``prime``), so validating N rows costs one query per FK instead
+    of one per row. Values not found in the primed map fall back to the
+    regular per-value lookup, which also produces the usual error."""
+
+    primed = None
+
+    def prime(self, values):
+        queryset = self.get_queryset().filter(**{f"{self.slug_field}__in": list(values)})
+        self.primed = {str(getattr(obj, self.slug_field)): obj for obj in queryset}
+
+    def to_internal_value(self, data):
+        if self.primed is not None and data is not None:
+            obj = self.primed.get(str(data))
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class BulkUpsertListSerializer(serializers.ListSerializer):
+    """Validates a ``bulk_upsert`` batch in one pass.
+
+    ``instance`` is ``{natural key: existing row}``. Each item is validated
+    against its existing row as a partial update, or as a create when its key
+    is new, exactly as a per-row serializer would; FK parents are primed for
+    the whole batch first.
+
+    The natural key's ``UniqueValidator`` is dropped: the caller already
+    de-duplicated the batch and fetched every existing key, so the per-row
+    uniqueness query could only repeat that answer."""
+
+    def __init__(self, *args, natural_key_field=None, **kwargs):
+        self.natural_key_field = natural_key_field
+        super().__init__(*args, **kwargs)
+        key_field = self.child.fields.get(natural_key_field)
+        if key_field is not None:
+            key_field.validators = [
+                v for v in key_field.validators if not isinstance(v, UniqueValidator)
+            ]
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for name, field in self.child.fields.items():
+                if isinstance(field, NaturalKeyRelatedField) and not field.read_only:
+                    field.prime({row[name] for row in data if isinstance(row, dict) and row.get(name) is not None})
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        existing = (self.instance or {}).get(data.get(self.natural_key_field))
+        # Fields consult the root serializer (this list) for `partial`.
+        self.partial = existing is not None
+        self.child.instance = existing
+        self.child.initial_data = data
+        return self.child.run_validation(data)
+
+
 def _fk_natural_key_fields(model):
     """For each ForeignKey on ``model`` whose TARGET is itself a registered
     master, build a ``SlugRelatedField`` that reads/writes the parent by its
@@ -24,7 +82,7 @@ def _fk_natural_key_fields(model):
         parent_nk = _NATURAL_KEY_BY_MODEL.get(parent)
         if not parent_nk:
             continue  # target isn't a registered master — leave as default
-        extra[field.name] = serializers.SlugRelatedField(
+        extra[field.name] = NaturalKeyRelatedField(
             slug_field=parent_nk,
             queryset=parent.objects.all(),
             required=not field.null,
@@ -1,9 +1,11 @@
 """Contract tests for the MDS master API — the behaviors consumers rely on."""
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
-from masters.models import Company, MasterChange
+from masters.models import Company, ItemGroup, ItemName, MasterChange
 
 WRITE = "t-write"
 READ = "t-read"
@@ -71,6 +73,48 @@ class TestBulkUpsert:
         r = api.post("/api/v1/companies/bulk_upsert/", [{"name": "NoIEC"}], format="json")
         assert r.status_code == 400
 
+    def test_mixed_batch_emits_changes_and_merges_repeated_keys(self, api):
+        _auth(api)
+        Company.objects.create(iec="IEC1", name="Acme")
+        MasterChange.objects.all().delete()
+
+        r = api.post(
+            "/api/v1/companies/bulk_upsert/",
+            [{"iec": "IEC1", "name": "Acme Renamed"}, {"iec": "IEC2", "name": "Beta"}, {"iec": "IEC2", "contact_person": "Ravi"}],
+            format="json",
+        )
+        assert r.data == {"created": 1, "updated": 2}
+        beta = Company.objects.get(iec="IEC2")
+        assert (beta.name, beta.contact_person) == ("Beta", "Ravi")
+        assert sorted(MasterChange.objects.values_list("natural_key", "op")) == [
+            ("IEC1", MasterChange.OP_UPDATE), ("IEC2", MasterChange.OP_CREATE),
+        ]
+
+    def test_invalid_row_rolls_back_the_batch(self, api):
+        _auth(api)
+        r = api.post(
+            "/api/v1/item-names/bulk_upsert/",
+            [{"name": "Sugar"}, {"name": "Salt", "group": "NoSuchGroup"}],
+            format="json",
+        )
+        assert r.status_code == 400
+        assert not ItemName.objects.exists()
+
+    def test_query_count_does_not_grow_with_batch(self, api):
+        _auth(api)
+        ItemGroup.objects.create(name="Sweeteners")
+        ItemName.objects.create(name="Item0")
+
+        def batch(n):
+            return [{"name": f"Item{i}", "group": "Sweeteners"} for i in range(n)]
+
+        with CaptureQueriesContext(connection) as small:
+            api.post("/api/v1/item-names/bulk_upsert/", batch(3), format="json")
+        with CaptureQueriesContext(connection) as large:
+            r = api.post("/api/v1/item-names/bulk_upsert/", batch(40), format="json")
+        assert r.data == {"created": 37, "updated": 3}
+        assert len(large.captured_queries) == len(small.captured_queries)
+
 
 @pytest.mark.django_db
 class TestDeleteByKey:
@@ -5,7 +5,8 @@ Generic master API.
 - `?updated_since=<iso8601>` delta filtering (the sync driver)
 - collection `ETag` + `If-None-Match` -> `304 Not Modified` (cheap refresh)
 - `GET .../_meta` high-water-mark ({max_modified, count, etag})
-- `POST .../bulk_upsert` keyed on the natural key (hydration + consolidation)
+- `POST .../bulk_upsert` keyed on the natural key (hydration + consolidation),
+  validated and written set-based in one transaction
 plus cursor pagination and scoped token auth from settings.
 
 Concrete viewsets for all 17 masters are generated from MASTER_REGISTRY.
@@ -13,7 +14,10 @@ Concrete viewsets for all 17 masters are generated from MASTER_REGISTRY.
 
 import hashlib
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Count, Max
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.utils.http import quote_etag
 from rest_framework import status, viewsets
@@ -22,7 +26,10 @@ from rest_framework.response import Response
 
 from .models import MASTER_REGISTRY, MasterChange
 from .pagination import ChangeFeedCursorPagination
-from .serializers import SERIALIZERS, MasterChangeSerializer
+from .serializers import SERIALIZERS, BulkUpsertListSerializer, MasterChangeSerializer
+
+#: natural keys per existing-row lookup, and rows per bulk INSERT/UPDATE.
+BULK_UPSERT_CHUNK = 1000
 
 
 class MasterViewSet(viewsets.ModelViewSet):
@@ -92,6 +99,16 @@ class MasterViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["post"], url_path="bulk_upsert")
     def bulk_upsert(self, request):
+        """Create or update a batch of records by natural key, set-based.
+
+        Existing rows are fetched with one ``IN`` query per chunk, the batch is
+        validated by ``BulkUpsertListSerializer`` (FK parents primed once), and
+        rows are written with ``bulk_create``/``bulk_update``. Bulk writes skip
+        ``post_save``, so the matching ``MasterChange`` rows are created in
+        bulk here. All of it runs in one transaction: a batch either lands
+        whole or not at all. A key repeated in the batch is merged into one
+        record, later fields winning.
+        """
         field = self.natural_key_field
         payload = request.data
         items = payload if isinstance(payload, list) else payload.get("items", [])
@@ -99,23 +116,75 @@ class MasterViewSet(viewsets.ModelViewSet):
             return Response({"detail": "expected a list of records"}, status=status.HTTP_400_BAD_REQUEST)
 
         Model = self.queryset.model
-        created = updated = 0
+        key_field = Model._meta.get_field(field)
+        merged = {}
         for row in items:
-            key = row.get(field)
+            key = row.get(field) if isinstance(row, dict) else None
             if key in (None, ""):
                 return Response(
                     {"detail": f"each record needs a natural key '{field}'"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            existing = Model.objects.filter(**{field: key}).first()
-            serializer = self.get_serializer(instance=existing, data=row, partial=bool(existing))
+            try:
+                key = key_field.to_python(key)
+            except DjangoValidationError:
+                return Response(
+                    {"detail": f"invalid natural key '{field}': {row.get(field)!r}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            merged.setdefault(key, {}).update(row)
+        if not merged:
+            return Response({"created": 0, "updated": 0}, status=status.HTTP_200_OK)
+
+        with transaction.atomic():
+            existing = {}
+            keys = list(merged)
+            for start in range(0, len(keys), BULK_UPSERT_CHUNK):
+                chunk = keys[start:start + BULK_UPSERT_CHUNK]
+                for obj in Model.objects.filter(**{f"{field}__in": chunk}):
+                    existing[getattr(obj, key_field.attname)] = obj
+
+            rows = list(merged.values())
+            serializer = BulkUpsertListSerializer(
+                child=self.get_serializer(),
+                instance={row[field]: existing[key] for key, row in merged.items() if key in existing},
+                data=rows,
+                natural_key_field=field,
+                context=self.get_serializer_context(),
+            )
             serializer.is_valid(raise_exception=True)
-            serializer.save()
-            if existing:
-                updated += 1
-            else:
-                created += 1
-        return Response({"created": created, "updated": updated}, status=status.HTTP_200_OK)
+
+            now = timezone.now()
+            to_create, to_update, update_fields = [], [], {"modified_on"}
+            for key, attrs in zip(merged, serializer.validated_data):
+                obj = existing.get(key)
+                if obj is None:
+                    to_create.append(Model(**attrs))
+                    continue
+                for name, value in attrs.items():
+                    setattr(obj, name, value)
+                obj.modified_on = now  # auto_now is not applied by bulk_update
+                update_fields.update(attrs)
+                to_update.append(obj)
+
+            Model.objects.bulk_create(to_create, batch_size=BULK_UPSERT_CHUNK)
+            if to_update:
+                Model.objects.bulk_update(to_update, sorted(update_fields), batch_size=BULK_UPSERT_CHUNK)
+
+            label = f"{Model._meta.app_label}.{Model.__name__}"
+            MasterChange.objects.bulk_create(
+                [
+                    MasterChange(model_label=label, natural_key=obj.natural_key_value, op=MasterChange.OP_CREATE)
+                    for obj in to_create
+                ] + [
+                    MasterChange(model_label=label, natural_key=obj.natural_key_value, op=MasterChange.OP_UPDATE)
+                    for obj in to_update
+                ],
+                batch_size=BULK_UPSERT_CHUNK,
+            )
+
+        created = len(to_create)
+        return Response({"created": created, "updated": len(items) - created}, status=status.HTTP_200_OK)
 
 
 def _make_viewset(model, natural_key):
@@ -9,6 +9,7 @@ path need:
     fetch_delta(model, since=None, etag=None) -> DeltaPage(results, next_url, etag, not_modified)
     bulk_upsert(model, rows)                -> {"created", "updated"}
     get_changes(since=None)                 -> list[change dicts]  (create/update/delete)
+    iter_changes / iter_change_pages(since) -> the same feed, streamed page by page
 
 Failure model (explicit — see ADR-001 Decision 3 degradation contract):
 - Connection errors / timeouts  -> ``MDSUnavailable`` (writes should fail loudly;
@@ -241,22 +242,34 @@ class MDSClient:
         resp = self._request("POST", self._url(f"{endpoint}/delete_by_key/"), json=body)
         return resp.json()
 
-    def get_changes(self, since: str | None = None) -> list:
-        """GET /changes/?since=<since> -> the change feed (create/update/delete).
-
-        Cursor-paginated like the masters; this walks all pages and returns the
-        flat list of change dicts in ``at`` order.
-        """
+    def iter_change_pages(self, since: str | None = None):
+        """Generator yielding the change feed (GET /changes/?since=<since>) one
+        cursor page at a time, as ``DeltaPage``s in ``at`` order. Only one page
+        is held in memory; callers can checkpoint after each."""
         params = {}
         if since:
             params["since"] = since
         resp = self._request("GET", self._url("changes/"), params=params)
         page = self._page_from_response(resp)
-        changes = list(page.results)
+        yield page
         while page.next_url:
             page = self.fetch_delta_url(page.next_url)
-            changes.extend(page.results)
-        return changes
+            yield page
+
+    def iter_changes(self, since: str | None = None):
+        """Generator yielding every change dict (create/update/delete) after
+        ``since``, following the feed's cursor pages."""
+        for page in self.iter_change_pages(since=since):
+            yield from page.results
+
+    def get_changes(self, since: str | None = None) -> list:
+        """GET /changes/?since=<since> -> the change feed (create/update/delete).
+
+        Cursor-paginated like the masters; this walks all pages and returns the
+        flat list of change dicts in ``at`` order. Prefer ``iter_changes`` /
+        ``iter_change_pages`` for long feeds.
+        """
+        return list(self.iter_changes(since=since))
 
     # -- response parsing ---------------------------------------------------
     @staticmethod
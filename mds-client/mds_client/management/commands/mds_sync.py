@@ -8,7 +8,7 @@ Exits non-zero if the service is unreachable so cron/ops can alert.
 from django.core.management.base import BaseCommand, CommandError
 
 from mds_client.client import MDSClient, MDSUnavailable
-from mds_client.sync import sync_all, sync_model
+from mds_client.sync import _timed_sync, critical_path_seconds, sync_all
 
 
 class Command(BaseCommand):
@@ -22,20 +22,41 @@ class Command(BaseCommand):
             help="Sync only this model_label (as declared in settings.MDS_MODELS). "
             "Omit to sync all configured models.",
         )
+        parser.add_argument(
+            "--no-stream",
+            dest="stream",
+            action="store_false",
+            help="Download every delta page before applying them in one transaction, "
+            "instead of applying and checkpointing page by page.",
+        )
+        parser.add_argument(
+            "--workers",
+            dest="max_workers",
+            type=int,
+            default=None,
+            help="Models to sync concurrently when syncing all of them "
+            "(default settings.MDS_SYNC_WORKERS; 1 = one after another).",
+        )
 
     def handle(self, *args, **options):
         model_label = options["model_label"]
-        client = MDSClient()
         try:
             if model_label:
-                results = [sync_model(model_label, client=client)]
+                client = MDSClient()
+                try:
+                    results = [_timed_sync(model_label, client, options["stream"])]
+                finally:
+                    client.close()
             else:
-                results = sync_all(client=client)
+                # each sync_all worker opens its own client
+                results = sync_all(stream=options["stream"], max_workers=options["max_workers"])
         except MDSUnavailable as exc:
             raise CommandError(f"MDS is unreachable: {exc}") from exc
-        finally:
-            client.close()
 
         for result in results:
-            self.stdout.write(self.style.SUCCESS(str(result)))
-        self.stdout.write(self.style.SUCCESS(f"Done. Synced {len(results)} model(s)."))
+            self.stdout.write(self.style.SUCCESS(f"{result} in {result.seconds:.2f}s"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. Synced {len(results)} model(s); critical path {critical_path_seconds(results):.2f}s."
+            )
+        )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mds_client", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mdssyncstate",
+            name="resume_url",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mdssyncstate",
+            name="resume_cursor",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -1,8 +1,9 @@
 """Local bookkeeping for the mirror sync.
 
 Only ``MDSSyncState`` lives here — one small row per synced model holding the
-delta cursor (``cursor`` = the ``max(modified_on)`` we've pulled through) and the
-last collection ``etag`` (for cheap ``If-None-Match`` polling). The actual master
+delta cursor (``cursor`` = the ``max(modified_on)`` we've pulled through), the
+last collection ``etag`` (for cheap ``If-None-Match`` polling) and the page
+checkpoint of a streaming pull in progress. The actual master
 mirror tables belong to the consuming project (e.g. ``core.CompanyModel``); this
 package never owns them, it only advances the cursor and upserts into them.
 """
@@ -28,6 +29,15 @@ class MDSSyncState(models.Model):
     #: cursor for the change feed (deletes) — ``at`` of the last applied change.
     changes_cursor = models.CharField(max_length=64, blank=True, null=True)
 
+    #: streaming-sync checkpoint: the ``next`` URL of the first delta page not
+    #: yet applied. Set while a paged pull is in progress; an interrupted sync
+    #: resumes from here instead of re-downloading from ``cursor``.
+    resume_url = models.TextField(blank=True, null=True)
+
+    #: greatest modified_on applied by the in-progress stream; promoted to
+    #: ``cursor`` once its last page is applied.
+    resume_cursor = models.CharField(max_length=64, blank=True, null=True)
+
     last_synced_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -33,6 +33,7 @@ Optional tuning (sane defaults provided):
     MDS_TIMEOUT          = (connect, read) seconds tuple or a single float. Default (3.05, 30).
     MDS_MAX_RETRIES      = transient-failure retries for idempotent GETs. Default 3.
     MDS_BACKOFF_FACTOR   = exponential backoff base (seconds). Default 0.5.
+    MDS_SYNC_WORKERS     = models ``sync_all`` refreshes concurrently. Default 4.
 """
 
 from __future__ import annotations
@@ -44,6 +45,7 @@ from django.core.exceptions import ImproperlyConfigured
 DEFAULT_TIMEOUT = (3.05, 30)
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_SYNC_WORKERS = 4
 
 #: keys each MDS_MODELS entry must define.
 REQUIRED_MODEL_KEYS = ("endpoint", "natural_key", "mirror_model")
@@ -103,3 +105,7 @@ def get_max_retries() -> int:
 
 def get_backoff_factor() -> float:
     return float(getattr(settings, "MDS_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR))
+
+
+def get_sync_workers() -> int:
+    return max(1, int(getattr(settings, "MDS_SYNC_WORKERS", DEFAULT_SYNC_WORKERS)))
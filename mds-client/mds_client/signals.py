@@ -0,0 +1,16 @@
+"""
+Signals sent by the mirror sync.
+
+``mirror_rows_upserted`` — sent once per ``upsert_rows`` call that wrote rows.
+The mirror is written with ``bulk_create``/``bulk_update``, which send no
+per-row ``post_save``; a consumer that invalidates caches (or similar) on
+master saves should also listen here.
+
+    sender   : the mirror model class
+    created  : number of rows inserted
+    updated  : number of rows updated
+"""
+
+from django.dispatch import Signal
+
+mirror_rows_upserted = Signal()
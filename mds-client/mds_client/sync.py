@@ -5,7 +5,9 @@ Read (mirror refresh):
     sync_model(label)  — pull deltas for one model, upsert into its local mirror
                          by natural key, apply deletes from the change feed, and
                          advance the per-model cursor/etag in MDSSyncState.
-    sync_all()         — sync every model declared in settings.MDS_MODELS.
+    sync_all()         — sync every model declared in settings.MDS_MODELS,
+                         independent models concurrently (FK parents first).
+    Both stream delta pages by default (see sync_model's ``stream``).
 
 Write:
     write_master(label, row) — push one row to MDS via bulk_upsert. On
@@ -14,12 +16,22 @@ Write:
                          where an optional Celery outbox would enqueue for retry.
 
 Design notes:
-- Upserts run inside a transaction per model so a mid-page failure doesn't leave
-  a half-applied mirror or an advanced cursor.
+- Delta pages stream: each is upserted in its own transaction together with a
+  page checkpoint (``resume_url``), so memory holds one page and an interrupted
+  sync resumes mid-stream; the cursor itself only advances once the stream
+  completes. ``sync_model(..., stream=False)`` keeps the older mode of one
+  transaction per model.
+- Upserts are set-based: per batch, parent natural keys and existing mirror
+  keys are each looked up with one ``IN`` query, then rows are written with
+  ``bulk_create``/``bulk_update``.
 - The cursor is ``max(modified_on)`` observed in the pulled rows — robust even if
   MDS returns rows slightly out of order across pages.
 - Deletes come only from the change feed (an ``updated_since`` pull cannot see a
   vanished row); we apply ``op == "delete"`` by natural key.
+- ``sync_all`` schedules models over the FK DAG on a bounded thread pool: a
+  model starts once its parents are done, each worker thread has its own
+  client session and DB connection, and per-model timings plus the critical
+  path (slowest parent-to-child chain) are reported.
 - Mirror models are resolved lazily via ``apps.get_model`` so this package does
   not import the consumer's models at load time.
 """
@@ -27,15 +39,21 @@ Design notes:
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 
 from django.apps import apps as django_apps
+from django.core.exceptions import ValidationError
+from django.db import connections as db_connections
 from django.db import transaction
 from django.utils import timezone
 
 from . import settings as mds_settings
 from .client import MDSClient, MDSUnavailable
 from .models import MDSSyncState
+from .signals import mirror_rows_upserted
 
 logger = logging.getLogger("mds_client.sync")
 
@@ -43,6 +61,9 @@ logger = logging.getLogger("mds_client.sync")
 # The mirror keeps its own PK/timestamps; we copy business fields + natural key.
 _SKIP_FIELDS = {"id", "pk"}
 
+#: Rows per bulk write, and values per ``IN`` lookup, when upserting the mirror.
+UPSERT_BATCH_SIZE = 500
+
 
 @dataclass
 class SyncResult:
@@ -52,6 +73,10 @@ class SyncResult:
     updated: int = 0
     deleted: int = 0
     skipped_unchanged: bool = False
+    pages: int = 0
+    resumed: bool = False
+    seconds: float = 0.0
+    path_seconds: float = 0.0
 
     def __str__(self):
         if self.skipped_unchanged:
@@ -84,7 +109,50 @@ def _parent_natural_key_for(parent_model) -> str | None:
     return cfg.get("natural_key")
 
 
-def _clean_row(row: dict, natural_key: str, model) -> dict:
+def _fk_fields(model) -> dict:
+    """{field name: ForeignKey} for the mirror model's concrete many-to-one fields."""
+    return {
+        f.name: f for f in model._meta.get_fields()
+        if getattr(f, "concrete", False) and f.is_relation and f.many_to_one
+    }
+
+
+def _normalise_key(field, value):
+    """``value`` (as serialised by MDS) in the Python type ``field`` stores, so a
+    JSON string can be matched against values read back from the DB (UUIDs,
+    dates). Returns None for a value the field cannot parse."""
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        return None
+
+
+def _resolve_parent_keys(model, rows) -> dict:
+    """Pre-resolve every FK value in ``rows`` to the local parent pk.
+
+    Returns {fk name: {normalised parent natural key: parent pk}}, with one
+    ``IN`` query per FK (and per UPSERT_BATCH_SIZE values) instead of one
+    lookup per FK per row. FKs whose parent is not a configured mirror model
+    are left out; _clean_row warns about them."""
+    resolved = {}
+    for name, field in _fk_fields(model).items():
+        parent_model = field.related_model
+        parent_nk = _parent_natural_key_for(parent_model)
+        if parent_nk is None:
+            continue
+        key_field = parent_model._meta.get_field(parent_nk)
+        values = {_normalise_key(key_field, row[name]) for row in rows if row.get(name) not in (None, "")}
+        values.discard(None)
+        mapping = resolved[name] = {}
+        values = list(values)
+        for start in range(0, len(values), UPSERT_BATCH_SIZE):
+            chunk = values[start:start + UPSERT_BATCH_SIZE]
+            for key, pk in parent_model.objects.filter(**{f"{parent_nk}__in": chunk}).values_list(parent_nk, "pk"):
+                mapping.setdefault(key, pk)
+    return resolved
+
+
+def _clean_row(row: dict, natural_key: str, model, parent_ids: dict | None = None) -> dict:
     """Map a raw MDS row onto mirror-model fields, resolving FKs by natural key.
 
     - Keeps only fields that exist on the mirror model (tolerant of MDS adding
@@ -94,6 +162,9 @@ def _clean_row(row: dict, natural_key: str, model) -> dict:
       resolve it to the local parent instance and set ``<fk>_id``, because the
       parent's id in the consumer differs from its id in MDS. A missing parent
       leaves the FK unset (nullable) or raises for a required FK caller-side.
+
+    ``parent_ids`` is the batch's pre-resolved parent lookup from
+    _resolve_parent_keys; without it each FK is looked up individually.
     """
     concrete = [f for f in model._meta.get_fields() if getattr(f, "concrete", False)]
     fk_fields = {f.name: f for f in concrete if f.is_relation and f.many_to_one}
@@ -118,8 +189,13 @@ def _clean_row(row: dict, natural_key: str, model) -> dict:
                     model.__name__, key, parent_model.__name__,
                 )
                 continue
-            parent = parent_model.objects.filter(**{parent_nk: value}).first()
-            if parent is None:
+            if parent_ids is not None:
+                parent_key = _normalise_key(parent_model._meta.get_field(parent_nk), value)
+                parent_pk = parent_ids.get(key, {}).get(parent_key)
+            else:
+                parent = parent_model.objects.filter(**{parent_nk: value}).first()
+                parent_pk = parent.pk if parent is not None else None
+            if parent_pk is None:
                 logger.warning(
                     "Skipping FK %s.%s -> %s[%s=%r]: parent not in mirror yet",
                     model.__name__, key, parent_model.__name__, parent_nk, value,
@@ -127,35 +203,99 @@ def _clean_row(row: dict, natural_key: str, model) -> dict:
                 # leave FK unset; a required FK will surface as an IntegrityError
                 # in the caller's transaction (fail loud, never a wrong id).
                 continue
-            cleaned[field.attname] = parent.pk
+            cleaned[field.attname] = parent_pk
         elif key in field_names:
             cleaned[key] = value
-    # The natural key must always survive so update_or_create can match.
+    # The natural key must always survive so the upsert can match.
     if natural_key in row:
         cleaned[natural_key] = row[natural_key]
     return cleaned
 
 
+def _upsert_batch(model, natural_key: str, rows: list) -> tuple[int, int]:
+    """Write one batch of rows that all carry a natural key: one parent lookup
+    per FK, one lookup of the existing keys, then bulk_create + bulk_update."""
+    key_field = model._meta.get_field(natural_key)
+    parent_ids = _resolve_parent_keys(model, rows)
+
+    # Later rows for the same key win, field by field, as sequential
+    # update_or_create calls would have left them.
+    pending = {}
+    written = 0
+    for row in rows:
+        key = _normalise_key(key_field, row[natural_key])
+        if key is None:
+            logger.warning("Skipping %s row with invalid natural key '%s': %r", model.__name__, natural_key, row)
+            continue
+        written += 1
+        defaults = _clean_row(row, natural_key, model, parent_ids)
+        defaults.pop(natural_key, None)
+        pending.setdefault(key, {}).update(defaults)
+    if not pending:
+        return 0, 0
+
+    existing = {
+        getattr(obj, key_field.attname): obj
+        for obj in model.objects.filter(**{f"{natural_key}__in": list(pending)})
+    }
+
+    # bulk_update bypasses save(), so stamp auto_now fields the way it would.
+    auto_now = [f.attname for f in model._meta.concrete_fields if getattr(f, "auto_now", False)]
+    now = timezone.now()
+    to_create, to_update, update_fields = [], [], set(auto_now)
+    for key, defaults in pending.items():
+        obj = existing.get(key)
+        if obj is None:
+            to_create.append(model(**{key_field.attname: key}, **defaults))
+            continue
+        for attname, value in defaults.items():
+            setattr(obj, attname, value)
+        for attname in auto_now:
+            setattr(obj, attname, now)
+        update_fields.update(defaults)
+        to_update.append(obj)
+
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=UPSERT_BATCH_SIZE)
+    if to_update and update_fields:
+        names = {f.attname: f.name for f in model._meta.concrete_fields}
+        model.objects.bulk_update(
+            to_update, sorted(names[attname] for attname in update_fields), batch_size=UPSERT_BATCH_SIZE,
+        )
+
+    created = len(to_create)
+    return created, written - created
+
+
 def upsert_rows(model, natural_key: str, rows) -> tuple[int, int]:
     """Upsert an iterable of raw MDS rows into the mirror ``model`` by natural key.
 
+    Rows are written in batches of UPSERT_BATCH_SIZE (see _upsert_batch), so a
+    full hydration costs a handful of queries per batch rather than several
+    per row. Bulk writes skip ``save()`` and per-row signals, so once every
+    batch is written ``mirror_rows_upserted`` is sent once per call, with the
+    totals and only if anything changed, so the consumer can invalidate what
+    its post_save receivers would have.
+
     Returns (created, updated). Runs inside the caller's transaction.
     """
     created = updated = 0
+    batch = []
     for row in rows:
         key_value = row.get(natural_key)
         if key_value in (None, ""):
             logger.warning("Skipping %s row without natural key '%s': %r", model.__name__, natural_key, row)
             continue
-        defaults = _clean_row(row, natural_key, model)
-        defaults.pop(natural_key, None)  # goes in the lookup, not the defaults
-        _, was_created = model.objects.update_or_create(
-            **{natural_key: key_value}, defaults=defaults
-        )
-        if was_created:
-            created += 1
-        else:
-            updated += 1
+        batch.append(row)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            batch_created, batch_updated = _upsert_batch(model, natural_key, batch)
+            created, updated = created + batch_created, updated + batch_updated
+            batch = []
+    if batch:
+        batch_created, batch_updated = _upsert_batch(model, natural_key, batch)
+        created, updated = created + batch_created, updated + batch_updated
+    if created or updated:
+        mirror_rows_upserted.send(sender=model, created=created, updated=updated)
     return created, updated
 
 
@@ -166,12 +306,18 @@ def _max_modified(rows) -> str | None:
 
 
 # --- per-model sync ---------------------------------------------------------
-def sync_model(model_label: str, client: MDSClient | None = None) -> SyncResult:
+def sync_model(model_label: str, client: MDSClient | None = None, stream: bool = True) -> SyncResult:
     """Refresh the local mirror for one model from MDS.
 
     Steps: (1) load/create sync state, (2) ETag short-circuit via a delta pull
-    with If-None-Match, (3) upsert all delta pages by natural key, (4) apply
-    deletes from the change feed, (5) advance the cursor/etag transactionally.
+    with If-None-Match, (3) upsert the delta pages by natural key, (4) apply
+    deletes from the change feed, (5) advance the cursor/etag.
+
+    With ``stream`` (the default) each page is applied as it arrives in its own
+    transaction (a savepoint inside a caller's), followed by a page checkpoint
+    in MDSSyncState, so memory stays at one page and an interrupted sync
+    resumes mid-stream. ``stream=False`` downloads every page first and applies
+    them all in one transaction.
     """
     cfg = mds_settings.get_model_config(model_label)
     natural_key = cfg["natural_key"]
@@ -183,9 +329,11 @@ def sync_model(model_label: str, client: MDSClient | None = None) -> SyncResult:
     try:
         state, _ = MDSSyncState.objects.get_or_create(model_label=model_label)
 
-        # 1) Pull the delta as pages; ETag short-circuits an unchanged model.
-        first_page = client.fetch_delta(model_label, since=state.cursor, etag=state.etag)
-        if first_page.not_modified:
+        if stream:
+            changed = _stream_delta(model_label, mirror_model, natural_key, client, state, result)
+        else:
+            changed = _pull_delta(model_label, mirror_model, natural_key, client, state, result)
+        if not changed:
             result.skipped_unchanged = True
             # Still apply deletes: a delete doesn't move max(modified_on), so the
             # collection ETag can be unchanged while a row vanished.
@@ -194,28 +342,8 @@ def sync_model(model_label: str, client: MDSClient | None = None) -> SyncResult:
             state.save(update_fields=["changes_cursor", "last_synced_at", "updated_at"])
             return result
 
-        rows = list(first_page.results)
-        next_url = first_page.next_url
-        new_etag = first_page.etag
-        while next_url:
-            page = client.fetch_delta_url(next_url)
-            rows.extend(page.results)
-            next_url = page.next_url
-
-        # 2) Apply upserts + deletes + cursor advance in one transaction.
         with transaction.atomic():
-            created, updated = upsert_rows(mirror_model, natural_key, rows)
-            result.created, result.updated = created, updated
-            result.upserted = created + updated
-
-            deleted = _apply_deletes(model_label, mirror_model, natural_key, client, state)
-            result.deleted = deleted
-
-            new_cursor = _max_modified(rows)
-            if new_cursor:
-                state.cursor = new_cursor
-            if new_etag:
-                state.etag = new_etag
+            result.deleted = _apply_deletes(model_label, mirror_model, natural_key, client, state)
             state.touch()
             state.save()
 
@@ -226,25 +354,104 @@ def sync_model(model_label: str, client: MDSClient | None = None) -> SyncResult:
             client.close()
 
 
+def _pull_delta(model_label, mirror_model, natural_key, client, state, result) -> bool:
+    """Download every delta page, then upsert them and advance the cursor in one
+    transaction. Returns False when MDS answered 304."""
+    first_page = client.fetch_delta(model_label, since=state.cursor, etag=state.etag)
+    if first_page.not_modified:
+        return False
+
+    rows = list(first_page.results)
+    next_url = first_page.next_url
+    new_etag = first_page.etag
+    result.pages = 1
+    while next_url:
+        page = client.fetch_delta_url(next_url)
+        rows.extend(page.results)
+        next_url = page.next_url
+        result.pages += 1
+
+    with transaction.atomic():
+        result.created, result.updated = upsert_rows(mirror_model, natural_key, rows)
+        result.upserted = result.created + result.updated
+        new_cursor = _max_modified(rows)
+        if new_cursor:
+            state.cursor = new_cursor
+        if new_etag:
+            state.etag = new_etag
+        # This pull re-read everything past `cursor`; drop any stale checkpoint.
+        state.resume_url = state.resume_cursor = None
+        state.save()
+    return True
+
+
+def _stream_delta(model_label, mirror_model, natural_key, client, state, result) -> bool:
+    """Apply delta pages one at a time, checkpointing after each. Returns False
+    when MDS answered 304.
+
+    ``cursor`` only moves once the last page is applied: the pages are ordered
+    by (modified_on, id), so rows sharing the boundary timestamp could be
+    skipped by an ``updated_since`` restart. Mid-stream progress is kept in
+    ``resume_url`` (MDS's exact cursor position) and ``resume_cursor``."""
+    if state.resume_url:
+        result.resumed = True
+        new_etag = None  # a resumed stream never saw the first page's ETag
+        page = client.fetch_delta_url(state.resume_url)
+    else:
+        page = client.fetch_delta(model_label, since=state.cursor, etag=state.etag)
+        if page.not_modified:
+            return False
+        new_etag = page.etag
+        state.resume_cursor = None
+
+    while True:
+        with transaction.atomic():
+            created, updated = upsert_rows(mirror_model, natural_key, page.results)
+            result.created += created
+            result.updated += updated
+            result.upserted = result.created + result.updated
+            result.pages += 1
+
+            page_max = _max_modified(page.results)
+            if page_max and (state.resume_cursor is None or page_max > state.resume_cursor):
+                state.resume_cursor = page_max
+            if page.next_url:
+                state.resume_url = page.next_url
+            else:
+                if state.resume_cursor:
+                    state.cursor = state.resume_cursor
+                if new_etag or result.resumed:
+                    state.etag = new_etag
+                state.resume_url = state.resume_cursor = None
+            state.save(update_fields=["cursor", "etag", "resume_url", "resume_cursor", "updated_at"])
+        if not page.next_url:
+            return True
+        page = client.fetch_delta_url(page.next_url)
+
+
 def _apply_deletes(model_label, mirror_model, natural_key, client, state) -> int:
     """Apply ``op == 'delete'`` changes from the feed to the mirror by natural key,
-    advancing ``changes_cursor``. Returns the number of rows deleted."""
-    changes = client.get_changes(since=state.changes_cursor)
+    one feed page at a time, advancing and saving ``changes_cursor`` after each
+    page. Returns the number of rows deleted."""
+    mds_label = _mds_label_for(model_label)
     deleted = 0
-    max_at = state.changes_cursor
-    for change in changes:
-        at = change.get("at")
-        if at and (max_at is None or at > max_at):
-            max_at = at
-        # Only act on this model's deletes; other models are handled by their own sync.
-        if change.get("model_label") != _mds_label_for(model_label):
-            continue
-        if change.get("op") == "delete":
-            key_value = change.get("natural_key")
-            count, _ = mirror_model.objects.filter(**{natural_key: key_value}).delete()
-            deleted += count
-    if max_at:
-        state.changes_cursor = max_at
+    for page in client.iter_change_pages(since=state.changes_cursor):
+        max_at = state.changes_cursor
+        keys = []
+        for change in page.results:
+            at = change.get("at")
+            if at and (max_at is None or at > max_at):
+                max_at = at
+            # Only act on this model's deletes; other models are handled by their own sync.
+            if change.get("model_label") == mds_label and change.get("op") == "delete":
+                keys.append(change.get("natural_key"))
+        with transaction.atomic():
+            if keys:
+                count, _ = mirror_model.objects.filter(**{f"{natural_key}__in": keys}).delete()
+                deleted += count
+            if max_at:
+                state.changes_cursor = max_at
+            state.save(update_fields=["changes_cursor", "updated_at"])
     return deleted
 
 
@@ -260,21 +467,16 @@ def _mds_label_for(model_label: str) -> str:
 
 
 # --- sync everything --------------------------------------------------------
-def _ordered_model_labels() -> list[str]:
-    """Model labels in a PARENT-BEFORE-CHILD order for a clean fresh hydration.
+def _model_dependencies() -> dict[str, set[str]]:
+    """``label -> {parent labels}`` over the configured models.
 
-    A keyless child (e.g. core.SIONExportModel) resolves its FK to a parent
-    (core.SionNormClassModel) by the parent's natural key; that parent must
-    already be in the mirror. We topologically sort the configured models by
-    their mirror-model FK edges (only edges whose target is ALSO a configured
-    mirror model matter). Cycles / unknown parents fall back to declaration
-    order, so this never drops a model."""
+    An edge is a concrete FK on the label's mirror model whose target is ALSO a
+    configured mirror model; unresolvable mirrors are left dependency-free."""
     models = mds_settings.get_models()
-    labels = list(models)
 
     # Map mirror-model class -> its config label, to translate FK targets back.
     label_by_mirror = {}
-    deps = {label: set() for label in labels}
+    deps = {label: set() for label in models}
     for label, cfg in models.items():
         try:
             mirror = _resolve_mirror_model(cfg)
@@ -291,6 +493,20 @@ def _ordered_model_labels() -> list[str]:
                 parent_label = label_by_mirror.get(field.related_model)
                 if parent_label and parent_label != label:
                     deps[label].add(parent_label)
+    return deps
+
+
+def _ordered_model_labels(deps: dict[str, set[str]] | None = None) -> list[str]:
+    """Model labels in a PARENT-BEFORE-CHILD order for a clean fresh hydration.
+
+    A keyless child (e.g. core.SIONExportModel) resolves its FK to a parent
+    (core.SionNormClassModel) by the parent's natural key; that parent must
+    already be in the mirror. We topologically sort the configured models by
+    their mirror-model FK edges (see :func:`_model_dependencies`). Cycles /
+    unknown parents fall back to declaration order, so this never drops a
+    model."""
+    deps = _model_dependencies() if deps is None else deps
+    labels = list(deps)
 
     # Kahn's algorithm; stable on declaration order, tolerant of cycles.
     ordered, placed = [], set()
@@ -308,20 +524,78 @@ def _ordered_model_labels() -> list[str]:
     return ordered
 
 
-def sync_all(client: MDSClient | None = None) -> list[SyncResult]:
-    """Sync every model in settings.MDS_MODELS, parents before children. Reuses
-    one client/session.
+def _timed_sync(model_label: str, client: MDSClient, stream: bool) -> SyncResult:
+    """:func:`sync_model` with ``seconds`` filled in. ``path_seconds`` starts
+    as the model's own time; :func:`sync_all` extends it along the DAG."""
+    started = time.perf_counter()
+    result = sync_model(model_label, client=client, stream=stream)
+    result.seconds = result.path_seconds = round(time.perf_counter() - started, 3)
+    return result
+
+
+def critical_path_seconds(results: list[SyncResult]) -> float:
+    """Seconds along the slowest parent-to-child chain of a :func:`sync_all`
+    run — the wall time a run with enough workers cannot beat."""
+    return max((r.path_seconds for r in results), default=0.0)
+
+
+def sync_all(
+    client: MDSClient | None = None,
+    stream: bool = True,
+    max_workers: int | None = None,
+    client_factory=MDSClient,
+) -> list[SyncResult]:
+    """Sync every model in settings.MDS_MODELS, parents before children.
+
+    Models run concurrently on up to ``max_workers`` threads (default
+    ``MDS_SYNC_WORKERS``): each model starts as soon as all of its FK parents
+    have finished, so the run takes about as long as the slowest dependency
+    chain rather than the sum of all models. Every worker thread builds its own
+    client with ``client_factory`` (a ``requests.Session`` is not thread-safe)
+    and closes its DB connections after each model.
+
+    Passing ``client``, or ``max_workers=1``, runs the models one after another
+    in the calling thread on that single client/session.
+
+    Each result carries its ``seconds`` and ``path_seconds`` (the slowest chain
+    ending at that model); :func:`critical_path_seconds` gives the run's total.
 
     One model's failure does not abort the rest: MDSUnavailable stops the whole
-    run (the service is down); a per-model error is logged and skipped.
+    run (the service is down; models already running finish first); a
+    per-model error is logged and skipped.
     """
-    own_client = client is None
-    client = client or MDSClient()
-    results: list[SyncResult] = []
+    deps = _model_dependencies()
+    labels = _ordered_model_labels(deps)
+    workers = mds_settings.get_sync_workers() if max_workers is None else max_workers
+    started = time.perf_counter()
+
+    if client is not None or workers <= 1 or len(labels) <= 1:
+        results = _sync_serial(labels, client or client_factory(), client is None, stream)
+    else:
+        results = _sync_parallel(labels, deps, stream, workers, client_factory)
+
+    path = {}
+    for label in labels:  # parents first, so their chains are known
+        if label in results:
+            result = results[label]
+            result.path_seconds = round(
+                result.seconds + max((path.get(parent, 0.0) for parent in deps[label]), default=0.0), 3
+            )
+            path[label] = result.path_seconds
+    ordered = [results[label] for label in labels if label in results]
+    logger.info(
+        "mds sync_all: %d model(s) in %.3fs, critical path %.3fs",
+        len(ordered), time.perf_counter() - started, critical_path_seconds(ordered),
+    )
+    return ordered
+
+
+def _sync_serial(labels, client, own_client, stream) -> dict[str, SyncResult]:
+    results = {}
     try:
-        for model_label in _ordered_model_labels():
+        for model_label in labels:
             try:
-                results.append(sync_model(model_label, client=client))
+                results[model_label] = _timed_sync(model_label, client, stream)
             except MDSUnavailable:
                 raise  # service down — no point continuing
             except Exception:  # noqa: BLE001 - isolate one model's failure
@@ -332,6 +606,55 @@ def sync_all(client: MDSClient | None = None) -> list[SyncResult]:
             client.close()
 
 
+def _sync_parallel(labels, deps, stream, workers, client_factory) -> dict[str, SyncResult]:
+    local = threading.local()
+    clients, clients_lock = [], threading.Lock()
+
+    def run(model_label):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = client_factory()
+            with clients_lock:
+                clients.append(client)
+        try:
+            return _timed_sync(model_label, client, stream)
+        finally:
+            db_connections.close_all()  # this thread's connections only
+
+    results, done, running = {}, set(), {}
+    waiting = {label: deps[label] & set(labels) for label in labels}
+    unavailable = None
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mds-sync") as pool:
+            while waiting or running:
+                if unavailable is None:
+                    ready = [label for label in labels if label in waiting and waiting[label] <= done]
+                    if not ready and not running and waiting:
+                        # a dependency cycle: release its first model in declaration order
+                        ready = [next(label for label in labels if label in waiting)]
+                    for label in ready:
+                        del waiting[label]
+                        running[pool.submit(run, label)] = label
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    model_label = running.pop(future)
+                    done.add(model_label)  # a failed parent still releases its children
+                    try:
+                        results[model_label] = future.result()
+                    except MDSUnavailable as exc:
+                        unavailable = unavailable or exc  # service down — start nothing new
+                    except Exception:  # noqa: BLE001 - isolate one model's failure
+                        logger.exception("mds sync failed for %s", model_label)
+    finally:
+        for client in clients:
+            client.close()
+    if unavailable is not None:
+        raise unavailable
+    return results
+
+
 # --- write path -------------------------------------------------------------
 def write_master(model_label: str, row: dict, client: MDSClient | None = None) -> dict:
     """Write ONE master row to MDS (via bulk_upsert of a single-element list).
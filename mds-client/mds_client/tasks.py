@@ -40,9 +40,11 @@ def sync_masters():
     beat schedule and on webhook nudge. Returns a list of per-model summaries."""
     # Import here so the module loads even if Django/consumer settings aren't
     # ready at task-registration import time.
-    from .sync import sync_all
+    from .sync import critical_path_seconds, sync_all
 
     results = sync_all()
-    summaries = [str(r) for r in results]
-    logger.info("sync_masters complete: %s", summaries)
+    summaries = [f"{r} in {r.seconds:.2f}s" for r in results]
+    logger.info(
+        "sync_masters complete (critical path %.2fs): %s", critical_path_seconds(results), summaries
+    )
     return summaries
@@ -3,7 +3,7 @@
 Standalone test runner for mds_client.
 
 Runs the suite with Django's own test runner against ``tests.settings`` — no
-pytest, no live MDS, no real DB server required (in-memory SQLite):
+pytest, no live MDS, no real DB server required (a throwaway SQLite file):
 
     python runtests.py            # run everything
     python runtests.py tests.test_client   # a subset
@@ -1,10 +1,13 @@
 """
 Minimal Django settings for running the mds_client test suite.
 
-No live MDS and no real DB server needed — in-memory SQLite + a tiny local test
+No live MDS and no real DB server needed — a throwaway SQLite file + a tiny local test
 app (`tests.mirror_app`) that provides mirror models the sync path upserts into.
 """
 
+import os
+import tempfile
+
 SECRET_KEY = "test-secret-key-not-for-production"
 
 DEBUG = True
@@ -20,6 +23,11 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
+        # A file, not shared-cache memory, and IMMEDIATE transactions: sync_all's
+        # worker threads write concurrently, and this way they wait on SQLite's
+        # lock instead of failing with "database (table) is locked".
+        "TEST": {"NAME": os.path.join(tempfile.gettempdir(), "mds_client_tests.sqlite3")},
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
     }
 }
 
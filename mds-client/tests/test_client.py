@@ -159,6 +159,20 @@ class ChangeFeedTests(SimpleTestCase):
         self.assertEqual(len(changes), 2)
         self.assertEqual(changes[0]["op"], "delete")
 
+    def test_iter_changes_fetches_pages_lazily(self):
+        pages = iter([
+            make_response(json_body={"results": [{"op": "create"}], "next": BASE + "changes/?cursor=p2"}),
+            make_response(json_body={"results": [{"op": "delete"}], "next": None}),
+        ])
+        session = FakeSession(lambda method, url, **kwargs: next(pages))
+        client = MDSClient(base_url=BASE, token="tok", session=session)
+
+        changes = client.iter_changes()
+        self.assertEqual(next(changes)["op"], "create")
+        self.assertEqual(len(session.calls), 1)
+        self.assertEqual([c["op"] for c in changes], ["delete"])
+        self.assertEqual(len(session.calls), 2)
+
 
 class FailureModeTests(SimpleTestCase):
     def test_connection_error_raises_mds_unavailable(self):
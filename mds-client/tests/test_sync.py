@@ -3,13 +3,30 @@ short-circuit, change-feed delete application, and write_master degradation."""
 
 from __future__ import annotations
 
+import threading
+import time
+import uuid
+from io import StringIO
+from unittest import mock
+
 import requests
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 
 from mds_client.client import MDSClient, MDSUnavailable
 from mds_client.models import MDSSyncState
-from mds_client.sync import delete_master, sync_all, sync_model, write_master
-from tests.mirror_app.models import CompanyMirror, PortMirror
+from mds_client.signals import mirror_rows_upserted
+from mds_client.sync import (
+    critical_path_seconds,
+    delete_master,
+    sync_all,
+    sync_model,
+    upsert_rows,
+    write_master,
+)
+from tests.mirror_app.models import CompanyMirror, PortMirror, SionExportMirror
 from tests.support import FakeSession, make_response
 
 BASE = "https://masters.test.local/api/v1/"
@@ -156,6 +173,135 @@ class KeylessFKResolutionTests(TestCase):
         self.assertEqual(SionExportMirror.objects.count(), 0)
 
 
+class BulkUpsertTests(TestCase):
+    """upsert_rows writes per batch, not per row: parent keys and existing
+    mirror keys are each resolved with one IN query."""
+
+    def test_query_count_does_not_grow_with_rows(self):
+        from tests.mirror_app.models import NormClassMirror, SionExportMirror
+
+        e1 = NormClassMirror.objects.create(norm_class="E1")
+        e2 = NormClassMirror.objects.create(norm_class="E2")
+
+        def rows(n, offset):
+            return [
+                {"uid": str(uuid.UUID(int=offset + i)), "norm_class": "E1" if i % 2 else "E2", "description": f"r{i}"}
+                for i in range(n)
+            ]
+
+        SionExportMirror.objects.create(uid=uuid.UUID(int=1), norm_class=e1, description="old")
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(upsert_rows(SionExportMirror, "uid", rows(3, 0)), (2, 1))
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(upsert_rows(SionExportMirror, "uid", rows(40, 1000)), (40, 0))
+
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries) - 1)  # no bulk_update
+        updated = SionExportMirror.objects.get(uid=uuid.UUID(int=1))
+        self.assertEqual((updated.description, updated.norm_class_id), ("r1", e1.pk))
+        self.assertEqual(SionExportMirror.objects.filter(norm_class=e2).count(), 22)
+
+    def test_duplicate_keys_merge_and_signal_fires_once(self):
+        received = []
+
+        def on_upsert(sender, **kwargs):
+            received.append((sender, kwargs["created"], kwargs["updated"]))
+
+        mirror_rows_upserted.connect(on_upsert)
+        self.addCleanup(mirror_rows_upserted.disconnect, on_upsert)
+
+        created, updated = upsert_rows(CompanyMirror, "iec", [
+            {"iec": "AAA", "name": "Acme"},
+            {"iec": "AAA", "address": "Mumbai"},
+            {"iec": "", "name": "no key"},
+        ])
+
+        self.assertEqual((created, updated), (1, 1))
+        row = CompanyMirror.objects.get(iec="AAA")
+        self.assertEqual((row.name, row.address), ("Acme", "Mumbai"))
+        self.assertEqual(received, [(CompanyMirror, 1, 1)])
+
+
+class StreamingSyncTests(TestCase):
+    """Pages are applied as they arrive with a page checkpoint, so a sync cut
+    off mid-stream resumes from the next page instead of starting over."""
+
+    PAGE2 = BASE + "companies/?cursor=p2"
+
+    def _page1(self):
+        return make_response(
+            json_body={
+                "results": [{"iec": "AAA", "name": "Acme", "modified_on": "2026-07-01T10:00:00Z"}],
+                "next": self.PAGE2,
+            },
+            headers={"ETag": '"etag-v2"'},
+        )
+
+    def _page2(self):
+        return make_response(json_body={
+            "results": [{"iec": "BBB", "name": "Beta", "modified_on": "2026-07-02T10:00:00Z"}],
+            "next": None,
+        })
+
+    def test_interrupted_stream_resumes_from_checkpoint(self):
+        MDSSyncState.objects.create(model_label=COMPANY, cursor="2026-06-01T00:00:00Z")
+
+        def failing(method, url, **kwargs):
+            if "/changes/" in url:
+                return make_response(json_body={"results": [], "next": None})
+            if url == self.PAGE2:
+                return requests.ConnectionError("dropped")
+            return self._page1()
+
+        with self.assertRaises(MDSUnavailable):
+            sync_model(COMPANY, client=client_with(failing))
+
+        # page 1 is applied and checkpointed; the delta cursor has not moved.
+        self.assertTrue(CompanyMirror.objects.filter(iec="AAA").exists())
+        state = MDSSyncState.objects.get(model_label=COMPANY)
+        self.assertEqual(state.resume_url, self.PAGE2)
+        self.assertEqual(state.cursor, "2026-06-01T00:00:00Z")
+
+        requested = []
+
+        def resumed(method, url, **kwargs):
+            requested.append(url)
+            if "/changes/" in url:
+                return make_response(json_body={"results": [], "next": None})
+            return self._page2()
+
+        result = sync_model(COMPANY, client=client_with(resumed))
+
+        self.assertTrue(result.resumed)
+        self.assertEqual((result.created, result.pages), (1, 1))
+        self.assertEqual(requested[0], self.PAGE2)
+        state.refresh_from_db()
+        self.assertEqual(state.cursor, "2026-07-02T10:00:00Z")
+        self.assertIsNone(state.resume_url)
+        self.assertEqual(CompanyMirror.objects.count(), 2)
+
+    def test_change_feed_cursor_advances_per_page(self):
+        CompanyMirror.objects.create(iec="AAA", name="Acme")
+        MDSSyncState.objects.create(model_label=COMPANY, etag='"cur"')
+        first_page = {
+            "results": [{"model_label": COMPANY, "natural_key": "AAA", "op": "delete", "at": "2026-07-04T00:00:00Z"}],
+            "next": BASE + "changes/?cursor=c2",
+        }
+
+        def handler(method, url, **kwargs):
+            if url.endswith("changes/"):
+                return make_response(json_body=first_page)
+            if "cursor=c2" in url:
+                return requests.ConnectionError("dropped")
+            return make_response(status_code=304)
+
+        with self.assertRaises(MDSUnavailable):
+            sync_model(COMPANY, client=client_with(handler))
+
+        self.assertFalse(CompanyMirror.objects.filter(iec="AAA").exists())
+        state = MDSSyncState.objects.get(model_label=COMPANY)
+        self.assertEqual(state.changes_cursor, "2026-07-04T00:00:00Z")
+
+
 class ETagShortCircuitSyncTests(TestCase):
     def test_304_skips_upsert_but_still_applies_deletes(self):
         # Seed one row + prior state so we send If-None-Match.
@@ -220,6 +366,69 @@ class SyncAllTests(TestCase):
         self.assertEqual(PortMirror.objects.count(), 1)
 
 
+class ParallelSyncAllTests(TransactionTestCase):
+    """Worker threads use their own DB connections, which only see committed
+    rows — hence a TransactionTestCase."""
+
+    def test_children_wait_for_parents_and_workers_get_their_own_clients(self):
+        events, lock = [], threading.Lock()
+
+        def handler(method, url, **kwargs):
+            if "/changes/" in url:
+                return make_response(json_body={"results": [], "next": None})
+            endpoint = url.split("/api/v1/")[1].split("/")[0]
+            with lock:
+                events.append(("start", endpoint))
+            time.sleep(0.05)
+            rows = {
+                "sion-norm-classes": [{"norm_class": "E1", "modified_on": "2026-07-01T00:00:00Z"}],
+                "sion-exports": [{"uid": str(uuid.uuid4()), "norm_class": "E1", "modified_on": "2026-07-01T00:00:00Z"}],
+                "companies": [{"iec": "AAA", "name": "Acme", "modified_on": "2026-07-01T00:00:00Z"}],
+            }.get(endpoint, [])
+            with lock:
+                events.append(("end", endpoint))
+            return make_response(json_body={"results": rows, "next": None})
+
+        built = []
+
+        def factory():
+            built.append(client_with(handler))
+            return built[-1]
+
+        results = sync_all(max_workers=2, client_factory=factory)
+
+        by_label = {r.model_label: r for r in results}
+        self.assertEqual(len(results), 4)
+        self.assertLess(
+            [r.model_label for r in results].index("mirror_app.NormClassMirror"),
+            [r.model_label for r in results].index("mirror_app.SionExportMirror"),
+        )
+        self.assertLess(events.index(("end", "sion-norm-classes")), events.index(("start", "sion-exports")))
+        self.assertLessEqual(len(built), 2)
+        self.assertEqual(SionExportMirror.objects.get().norm_class.norm_class, "E1")
+        self.assertEqual(CompanyMirror.objects.count(), 1)
+
+        export, parent = by_label["mirror_app.SionExportMirror"], by_label["mirror_app.NormClassMirror"]
+        self.assertGreater(export.seconds, 0)
+        self.assertAlmostEqual(export.path_seconds, export.seconds + parent.path_seconds, places=2)
+        self.assertEqual(critical_path_seconds(results), max(r.path_seconds for r in results))
+
+
+class SyncCommandTests(TestCase):
+    def test_single_model_run_reports_its_real_time(self):
+        def handler(method, url, **kwargs):
+            time.sleep(0.02)
+            return make_response(json_body={"results": [], "next": None})
+
+        out = StringIO()
+        with mock.patch("mds_client.management.commands.mds_sync.MDSClient", return_value=client_with(handler)):
+            call_command("mds_sync", "--model", COMPANY, stdout=out)
+
+        output = out.getvalue()
+        self.assertNotIn("in 0.00s", output)
+        self.assertNotIn("critical path 0.00s", output)
+
+
 class WriteMasterTests(TestCase):
     def test_write_master_calls_bulk_upsert(self):
         captured = {}